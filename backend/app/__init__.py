@@ -4,23 +4,30 @@ BaraCorrespondance AI - Application Factory
 ================================================================
 """
 
+import hmac
 import os
-from flask import Flask, jsonify
+import time
+from flask import Flask, abort, jsonify, request
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from flask_migrate import Migrate
 from flask_jwt_extended import JWTManager
 from flask_cors import CORS
 from flask_marshmallow import Marshmallow
+from flask_socketio import SocketIO
 
 from app.config import config
+from app.utils.db_routing import RoutingSession, init_db_routing, latency_sensitive
+from app.utils.db_pool import init_db_pool, pool_status
 from flask_mail import Mail
 
 # Extensions
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 migrate = Migrate()
 jwt = JWTManager()
 ma = Marshmallow()
 mail = Mail()
+socketio = SocketIO()
 
 
 def create_app(config_name=None):
@@ -32,28 +39,76 @@ def create_app(config_name=None):
     app = Flask(__name__)
     app.config.from_object(config[config_name])
     
+    # Encodeur JSON rapide (orjson) si disponible
+    from app.utils.json_provider import init_json_provider
+    init_json_provider(app)
+    
+    cors_origins = ["http://localhost:3000", "http://localhost:5173", "http://127.0.0.1:3000", "http://127.0.0.1:5000"]
+    
     # CORS FIRST - must be before other extensions
     CORS(app, resources={
         r"/api/*": {
-            "origins": ["http://localhost:3000", "http://localhost:5173", "http://127.0.0.1:3000", "http://127.0.0.1:5000"],
+            "origins": cors_origins,
             "methods": ["GET", "POST", "PUT", "DELETE", "PATCH", "OPTIONS"],
-            "allow_headers": ["Content-Type", "Authorization"],
-            "expose_headers": ["Content-Type", "Authorization"],
+            "allow_headers": ["Content-Type", "Authorization", "Upload-Offset"],
+            "expose_headers": ["Content-Type", "Authorization", "Upload-Offset", "Upload-Length"],
             "supports_credentials": True,
             "max_age": 3600
         }
     })
     
-    # Initialiser les extensions
+    # Initialiser les extensions (réplicas et pools déclarés avant la base)
+    init_db_routing(app)
+    init_db_pool(app)
     db.init_app(app)
     migrate.init_app(app, db)
     jwt.init_app(app)
     ma.init_app(app)
     mail.init_app(app)
+    socketio.init_app(
+        app,
+        cors_allowed_origins=cors_origins,
+        message_queue=app.config.get('SOCKETIO_MESSAGE_QUEUE')
+    )
+    
+    # Compteurs à écriture différée
+    from app.services.counter_service import counter_buffer
+    counter_buffer.init_app(app)
+    
+    # File d'envoi d'emails
+    from app.services.email_queue import email_queue
+    email_queue.init_app(app)
+    
+    # Stockage des fichiers
+    from app.services.blob_store import blob_store
+    blob_store.init_app(app)
+    
+    # Uploads reprenables (CV par morceaux)
+    from app.services.resumable_uploads import resumable_uploads
+    resumable_uploads.init_app(app)
+    
+    # Déclinaisons d'images
+    from app.services.image_derivatives import image_derivatives
+    image_derivatives.init_app(app)
+    
+    # Vocabulaire de compétences (synonymes)
+    from app.services.skill_vocabulary import skill_vocabulary
+    skill_vocabulary.init_app(app)
+    
+    # Instantané de matching partagé (mmap, après le vocabulaire)
+    from app.services.matching_snapshot import matching_snapshot
+    matching_snapshot.init_app(app)
+    
+    # Tâches de maintenance planifiées
+    from app.services.scheduler import scheduler
+    scheduler.init_app(app)
     
     # Enregistrer les blueprints (routes)
     register_blueprints(app)
     
+    # Enregistrer les événements temps réel (Socket.IO)
+    from app.routes import realtime  # noqa: F401
+    
     # Enregistrer les gestionnaires d'erreurs
     register_error_handlers(app)
     
@@ -72,6 +127,43 @@ def create_app(config_name=None):
             'version': '1.0.0'
         })
     
+    # Disponibilité de chaque base (répartiteur de charge)
+    @app.route('/api/health/ready')
+    @latency_sensitive
+    def readiness_check():
+        from sqlalchemy import text
+
+        databases = {}
+        for key, engine in db.engines.items():
+            started = time.perf_counter()
+            try:
+                with engine.connect() as connection:
+                    connection.execute(text('SELECT 1'))
+                databases[key or 'default'] = {'ok': True, 'ms': round((time.perf_counter() - started) * 1000, 1)}
+            except Exception as e:
+                databases[key or 'default'] = {'ok': False, 'error': type(e).__name__}
+        ready = all(entry['ok'] for entry in databases.values())
+        return jsonify({'status': 'ready' if ready else 'unavailable', 'databases': databases}), 200 if ready else 503
+    
+    # Saturation des pools et files de travail
+    @app.route('/api/metrics')
+    def metrics():
+        token = app.config.get('METRICS_TOKEN')
+        if not token:
+            # Non exposé sans jeton configuré
+            abort(404)
+        if not hmac.compare_digest(request.headers.get('X-Metrics-Token', ''), token):
+            return jsonify({'success': False, 'message': 'Jeton de métriques invalide'}), 403
+        from app.services.email_queue import email_queue
+        from app.services.matching_snapshot import matching_snapshot
+        from app.services.scheduler import scheduler
+        return jsonify({
+            'database': pool_status(db.engines),
+            'email_queue': email_queue.stats(),
+            'matching_snapshot': matching_snapshot.stats(),
+            'scheduler': scheduler.stats(),
+        })
+    
     @app.route('/')
     def index():
         return jsonify({
@@ -173,6 +265,15 @@ def register_error_handlers(app):
             'error': 'Internal Server Error',
             'message': 'Erreur interne du serveur'
         }), 500
+    
+    @app.errorhandler(PoolTimeoutError)
+    def database_saturated(error):
+        # Pool de connexions épuisé (voir /api/metrics): réessayer plus tard
+        return jsonify({
+            'success': False,
+            'error': 'Service Unavailable',
+            'message': 'Service momentanément saturé, réessayez'
+        }), 503, {'Retry-After': '2'}
 
 
 def register_jwt_callbacks(app):
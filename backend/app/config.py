@@ -24,6 +24,35 @@ class Config:
     )
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     SQLALCHEMY_ECHO = False
+    # Réplicas de lecture (routes et services @read_only), séparés par des virgules
+    # ex. local: 'sqlite:///replica.db' (copie du primaire) ou un second Postgres
+    SQLALCHEMY_REPLICA_URIS = [uri.strip() for uri in os.getenv('DATABASE_REPLICA_URLS', '').split(',') if uri.strip()]
+    DB_REPLICA_STICKY_SECONDS = int(os.getenv('DB_REPLICA_STICKY_SECONDS', 10))  # lectures sur le primaire après une écriture
+
+    # Pool de connexions (ignoré par SQLite en mémoire), voir /api/metrics
+    # Connexions max = workers gunicorn x (DB_POOL_SIZE + DB_MAX_OVERFLOW
+    # + DB_FAST_POOL_SIZE + DB_FAST_MAX_OVERFLOW), + réplicas: à garder
+    # sous max_connections de la base (Procfile: 4 workers synchrones, plus
+    # le service temps réel de render.yaml)
+    DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 5))
+    DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', 5))  # connexions temporaires au-delà du pool
+    DB_POOL_TIMEOUT = int(os.getenv('DB_POOL_TIMEOUT', 10))  # secondes d'attente max d'une connexion
+    DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', 1800))  # secondes avant renouvellement d'une connexion
+    DB_POOL_PRE_PING = os.getenv('DB_POOL_PRE_PING', 'true').lower() == 'true'  # connexions mortes détectées avant usage
+    DB_STATEMENT_TIMEOUT_MS = int(os.getenv('DB_STATEMENT_TIMEOUT_MS', 30000))  # requêtes HTTP uniquement (PostgreSQL/MySQL), 0 = aucun
+    DB_POOL_SLOW_WAIT_MS = int(os.getenv('DB_POOL_SLOW_WAIT_MS', 100))  # attente comptée comme lente
+
+    # Pool interactif (routes @latency_sensitive), 0 = désactivé
+    DB_FAST_POOL_SIZE = int(os.getenv('DB_FAST_POOL_SIZE', 3))
+    DB_FAST_MAX_OVERFLOW = int(os.getenv('DB_FAST_MAX_OVERFLOW', 2))
+    DB_FAST_POOL_TIMEOUT = int(os.getenv('DB_FAST_POOL_TIMEOUT', 2))
+    DB_FAST_STATEMENT_TIMEOUT_MS = int(os.getenv('DB_FAST_STATEMENT_TIMEOUT_MS', 5000))
+
+    # Métriques (/api/metrics): jeton exigé (en-tête X-Metrics-Token), 404 si non défini
+    METRICS_TOKEN = os.getenv('METRICS_TOKEN')
+    
+    # Réponses JSON
+    JSON_USE_ORJSON = os.getenv('JSON_USE_ORJSON', 'true').lower() == 'true'  # Encodeur orjson si installé
     
     # JWT
     JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY', 'jwt-secret-change-in-production')
@@ -36,12 +65,86 @@ class Config:
     # Upload de fichiers
     UPLOAD_FOLDER = os.getenv('UPLOAD_FOLDER', 'app/static/uploads')
     MAX_CONTENT_LENGTH = int(os.getenv('MAX_CONTENT_LENGTH', 10 * 1024 * 1024))  # 10 MB
+    
+    # Stockage des fichiers (adressé par contenu)
+    BLOB_BACKEND = os.getenv('BLOB_BACKEND', 'local')  # local ou s3
+    BLOB_LOCAL_ROOT = os.getenv('BLOB_LOCAL_ROOT')  # défaut: UPLOAD_FOLDER/blobs
+    BLOB_S3_BUCKET = os.getenv('BLOB_S3_BUCKET')
+    BLOB_S3_PREFIX = os.getenv('BLOB_S3_PREFIX', 'blobs/')
+    BLOB_S3_ENDPOINT_URL = os.getenv('BLOB_S3_ENDPOINT_URL')  # MinIO, LocalStack, serveur moto...
+    BLOB_S3_REGION = os.getenv('BLOB_S3_REGION')
+    BLOB_GC_GRACE = int(os.getenv('BLOB_GC_GRACE', 86400))  # secondes avant suppression d'un blob libéré
+    BLOB_S3_REDIRECT = os.getenv('BLOB_S3_REDIRECT', 'true').lower() == 'true'  # URL pré-signée plutôt que flux
+    BLOB_S3_URL_EXPIRES = int(os.getenv('BLOB_S3_URL_EXPIRES', 3600))  # validité des URLs pré-signées
+    
+    # Diffusion des fichiers par le proxy frontal
+    UPLOADS_OFFLOAD = os.getenv('UPLOADS_OFFLOAD', '')  # '', x-accel (nginx) ou x-sendfile (Apache, lighttpd)
+    UPLOADS_ACCEL_PREFIX = os.getenv('UPLOADS_ACCEL_PREFIX', '/_protected/uploads/')  # location internal -> UPLOAD_FOLDER
+    BLOB_ACCEL_PREFIX = os.getenv('BLOB_ACCEL_PREFIX', '/_protected/blobs/')  # location internal -> racine des blobs
+    UPLOADS_CACHE_MAX_AGE = int(os.getenv('UPLOADS_CACHE_MAX_AGE', 3600))  # anciens fichiers (non adressés par contenu)
+    
+    # Uploads reprenables (CV envoyés par morceaux)
+    UPLOAD_SESSIONS_FOLDER = os.getenv('UPLOAD_SESSIONS_FOLDER')  # défaut: UPLOAD_FOLDER/.sessions (volume partagé)
+    UPLOAD_CHUNK_SIZE = int(os.getenv('UPLOAD_CHUNK_SIZE', 1024 * 1024))  # taille de morceau conseillée au client
+    UPLOAD_SESSION_TTL = int(os.getenv('UPLOAD_SESSION_TTL', 86400))  # secondes avant expiration d'un upload
+    
+    # Déclinaisons d'images (avatars, logos, affiches)
+    IMAGE_WORKERS = int(os.getenv('IMAGE_WORKERS', 2))  # threads de redimensionnement
+    IMAGE_QUALITY = int(os.getenv('IMAGE_QUALITY', 80))  # qualité WebP/JPEG
+    IMAGE_MAX_PIXELS = int(os.getenv('IMAGE_MAX_PIXELS', 40_000_000))  # refus des images démesurées (bombes)
+    IMAGE_DERIVATIVES_ASYNC = os.getenv('IMAGE_DERIVATIVES_ASYNC', 'true').lower() == 'true'
     ALLOWED_CV_EXTENSIONS = {'pdf', 'doc', 'docx'}
     ALLOWED_IMAGE_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
     
+    # Temps réel (Socket.IO)
+    REALTIME_ENABLED = os.getenv('REALTIME_ENABLED', 'true').lower() == 'true'
+    # File partagée (ex: redis://...): les workers de l'API émettent, le
+    # service temps réel (un worker à threads, render.yaml) tient les WebSocket
+    SOCKETIO_MESSAGE_QUEUE = os.getenv('SOCKETIO_MESSAGE_QUEUE')
+    
+    # Compteurs à écriture différée (vues, "utile", candidatures)
+    COUNTER_FLUSH_INTERVAL = int(os.getenv('COUNTER_FLUSH_INTERVAL', 10))  # secondes, 0 = immédiat
+    COUNTER_FLUSH_THRESHOLD = int(os.getenv('COUNTER_FLUSH_THRESHOLD', 1000))  # lignes en attente
+    COUNTER_HISTORY_DAYS = int(os.getenv('COUNTER_HISTORY_DAYS', 35))  # incréments quotidiens conservés (récapitulatifs)
+    
     # Analyse CV
     CV_ANALYSIS_LIMIT_FREE = 3  # Analyses gratuites par mois
     MATCHING_THRESHOLD = 60  # Score minimum pour notification (%)
+    
+    # Similarité sémantique TF-IDF (matching automatique)
+    # Index appris hors requête (flask build-tfidf-index ou tâche refit-tfidf-index)
+    TFIDF_WEIGHT = float(os.getenv('TFIDF_WEIGHT', 0))  # Part du score global, 0 = désactivé (à valider avant activation)
+    TFIDF_INDEX_PATH = os.getenv('TFIDF_INDEX_PATH', 'instance/tfidf-index.pkl')  # fichier local à l'hôte
+    TFIDF_REFIT_INTERVAL = int(os.getenv('TFIDF_REFIT_INTERVAL', 3600))  # secondes entre deux apprentissages, 0 = jamais
+    TFIDF_MAX_FEATURES = int(os.getenv('TFIDF_MAX_FEATURES', 50000))  # taille max du vocabulaire
+
+    # Matching réparti (find_matches_for_job sur les grands viviers)
+    MATCHING_SHARDS = int(os.getenv('MATCHING_SHARDS', 0))  # shards (processus ou nœuds), 0/1 = désactivé
+    MATCHING_SHARD_NODES = os.getenv('MATCHING_SHARD_NODES')  # 'hôte:port,...' (sinon pool de processus local)
+    MATCHING_SHARD_AUTHKEY = os.getenv('MATCHING_SHARD_AUTHKEY')  # secret partagé des nœuds, obligatoire avec MATCHING_SHARD_NODES
+
+    # Instantané de matching partagé entre workers (flask build-matching-snapshot)
+    MATCHING_SNAPSHOT_DIR = os.getenv('MATCHING_SNAPSHOT_DIR')  # dossier local à l'hôte, vide = désactivé
+    MATCHING_SNAPSHOT_DELTA_INTERVAL = int(os.getenv('MATCHING_SNAPSHOT_DELTA_INTERVAL', 5))  # secondes entre deux lectures du journal
+    MATCHING_SNAPSHOT_KEEP = int(os.getenv('MATCHING_SNAPSHOT_KEEP', 2))  # instantanés conservés sur disque
+    MATCHING_SNAPSHOT_BUILD_ON_START = os.getenv('MATCHING_SNAPSHOT_BUILD_ON_START', 'false').lower() == 'true'  # construire si absent (gunicorn --preload)
+    CANDIDATE_REMOVAL_RETENTION_DAYS = int(os.getenv('CANDIDATE_REMOVAL_RETENTION_DAYS', 7))  # suppressions gardées pour le journal (> âge des instantanés)
+
+    # Vocabulaire de compétences (synonymes)
+    SKILL_SYNONYMS_FILE = os.getenv('SKILL_SYNONYMS_FILE')  # JSON {nom canonique: [variantes]}
+    SKILL_VOCABULARY_CHECK_INTERVAL = int(os.getenv('SKILL_VOCABULARY_CHECK_INTERVAL', 60))  # secondes, 0 = jamais relu
+    SKILL_VOCABULARY_MAX_IDS = int(os.getenv('SKILL_VOCABULARY_MAX_IDS', 4096))  # compétences internées avant compactage des identifiants
+
+    # Planificateur de tâches de maintenance (flask list-tasks / run-task)
+    SCHEDULER_ENABLED = os.getenv('SCHEDULER_ENABLED', 'false').lower() == 'true'  # thread de planification dans chaque worker
+    SCHEDULER_TICK_SECONDS = int(os.getenv('SCHEDULER_TICK_SECONDS', 15))  # secondes entre deux consultations des échéances
+    SCHEDULER_HISTORY_DAYS = int(os.getenv('SCHEDULER_HISTORY_DAYS', 30))  # historique des exécutions conservé
+    WEEKLY_DIGEST_CRON = os.getenv('WEEKLY_DIGEST_CRON', '0 8 * * 1')  # UTC (lundi 8h), vide = désactivé
+    NOTIFICATION_RETENTION_DAYS = int(os.getenv('NOTIFICATION_RETENTION_DAYS', 90))  # notifications lues supprimées après
+    MATCHING_SNAPSHOT_REBUILD_INTERVAL = int(os.getenv('MATCHING_SNAPSHOT_REBUILD_INTERVAL', 3600))  # secondes, 0 = jamais
+
+    # Démarrage (flask check-startup)
+    STARTUP_BUDGET_MS = int(os.getenv('STARTUP_BUDGET_MS', 2500))  # durée max de create_app()
 
     # Google Gemini API (Gratuit et performant)
     GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
@@ -53,29 +156,50 @@ class Config:
     # Email
     MAIL_SERVER = os.getenv('MAIL_SERVER', 'smtp.gmail.com')
     MAIL_PORT = int(os.getenv('MAIL_PORT', 587))
-    MAIL_USE_TLS = True
+    MAIL_USE_TLS = os.getenv('MAIL_USE_TLS', 'true').lower() == 'true'
+    MAIL_USE_SSL = os.getenv('MAIL_USE_SSL', 'false').lower() == 'true'
     MAIL_USERNAME = os.getenv('MAIL_USERNAME')
     MAIL_PASSWORD = os.getenv('MAIL_PASSWORD')
     MAIL_DEFAULT_SENDER = os.getenv('MAIL_DEFAULT_SENDER', 'noreply@baracorrespondance.com')
+    MAIL_MAX_EMAILS = int(os.getenv('MAIL_MAX_EMAILS', 100)) or None  # Envois par connexion SMTP
+    
+    # File d'envoi d'emails
+    MAIL_WORKERS = int(os.getenv('MAIL_WORKERS', 2))  # Connexions SMTP simultanées par processus
+    MAIL_QUEUE_SIZE = int(os.getenv('MAIL_QUEUE_SIZE', 1000))
+    MAIL_ENQUEUE_TIMEOUT = float(os.getenv('MAIL_ENQUEUE_TIMEOUT', 5))  # secondes avant rejet
+    MAIL_IDLE_TIMEOUT = float(os.getenv('MAIL_IDLE_TIMEOUT', 5))  # fermeture de la connexion inactive
+    MAIL_MAX_RETRIES = int(os.getenv('MAIL_MAX_RETRIES', 3))
+    MAIL_RETRY_BACKOFF = float(os.getenv('MAIL_RETRY_BACKOFF', 2))  # secondes, doublé à chaque essai
 
 
 class DevelopmentConfig(Config):
     """Configuration pour le développement"""
     DEBUG = True
     SQLALCHEMY_ECHO = True
+    DB_STATEMENT_TIMEOUT_MS = int(os.getenv('DB_STATEMENT_TIMEOUT_MS', 0))  # pas de coupure en débogage
 
 
 class TestingConfig(Config):
     """Configuration pour les tests"""
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    SQLALCHEMY_REPLICA_URIS = []
+    DB_FAST_POOL_SIZE = 0
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(minutes=5)
+    COUNTER_FLUSH_INTERVAL = 0  # Écriture immédiate des compteurs
+    IMAGE_DERIVATIVES_ASYNC = False  # Déclinaisons générées pendant la requête
 
 
 class ProductionConfig(Config):
     """Configuration pour la production"""
     DEBUG = False
     # En production, utilisez des variables d'environnement!
+    # 13 connexions par worker synchrone (5 + 3 + 3 + 2, une requête à la fois
+    # plus les threads de fond): 4 workers et le service temps réel (25)
+    # tiennent sous la limite de PostgreSQL Render gratuit avec la commande release
+    DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 5))
+    DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', 3))
+    DB_POOL_TIMEOUT = int(os.getenv('DB_POOL_TIMEOUT', 5))
     
 
 # Dictionnaire de configuration
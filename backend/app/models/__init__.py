@@ -17,6 +17,12 @@ from app.models.message import Message
 from app.models.favorite import Favorite
 from app.models.review import Review
 from app.models.skill_test import SkillTest, TestResult
+from app.models.similarity import SimilarityBucket
+from app.models.blob import Blob
+from app.models.upload_session import UploadSession
+from app.models.scheduled_task import ScheduledTask, TaskRun
+from app.models.counter_day import CounterDay
+from app.models.candidate_removal import CandidateRemoval
 
 __all__ = [
     'User',
@@ -33,5 +39,12 @@ __all__ = [
     'Favorite',
     'Review',
     'SkillTest',
-    'TestResult'
+    'TestResult',
+    'SimilarityBucket',
+    'Blob',
+    'UploadSession',
+    'ScheduledTask',
+    'TaskRun',
+    'CounterDay',
+    'CandidateRemoval'
 ]
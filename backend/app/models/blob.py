@@ -0,0 +1,157 @@
+"""
+================================================================
+Modèle Blob - Fichiers adressés par contenu
+================================================================
+Un blob par contenu distinct (SHA-256), quel que soit le nombre
+d'utilisateurs, de CV ou d'affiches qui le référencent. Le compteur
+de références est tenu à jour à l'écriture des colonnes d'URL
+(BLOB_REFERENCES); les blobs sans référence sont supprimés par
+`flask gc-blobs` après un délai de grâce.
+"""
+
+import re
+from datetime import datetime
+
+from sqlalchemy import event, inspect, insert, update
+from sqlalchemy.orm.base import NO_VALUE
+
+from app import db
+from app.models.user import User
+from app.models.company import Company
+from app.models.candidate import Candidate
+from app.models.cv_analysis import CVAnalysis
+from app.models.poster import Poster
+
+# URL publique d'un blob: /uploads/blobs/<sha256>[.ext]
+BLOB_URL_PREFIX = '/uploads/blobs/'
+_BLOB_URL = re.compile(r'^/uploads/blobs/([0-9a-f]{64})(\.[A-Za-z0-9]{1,10})?$')
+
+# Colonnes contenant une URL de fichier, ou un dict d'URLs (comptées comme références)
+BLOB_REFERENCES = (
+    (User, 'avatar_url'),
+    (User, 'avatar_variants'),
+    (Company, 'logo_url'),
+    (Company, 'logo_variants'),
+    (Candidate, 'cv_url'),
+    (CVAnalysis, 'file_url'),
+    (Poster, 'file_path'),
+    (Poster, 'thumbnail_variants'),
+)
+
+
+def blob_url(key, extension=''):
+    """URL publique d'un blob"""
+    return f'{BLOB_URL_PREFIX}{key}{extension or ""}'
+
+
+def blob_key(url):
+    """Clé (SHA-256) d'une URL de blob, None pour un autre chemin"""
+    match = _BLOB_URL.match(url) if isinstance(url, str) else None
+    return match.group(1) if match else None
+
+
+class Blob(db.Model):
+    """Contenu stocké une seule fois, référencé par plusieurs enregistrements"""
+
+    __tablename__ = 'blobs'
+
+    id = db.Column(db.Integer, primary_key=True)
+    hash = db.Column(db.String(64), unique=True, nullable=False, index=True)
+    size = db.Column(db.BigInteger, default=0)
+    content_type = db.Column(db.String(100))
+    ref_count = db.Column(db.Integer, default=0, nullable=False)
+
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)  # dernier enregistrement ou libération
+
+    @classmethod
+    def register(cls, connection, key, size, content_type=None):
+        """
+        Créer la ligne d'un blob, ou rafraîchir sa date (dans la transaction en cours)
+
+        La date rafraîchie protège le blob du nettoyage: un blob libéré
+        n'est supprimé que si updated_at est antérieur au délai de grâce.
+        """
+        table = cls.__table__
+        now = datetime.utcnow()
+        row = {'hash': key, 'size': size, 'content_type': content_type,
+               'ref_count': 0, 'created_at': now, 'updated_at': now}
+
+        dialect = connection.dialect.name
+        if dialect in ('postgresql', 'sqlite'):
+            if dialect == 'postgresql':
+                from sqlalchemy.dialects.postgresql import insert as upsert
+            else:
+                from sqlalchemy.dialects.sqlite import insert as upsert
+            connection.execute(upsert(table).values(row).on_conflict_do_update(
+                index_elements=[table.c.hash], set_={'updated_at': now}
+            ))
+            return
+
+        # Autres bases: mise à jour, puis insertion si absente
+        updated = connection.execute(update(table).where(table.c.hash == key).values(updated_at=now))
+        if not updated.rowcount:
+            connection.execute(insert(table), row)
+
+    def to_dict(self):
+        """Sérialiser le blob en dictionnaire"""
+        return {
+            'hash': self.hash,
+            'size': self.size,
+            'content_type': self.content_type,
+            'ref_count': self.ref_count,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+
+    def __repr__(self):
+        return f'<Blob {self.hash[:12]} refs={self.ref_count}>'
+
+
+# ================================================================
+# COMPTAGE DES RÉFÉRENCES
+# ================================================================
+
+def _adjust(connection, value, delta):
+    """Ajouter delta au compteur des blobs désignés par une URL ou un dict d'URLs"""
+    urls = value.values() if isinstance(value, dict) else (value,)
+    table = Blob.__table__
+    for url in urls:
+        key = blob_key(url)
+        if key is None:
+            continue
+        connection.execute(
+            update(table)
+            .where(table.c.hash == key)
+            .values(ref_count=table.c.ref_count + delta, updated_at=datetime.utcnow())
+        )
+
+
+def _track(model, attribute):
+    """Compter les références d'une colonne d'URL"""
+
+    # Ancienne valeur chargée avant modification (nécessaire à l'historique)
+    @event.listens_for(getattr(model, attribute), 'set', active_history=True)
+    def _load_previous(target, value, oldvalue, initiator):
+        pass
+
+    @event.listens_for(model, 'after_insert')
+    def _retain(mapper, connection, target):
+        _adjust(connection, getattr(target, attribute), 1)
+
+    @event.listens_for(model, 'after_update')
+    def _swap(mapper, connection, target):
+        history = inspect(target).attrs[attribute].history
+        for url in history.deleted or ():
+            _adjust(connection, url, -1)
+        for url in history.added or ():
+            _adjust(connection, url, 1)
+
+    @event.listens_for(model, 'after_delete')
+    def _release(mapper, connection, target):
+        url = inspect(target).attrs[attribute].loaded_value
+        if url is not NO_VALUE:
+            _adjust(connection, url, -1)
+
+
+for _model, _attribute in BLOB_REFERENCES:
+    _track(_model, _attribute)
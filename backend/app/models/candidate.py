@@ -5,6 +5,7 @@ Modèle Candidate - Profil des candidats/chercheurs d'emploi
 """
 
 from datetime import datetime
+from sqlalchemy.orm import joinedload
 from app import db
 
 
@@ -97,7 +98,7 @@ class Candidate(db.Model):
     
     # Timestamps
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
     
     # Relations
     cv_analyses = db.relationship('CVAnalysis', backref='candidate', cascade='all, delete-orphan')
@@ -119,6 +120,14 @@ class Candidate(db.Model):
         filled = sum(1 for f in fields if f)
         return int((filled / len(fields)) * 100)
     
+    @classmethod
+    def loader_options(cls, include_user=False):
+        """Options de chargement des relations utilisées par to_dict()"""
+        options = []
+        if include_user:
+            options.append(joinedload(cls.user))
+        return options
+
     def to_dict(self, include_user=False):
         """Sérialiser le candidat en dictionnaire"""
         data = {
@@ -158,7 +167,7 @@ class Candidate(db.Model):
                 'email': self.user.email,
                 'full_name': self.user.full_name,
                 'phone': self.user.phone,
-                'avatar_url': self.user.avatar_url
+                'avatar_url': self.user.avatar_thumbnail_url
             }
         
         return data
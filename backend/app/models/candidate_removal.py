@@ -0,0 +1,37 @@
+"""
+================================================================
+Modèle CandidateRemoval - Candidats supprimés
+================================================================
+Une ligne par candidat supprimé, écrite dans la transaction de la
+suppression: le journal de l'instantané de matching
+(app.services.matching_snapshot) ne voit que les lignes dont
+updated_at avance, il lit ici celles qui ont disparu. Purgé par la
+tâche purge-notifications.
+"""
+
+from datetime import datetime
+
+from sqlalchemy import event, delete, insert
+
+from app import db
+from app.models.candidate import Candidate
+
+
+class CandidateRemoval(db.Model):
+    """Suppression d'un candidat (masqué dans les instantanés antérieurs)"""
+
+    __tablename__ = 'candidate_removals'
+
+    candidate_id = db.Column(db.Integer, primary_key=True)
+    removed_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+
+    def __repr__(self):
+        return f'<CandidateRemoval {self.candidate_id}>'
+
+
+@event.listens_for(Candidate, 'after_delete')
+def _record_removal(mapper, connection, target):
+    """Enregistrer la suppression d'un candidat"""
+    table = CandidateRemoval.__table__
+    connection.execute(delete(table).where(table.c.candidate_id == target.id))
+    connection.execute(insert(table).values(candidate_id=target.id, removed_at=datetime.utcnow()))
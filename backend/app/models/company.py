@@ -38,6 +38,7 @@ class Company(db.Model):
     
     # Branding / Identité visuelle
     logo_url = db.Column(db.String(500))
+    logo_variants = db.Column(db.JSON(none_as_null=True))  # {thumb, medium, large}: URLs des déclinaisons
     cover_image_url = db.Column(db.String(500))
     primary_color = db.Column(db.String(7), default='#2563EB')  # Couleur hex
     secondary_color = db.Column(db.String(7), default='#1E40AF')
@@ -69,6 +70,11 @@ class Company(db.Model):
     # Relations
     jobs = db.relationship('Job', backref='company', cascade='all, delete-orphan')
     
+    @property
+    def logo_thumbnail_url(self):
+        """Miniature du logo (l'original tant qu'elle n'est pas générée)"""
+        return (self.logo_variants or {}).get('thumb') or self.logo_url
+    
     def to_dict(self, include_user=False, include_jobs=False):
         """Sérialiser l'entreprise en dictionnaire"""
         data = {
@@ -87,6 +93,7 @@ class Company(db.Model):
             'city': self.city,
             'country': self.country,
             'logo_url': self.logo_url,
+            'logo_variants': self.logo_variants or {},
             'cover_image_url': self.cover_image_url,
             'primary_color': self.primary_color,
             'secondary_color': self.secondary_color,
@@ -0,0 +1,71 @@
+"""
+================================================================
+Modèle CounterDay - Incréments quotidiens des compteurs
+================================================================
+Les colonnes compteurs (ex: candidates.profile_views) sont cumulées
+depuis la création de la ligne; CounterDay garde, pour les compteurs
+suivis, les incréments par jour afin de compter une période
+(récapitulatif hebdomadaire). Alimenté par le vidage du tampon de
+compteurs (app.services.counter_service).
+"""
+
+from sqlalchemy import update, insert
+from app import db
+
+
+class CounterDay(db.Model):
+    """Incrément d'un compteur pour une ligne et un jour (UTC)"""
+
+    __tablename__ = 'counter_days'
+
+    counter = db.Column(db.String(100), primary_key=True)  # 'table.colonne'
+    entity_id = db.Column(db.Integer, primary_key=True)
+    day = db.Column(db.Date, primary_key=True, index=True)
+    amount = db.Column(db.Integer, nullable=False, default=0)
+
+    @staticmethod
+    def counter_key(table_name, column):
+        """Nom d'un compteur suivi (ex: 'candidates.profile_views')"""
+        return f'{table_name}.{column}'
+
+    @classmethod
+    def add(cls, connection, counter, day, amounts):
+        """
+        Ajouter des incréments du jour (dans la transaction en cours)
+
+        Args:
+            counter: Nom du compteur (counter_key)
+            day: Date (UTC)
+            amounts: {entity_id: incrément}
+        """
+        table = cls.__table__
+        rows = [{'counter': counter, 'entity_id': entity_id, 'day': day, 'amount': amount}
+                for entity_id, amount in amounts.items() if amount]
+        if not rows:
+            return
+
+        dialect = connection.dialect.name
+        if dialect in ('postgresql', 'sqlite'):
+            if dialect == 'postgresql':
+                from sqlalchemy.dialects.postgresql import insert as upsert
+            else:
+                from sqlalchemy.dialects.sqlite import insert as upsert
+            statement = upsert(table)
+            connection.execute(statement.on_conflict_do_update(
+                index_elements=[table.c.counter, table.c.entity_id, table.c.day],
+                set_={'amount': table.c.amount + statement.excluded.amount}
+            ), rows)
+            return
+
+        # Autres bases: mise à jour, puis insertion des lignes absentes
+        for row in rows:
+            updated = connection.execute(update(table).where(
+                table.c.counter == counter,
+                table.c.entity_id == row['entity_id'],
+                table.c.day == day
+            ).values(amount=table.c.amount + row['amount']))
+            if not updated.rowcount:
+                connection.execute(insert(table), row)
+
+    def __repr__(self):
+        return f'<CounterDay {self.counter}:{self.entity_id} {self.day} +{self.amount}>'
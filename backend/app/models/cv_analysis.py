@@ -5,7 +5,9 @@ Modèle CVAnalysis - Résultats d'analyse de CV par l'IA
 """
 
 from datetime import datetime
+from sqlalchemy import event
 from app import db
+from app.utils.match_features import build_cv_features, needs_refresh, CV_FEATURE_FIELDS
 
 
 class CVAnalysis(db.Model):
@@ -109,6 +111,7 @@ class CVAnalysis(db.Model):
     
     # Mots-clés extraits (pour le matching)
     keywords = db.Column(db.JSON, default=list)
+    match_features = db.Column(db.JSON)  # Caractéristiques pré-calculées (app.utils.match_features)
     
     # Métadonnées d'analyse
     analysis_version = db.Column(db.String(20), default='1.0')
@@ -160,3 +163,11 @@ class CVAnalysis(db.Model):
     
     def __repr__(self):
         return f'<CVAnalysis {self.id} - Score: {self.overall_score}>'
+
+
+@event.listens_for(CVAnalysis, 'before_insert')
+@event.listens_for(CVAnalysis, 'before_update')
+def _refresh_cv_match_features(mapper, connection, target):
+    """Recalculer les caractéristiques de matching quand l'analyse change"""
+    if needs_refresh(target, CV_FEATURE_FIELDS):
+        target.match_features = build_cv_features(target)
@@ -7,6 +7,7 @@ et aux entreprises de marquer des candidats favoris
 """
 
 from datetime import datetime
+from sqlalchemy.orm import selectinload
 from app import db
 
 
@@ -45,6 +46,18 @@ class Favorite(db.Model):
         db.UniqueConstraint('user_id', 'candidate_id', name='unique_user_candidate_favorite'),
     )
 
+    @classmethod
+    def loader_options(cls, include_details=False):
+        """Options de chargement des relations utilisées par to_dict()"""
+        from app.models.job import Job
+
+        options = []
+        if include_details:
+            # selectin: job_id / candidate_id sont exclusifs, une requête IN par type
+            options.append(selectinload(cls.job).joinedload(Job.company))
+            options.append(selectinload(cls.candidate))
+        return options
+
     def to_dict(self, include_details=False):
         """Sérialiser le favori en dictionnaire"""
         data = {
@@ -88,9 +101,11 @@ class Favorite(db.Model):
         return False
 
     @staticmethod
-    def get_user_favorites(user_id, favorite_type=None):
+    def get_user_favorites(user_id, favorite_type=None, include_details=False):
         """Récupérer tous les favoris d'un utilisateur"""
-        query = Favorite.query.filter_by(user_id=user_id)
+        query = Favorite.query.filter_by(user_id=user_id).options(
+            *Favorite.loader_options(include_details=include_details)
+        )
         if favorite_type:
             query = query.filter_by(favorite_type=favorite_type)
         return query.order_by(Favorite.created_at.desc()).all()
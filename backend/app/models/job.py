@@ -5,7 +5,11 @@ Modèle Job - Offres d'emploi et candidatures
 """
 
 from datetime import datetime
+from sqlalchemy import event
+from sqlalchemy.orm import joinedload
 from app import db
+from app.utils.helpers import select_fields
+from app.utils.match_features import build_job_features, needs_refresh, JOB_FEATURE_FIELDS
 
 
 class Job(db.Model):
@@ -62,12 +66,13 @@ class Job(db.Model):
     # Matching automatique
     auto_match = db.Column(db.Boolean, default=True)
     match_threshold = db.Column(db.Integer, default=60)  # Score minimum pour match
+    match_features = db.Column(db.JSON)  # Caractéristiques pré-calculées (app.utils.match_features)
     
     # Dates
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     published_at = db.Column(db.DateTime)
-    expires_at = db.Column(db.DateTime)
+    expires_at = db.Column(db.DateTime, index=True)
     
     # Statistiques
     views_count = db.Column(db.Integer, default=0)
@@ -82,8 +87,23 @@ class Job(db.Model):
             return datetime.utcnow() > self.expires_at
         return False
     
-    def to_dict(self, include_company=False):
-        """Sérialiser l'offre en dictionnaire"""
+    @classmethod
+    def loader_options(cls, include_company=False):
+        """Options de chargement des relations utilisées par to_dict()"""
+        options = []
+        if include_company:
+            options.append(joinedload(cls.company))
+        return options
+
+    def to_dict(self, include_company=False, fields=None):
+        """
+        Sérialiser l'offre en dictionnaire
+        
+        fields: ensemble optionnel de champs à conserver (sparse fieldset)
+        """
+        if fields:
+            include_company = include_company and 'company' in fields
+        
         data = {
             'id': self.id,
             'company_id': self.company_id,
@@ -123,18 +143,26 @@ class Job(db.Model):
             data['company'] = {
                 'id': self.company.id,
                 'name': self.company.name,
-                'logo_url': self.company.logo_url,
+                'logo_url': self.company.logo_thumbnail_url,
                 'city': self.company.city,
                 'sector': self.company.sector,
                 'is_verified': self.company.is_verified
             }
         
-        return data
+        return select_fields(data, fields)
     
     def __repr__(self):
         return f'<Job {self.title}>'
 
 
+@event.listens_for(Job, 'before_insert')
+@event.listens_for(Job, 'before_update')
+def _refresh_job_match_features(mapper, connection, target):
+    """Recalculer les caractéristiques de matching quand l'offre change"""
+    if needs_refresh(target, JOB_FEATURE_FIELDS):
+        target.match_features = build_job_features(target)
+
+
 class JobApplication(db.Model):
     """Candidature à une offre d'emploi"""
     
@@ -180,6 +208,18 @@ class JobApplication(db.Model):
         db.UniqueConstraint('job_id', 'candidate_id', name='unique_job_candidate'),
     )
     
+    @classmethod
+    def loader_options(cls, include_job=False, include_candidate=False):
+        """Options de chargement des relations utilisées par to_dict()"""
+        from app.models.candidate import Candidate
+
+        options = []
+        if include_job:
+            options.append(joinedload(cls.job).joinedload(Job.company))
+        if include_candidate:
+            options.append(joinedload(cls.candidate).joinedload(Candidate.user))
+        return options
+
     def to_dict(self, include_job=False, include_candidate=False):
         """Sérialiser la candidature"""
         data = {
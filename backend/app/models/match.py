@@ -5,6 +5,7 @@ Modèle Match - Correspondances automatiques CV-Emploi
 """
 
 from datetime import datetime
+from sqlalchemy.orm import joinedload
 from app import db
 
 
@@ -116,7 +117,7 @@ class Match(db.Model):
     # Timestamps
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
-    expires_at = db.Column(db.DateTime)  # Expiration du match (optionnel)
+    expires_at = db.Column(db.DateTime, index=True)  # Expiration du match (optionnel)
 
     # Relations
     candidate = db.relationship('Candidate', backref='matches')
@@ -128,6 +129,20 @@ class Match(db.Model):
         db.UniqueConstraint('candidate_id', 'job_id', name='unique_candidate_job_match'),
     )
 
+    @classmethod
+    def loader_options(cls, include_candidate=False, include_job=False, include_analysis=False):
+        """Options de chargement des relations utilisées par to_dict()"""
+        from app.models.job import Job
+
+        options = []
+        if include_candidate:
+            options.append(joinedload(cls.candidate))
+        if include_job:
+            options.append(joinedload(cls.job).joinedload(Job.company))
+        if include_analysis:
+            options.append(joinedload(cls.cv_analysis))
+        return options
+
     def to_dict(self, include_candidate=False, include_job=False, include_analysis=False):
         """Sérialiser le match en dictionnaire"""
         data = {
@@ -184,7 +199,7 @@ class Match(db.Model):
                 data['job']['company'] = {
                     'id': self.job.company.id,
                     'name': self.job.company.name,
-                    'logo_url': self.job.company.logo_url,
+                    'logo_url': self.job.company.logo_thumbnail_url,
                     'sector': self.job.company.sector
                 }
 
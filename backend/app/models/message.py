@@ -54,3 +54,74 @@ class Message(db.Model):
             self.is_read = True
             self.read_at = datetime.utcnow()
             db.session.commit()
+
+    @staticmethod
+    def mark_all_as_read(match_id, sender_type):
+        """
+        Marquer comme lus, en un seul UPDATE, les messages d'un expéditeur dans un match
+
+        Returns:
+            int: Nombre de messages marqués
+        """
+        count = Message.query.filter_by(
+            match_id=match_id,
+            sender_type=sender_type,
+            is_read=False
+        ).update(
+            {Message.is_read: True, Message.read_at: datetime.utcnow()},
+            synchronize_session=False
+        )
+        db.session.commit()
+        return count
+
+    @staticmethod
+    def get_page(match_id, before_id=None, after_id=None, limit=50):
+        """
+        Page de messages par curseur (ID de message), en ordre chronologique
+
+        Args:
+            before_id: Messages plus anciens que cet ID (historique)
+            after_id: Messages plus récents que cet ID (nouveaux)
+            limit: Taille de page (ramenée entre 1 et 100)
+
+        Returns:
+            tuple: (messages, has_more)
+        """
+        limit = max(1, min(limit, 100))
+        query = Message.query.filter_by(match_id=match_id)
+
+        if after_id:
+            rows = query.filter(Message.id > after_id).order_by(
+                Message.id.asc()
+            ).limit(limit + 1).all()
+            return rows[:limit], len(rows) > limit
+
+        if before_id:
+            query = query.filter(Message.id < before_id)
+
+        rows = query.order_by(Message.id.desc()).limit(limit + 1).all()
+        return list(reversed(rows[:limit])), len(rows) > limit
+
+    @staticmethod
+    def unread_count_for(user):
+        """Nombre de messages non lus reçus par un utilisateur (User ou Actor, candidat ou entreprise)"""
+        from app.models.match import Match
+        from app.models.job import Job
+
+        if user.role == 'candidate' and user.candidate:
+            # Messages des entreprises non lus
+            return Message.query.join(Match).filter(
+                Match.candidate_id == user.candidate.id,
+                Message.sender_type == 'company',
+                Message.is_read == False
+            ).count()
+
+        if user.role == 'company' and user.company:
+            # Messages des candidats non lus
+            return Message.query.join(Match).join(Job).filter(
+                Job.company_id == user.company.id,
+                Message.sender_type == 'candidate',
+                Message.is_read == False
+            ).count()
+
+        return 0
@@ -48,6 +48,22 @@ class Notification(db.Model):
             self.is_read = True
             self.read_at = datetime.utcnow()
 
+    @staticmethod
+    def mark_all_as_read(user_id):
+        """
+        Marquer toutes les notifications d'un utilisateur comme lues (un seul UPDATE)
+
+        Returns:
+            int: Nombre de notifications marquées
+        """
+        return Notification.query.filter_by(
+            user_id=user_id,
+            is_read=False
+        ).update(
+            {Notification.is_read: True, Notification.read_at: datetime.utcnow()},
+            synchronize_session=False
+        )
+
     def to_dict(self):
         """Sérialiser la notification"""
         return {
@@ -66,11 +82,17 @@ class Notification(db.Model):
         return f'<Notification {self.id} - {self.type}>'
 
 
-def create_notification(user_id, type, title, message=None, data=None, action_url=None):
-    """Helper pour créer une notification"""
+def create_notification(user_id, type=None, title=None, message=None, data=None,
+                        action_url=None, notification_type=None):
+    """
+    Helper pour créer une notification
+
+    Le type peut être passé via `type` ou `notification_type`.
+    La notification est poussée en temps réel aux clients connectés.
+    """
     notification = Notification(
         user_id=user_id,
-        type=type,
+        type=type or notification_type,
         title=title,
         message=message,
         data=data or {},
@@ -78,4 +100,8 @@ def create_notification(user_id, type, title, message=None, data=None, action_ur
     )
     db.session.add(notification)
     db.session.commit()
+
+    from app.services.realtime_service import realtime_service
+    realtime_service.notify_user(user_id, notification)
+
     return notification
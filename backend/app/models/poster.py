@@ -5,6 +5,7 @@ Modèle Poster - Affiches d'emploi générées par IA
 """
 
 from datetime import datetime
+from sqlalchemy.orm import joinedload
 from app import db
 
 
@@ -37,6 +38,7 @@ class Poster(db.Model):
     file_path = db.Column(db.String(500))
     file_url = db.Column(db.String(500))
     file_size = db.Column(db.Integer)  # En bytes
+    thumbnail_variants = db.Column(db.JSON(none_as_null=True))  # {thumb, medium}: URLs des miniatures
 
     # Format
     format = db.Column(db.String(20), default='png')  # png, jpg, pdf
@@ -72,6 +74,21 @@ class Poster(db.Model):
     job = db.relationship('Job', backref='posters')
     company = db.relationship('Company', backref='posters')
 
+    @classmethod
+    def loader_options(cls, include_job=False, include_company=False):
+        """Options de chargement des relations utilisées par to_dict()"""
+        options = []
+        if include_job:
+            options.append(joinedload(cls.job))
+        if include_company:
+            options.append(joinedload(cls.company))
+        return options
+
+    @property
+    def thumbnail_url(self):
+        """URL de la miniature de l'affiche (None tant qu'elle n'est pas générée)"""
+        return (self.thumbnail_variants or {}).get('thumb')
+
     def to_dict(self, include_job=False, include_company=False):
         """Sérialiser l'affiche en dictionnaire"""
         data = {
@@ -91,6 +108,7 @@ class Poster(db.Model):
             'file_path': self.file_path,
             'file_url': self.file_url,
             'file_size': self.file_size,
+            'thumbnail_url': self.thumbnail_url,
             'format': self.format,
             'width': self.width,
             'height': self.height,
@@ -118,26 +136,26 @@ class Poster(db.Model):
             data['company'] = {
                 'id': self.company.id,
                 'name': self.company.name,
-                'logo_url': self.company.logo_url,
+                'logo_url': self.company.logo_thumbnail_url,
                 'sector': self.company.sector
             }
 
         return data
 
     def increment_views(self):
-        """Incrémenter le compteur de vues"""
-        self.views_count += 1
-        db.session.commit()
+        """Incrémenter le compteur de vues (écriture différée)"""
+        from app.services.counter_service import counter_buffer
+        counter_buffer.increment(Poster, 'views_count', self.id)
 
     def increment_downloads(self):
-        """Incrémenter le compteur de téléchargements"""
-        self.downloads_count += 1
-        db.session.commit()
+        """Incrémenter le compteur de téléchargements (écriture différée)"""
+        from app.services.counter_service import counter_buffer
+        counter_buffer.increment(Poster, 'downloads_count', self.id)
 
     def increment_shares(self):
-        """Incrémenter le compteur de partages"""
-        self.shares_count += 1
-        db.session.commit()
+        """Incrémenter le compteur de partages (écriture différée)"""
+        from app.services.counter_service import counter_buffer
+        counter_buffer.increment(Poster, 'shares_count', self.id)
 
     def __repr__(self):
         return f'<Poster {self.id} - Job:{self.job_id}>'
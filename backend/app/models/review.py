@@ -72,7 +72,7 @@ class Review(db.Model):
                 reviewer_info['avatar_url'] = self.reviewer.candidate.avatar_url
             elif self.reviewer.role == 'company' and self.reviewer.company:
                 reviewer_info['name'] = self.reviewer.company.name
-                reviewer_info['avatar_url'] = self.reviewer.company.logo_url
+                reviewer_info['avatar_url'] = self.reviewer.company.logo_thumbnail_url
 
         # Get reviewed info
         reviewed_info = {
@@ -89,7 +89,7 @@ class Review(db.Model):
             company = Company.query.get(self.reviewed_id)
             if company:
                 reviewed_info['name'] = company.name
-                reviewed_info['avatar_url'] = company.logo_url
+                reviewed_info['avatar_url'] = company.logo_thumbnail_url
 
         return {
             'id': self.id,
@@ -0,0 +1,65 @@
+"""
+================================================================
+Modèles ScheduledTask / TaskRun - Tâches planifiées
+================================================================
+État partagé des tâches de maintenance (app.services.scheduler):
+- ScheduledTask: prochaine exécution et bail (un seul worker
+  exécute une échéance: celui qui obtient le bail)
+- TaskRun: historique des exécutions (durée, statut, bilan)
+"""
+
+from datetime import datetime
+from app import db
+
+
+class ScheduledTask(db.Model):
+    """Échéance et bail d'une tâche planifiée"""
+
+    __tablename__ = 'scheduled_tasks'
+
+    name = db.Column(db.String(150), primary_key=True)  # tâche (ou tâche@hôte)
+    next_run_at = db.Column(db.DateTime, nullable=False)
+    locked_by = db.Column(db.String(150))  # hôte:pid du worker qui exécute
+    locked_until = db.Column(db.DateTime)  # bail repris par un autre worker après expiration
+    last_run_at = db.Column(db.DateTime)
+    last_status = db.Column(db.String(20))
+
+    def __repr__(self):
+        return f'<ScheduledTask {self.name} {self.next_run_at}>'
+
+
+class TaskRun(db.Model):
+    """Exécution d'une tâche planifiée ou lancée à la main"""
+
+    __tablename__ = 'task_runs'
+
+    id = db.Column(db.Integer, primary_key=True)
+    task = db.Column(db.String(100), nullable=False)
+    trigger = db.Column(db.String(20), nullable=False)  # schedule, manual
+    worker = db.Column(db.String(150))
+    status = db.Column(db.String(20), nullable=False)  # success, failed, timeout
+    started_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+    duration_ms = db.Column(db.Integer)
+    result = db.Column(db.JSON)  # bilan retourné par la tâche
+    error = db.Column(db.Text)
+
+    __table_args__ = (
+        db.Index('ix_task_runs_task_started', 'task', 'started_at'),
+    )
+
+    def to_dict(self):
+        """Sérialiser l'exécution en dictionnaire"""
+        return {
+            'id': self.id,
+            'task': self.task,
+            'trigger': self.trigger,
+            'worker': self.worker,
+            'status': self.status,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'duration_ms': self.duration_ms,
+            'result': self.result,
+            'error': self.error
+        }
+
+    def __repr__(self):
+        return f'<TaskRun {self.task} {self.status}>'
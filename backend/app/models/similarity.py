@@ -0,0 +1,129 @@
+"""
+================================================================
+Modèle SimilarityBucket - Index LSH des offres et candidats
+================================================================
+Seaux MinHash/LSH (app.utils.minhash) tenus à jour à l'écriture
+des offres, des profils candidats et des analyses de CV
+"""
+
+from sqlalchemy import event, inspect, select, delete, insert
+from app import db
+from app.models.job import Job
+from app.models.candidate import Candidate
+from app.models.cv_analysis import CVAnalysis
+from app.utils.minhash import minhasher, job_tokens, candidate_tokens
+
+
+class SimilarityBucket(db.Model):
+    """Appartenance d'une entité à un seau LSH"""
+
+    __tablename__ = 'similarity_buckets'
+
+    id = db.Column(db.Integer, primary_key=True)
+    entity_type = db.Column(db.String(20), nullable=False)  # 'job' ou 'candidate'
+    entity_id = db.Column(db.Integer, nullable=False)
+    band = db.Column(db.SmallInteger, nullable=False)
+    bucket = db.Column(db.BigInteger, nullable=False)
+
+    __table_args__ = (
+        db.Index('ix_similarity_buckets_lookup', 'entity_type', 'bucket'),
+        db.Index('ix_similarity_buckets_entity', 'entity_type', 'entity_id'),
+    )
+
+    @classmethod
+    def replace(cls, connection, entity_type, entity_id, tokens):
+        """Remplacer les seaux d'une entité (dans la transaction en cours)"""
+        table = cls.__table__
+        connection.execute(delete(table).where(
+            table.c.entity_type == entity_type,
+            table.c.entity_id == entity_id
+        ))
+        signature = minhasher.signature(tokens)
+        if signature is None:
+            return
+        connection.execute(insert(table), [
+            {'entity_type': entity_type, 'entity_id': entity_id, 'band': band, 'bucket': bucket}
+            for band, bucket in minhasher.bands(signature)
+        ])
+
+    @classmethod
+    def remove(cls, connection, entity_type, entity_id):
+        """Retirer une entité de l'index"""
+        table = cls.__table__
+        connection.execute(delete(table).where(
+            table.c.entity_type == entity_type,
+            table.c.entity_id == entity_id
+        ))
+
+    def __repr__(self):
+        return f'<SimilarityBucket {self.entity_type}:{self.entity_id} band={self.band}>'
+
+
+def _changed(target, *fields):
+    """Une des colonnes a-t-elle changé dans ce flush ?"""
+    state = inspect(target)
+    return any(state.attrs[field].history.has_changes() for field in fields)
+
+
+def _latest_keywords(connection, candidate_id):
+    """Mots-clés de la dernière analyse de CV d'un candidat"""
+    table = CVAnalysis.__table__
+    return connection.execute(
+        select(table.c.keywords)
+        .where(table.c.candidate_id == candidate_id, table.c.is_latest.is_(True))
+        .order_by(table.c.id.desc())
+        .limit(1)
+    ).scalar()
+
+
+# ================================================================
+# MISE À JOUR À L'ÉCRITURE
+# ================================================================
+
+@event.listens_for(Job, 'after_insert')
+def _index_new_job(mapper, connection, target):
+    """Indexer une nouvelle offre"""
+    SimilarityBucket.replace(connection, 'job', target.id, job_tokens(target))
+
+
+@event.listens_for(Job, 'after_update')
+def _reindex_job(mapper, connection, target):
+    """Réindexer une offre dont le titre ou les compétences changent"""
+    if _changed(target, 'title', 'required_skills', 'nice_to_have_skills'):
+        SimilarityBucket.replace(connection, 'job', target.id, job_tokens(target))
+
+
+@event.listens_for(Candidate, 'after_insert')
+def _index_new_candidate(mapper, connection, target):
+    """Indexer un nouveau candidat"""
+    SimilarityBucket.replace(connection, 'candidate', target.id, candidate_tokens(target.skills))
+
+
+@event.listens_for(Candidate, 'after_update')
+def _reindex_candidate(mapper, connection, target):
+    """Réindexer un candidat dont les compétences changent"""
+    if _changed(target, 'skills'):
+        keywords = _latest_keywords(connection, target.id)
+        SimilarityBucket.replace(connection, 'candidate', target.id, candidate_tokens(target.skills, keywords))
+
+
+@event.listens_for(CVAnalysis, 'after_insert')
+def _index_candidate_cv(mapper, connection, target):
+    """Réindexer le candidat avec les mots-clés de sa nouvelle analyse"""
+    if target.is_latest is False:
+        return
+    table = Candidate.__table__
+    skills = connection.execute(select(table.c.skills).where(table.c.id == target.candidate_id)).scalar()
+    SimilarityBucket.replace(connection, 'candidate', target.candidate_id, candidate_tokens(skills, target.keywords))
+
+
+@event.listens_for(Job, 'after_delete')
+def _unindex_job(mapper, connection, target):
+    """Retirer une offre supprimée"""
+    SimilarityBucket.remove(connection, 'job', target.id)
+
+
+@event.listens_for(Candidate, 'after_delete')
+def _unindex_candidate(mapper, connection, target):
+    """Retirer un candidat supprimé"""
+    SimilarityBucket.remove(connection, 'candidate', target.id)
@@ -0,0 +1,50 @@
+"""
+================================================================
+Modèle UploadSession - Uploads reprenables
+================================================================
+État d'un upload de CV envoyé par morceaux: les octets reçus sont
+ajoutés à un fichier partiel (app.services.resumable_uploads), la
+ligne garde la taille annoncée et le décalage déjà confirmé.
+"""
+
+import uuid
+from datetime import datetime
+from app import db
+
+
+class UploadSession(db.Model):
+    """Upload de fichier en cours"""
+
+    __tablename__ = 'upload_sessions'
+
+    id = db.Column(db.String(32), primary_key=True, default=lambda: uuid.uuid4().hex)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
+
+    file_name = db.Column(db.String(255), nullable=False)
+    content_type = db.Column(db.String(100))
+    total_size = db.Column(db.BigInteger, nullable=False)
+    received_size = db.Column(db.BigInteger, default=0, nullable=False)
+    expected_sha256 = db.Column(db.String(64))  # empreinte annoncée par le client (optionnelle)
+    analyze = db.Column(db.Boolean, default=True)
+
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+
+    @property
+    def is_complete(self):
+        return self.received_size >= self.total_size
+
+    def to_dict(self):
+        """Sérialiser la session en dictionnaire"""
+        return {
+            'upload_id': self.id,
+            'file_name': self.file_name,
+            'total_size': self.total_size,
+            'offset': self.received_size,
+            'complete': self.is_complete,
+            'expires_at': self.expires_at.isoformat() if self.expires_at else None
+        }
+
+    def __repr__(self):
+        return f'<UploadSession {self.id} {self.received_size}/{self.total_size}>'
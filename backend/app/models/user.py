@@ -25,6 +25,7 @@ class User(db.Model):
     last_name = db.Column(db.String(100))
     phone = db.Column(db.String(20))
     avatar_url = db.Column(db.String(500))
+    avatar_variants = db.Column(db.JSON(none_as_null=True))  # {thumb, medium, large}: URLs des déclinaisons
     
     # Statut
     is_active = db.Column(db.Boolean, default=True)
@@ -37,6 +38,7 @@ class User(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     last_login = db.Column(db.DateTime)
+    reads_primary_until = db.Column(db.DateTime)  # lectures sur le primaire après une écriture (réplicas)
     
     # Relations
     candidate = db.relationship('Candidate', backref='user', uselist=False, cascade='all, delete-orphan')
@@ -76,6 +78,11 @@ class User(db.Model):
             return self.first_name
         return self.email.split('@')[0]
     
+    @property
+    def avatar_thumbnail_url(self):
+        """Miniature de l'avatar (l'original tant qu'elle n'est pas générée)"""
+        return (self.avatar_variants or {}).get('thumb') or self.avatar_url
+    
     def to_dict(self, include_profile=False):
         """Sérialiser l'utilisateur en dictionnaire"""
         data = {
@@ -87,6 +94,7 @@ class User(db.Model):
             'full_name': self.full_name,
             'phone': self.phone,
             'avatar_url': self.avatar_url,
+            'avatar_variants': self.avatar_variants or {},
             'is_active': self.is_active,
             'is_verified': self.is_verified,
             'created_at': self.created_at.isoformat() if self.created_at else None,
@@ -5,11 +5,13 @@ Routes Analyse CV - BaraCorrespondance AI
 """
 
 from flask import Blueprint, request
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required
 
 from app import db
-from app.models import User, Candidate, CVAnalysis
-from app.utils.helpers import success_response, error_response, safe_int
+from app.models import Candidate, CVAnalysis
+from app.utils.helpers import success_response, error_response
+from app.utils.identity import current_actor
+from app.services.blob_store import blob_store
 from app.services.cv_analyzer import CVAnalyzerService
 
 analysis_bp = Blueprint('analysis', __name__)
@@ -21,16 +23,13 @@ analysis_bp = Blueprint('analysis', __name__)
 
 def get_current_candidate():
     """Obtenir le profil candidat de l'utilisateur connecté"""
-    user_id = safe_int(get_jwt_identity())
-    user = User.query.get(user_id)
-    
-    if not user or user.role != 'candidate':
+    if not current_actor or current_actor.role != 'candidate':
         return None, error_response("Accès réservé aux candidats", 403)
     
-    if not user.candidate:
+    if not current_actor.candidate:
         return None, error_response("Profil candidat non trouvé", 404)
     
-    return user.candidate, None
+    return current_actor.candidate, None
 
 
 # ================================================================
@@ -218,7 +217,11 @@ def reanalyze_cv():
     # Lancer l'analyse
     try:
         analyzer = CVAnalyzerService()
-        result = analyzer.analyze_file(candidate.cv_url, candidate.id)
+        with blob_store.local_file(candidate.cv_url) as filepath:
+            result = analyzer.analyze_file(
+                filepath, candidate.id, file_url=candidate.cv_url,
+                file_name=candidate.cv_filename or candidate.cv_url.rsplit('/', 1)[-1]
+            )
         
         return success_response({
             'analysis': result
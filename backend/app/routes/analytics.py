@@ -6,20 +6,27 @@ Statistiques et analytics pour candidats et entreprises
 """
 
 from flask import Blueprint, request, send_file
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required
 from sqlalchemy import func, desc
 from datetime import datetime, timedelta
 
 from app import db
-from app.models import User, Candidate, Company, Job, JobApplication, Match, CVAnalysis
-from app.utils.helpers import success_response, error_response, safe_int
-from app.services.pdf_service import generate_candidate_analytics_pdf, generate_company_analytics_pdf
+from app.models import Candidate, Company, Job, JobApplication, Match, CVAnalysis
+from app.utils.helpers import success_response, error_response
+from app.utils.identity import current_actor
+from app.utils.db_routing import read_only
+from app.utils.lazy import lazy_service
+
+# reportlab chargé au premier export PDF
+generate_candidate_analytics_pdf = lazy_service('app.services.pdf_service:generate_candidate_analytics_pdf')
+generate_company_analytics_pdf = lazy_service('app.services.pdf_service:generate_company_analytics_pdf')
 
 analytics_bp = Blueprint('analytics', __name__)
 
 
 @analytics_bp.route('/candidate/stats', methods=['GET'])
 @jwt_required()
+@read_only
 def get_candidate_stats():
     """
     Statistiques complètes pour un candidat
@@ -31,13 +38,10 @@ def get_candidate_stats():
         - CV analysis history
         - Timeline data
     """
-    user_id = safe_int(get_jwt_identity())
-    user = User.query.get(user_id)
-
-    if not user or user.role != 'candidate':
+    if not current_actor or current_actor.role != 'candidate':
         return error_response("Accès réservé aux candidats", 403)
 
-    candidate = user.candidate
+    candidate = current_actor.candidate
     if not candidate:
         return error_response("Profil candidat non trouvé", 404)
 
@@ -142,6 +146,7 @@ def get_candidate_stats():
 
 @analytics_bp.route('/company/stats', methods=['GET'])
 @jwt_required()
+@read_only
 def get_company_stats():
     """
     Statistiques complètes pour une entreprise
@@ -153,13 +158,10 @@ def get_company_stats():
         - Top performing jobs
         - Timeline data
     """
-    user_id = safe_int(get_jwt_identity())
-    user = User.query.get(user_id)
-
-    if not user or user.role != 'company':
+    if not current_actor or current_actor.role != 'company':
         return error_response("Accès réservé aux entreprises", 403)
 
-    company = user.company
+    company = current_actor.company
     if not company:
         return error_response("Profil entreprise non trouvé", 404)
 
@@ -310,15 +312,13 @@ def get_company_stats():
 
 @analytics_bp.route('/candidate/activity', methods=['GET'])
 @jwt_required()
+@read_only
 def get_candidate_activity():
     """Activité récente du candidat"""
-    user_id = safe_int(get_jwt_identity())
-    user = User.query.get(user_id)
-
-    if not user or user.role != 'candidate':
+    if not current_actor or current_actor.role != 'candidate':
         return error_response("Accès réservé aux candidats", 403)
 
-    candidate = user.candidate
+    candidate = current_actor.candidate
     if not candidate:
         return error_response("Profil candidat non trouvé", 404)
 
@@ -361,15 +361,13 @@ def get_candidate_activity():
 
 @analytics_bp.route('/company/activity', methods=['GET'])
 @jwt_required()
+@read_only
 def get_company_activity():
     """Activité récente de l'entreprise"""
-    user_id = safe_int(get_jwt_identity())
-    user = User.query.get(user_id)
-
-    if not user or user.role != 'company':
+    if not current_actor or current_actor.role != 'company':
         return error_response("Accès réservé aux entreprises", 403)
 
-    company = user.company
+    company = current_actor.company
     if not company:
         return error_response("Profil entreprise non trouvé", 404)
 
@@ -395,14 +393,15 @@ def get_company_activity():
 
 @analytics_bp.route('/export/pdf', methods=['GET'])
 @jwt_required()
+@read_only
 def export_analytics_pdf():
     """
     Exporter les analytics en PDF
 
     Génère un rapport PDF complet basé sur le rôle de l'utilisateur
     """
-    user_id = safe_int(get_jwt_identity())
-    user = User.query.get(user_id)
+    # Utilisateur et profil chargés en une requête
+    user = current_actor.user if current_actor else None
 
     if not user:
         return error_response("Utilisateur non trouvé", 404)
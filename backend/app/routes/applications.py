@@ -9,9 +9,10 @@ from flask import Blueprint, request
 from flask_jwt_extended import jwt_required, get_jwt_identity
 
 from app import db
-from app.models import User, Candidate, Company, JobApplication
+from app.models import User, Candidate, Company, Job, JobApplication
 from app.utils.helpers import success_response, error_response, paginated_response, safe_int
 from app.models.notification import create_notification
+from app.services.counter_service import counter_buffer
 
 applications_bp = Blueprint('applications', __name__)
 
@@ -211,12 +212,11 @@ def withdraw_application(application_id):
     try:
         job = application.job
         db.session.delete(application)
+        db.session.commit()
 
         # Décrémenter le compteur
         if job.applications_count > 0:
-            job.applications_count -= 1
-
-        db.session.commit()
+            counter_buffer.increment(Job, 'applications_count', job.id, amount=-1)
 
         return success_response(message="Candidature retirée")
 
@@ -18,6 +18,8 @@ from app import db
 from app.models import User, Candidate, Company
 from app.utils.validators import validate_email, validate_password
 from app.utils.helpers import success_response, error_response, safe_int
+from app.utils.identity import identity_claims
+from app.utils.db_routing import latency_sensitive
 
 auth_bp = Blueprint('auth', __name__)
 
@@ -116,8 +118,9 @@ def register():
         db.session.commit()
         
         # Générer les tokens (identity as string for consistency)
-        access_token = create_access_token(identity=str(user.id))
-        refresh_token = create_refresh_token(identity=str(user.id))
+        claims = identity_claims(user)
+        access_token = create_access_token(identity=str(user.id), additional_claims=claims)
+        refresh_token = create_refresh_token(identity=str(user.id), additional_claims=claims)
         
         # TODO: Envoyer email de vérification
         
@@ -138,6 +141,7 @@ def register():
 # ================================================================
 
 @auth_bp.route('/login', methods=['POST'])
+@latency_sensitive
 def login():
     """
     Connexion d'un utilisateur
@@ -173,8 +177,9 @@ def login():
     db.session.commit()
     
     # Générer les tokens
-    access_token = create_access_token(identity=str(user.id))
-    refresh_token = create_refresh_token(identity=str(user.id))
+    claims = identity_claims(user)
+    access_token = create_access_token(identity=str(user.id), additional_claims=claims)
+    refresh_token = create_refresh_token(identity=str(user.id), additional_claims=claims)
     
     return success_response({
         'user': user.to_dict(include_profile=True),
@@ -190,6 +195,7 @@ def login():
 
 @auth_bp.route('/refresh', methods=['POST'])
 @jwt_required(refresh=True)
+@latency_sensitive
 def refresh_token():
     """Rafraîchir le token d'accès"""
     current_user_id = safe_int(get_jwt_identity())
@@ -199,7 +205,11 @@ def refresh_token():
         return error_response("Utilisateur non trouvé ou inactif", 401)
     
     # Ensure identity stored as string in refreshed token
-    new_access_token = create_access_token(identity=str(current_user_id))
+    # (claims relus en base: rôle ou profil ont pu changer)
+    new_access_token = create_access_token(
+        identity=str(current_user_id),
+        additional_claims=identity_claims(user)
+    )
     
     return success_response({
         'access_token': new_access_token,
@@ -213,6 +223,7 @@ def refresh_token():
 
 @auth_bp.route('/me', methods=['GET'])
 @jwt_required()
+@latency_sensitive
 def get_current_user():
     """Obtenir les informations de l'utilisateur connecté"""
     current_user_id = safe_int(get_jwt_identity())
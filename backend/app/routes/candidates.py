@@ -6,12 +6,16 @@ Routes Candidats - BaraCorrespondance AI
 
 from datetime import datetime
 from flask import Blueprint, request, g, current_app
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required
 
 from app import db
-from app.models import User, Candidate, CVAnalysis, JobApplication
-from app.utils.helpers import success_response, error_response, paginated_response, safe_int
+from app.models import Candidate, CVAnalysis, Job, JobApplication
+from app.utils.helpers import success_response, error_response, paginated_response
+from app.utils.identity import current_actor
 from app.utils.validators import allowed_cv_file
+from app.services.counter_service import counter_buffer
+from app.services.similarity_service import similarity_service
+from app.utils.http_cache import conditional_get, check_not_modified, entity_etag, entity_last_modified
 
 candidates_bp = Blueprint('candidates', __name__)
 
@@ -22,16 +26,13 @@ candidates_bp = Blueprint('candidates', __name__)
 
 def get_current_candidate():
     """Obtenir le profil candidat de l'utilisateur connecté"""
-    user_id = safe_int(get_jwt_identity())
-    user = User.query.get(user_id)
-    
-    if not user or user.role != 'candidate':
+    if not current_actor or current_actor.role != 'candidate':
         return None, error_response("Accès réservé aux candidats", 403)
     
-    if not user.candidate:
+    if not current_actor.candidate:
         return None, error_response("Profil candidat non trouvé", 404)
     
-    return user.candidate, None
+    return current_actor.candidate, None
 
 
 # ================================================================
@@ -238,13 +239,14 @@ def withdraw_application(application_id):
     if application.status in ['hired', 'rejected']:
         return error_response("Impossible de retirer cette candidature", 400)
     
-    # Décrémenter le compteur de candidatures du job
-    if application.job:
-        application.job.applications_count -= 1
+    job_id = application.job_id
     
     db.session.delete(application)
     db.session.commit()
     
+    # Décrémenter le compteur de candidatures du job
+    counter_buffer.increment(Job, 'applications_count', job_id, amount=-1)
+    
     return success_response(message="Candidature retirée")
 
 
@@ -307,15 +309,12 @@ def get_stats():
 # ================================================================
 
 @candidates_bp.route('/public/<int:candidate_id>', methods=['GET'])
+@conditional_get(max_age=0, private=True)
 @jwt_required()
 def get_public_profile(candidate_id):
     """Obtenir le profil public d'un candidat (pour les entreprises)"""
-    from app.utils.helpers import safe_int
-    user_id = safe_int(get_jwt_identity())
-    user = User.query.get(user_id)
-    
-    # Vérifier que c'est une entreprise
-    if not user or user.role != 'company':
+    # Vérifier que c'est une entreprise (rôle lu dans le token)
+    if not current_actor or current_actor.role != 'company':
         return error_response("Accès réservé aux entreprises", 403)
     
     candidate = Candidate.query.get(candidate_id)
@@ -326,9 +325,15 @@ def get_public_profile(candidate_id):
     if not candidate.is_public:
         return error_response("Ce profil n'est pas public", 403)
     
-    # Incrémenter les vues
-    candidate.profile_views += 1
-    db.session.commit()
+    # Incrémenter les vues (écriture différée, sans modifier updated_at)
+    counter_buffer.increment(Candidate, 'profile_views', candidate.id)
+    
+    not_modified = check_not_modified(
+        etag=entity_etag(candidate, candidate.user),
+        last_modified=entity_last_modified(candidate, candidate.user)
+    )
+    if not_modified:
+        return not_modified
     
     # Retourner un profil partiel (sans données sensibles)
     profile = candidate.to_dict(include_user=True)
@@ -339,3 +344,29 @@ def get_public_profile(candidate_id):
     return success_response({
         'profile': profile
     })
+
+
+@candidates_bp.route('/public/<int:candidate_id>/similar', methods=['GET'])
+@jwt_required()
+def get_similar_candidates(candidate_id):
+    """Candidats au profil similaire (compétences et mots-clés du CV, index LSH)"""
+    # Vérifier que c'est une entreprise (rôle lu dans le token)
+    if not current_actor or current_actor.role != 'company':
+        return error_response("Accès réservé aux entreprises", 403)
+    
+    candidate = Candidate.query.get(candidate_id)
+    
+    if not candidate or not candidate.is_public:
+        return error_response("Candidat non trouvé", 404)
+    
+    limit = max(1, min(request.args.get('limit', 10, type=int), 50))
+    
+    candidates = []
+    for other, similarity in similarity_service.similar_candidates(candidate, limit=limit):
+        candidate_data = other.to_dict(include_user=True)
+        candidate_data['similarity'] = round(similarity * 100, 1)
+        candidates.append(candidate_data)
+    
+    return success_response({
+        'candidates': candidates
+    })
@@ -6,11 +6,15 @@ Routes Entreprises - BaraCorrespondance AI
 
 from datetime import datetime
 from flask import Blueprint, request
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required
 
 from app import db
-from app.models import User, Company, Job, JobApplication, Candidate
-from app.utils.helpers import success_response, error_response, paginated_response, safe_int
+from app.models import Company, Job, JobApplication, Candidate
+from app.utils.helpers import success_response, error_response, paginated_response
+from app.utils.identity import current_actor
+from app.utils.db_routing import read_only
+from app.utils.http_cache import conditional_get, check_not_modified, entity_etag, entity_last_modified
+from app.services.counter_service import counter_buffer
 
 companies_bp = Blueprint('companies', __name__)
 
@@ -21,16 +25,13 @@ companies_bp = Blueprint('companies', __name__)
 
 def get_current_company():
     """Obtenir le profil entreprise de l'utilisateur connecté"""
-    user_id = safe_int(get_jwt_identity())
-    user = User.query.get(user_id)
-    
-    if not user or user.role != 'company':
+    if not current_actor or current_actor.role != 'company':
         return None, error_response("Accès réservé aux entreprises", 403)
     
-    if not user.company:
+    if not current_actor.company:
         return None, error_response("Profil entreprise non trouvé", 404)
     
-    return user.company, None
+    return current_actor.company, None
 
 
 # ================================================================
@@ -141,7 +142,9 @@ def get_received_applications():
     if status:
         query = query.filter(JobApplication.status == status)
     
-    query = query.order_by(JobApplication.created_at.desc())
+    query = query.options(
+        *JobApplication.loader_options(include_job=True, include_candidate=True)
+    ).order_by(JobApplication.created_at.desc())
     
     pagination = query.paginate(page=page, per_page=per_page, error_out=False)
     
@@ -256,6 +259,7 @@ def toggle_favorite(application_id):
 
 @companies_bp.route('/search-candidates', methods=['GET'])
 @jwt_required()
+@read_only
 def search_candidates():
     """
     Rechercher des candidats
@@ -376,6 +380,7 @@ def get_stats():
 # ================================================================
 
 @companies_bp.route('/public/<int:company_id>', methods=['GET'])
+@conditional_get(max_age=60)
 def get_public_profile(company_id):
     """Obtenir le profil public d'une entreprise"""
     company = Company.query.get(company_id)
@@ -383,9 +388,16 @@ def get_public_profile(company_id):
     if not company:
         return error_response("Entreprise non trouvée", 404)
     
-    # Incrémenter les vues
-    company.profile_views += 1
-    db.session.commit()
+    # Incrémenter les vues (écriture différée, sans modifier updated_at)
+    counter_buffer.increment(Company, 'profile_views', company.id)
+    
+    # Validateurs: l'entreprise et ses offres (le compteur de vues n'en fait pas partie)
+    not_modified = check_not_modified(
+        etag=entity_etag(company, *company.jobs),
+        last_modified=entity_last_modified(company, *company.jobs)
+    )
+    if not_modified:
+        return not_modified
     
     # Retourner le profil public avec les offres actives
     return success_response({
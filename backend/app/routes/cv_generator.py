@@ -12,13 +12,10 @@ from io import BytesIO
 from app import db
 from app.models import User, Candidate, Job, Company
 from app.utils.helpers import success_response, error_response, safe_int
+from app.utils.http_cache import conditional_get
+from app.services.blob_store import blob_store
 from app.services.cv_letter_generator import CVLetterGeneratorService
 from app.models.cv_analysis import CVAnalysis
-from reportlab.lib.pagesizes import A4
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image
-from reportlab.lib import colors
-from reportlab.lib.styles import getSampleStyleSheet
-from reportlab.lib.utils import ImageReader
 import urllib.request
 
 cv_generator_bp = Blueprint('cv_generator', __name__)
@@ -302,6 +299,7 @@ def get_cv_tips():
 
 
 @cv_generator_bp.route('/templates', methods=['GET'])
+@conditional_get(max_age=3600)
 def get_templates():
     """Obtenir la liste des templates de CV disponibles"""
     templates = [
@@ -368,6 +366,13 @@ def download_cv_report_pdf():
                 return error_response("Aucune analyse trouvée pour ce candidat", 404)
 
         # Construire un PDF simple et professionnel avec ReportLab
+        # (import différé: reportlab n'est chargé qu'à la première génération)
+        from reportlab.lib.pagesizes import A4
+        from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image
+        from reportlab.lib import colors
+        from reportlab.lib.styles import getSampleStyleSheet
+        from reportlab.lib.utils import ImageReader
+
         buffer = BytesIO()
         doc = SimpleDocTemplate(buffer, pagesize=A4, rightMargin=40, leftMargin=40, topMargin=40, bottomMargin=40)
         styles = getSampleStyleSheet()
@@ -386,8 +391,12 @@ def download_cv_report_pdf():
         avatar_flowable = None
         if avatar_url:
             try:
-                resp = urllib.request.urlopen(avatar_url, timeout=5)
-                img_data = resp.read()
+                if blob_store.is_stored(avatar_url):
+                    # Fichier de la plateforme: lu depuis le stockage
+                    img_data = blob_store.read(avatar_url)
+                else:
+                    resp = urllib.request.urlopen(avatar_url, timeout=5)
+                    img_data = resp.read()
                 img_buf = BytesIO(img_data)
                 img_reader = ImageReader(img_buf)
                 avatar_flowable = Image(img_buf, width=64, height=64)
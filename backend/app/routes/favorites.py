@@ -35,8 +35,8 @@ def get_favorites():
     if favorite_type and favorite_type not in ['job', 'candidate']:
         return error_response("Type invalide. Utilisez 'job' ou 'candidate'", 400)
 
-    # Récupérer les favoris
-    favorites = Favorite.get_user_favorites(user_id, favorite_type)
+    # Récupérer les favoris avec les relations nécessaires à la sérialisation
+    favorites = Favorite.get_user_favorites(user_id, favorite_type, include_details=True)
 
     # Sérialiser avec détails
     favorites_data = [fav.to_dict(include_details=True) for fav in favorites]
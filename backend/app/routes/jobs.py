@@ -6,12 +6,17 @@ Routes Offres d'Emploi - BaraCorrespondance AI
 
 from datetime import datetime
 from flask import Blueprint, request
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required
 
 from app import db
-from app.models import User, Company, Job, JobApplication, Candidate
-from app.utils.helpers import success_response, error_response, paginated_response, safe_int
+from app.models import Company, Job, JobApplication, Candidate
+from app.utils.helpers import success_response, error_response, paginated_response, get_requested_fields
+from app.utils.identity import current_actor
+from app.utils.db_routing import read_only
+from app.utils.http_cache import conditional_get, check_not_modified, entity_etag, entity_last_modified
 from app.services.matcher import MatcherService
+from app.services.similarity_service import similarity_service
+from app.services.counter_service import counter_buffer
 
 jobs_bp = Blueprint('jobs', __name__)
 
@@ -22,30 +27,24 @@ jobs_bp = Blueprint('jobs', __name__)
 
 def get_current_company():
     """Obtenir le profil entreprise de l'utilisateur connecté"""
-    user_id = safe_int(get_jwt_identity())
-    user = User.query.get(user_id)
-    
-    if not user or user.role != 'company':
+    if not current_actor or current_actor.role != 'company':
         return None, error_response("Accès réservé aux entreprises", 403)
     
-    if not user.company:
+    if not current_actor.company:
         return None, error_response("Profil entreprise non trouvé", 404)
     
-    return user.company, None
+    return current_actor.company, None
 
 
 def get_current_candidate():
     """Obtenir le profil candidat de l'utilisateur connecté"""
-    user_id = safe_int(get_jwt_identity())
-    user = User.query.get(user_id)
-    
-    if not user or user.role != 'candidate':
+    if not current_actor or current_actor.role != 'candidate':
         return None, error_response("Accès réservé aux candidats", 403)
     
-    if not user.candidate:
+    if not current_actor.candidate:
         return None, error_response("Profil candidat non trouvé", 404)
     
-    return user.candidate, None
+    return current_actor.candidate, None
 
 
 # ================================================================
@@ -53,6 +52,8 @@ def get_current_candidate():
 # ================================================================
 
 @jobs_bp.route('/', methods=['GET'])
+@conditional_get(max_age=30)
+@read_only
 def list_jobs():
     """
     Lister les offres d'emploi actives (public)
@@ -67,12 +68,19 @@ def list_jobs():
     - is_remote: télétravail
     - skills: compétences (séparées par virgule)
     - sector: secteur d'activité
+    - fields: champs à retourner (ex: id,title,city,company)
     """
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 20, type=int)
     
+    # Sparse fieldset: l'entreprise n'est chargée que si demandée
+    fields = get_requested_fields()
+    include_company = not fields or 'company' in fields
+    
     # Base query - offres actives et non expirées
-    query = Job.query.filter_by(is_active=True)
+    query = Job.query.filter_by(is_active=True).options(
+        *Job.loader_options(include_company=include_company)
+    )
     
     # Recherche textuelle
     search = request.args.get('search')
@@ -158,30 +166,60 @@ def list_jobs():
     pagination = query.paginate(page=page, per_page=per_page, error_out=False)
     
     return paginated_response(
-        items=[job.to_dict(include_company=True) for job in pagination.items],
+        items=[job.to_dict(include_company=include_company, fields=fields) for job in pagination.items],
         total=pagination.total,
         page=page,
-        per_page=per_page
+        per_page=per_page,
+        fields=fields
     )
 
 
 @jobs_bp.route('/<int:job_id>', methods=['GET'])
+@conditional_get(max_age=60)
 def get_job(job_id):
     """Obtenir les détails d'une offre d'emploi"""
-    job = Job.query.get(job_id)
+    job = Job.query.options(*Job.loader_options(include_company=True)).get(job_id)
     
     if not job:
         return error_response("Offre non trouvée", 404)
     
-    # Incrémenter les vues
-    job.views_count += 1
-    db.session.commit()
+    # Incrémenter les vues (écriture différée, sans modifier updated_at)
+    counter_buffer.increment(Job, 'views_count', job.id)
+    
+    not_modified = check_not_modified(
+        etag=entity_etag(job, job.company),
+        last_modified=entity_last_modified(job, job.company)
+    )
+    if not_modified:
+        return not_modified
     
     return success_response({
         'job': job.to_dict(include_company=True)
     })
 
 
+@jobs_bp.route('/<int:job_id>/similar', methods=['GET'])
+@conditional_get(max_age=300)
+def get_similar_jobs(job_id):
+    """Offres similaires (compétences et titre, index LSH)"""
+    job = Job.query.get(job_id)
+    
+    if not job:
+        return error_response("Offre non trouvée", 404)
+    
+    limit = max(1, min(request.args.get('limit', 6, type=int), 20))
+    
+    jobs = []
+    for other, similarity in similarity_service.similar_jobs(job, limit=limit):
+        job_data = other.to_dict(include_company=True)
+        job_data['similarity'] = round(similarity * 100, 1)
+        jobs.append(job_data)
+    
+    return success_response({
+        'jobs': jobs
+    })
+
+
 # ================================================================
 # GESTION DES OFFRES (ENTREPRISE)
 # ================================================================
@@ -440,10 +478,10 @@ def apply_to_job(job_id):
     )
     
     db.session.add(application)
-    job.applications_count += 1
     
     try:
         db.session.commit()
+        counter_buffer.increment(Job, 'applications_count', job.id)
         
         # TODO: Notifier l'entreprise
         
@@ -13,7 +13,10 @@ import io as io_module
 from app import db
 from app.models import User, Candidate, Company, Match, CVAnalysis
 from app.utils.helpers import success_response, error_response, safe_int
-from app.services.pdf_generator import pdf_generator
+from app.utils.lazy import lazy_service
+
+# reportlab chargé à la première génération de PDF
+pdf_generator = lazy_service('app.services.pdf_generator:pdf_generator')
 
 matches_bp = Blueprint('matches', __name__)
 
@@ -66,21 +69,23 @@ def get_matches():
     if status:
         query = query.filter_by(status=status)
 
-    # Récupérer les matchs
-    matches = query.order_by(
+    # Relations nécessaires à la sérialisation
+    serializer_flags = {
+        'include_candidate': user.role == 'company',
+        'include_job': user.role == 'candidate',
+        'include_analysis': True
+    }
+
+    # Récupérer les matchs (relations chargées en un nombre constant de requêtes)
+    matches = query.options(
+        *Match.loader_options(**serializer_flags)
+    ).order_by(
         Match.match_score.desc(),
         Match.created_at.desc()
     ).limit(limit).all()
 
     # Sérialiser avec les détails
-    matches_data = [
-        m.to_dict(
-            include_candidate=(user.role == 'company'),
-            include_job=(user.role == 'candidate'),
-            include_analysis=True
-        )
-        for m in matches
-    ]
+    matches_data = [m.to_dict(**serializer_flags) for m in matches]
 
     return success_response({
         'matches': matches_data,
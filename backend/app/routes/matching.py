@@ -5,10 +5,12 @@ Routes Matching - BaraCorrespondance AI
 """
 
 from flask import Blueprint, request
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required
 
-from app.models import User, Candidate, Job
-from app.utils.helpers import success_response, error_response, safe_int
+from app.models import Candidate, Job
+from app.utils.helpers import success_response, error_response
+from app.utils.identity import current_actor
+from app.utils.db_routing import read_only
 from app.services.matching_service import matching_service
 
 matching_bp = Blueprint('matching', __name__)
@@ -16,6 +18,7 @@ matching_bp = Blueprint('matching', __name__)
 
 @matching_bp.route('/jobs', methods=['GET'])
 @jwt_required()
+@read_only
 def get_matched_jobs():
     """
     Obtenir les offres correspondant au profil du candidat
@@ -24,13 +27,10 @@ def get_matched_jobs():
     - limit: Nombre max de résultats (default: 20)
     - min_score: Score minimum (default: 50)
     """
-    user_id = safe_int(get_jwt_identity())
-    user = User.query.get(user_id)
-
-    if not user or user.role != 'candidate':
+    if not current_actor or current_actor.role != 'candidate':
         return error_response("Accès réservé aux candidats", 403)
 
-    candidate = user.candidate
+    candidate = current_actor.candidate
     if not candidate:
         return error_response("Profil candidat non trouvé", 404)
 
@@ -53,6 +53,7 @@ def get_matched_jobs():
 
 @matching_bp.route('/candidates', methods=['GET'])
 @jwt_required()
+@read_only
 def get_matched_candidates():
     """
     Obtenir les candidats correspondant aux offres de l'entreprise
@@ -62,13 +63,10 @@ def get_matched_candidates():
     - limit: Nombre max de résultats (default: 20)
     - min_score: Score minimum (default: 50)
     """
-    user_id = safe_int(get_jwt_identity())
-    user = User.query.get(user_id)
-
-    if not user or user.role != 'company':
+    if not current_actor or current_actor.role != 'company':
         return error_response("Accès réservé aux entreprises", 403)
 
-    company = user.company
+    company = current_actor.company
     if not company:
         return error_response("Profil entreprise non trouvé", 404)
 
@@ -101,13 +99,16 @@ def get_matched_candidates():
             is_active=True
         ).all()
 
+        # Un seul chargement du vivier, noté contre toutes les offres
+        matches_by_job = matching_service.get_matched_candidates_for_jobs(
+            jobs,
+            limit=5,  # Limiter par offre
+            min_score=min_score
+        )
+
         all_matches = {}
         for job in jobs:
-            matches = matching_service.get_matched_candidates_for_job(
-                job.id,
-                limit=5,  # Limiter par offre
-                min_score=min_score
-            )
+            matches = matches_by_job.get(job.id)
             if matches:
                 all_matches[job.id] = {
                     'job': job.to_dict(),
@@ -130,13 +131,10 @@ def calculate_match():
     Body:
     - job_id: ID de l'offre
     """
-    user_id = safe_int(get_jwt_identity())
-    user = User.query.get(user_id)
-
-    if not user or user.role != 'candidate':
+    if not current_actor or current_actor.role != 'candidate':
         return error_response("Accès réservé aux candidats", 403)
 
-    candidate = user.candidate
+    candidate = current_actor.candidate
     if not candidate:
         return error_response("Profil candidat non trouvé", 404)
 
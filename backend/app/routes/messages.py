@@ -6,13 +6,16 @@ Gestion de la messagerie entre candidats et entreprises
 """
 
 from flask import Blueprint, request, current_app
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required
 from sqlalchemy import or_, and_
 
 from app import db
-from app.models import User, Candidate, Company, Match, Message
-from app.utils.helpers import success_response, error_response, safe_int
+from app.models import Candidate, Company, Match, Message
+from app.utils.helpers import success_response, error_response
+from app.utils.identity import current_actor
+from app.utils.db_routing import latency_sensitive
 from app.models.notification import create_notification
+from app.services.realtime_service import realtime_service
 
 messages_bp = Blueprint('messages', __name__)
 
@@ -21,16 +24,18 @@ messages_bp = Blueprint('messages', __name__)
 @jwt_required()
 def get_messages(match_id):
     """
-    Récupérer tous les messages d'un match
+    Récupérer les messages d'un match (pagination par curseur)
+
+    Query params:
+    - before_id: messages antérieurs à cet ID (défaut: les plus récents)
+    - after_id: messages postérieurs à cet ID
+    - limit: taille de page (default: 50, max: 100)
 
     Permissions:
     - Candidat ou entreprise du match
     - Match doit être mutual_interest
     """
-    user_id = safe_int(get_jwt_identity())
-    user = User.query.get(user_id)
-
-    if not user:
+    if not current_actor:
         return error_response("Utilisateur non trouvé", 404)
 
     # Récupérer le match
@@ -38,14 +43,12 @@ def get_messages(match_id):
     if not match:
         return error_response("Match non trouvé", 404)
 
-    # Vérifier les permissions
-    if user.role == 'candidate':
-        candidate = user.candidate
-        if not candidate or match.candidate_id != candidate.id:
+    # Vérifier les permissions (IDs de profil lus dans le token)
+    if current_actor.role == 'candidate':
+        if not current_actor.candidate_id or match.candidate_id != current_actor.candidate_id:
             return error_response("Accès non autorisé", 403)
-    elif user.role == 'company':
-        company = user.company
-        if not company or match.job.company_id != company.id:
+    elif current_actor.role == 'company':
+        if not current_actor.company_id or match.job.company_id != current_actor.company_id:
             return error_response("Accès non autorisé", 403)
     else:
         return error_response("Accès non autorisé", 403)
@@ -54,19 +57,29 @@ def get_messages(match_id):
     if not match.is_mutual_interest:
         return error_response("La messagerie n'est disponible que pour les matchs mutuels", 403)
 
-    # Récupérer les messages
-    messages = Message.query.filter_by(match_id=match_id).order_by(Message.created_at.asc()).all()
+    # Marquer les messages de l'autre partie comme lus (un seul UPDATE)
+    other_party = 'company' if current_actor.role == 'candidate' else 'candidate'
+    read_count = Message.mark_all_as_read(match_id, other_party)
+    realtime_service.messages_read(match_id, current_actor.id, current_actor.role, read_count)
 
-    # Marquer les messages de l'autre partie comme lus
-    for message in messages:
-        if user.role == 'candidate' and message.sender_type == 'company':
-            message.mark_as_read()
-        elif user.role == 'company' and message.sender_type == 'candidate':
-            message.mark_as_read()
+    # Récupérer la page de messages
+    limit = max(1, min(request.args.get('limit', 50, type=int), 100))
+    messages, has_more = Message.get_page(
+        match_id,
+        before_id=request.args.get('before_id', type=int),
+        after_id=request.args.get('after_id', type=int),
+        limit=limit
+    )
 
     return success_response({
         'messages': [msg.to_dict() for msg in messages],
-        'match': match.to_dict()
+        'match': match.to_dict(),
+        'pagination': {
+            'limit': limit,
+            'has_more': has_more,
+            'before_id': messages[0].id if messages else None,
+            'after_id': messages[-1].id if messages else None
+        }
     })
 
 
@@ -81,10 +94,7 @@ def send_message(match_id):
         "content": "Message text"
     }
     """
-    user_id = safe_int(get_jwt_identity())
-    user = User.query.get(user_id)
-
-    if not user:
+    if not current_actor:
         return error_response("Utilisateur non trouvé", 404)
 
     # Validation
@@ -107,20 +117,18 @@ def send_message(match_id):
     sender_id = None
     recipient_user_id = None
 
-    if user.role == 'candidate':
-        candidate = user.candidate
-        if not candidate or match.candidate_id != candidate.id:
+    if current_actor.role == 'candidate':
+        if not current_actor.candidate_id or match.candidate_id != current_actor.candidate_id:
             return error_response("Accès non autorisé", 403)
         sender_type = 'candidate'
-        sender_id = candidate.id
+        sender_id = current_actor.candidate_id
         # Récupérer l'user_id de l'entreprise
         recipient_user_id = match.job.company.user.id if match.job.company.user else None
-    elif user.role == 'company':
-        company = user.company
-        if not company or match.job.company_id != company.id:
+    elif current_actor.role == 'company':
+        if not current_actor.company_id or match.job.company_id != current_actor.company_id:
             return error_response("Accès non autorisé", 403)
         sender_type = 'company'
-        sender_id = company.id
+        sender_id = current_actor.company_id
         # Récupérer l'user_id du candidat
         recipient_user_id = match.candidate.user.id if match.candidate.user else None
     else:
@@ -141,10 +149,14 @@ def send_message(match_id):
         db.session.add(message)
         db.session.commit()
 
+        # Pousser le message aux clients connectés
+        realtime_service.message_sent(message, recipient_user_id)
+
         # Envoyer une notification au destinataire
         if recipient_user_id:
             try:
-                sender_name = user.full_name or user.email
+                sender = current_actor.user
+                sender_name = sender.full_name or sender.email
                 notification_message = f"Nouveau message de {sender_name}"
 
                 create_notification(
@@ -177,10 +189,7 @@ def send_message(match_id):
 @jwt_required()
 def mark_message_read(message_id):
     """Marquer un message comme lu"""
-    user_id = safe_int(get_jwt_identity())
-    user = User.query.get(user_id)
-
-    if not user:
+    if not current_actor:
         return error_response("Utilisateur non trouvé", 404)
 
     message = Message.query.get(message_id)
@@ -191,51 +200,31 @@ def mark_message_read(message_id):
     match = message.match
     can_read = False
 
-    if user.role == 'candidate' and message.sender_type == 'company':
-        can_read = match.candidate_id == user.candidate.id
-    elif user.role == 'company' and message.sender_type == 'candidate':
-        can_read = match.job.company_id == user.company.id
+    if current_actor.role == 'candidate' and message.sender_type == 'company':
+        can_read = match.candidate_id == current_actor.candidate_id
+    elif current_actor.role == 'company' and message.sender_type == 'candidate':
+        can_read = match.job.company_id == current_actor.company_id
 
     if not can_read:
         return error_response("Accès non autorisé", 403)
 
-    message.mark_as_read()
+    if not message.is_read:
+        message.mark_as_read()
+        realtime_service.messages_read(match.id, current_actor.id, current_actor.role, 1)
 
     return success_response(message.to_dict(), "Message marqué comme lu")
 
 
 @messages_bp.route('/unread-count', methods=['GET'])
 @jwt_required()
+@latency_sensitive
 def get_unread_count():
     """Récupérer le nombre de messages non lus"""
-    user_id = safe_int(get_jwt_identity())
-    user = User.query.get(user_id)
-
-    if not user:
+    if not current_actor:
         return error_response("Utilisateur non trouvé", 404)
 
     # Compter les messages non lus
-    unread_count = 0
-
-    if user.role == 'candidate':
-        candidate = user.candidate
-        if candidate:
-            # Messages des entreprises non lus
-            unread_count = Message.query.join(Match).filter(
-                Match.candidate_id == candidate.id,
-                Message.sender_type == 'company',
-                Message.is_read == False
-            ).count()
-    elif user.role == 'company':
-        company = user.company
-        if company:
-            # Messages des candidats non lus
-            from app.models import Job
-            unread_count = Message.query.join(Match).join(Job).filter(
-                Job.company_id == company.id,
-                Message.sender_type == 'candidate',
-                Message.is_read == False
-            ).count()
+    unread_count = Message.unread_count_for(current_actor)
 
     return success_response({
         'unread_count': unread_count
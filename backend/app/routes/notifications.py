@@ -11,6 +11,8 @@ from datetime import datetime
 from app import db
 from app.models import User, Notification
 from app.utils.helpers import success_response, error_response, safe_int
+from app.utils.db_routing import latency_sensitive
+from app.services.realtime_service import realtime_service
 
 notifications_bp = Blueprint('notifications', __name__)
 
@@ -22,26 +24,34 @@ def get_notifications():
     Récupérer les notifications de l'utilisateur
 
     Query params:
-    - limit: Nombre max (default: 20)
+    - limit: Nombre max (default: 20, max: 100)
     - unread_only: true/false (default: false)
+    - before_id: notifications antérieures à cet ID (page suivante)
     """
     user_id = safe_int(get_jwt_identity())
 
-    limit = request.args.get('limit', 20, type=int)
+    limit = max(1, min(request.args.get('limit', 20, type=int), 100))
     unread_only = request.args.get('unread_only', 'false').lower() == 'true'
+    before_id = request.args.get('before_id', type=int)
 
     query = Notification.query.filter_by(user_id=user_id)
 
     if unread_only:
         query = query.filter_by(is_read=False)
 
-    notifications = query.order_by(
-        Notification.created_at.desc()
-    ).limit(limit).all()
+    if before_id:
+        query = query.filter(Notification.id < before_id)
+
+    rows = query.order_by(
+        Notification.id.desc()
+    ).limit(limit + 1).all()
+    notifications = rows[:limit]
 
     return success_response({
         'notifications': [n.to_dict() for n in notifications],
         'total': len(notifications),
+        'has_more': len(rows) > limit,
+        'next_before_id': notifications[-1].id if notifications else None,
         'unread_count': Notification.query.filter_by(
             user_id=user_id,
             is_read=False
@@ -51,6 +61,7 @@ def get_notifications():
 
 @notifications_bp.route('/unread-count', methods=['GET'])
 @jwt_required()
+@latency_sensitive
 def get_unread_count():
     """Récupérer le nombre de notifications non lues"""
     user_id = safe_int(get_jwt_identity())
@@ -79,9 +90,13 @@ def mark_as_read(notification_id):
     if not notification:
         return error_response("Notification non trouvée", 404)
 
+    was_unread = not notification.is_read
     notification.mark_as_read()
     db.session.commit()
 
+    if was_unread:
+        realtime_service.push_counters(user_id, notifications=-1)
+
     return success_response({
         'notification': notification.to_dict()
     })
@@ -93,18 +108,13 @@ def mark_all_as_read():
     """Marquer toutes les notifications comme lues"""
     user_id = safe_int(get_jwt_identity())
 
-    notifications = Notification.query.filter_by(
-        user_id=user_id,
-        is_read=False
-    ).all()
-
-    for notification in notifications:
-        notification.mark_as_read()
-
+    marked_count = Notification.mark_all_as_read(user_id)
     db.session.commit()
 
+    realtime_service.push_counters(user_id, notifications=-marked_count)
+
     return success_response({
-        'marked_count': len(notifications)
+        'marked_count': marked_count
     })
 
 
@@ -122,9 +132,13 @@ def delete_notification(notification_id):
     if not notification:
         return error_response("Notification non trouvée", 404)
 
+    was_unread = not notification.is_read
     db.session.delete(notification)
     db.session.commit()
 
+    if was_unread:
+        realtime_service.push_counters(user_id, notifications=-1)
+
     return success_response(message="Notification supprimée")
 
 
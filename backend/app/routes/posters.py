@@ -5,14 +5,17 @@ Routes Posters - BaraCorrespondance AI
 Gestion de la génération d'affiches d'emploi par IA
 """
 
-from flask import Blueprint, request, send_file, current_app
+from flask import Blueprint, request, current_app, redirect, url_for
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from datetime import datetime
-import os
+from io import BytesIO
 import time
 
 from app import db
 from app.models import User, Company, Job, Poster
+from app.models.blob import blob_key
+from app.services.blob_store import blob_store
+from app.services.image_derivatives import image_derivatives
 from app.services.poster_generator import poster_generator
 from app.utils.helpers import success_response, error_response, safe_int
 
@@ -97,15 +100,10 @@ def generate_poster():
         db.session.add(poster)
         db.session.flush()  # Pour obtenir l'ID
 
-        # Créer le fichier image
-        upload_folder = current_app.config.get('UPLOAD_FOLDER', 'app/static/uploads')
-        posters_folder = os.path.join(upload_folder, 'posters')
-        os.makedirs(posters_folder, exist_ok=True)
-
-        # Nom de fichier unique
+        # Nom de fichier proposé au téléchargement
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         file_name = f"poster_{job_id}_{timestamp}.png"
-        file_path = os.path.join(posters_folder, file_name)
+        buffer = BytesIO()
 
         # Préparer les données pour la création d'image
         poster_data = {
@@ -123,7 +121,7 @@ def generate_poster():
 
         # Générer l'image
         current_app.logger.info(f"🖼️ Création de l'image pour poster {poster.id}")
-        image_result = poster_generator.create_poster_image(poster_data, file_path)
+        image_result = poster_generator.create_poster_image(poster_data, buffer)
 
         if not image_result.get('success'):
             db.session.rollback()
@@ -131,13 +129,17 @@ def generate_poster():
 
         # Mettre à jour le poster avec les infos du fichier
         poster.file_name = file_name
-        poster.file_path = file_path
+        buffer.seek(0)
+        poster.file_path = blob_store.put(buffer, 'image/png', '.png')
         poster.file_url = f"/api/posters/{poster.id}/download"
         poster.file_size = image_result.get('file_size')
         poster.generation_time = round(time.time() - start_time, 2)
 
         db.session.commit()
 
+        # Miniatures pour les listes (arrière-plan)
+        image_derivatives.schedule('poster', poster.id)
+
         current_app.logger.info(f"✅ Poster {poster.id} créé avec succès en {poster.generation_time}s")
 
         return success_response({
@@ -180,7 +182,9 @@ def get_posters():
 
     limit = request.args.get('limit', 20, type=int)
 
-    posters = query.order_by(Poster.created_at.desc()).limit(limit).all()
+    posters = query.options(
+        *Poster.loader_options(include_job=True)
+    ).order_by(Poster.created_at.desc()).limit(limit).all()
 
     return success_response({
         'posters': [p.to_dict(include_job=True) for p in posters],
@@ -219,18 +223,19 @@ def download_poster(poster_id):
     if not poster:
         return error_response("Affiche non trouvée", 404)
 
-    if not os.path.exists(poster.file_path):
-        return error_response("Fichier non trouvé", 404)
-
-    # Incrémenter le compteur de téléchargements
-    poster.increment_downloads()
-
-    return send_file(
+    response = blob_store.send(
         poster.file_path,
         mimetype='image/png',
         as_attachment=True,
         download_name=poster.file_name
     )
+    if response is None:
+        return error_response("Fichier non trouvé", 404)
+
+    # Incrémenter le compteur de téléchargements
+    poster.increment_downloads()
+
+    return response
 
 
 @posters_bp.route('/<int:poster_id>/view', methods=['GET'])
@@ -241,16 +246,24 @@ def view_poster(poster_id):
     if not poster:
         return error_response("Affiche non trouvée", 404)
 
-    if not os.path.exists(poster.file_path):
+    # Image adressée par contenu: redirection vers son URL immuable (cache navigateur/CDN)
+    if blob_key(poster.file_path):
+        poster.increment_views()
+        return redirect(url_for(
+            'uploads.serve_upload', filename=poster.file_path[len('/uploads/'):]
+        ), 302)
+
+    response = blob_store.send(
+        poster.file_path,
+        mimetype='image/png'
+    )
+    if response is None:
         return error_response("Fichier non trouvé", 404)
 
     # Incrémenter le compteur de vues
     poster.increment_views()
 
-    return send_file(
-        poster.file_path,
-        mimetype='image/png'
-    )
+    return response
 
 
 @posters_bp.route('/<int:poster_id>', methods=['DELETE'])
@@ -272,14 +285,15 @@ def delete_poster(poster_id):
         return error_response("Affiche non trouvée", 404)
 
     try:
-        # Supprimer le fichier physique
-        if poster.file_path and os.path.exists(poster.file_path):
-            os.remove(poster.file_path)
+        previous_path = poster.file_path
 
-        # Supprimer l'enregistrement
+        # Supprimer l'enregistrement (le blob est libéré par son compteur)
         db.session.delete(poster)
         db.session.commit()
 
+        # Supprimer le fichier physique s'il précède le stockage par contenu
+        blob_store.discard_legacy(previous_path)
+
         return success_response({
             'message': 'Affiche supprimée avec succès'
         })
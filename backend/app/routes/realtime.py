@@ -0,0 +1,102 @@
+"""
+================================================================
+Événements Socket.IO - BaraCorrespondance AI
+================================================================
+Canal push pour les notifications, messages et compteurs de non-lus
+
+Connexion client:
+    io(API_URL, { auth: { token: '<access_token>' } })
+
+Événements client -> serveur:
+- join_match  {match_id}  : suivre le fil d'un match mutuel
+- leave_match {match_id}
+
+Événements serveur -> client: voir RealtimeService
+"""
+
+from flask import request, current_app
+from flask_jwt_extended import decode_token
+from flask_socketio import join_room, leave_room, emit, ConnectionRefusedError
+
+from app import socketio
+from app.models import User, Match, Message, Notification
+from app.utils.helpers import safe_int
+from app.services.realtime_service import realtime_service
+
+# sid -> user_id des connexions authentifiées de ce processus
+_connected_users = {}
+
+
+def _current_user():
+    """Utilisateur associé à la connexion Socket.IO courante"""
+    user_id = _connected_users.get(request.sid)
+    return User.query.get(user_id) if user_id else None
+
+
+def _can_access_match(user, match):
+    """Vérifier qu'un utilisateur participe à un match mutuel"""
+    if not match or not match.is_mutual_interest:
+        return False
+    if user.role == 'candidate':
+        return bool(user.candidate) and match.candidate_id == user.candidate.id
+    if user.role == 'company':
+        return bool(user.company) and match.job.company_id == user.company.id
+    return False
+
+
+@socketio.on('connect')
+def handle_connect(auth):
+    """Authentifier la connexion avec le token JWT d'accès"""
+    token = (auth or {}).get('token') or request.args.get('token')
+    if not token:
+        raise ConnectionRefusedError('Token d\'authentification manquant')
+
+    try:
+        claims = decode_token(token)
+    except Exception:
+        raise ConnectionRefusedError('Token invalide')
+
+    # Les tokens de rafraîchissement (longue durée) ne donnent pas accès au canal
+    if claims.get('type') != 'access':
+        raise ConnectionRefusedError('Token d\'accès requis')
+
+    user = User.query.get(safe_int(claims.get('sub')))
+    if not user or not user.is_active:
+        raise ConnectionRefusedError('Utilisateur non trouvé')
+
+    _connected_users[request.sid] = user.id
+    join_room(realtime_service.user_room(user.id))
+
+    # État initial des compteurs: le client n'a plus besoin de les interroger
+    emit(realtime_service.EVENT_COUNTERS, {
+        'notifications_unread': Notification.query.filter_by(user_id=user.id, is_read=False).count(),
+        'messages_unread': Message.unread_count_for(user)
+    })
+
+
+@socketio.on('disconnect')
+def handle_disconnect():
+    """Oublier la connexion"""
+    _connected_users.pop(request.sid, None)
+
+
+@socketio.on('join_match')
+def handle_join_match(data):
+    """Rejoindre la salle d'un match pour recevoir les nouveaux messages"""
+    user = _current_user()
+    match = Match.query.get(safe_int((data or {}).get('match_id')))
+
+    if not user or not _can_access_match(user, match):
+        return {'success': False, 'message': 'Accès non autorisé'}
+
+    join_room(realtime_service.match_room(match.id))
+    current_app.logger.debug(f"Socket {request.sid} a rejoint le match {match.id}")
+    return {'success': True}
+
+
+@socketio.on('leave_match')
+def handle_leave_match(data):
+    """Quitter la salle d'un match"""
+    match_id = safe_int((data or {}).get('match_id'))
+    leave_room(realtime_service.match_room(match_id))
+    return {'success': True}
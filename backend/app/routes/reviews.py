@@ -12,6 +12,8 @@ from sqlalchemy import desc
 from app import db
 from app.models import User, Candidate, Company, Review
 from app.utils.helpers import success_response, error_response, safe_int
+from app.utils.http_cache import conditional_get
+from app.services.counter_service import counter_buffer
 
 reviews_bp = Blueprint('reviews', __name__)
 
@@ -266,6 +268,7 @@ def get_company_reviews(company_id):
 
 
 @reviews_bp.route('/stats/<string:entity_type>/<int:entity_id>', methods=['GET'])
+@conditional_get(max_age=60)
 def get_review_stats(entity_type, entity_id):
     """Obtenir uniquement les statistiques d'avis"""
     if entity_type not in ['candidate', 'company']:
@@ -306,10 +309,10 @@ def mark_helpful(review_id):
     if not review:
         return error_response("Avis non trouvé", 404)
 
-    review.helpful_count += 1
-    db.session.commit()
+    counter_buffer.increment(Review, 'helpful_count', review.id)
+    helpful_count = (review.helpful_count or 0) + counter_buffer.pending(Review, 'helpful_count', review.id)
 
-    return success_response({'helpful_count': review.helpful_count}, "Merci pour votre retour")
+    return success_response({'helpful_count': helpful_count}, "Merci pour votre retour")
 
 
 @reviews_bp.route('/my-reviews', methods=['GET'])
@@ -13,6 +13,7 @@ from datetime import datetime
 from app import db
 from app.models import User, Candidate, SkillTest, TestResult
 from app.utils.helpers import success_response, error_response, safe_int
+from app.utils.http_cache import conditional_get
 
 skill_tests_bp = Blueprint('skill_tests', __name__)
 
@@ -281,6 +282,7 @@ def get_result(result_id):
 
 
 @skill_tests_bp.route('/categories', methods=['GET'])
+@conditional_get(max_age=300)
 def get_categories():
     """Obtenir toutes les catégories de compétences disponibles"""
     categories = db.session.query(SkillTest.skill_category).filter_by(is_active=True).distinct().all()
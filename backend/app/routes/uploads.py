@@ -4,20 +4,26 @@ Routes Upload de fichiers - BaraCorrespondance AI
 ================================================================
 """
 
-import os
+from contextlib import nullcontext
 from datetime import datetime
-from flask import Blueprint, request, current_app, send_from_directory, send_file
+from flask import Blueprint, request, current_app, send_file
 from flask_jwt_extended import jwt_required, get_jwt_identity, verify_jwt_in_request
-from werkzeug.utils import secure_filename
 
 from app import db
 from app.models import User, Candidate, Company, CVAnalysis
+from app.models.blob import blob_key
 from app.utils.helpers import success_response, error_response, safe_int
-from app.utils.validators import allowed_cv_file, allowed_image_file, generate_unique_filename
+from app.utils.validators import allowed_cv_file, allowed_image_file, file_extension
+from app.services.blob_store import BlobTooLarge, blob_store
+from app.services.image_derivatives import image_derivatives
+from app.services.resumable_uploads import UploadSessionError, resumable_uploads
 from app.services.cv_analyzer import CVAnalyzerService
 from app.services.ai_analyzer import ai_analyzer_service
-from app.services.pdf_generator import pdf_generator
 from app.services.auto_matcher import auto_matcher
+from app.utils.lazy import lazy_service
+
+# reportlab chargé à la première génération de PDF
+pdf_generator = lazy_service('app.services.pdf_generator:pdf_generator')
 
 uploads_bp = Blueprint('uploads', __name__)
 
@@ -82,121 +88,276 @@ def upload_cv():
             400
         )
     
-    # Vérifier la taille
-    file.seek(0, 2)
-    file_size = file.tell()
-    file.seek(0)
-    
+    # Sauvegarder le fichier (taille vérifiée pendant l'écriture)
     max_size = current_app.config.get('MAX_CONTENT_LENGTH', 10 * 1024 * 1024)
-    if file_size > max_size:
+    try:
+        # Stockage adressé par contenu (URL relative pour stockage en BDD)
+        relative_url = blob_store.put(
+            file.stream, file.mimetype, file_extension(file.filename), max_size=max_size
+        )
+        file_size = file.stream.tell()
+    except BlobTooLarge:
         return error_response(
             f"Fichier trop volumineux. Maximum: {max_size // (1024*1024)} MB",
             400
         )
     
-    # Sauvegarder le fichier
     try:
-        filename = generate_unique_filename(file.filename, prefix=f'cv_{candidate.id}')
-        upload_folder = os.path.join(
-            current_app.config.get('UPLOAD_FOLDER', 'app/static/uploads'),
-            'cv'
-        )
-        os.makedirs(upload_folder, exist_ok=True)
-        
-        filepath = os.path.join(upload_folder, filename)
-        file.save(filepath)
-        
-        # URL relative pour stockage en BDD
-        relative_url = f'/uploads/cv/{filename}'
-        
-        # Mettre à jour le profil candidat
-        candidate.cv_url = relative_url
-        candidate.cv_filename = file.filename
-        candidate.cv_uploaded_at = datetime.utcnow()
+        analyze = request.form.get('analyze', 'true').lower() == 'true'
+        response_data = _attach_cv(candidate, relative_url, file.filename, file_size, analyze)
+        return success_response(response_data, "CV uploadé avec succès", 201)
         
-        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        return error_response(f"Erreur lors de l'upload: {str(e)}", 500)
+
+
+def _attach_cv(candidate, relative_url, file_name, file_size, analyze, local_path=None):
+    """
+    Enregistrer le CV du candidat puis l'analyser (matching automatique compris)
+    
+    Args:
+        candidate: Profil candidat
+        relative_url: URL du blob
+        file_name: Nom d'origine du fichier
+        file_size: Taille en octets
+        analyze: Lancer l'analyse
+        local_path: Copie locale déjà disponible (upload reprenable), sinon le blob est lu en place
         
-        # Lancer l'analyse si demandé
-        analyze = request.form.get('analyze', 'true').lower() == 'true'
-        analysis_result = None
+    Returns:
+        dict: Données de la réponse (cv, analysis)
+    """
+    # Mettre à jour le profil candidat
+    candidate.cv_url = relative_url
+    candidate.cv_filename = file_name
+    candidate.cv_uploaded_at = datetime.utcnow()
+    
+    db.session.commit()
+    
+    # Lancer l'analyse si demandé
+    analysis_result = None
 
-        if analyze:
-            try:
-                # Extraire le texte du CV
-                analyzer = CVAnalyzerService()
-                cv_text = analyzer._extract_text(filepath)
+    if analyze:
+        try:
+            # Extraire le texte du CV (une seule lecture du fichier)
+            analyzer = CVAnalyzerService()
+            source = nullcontext(local_path) if local_path else blob_store.local_file(relative_url)
+            with source as filepath:
+                cv_text = analyzer._extract_text(filepath, file_name)
 
                 # Utiliser l'analyse IA si la clé API est configurée
                 if current_app.config.get('OPENAI_API_KEY'):
                     analysis_result = ai_analyzer_service.analyze_cv(cv_text)
                 else:
                     # Fallback vers l'analyse basique
-                    analysis_result = analyzer.analyze_file(filepath, candidate.id)
-
-                # Marquer les anciennes analyses comme non-latest
-                CVAnalysis.query.filter_by(
-                    candidate_id=candidate.id,
-                    is_latest=True
-                ).update({'is_latest': False})
-
-                # Sauvegarder l'analyse en base
-                cv_analysis = CVAnalysis(
-                    candidate_id=candidate.id,
-                    file_url=relative_url,
-                    file_name=file.filename,
-                    file_type=file.filename.rsplit('.', 1)[1].lower() if '.' in file.filename else 'pdf',
-                    file_size=file_size,
-                    raw_text=cv_text[:10000],  # Limiter la taille
-                    extracted_data=analysis_result.get('extracted_data', {}),
-                    overall_score=analysis_result.get('overall_score', 0),
-                    scores_breakdown=analysis_result.get('scores_breakdown', {}),
-                    recommendations=analysis_result.get('recommendations', []),
-                    keywords=analysis_result.get('keywords', []),
-                    is_latest=True
-                )
-                db.session.add(cv_analysis)
-                db.session.commit()
-
-                # Ajouter l'ID de l'analyse pour le PDF
-                analysis_result['analysis_id'] = cv_analysis.id
-
-                # 🔄 MATCHING AUTOMATIQUE - Rechercher les offres correspondantes
-                try:
-                    current_app.logger.info(f"Lancement du matching automatique pour {candidate.user.full_name if candidate.user else 'candidat'}")
-                    matches = auto_matcher.find_matches_for_cv(cv_analysis)
-                    current_app.logger.info(f"✅ {len(matches)} match(s) trouvé(s) et notifié(s)")
-
-                    # Ajouter le nombre de matchs dans la réponse
-                    analysis_result['matches_found'] = len(matches)
-                except Exception as match_error:
-                    current_app.logger.error(f"Erreur matching automatique: {match_error}")
-                    # Ne pas échouer l'upload si le matching échoue
-                    analysis_result['matches_found'] = 0
-
-            except Exception as e:
-                # Ne pas échouer si l'analyse échoue
-                current_app.logger.error(f"Erreur analyse CV: {e}")
-                print(f"Erreur analyse CV: {e}")
-        
-        response_data = {
-            'cv': {
-                'url': relative_url,
-                'filename': file.filename,
-                'size': file_size,
-                'uploaded_at': candidate.cv_uploaded_at.isoformat()
-            }
+                    analysis_result = analyzer.analyze_file(
+                        filepath, candidate.id, file_url=relative_url, file_name=file_name, raw_text=cv_text
+                    )
+
+            # Marquer les anciennes analyses comme non-latest
+            CVAnalysis.query.filter_by(
+                candidate_id=candidate.id,
+                is_latest=True
+            ).update({'is_latest': False})
+
+            # Sauvegarder l'analyse en base
+            cv_analysis = CVAnalysis(
+                candidate_id=candidate.id,
+                file_url=relative_url,
+                file_name=file_name,
+                file_type=file_name.rsplit('.', 1)[1].lower() if '.' in file_name else 'pdf',
+                file_size=file_size,
+                raw_text=cv_text[:10000],  # Limiter la taille
+                extracted_data=analysis_result.get('extracted_data', {}),
+                overall_score=analysis_result.get('overall_score', 0),
+                scores_breakdown=analysis_result.get('scores_breakdown', {}),
+                recommendations=analysis_result.get('recommendations', []),
+                keywords=analysis_result.get('keywords', []),
+                is_latest=True
+            )
+            db.session.add(cv_analysis)
+            db.session.commit()
+
+            # Ajouter l'ID de l'analyse pour le PDF
+            analysis_result['analysis_id'] = cv_analysis.id
+
+            # 🔄 MATCHING AUTOMATIQUE - Rechercher les offres correspondantes
+            try:
+                current_app.logger.info(f"Lancement du matching automatique pour {candidate.user.full_name if candidate.user else 'candidat'}")
+                matches = auto_matcher.find_matches_for_cv(cv_analysis)
+                current_app.logger.info(f"✅ {len(matches)} match(s) trouvé(s) et notifié(s)")
+
+                # Ajouter le nombre de matchs dans la réponse
+                analysis_result['matches_found'] = len(matches)
+            except Exception as match_error:
+                current_app.logger.error(f"Erreur matching automatique: {match_error}")
+                # Ne pas échouer l'upload si le matching échoue
+                analysis_result['matches_found'] = 0
+
+        except Exception as e:
+            # Ne pas échouer si l'analyse échoue
+            current_app.logger.error(f"Erreur analyse CV: {e}")
+            print(f"Erreur analyse CV: {e}")
+    
+    response_data = {
+        'cv': {
+            'url': relative_url,
+            'filename': file_name,
+            'size': file_size,
+            'uploaded_at': candidate.cv_uploaded_at.isoformat()
         }
-        
-        if analysis_result:
-            response_data['analysis'] = analysis_result
-        
+    }
+    
+    if analysis_result:
+        response_data['analysis'] = analysis_result
+    
+    return response_data
+
+
+# ================================================================
+# UPLOAD CV REPRENABLE (PAR MORCEAUX)
+# ================================================================
+
+def _session_error(error):
+    """Réponse d'erreur d'une session (avec le décalage à reprendre)"""
+    response, status = error_response(str(error), error.status)
+    if error.offset is not None:
+        response.headers['Upload-Offset'] = str(error.offset)
+    return response, status
+
+
+def _current_candidate():
+    """Candidat connecté, ou réponse d'erreur"""
+    user = User.query.get(safe_int(get_jwt_identity()))
+    if not user or user.role != 'candidate':
+        return None, error_response("Accès réservé aux candidats", 403)
+    if not user.candidate:
+        return None, error_response("Profil candidat non trouvé", 404)
+    return user.candidate, None
+
+
+@uploads_bp.route('/cv/sessions', methods=['POST'])
+@jwt_required()
+def create_cv_upload_session():
+    """
+    Ouvrir un upload de CV reprenable
+    
+    Body:
+    {
+        "file_name": "cv.pdf",
+        "size": 2456789,
+        "content_type": "application/pdf",  (optionnel)
+        "sha256": "...",                    (optionnel, vérifié à la fin)
+        "analyze": true                     (optionnel)
+    }
+    """
+    candidate, error = _current_candidate()
+    if error:
+        return error
+    
+    data = request.get_json() or {}
+    try:
+        session = resumable_uploads.create(
+            candidate.user_id,
+            data.get('file_name', ''),
+            data.get('size'),
+            content_type=data.get('content_type'),
+            sha256=data.get('sha256'),
+            analyze=bool(data.get('analyze', True))
+        )
+    except UploadSessionError as e:
+        return _session_error(e)
+    
+    payload = session.to_dict()
+    payload['chunk_size'] = resumable_uploads.chunk_size
+    return success_response({'upload': payload}, "Upload ouvert", 201)
+
+
+@uploads_bp.route('/cv/sessions/<session_id>', methods=['GET', 'HEAD'])
+@jwt_required()
+def get_cv_upload_session(session_id):
+    """État d'un upload (décalage à partir duquel reprendre)"""
+    session = resumable_uploads.get(session_id, safe_int(get_jwt_identity()))
+    if not session:
+        return error_response("Upload non trouvé ou expiré", 404)
+    
+    response, status = success_response({'upload': session.to_dict()})
+    response.headers['Upload-Offset'] = str(session.received_size)
+    response.headers['Upload-Length'] = str(session.total_size)
+    response.headers['Cache-Control'] = 'no-store'
+    return response, status
+
+
+@uploads_bp.route('/cv/sessions/<session_id>', methods=['PATCH'])
+@jwt_required()
+def append_cv_upload_chunk(session_id):
+    """
+    Envoyer un morceau du fichier
+    
+    Headers:
+    - Upload-Offset: décalage du morceau (doit égaler le décalage confirmé)
+    Corps: octets bruts du morceau
+    """
+    session = resumable_uploads.get(session_id, safe_int(get_jwt_identity()))
+    if not session:
+        return error_response("Upload non trouvé ou expiré", 404)
+    
+    offset = request.headers.get('Upload-Offset', type=int)
+    if offset is None:
+        return error_response("En-tête Upload-Offset requis", 400)
+    
+    try:
+        new_offset = resumable_uploads.append(session, offset, request.stream)
+    except UploadSessionError as e:
+        return _session_error(e)
+    
+    response, status = success_response({'upload': session.to_dict()})
+    response.headers['Upload-Offset'] = str(new_offset)
+    return response, status
+
+
+@uploads_bp.route('/cv/sessions/<session_id>/complete', methods=['POST'])
+@jwt_required()
+def complete_cv_upload_session(session_id):
+    """Terminer l'upload: publication du CV puis analyse (comme POST /cv)"""
+    candidate, error = _current_candidate()
+    if error:
+        return error
+    
+    session = resumable_uploads.get(session_id, candidate.user_id)
+    if not session:
+        return error_response("Upload non trouvé ou expiré", 404)
+    
+    try:
+        relative_url, local_path = resumable_uploads.complete(session)
+    except UploadSessionError as e:
+        return _session_error(e)
+    
+    try:
+        response_data = _attach_cv(
+            candidate, relative_url, session.file_name, session.total_size,
+            session.analyze, local_path=local_path
+        )
+        resumable_uploads.discard(session)
         return success_response(response_data, "CV uploadé avec succès", 201)
-        
+    
     except Exception as e:
         db.session.rollback()
         return error_response(f"Erreur lors de l'upload: {str(e)}", 500)
 
 
+@uploads_bp.route('/cv/sessions/<session_id>', methods=['DELETE'])
+@jwt_required()
+def abort_cv_upload_session(session_id):
+    """Abandonner un upload"""
+    session = resumable_uploads.get(session_id, safe_int(get_jwt_identity()))
+    if not session:
+        return error_response("Upload non trouvé ou expiré", 404)
+    
+    resumable_uploads.discard(session)
+    return success_response(message="Upload abandonné")
+
+
 # ================================================================
 # UPLOAD AVATAR
 # ================================================================
@@ -239,31 +400,22 @@ def upload_avatar():
         return error_response("Image trop volumineuse. Maximum: 5 MB", 400)
     
     try:
-        filename = generate_unique_filename(file.filename, prefix=f'avatar_{user.id}')
-        upload_folder = os.path.join(
-            current_app.config.get('UPLOAD_FOLDER', 'app/static/uploads'),
-            'avatars'
-        )
-        os.makedirs(upload_folder, exist_ok=True)
+        previous_url = user.avatar_url
         
-        filepath = os.path.join(upload_folder, filename)
-        file.save(filepath)
+        # Mettre à jour l'utilisateur (les anciens blobs sont libérés par leur compteur)
+        user.avatar_url = blob_store.put(file.stream, file.mimetype, file_extension(file.filename))
+        user.avatar_variants = None
+        db.session.commit()
         
-        # Supprimer l'ancien avatar si existant
-        if user.avatar_url:
-            old_path = os.path.join(
-                current_app.config.get('UPLOAD_FOLDER', 'app/static/uploads'),
-                user.avatar_url.replace('/uploads/', '')
-            )
-            if os.path.exists(old_path):
-                os.remove(old_path)
+        # Supprimer l'ancien avatar s'il précède le stockage par contenu
+        blob_store.discard_legacy(previous_url)
         
-        # Mettre à jour l'utilisateur
-        user.avatar_url = f'/uploads/avatars/{filename}'
-        db.session.commit()
+        # Miniatures générées en arrière-plan
+        image_derivatives.schedule('avatar', user.id)
         
         return success_response({
-            'avatar_url': user.avatar_url
+            'avatar_url': user.avatar_url,
+            'avatar_variants': user.avatar_variants or {}
         }, "Avatar mis à jour")
         
     except Exception as e:
@@ -309,30 +461,22 @@ def upload_logo():
         )
     
     try:
-        filename = generate_unique_filename(file.filename, prefix=f'logo_{company.id}')
-        upload_folder = os.path.join(
-            current_app.config.get('UPLOAD_FOLDER', 'app/static/uploads'),
-            'logos'
-        )
-        os.makedirs(upload_folder, exist_ok=True)
+        previous_url = company.logo_url
         
-        filepath = os.path.join(upload_folder, filename)
-        file.save(filepath)
+        # Les anciens blobs sont libérés par leur compteur
+        company.logo_url = blob_store.put(file.stream, file.mimetype, file_extension(file.filename))
+        company.logo_variants = None
+        db.session.commit()
         
-        # Supprimer l'ancien logo
-        if company.logo_url:
-            old_path = os.path.join(
-                current_app.config.get('UPLOAD_FOLDER', 'app/static/uploads'),
-                company.logo_url.replace('/uploads/', '')
-            )
-            if os.path.exists(old_path):
-                os.remove(old_path)
+        # Supprimer l'ancien logo s'il précède le stockage par contenu
+        blob_store.discard_legacy(previous_url)
         
-        company.logo_url = f'/uploads/logos/{filename}'
-        db.session.commit()
+        # Miniatures générées en arrière-plan
+        image_derivatives.schedule('logo', company.id)
         
         return success_response({
-            'logo_url': company.logo_url
+            'logo_url': company.logo_url,
+            'logo_variants': company.logo_variants or {}
         }, "Logo mis à jour")
         
     except Exception as e:
@@ -346,21 +490,18 @@ def upload_logo():
 
 @uploads_bp.route('/<path:filename>', methods=['GET'])
 def serve_upload(filename):
-    """Servir un fichier uploadé"""
-    upload_folder = current_app.config.get('UPLOAD_FOLDER', 'app/static/uploads')
+    """Servir un fichier uploadé (blob ou ancien fichier de UPLOAD_FOLDER)"""
+    url = f'/uploads/{filename}'
     
-    # Sécurité: vérifier que le chemin est dans le dossier uploads
-    filepath = os.path.join(upload_folder, filename)
-    if not os.path.abspath(filepath).startswith(os.path.abspath(upload_folder)):
+    # Sécurité: blob valide ou chemin dans le dossier uploads
+    if not blob_key(url) and (filename.startswith('blobs/') or not blob_store.legacy_path(url)):
         return error_response("Accès non autorisé", 403)
     
-    if not os.path.exists(filepath):
+    response = blob_store.send(url)
+    if response is None:
         return error_response("Fichier non trouvé", 404)
     
-    directory = os.path.dirname(filepath)
-    file_name = os.path.basename(filepath)
-    
-    return send_from_directory(directory, file_name)
+    return response
 
 
 # ================================================================
@@ -382,20 +523,17 @@ def delete_cv():
         return error_response("Aucun CV à supprimer", 404)
     
     try:
-        # Supprimer le fichier physique
-        filepath = os.path.join(
-            current_app.config.get('UPLOAD_FOLDER', 'app/static/uploads'),
-            candidate.cv_url.replace('/uploads/', '')
-        )
-        if os.path.exists(filepath):
-            os.remove(filepath)
+        previous_url = candidate.cv_url
         
-        # Mettre à jour la BDD
+        # Mettre à jour la BDD (le blob reste tant que des analyses le référencent)
         candidate.cv_url = None
         candidate.cv_filename = None
         candidate.cv_uploaded_at = None
         
         db.session.commit()
+        
+        # Supprimer le fichier physique s'il précède le stockage par contenu
+        blob_store.discard_legacy(previous_url)
 
         return success_response(message="CV supprimé")
 
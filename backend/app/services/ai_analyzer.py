@@ -7,7 +7,6 @@ Utilise OpenAI GPT pour analyser les CVs et fournir des recommandations
 
 import json
 from flask import current_app
-from openai import OpenAI
 import os
 
 
@@ -31,6 +30,9 @@ class AIAnalyzerService:
                 # Ne pas afficher la clé en clair dans les logs
                 current_app.logger.warning('OPENAI_API_KEY semble invalide. Veuillez vérifier la clé.')
 
+            # Import différé: openai est coûteux à charger au démarrage
+            from openai import OpenAI
+
             # Initialiser le client sans exposer la clé dans les logs (OpenAI v1+ compatible)
             self.client = OpenAI(api_key=api_key)
         return self.client
@@ -9,6 +9,9 @@ from datetime import datetime
 from flask import current_app
 from app import db
 from app.models import Match, Job, CVAnalysis, Candidate, Company, create_notification
+from app.utils.match_features import job_features, cv_features
+from app.services.semantic_index import semantic_index
+from app.services.skill_vocabulary import skill_vocabulary
 
 
 class AutoMatcherService:
@@ -47,6 +50,12 @@ class AutoMatcherService:
 
             matches_created = []
 
+            # Caractéristiques du CV: calculées une seule fois pour toutes les offres
+            cv_data = cv_features(cv_analysis)
+
+            # Similarité TF-IDF avec toutes les offres: un seul produit creux
+            semantic_scores = semantic_index.similarities_for_cv(cv_analysis, active_jobs)
+
             for job in active_jobs:
                 # Vérifier si un match existe déjà
                 existing_match = Match.query.filter_by(
@@ -58,7 +67,10 @@ class AutoMatcherService:
                     continue  # Skip si match déjà créé
 
                 # Calculer le score de correspondance
-                match_score, match_details = self._calculate_match_score(cv_analysis, job, candidate)
+                match_score, match_details = self._calculate_match_score(
+                    cv_analysis, job, candidate, cv_data=cv_data,
+                    semantic_score=semantic_scores.get(job.id)
+                )
 
                 # Utiliser le seuil du job ou le seuil par défaut
                 threshold = job.match_threshold or self.match_threshold
@@ -84,28 +96,50 @@ class AutoMatcherService:
             current_app.logger.error(f"Erreur matching: {str(e)}")
             return []
 
-    def _calculate_match_score(self, cv_analysis, job, candidate):
+    # Pondération des critères (hors critère sémantique)
+    WEIGHTS = {
+        'skills': 0.40,
+        'experience': 0.25,
+        'education': 0.15,
+        'location': 0.10,
+        'keywords': 0.10
+    }
+
+    def _calculate_match_score(self, cv_analysis, job, candidate, cv_data=None, job_data=None,
+                               semantic_score=None):
         """
         Calcule le score de correspondance entre un CV et un job
 
+        Args:
+            cv_analysis: Instance CVAnalysis
+            job: Instance Job
+            candidate: Instance Candidate
+            cv_data: Caractéristiques du CV (cv_features), chargées si absentes
+            job_data: Caractéristiques de l'offre (job_features), chargées si absentes
+            semantic_score: Similarité TF-IDF (0-100); le critère sémantique prend
+                alors TFIDF_WEIGHT du score, les autres critères étant réduits d'autant
+
         Returns:
             tuple: (score, match_details)
         """
+        cv_data = cv_data or cv_features(cv_analysis)
+        job_data = job_data or job_features(job)
+
         scores = {}
         details = {}
 
         # 1. COMPÉTENCES (40% du score total)
-        skills_score, skills_details = self._match_skills(cv_analysis, job)
+        skills_score, skills_details = self._match_skills(cv_data, job_data)
         scores['skills'] = skills_score
         details['skills_match'] = skills_details
 
         # 2. EXPÉRIENCE (25% du score total)
-        experience_score, experience_details = self._match_experience(cv_analysis, job, candidate)
+        experience_score, experience_details = self._match_experience(cv_data, job, candidate)
         scores['experience'] = experience_score
         details['experience_match'] = experience_details
 
         # 3. FORMATION (15% du score total)
-        education_score, education_details = self._match_education(cv_analysis, job)
+        education_score, education_details = self._match_education(cv_data, job, job_data)
         scores['education'] = education_score
         details['education_match'] = education_details
 
@@ -115,20 +149,19 @@ class AutoMatcherService:
         details['location_match'] = location_details
 
         # 5. MOTS-CLÉS (10% du score total)
-        keywords_score, keywords_details = self._match_keywords(cv_analysis, job)
+        keywords_score, keywords_details = self._match_keywords(cv_data, job_data)
         scores['keywords'] = keywords_score
         details['keywords_match'] = keywords_details
 
         # Calculer le score global pondéré
-        weights = {
-            'skills': 0.40,
-            'experience': 0.25,
-            'education': 0.15,
-            'location': 0.10,
-            'keywords': 0.10
-        }
+        overall_score = sum(scores[key] * self.WEIGHTS[key] for key in scores)
 
-        overall_score = sum(scores[key] * weights[key] for key in scores)
+        # 6. SIMILARITÉ SÉMANTIQUE (TF-IDF, optionnelle)
+        if semantic_score is not None:
+            semantic_weight = current_app.config.get('TFIDF_WEIGHT', 0)
+            scores['semantic'] = semantic_score
+            details['semantic_match'] = {'score': semantic_score, 'weight': semantic_weight}
+            overall_score = overall_score * (1 - semantic_weight) + semantic_score * semantic_weight
 
         # Générer les raisons du match
         match_reasons = self._generate_match_reasons(scores, details)
@@ -141,45 +174,42 @@ class AutoMatcherService:
             'concerns': concerns
         }
 
-    def _match_skills(self, cv_analysis, job):
-        """Comparer les compétences"""
-        extracted_data = cv_analysis.extracted_data or {}
-        candidate_skills = extracted_data.get('skills', {})
-        all_candidate_skills = set(
-            [s.lower() for s in candidate_skills.get('technical', [])] +
-            [s.lower() for s in candidate_skills.get('soft', [])]
-        )
-
-        required_skills = set([s.lower() for s in (job.required_skills or [])])
-        nice_to_have = set([s.lower() for s in (job.nice_to_have_skills or [])])
-
-        if not required_skills:
-            return 80, {'score': 80, 'matched_skills': [], 'missing_skills': []}
-
-        # Compétences requises matchées
-        matched_required = all_candidate_skills.intersection(required_skills)
-        matched_nice = all_candidate_skills.intersection(nice_to_have)
-
-        # Score basé sur les compétences requises
-        required_ratio = len(matched_required) / len(required_skills) if required_skills else 0
-        nice_ratio = len(matched_nice) / len(nice_to_have) if nice_to_have else 0
-
-        # 80% pour required, 20% pour nice-to-have
-        score = (required_ratio * 80) + (nice_ratio * 20)
-
-        return round(score, 1), {
-            'score': round(score, 1),
-            'matched_skills': list(matched_required.union(matched_nice)),
-            'missing_skills': list(required_skills - matched_required),
-            'matched_count': len(matched_required),
-            'required_count': len(required_skills),
-            'nice_matched_count': len(matched_nice)
-        }
+    def _match_skills(self, cv_data, job_data):
+        """Comparer les compétences (bitsets du vocabulaire, synonymes résolus)"""
+        with skill_vocabulary.pinned():
+            all_candidate_skills = skill_vocabulary.bits(cv_data['skills'])
+            required_skills = skill_vocabulary.bits(job_data['required_skills'])
+            nice_to_have = skill_vocabulary.bits(job_data['nice_to_have_skills'])
+
+            if not required_skills:
+                return 80, {'score': 80, 'matched_skills': [], 'missing_skills': []}
+
+            # Compétences requises matchées
+            matched_required = all_candidate_skills & required_skills
+            matched_nice = all_candidate_skills & nice_to_have
+
+            # Score basé sur les compétences requises
+            required_count = required_skills.bit_count()
+            matched_count = matched_required.bit_count()
+            nice_matched_count = matched_nice.bit_count()
+            required_ratio = matched_count / required_count
+            nice_ratio = nice_matched_count / nice_to_have.bit_count() if nice_to_have else 0
+
+            # 80% pour required, 20% pour nice-to-have
+            score = (required_ratio * 80) + (nice_ratio * 20)
+
+            return round(score, 1), {
+                'score': round(score, 1),
+                'matched_skills': skill_vocabulary.names(matched_required | matched_nice),
+                'missing_skills': skill_vocabulary.names(required_skills & ~matched_required),
+                'matched_count': matched_count,
+                'required_count': required_count,
+                'nice_matched_count': nice_matched_count
+            }
 
-    def _match_experience(self, cv_analysis, job, candidate):
+    def _match_experience(self, cv_data, job, candidate):
         """Comparer l'expérience"""
-        extracted_data = cv_analysis.extracted_data or {}
-        candidate_years = extracted_data.get('total_experience_years', 0) or candidate.experience_years or 0
+        candidate_years = cv_data.get('experience_years') or candidate.experience_years or 0
 
         min_years = job.min_experience_years or 0
         max_years = job.max_experience_years or 999
@@ -204,31 +234,14 @@ class AutoMatcherService:
             'meets_requirement': min_years <= candidate_years <= max_years
         }
 
-    def _match_education(self, cv_analysis, job):
-        """Comparer la formation"""
+    def _match_education(self, cv_data, job, job_data):
+        """Comparer la formation (niveaux ordinaux pré-calculés)"""
         if not job.education_level:
             return 80, {'score': 80, 'meets_requirement': True}
 
-        extracted_data = cv_analysis.extracted_data or {}
-        education = extracted_data.get('education_level', '').lower()
-
-        education_levels = {
-            'bac': 1,
-            'bac+2': 2,
-            'bac+3': 3,
-            'bac+5': 5,
-            'master': 5,
-            'doctorat': 8,
-            'phd': 8
-        }
-
-        required_level = education_levels.get(job.education_level.lower(), 3)
-        candidate_level = 0
-
-        # Trouver le niveau du candidat
-        for key, value in education_levels.items():
-            if key in education:
-                candidate_level = max(candidate_level, value)
+        education = cv_data.get('education', '')
+        required_level = job_data['education_required']
+        candidate_level = cv_data.get('education_level', 0)
 
         if candidate_level >= required_level:
             score = 100
@@ -273,19 +286,10 @@ class AutoMatcherService:
             'is_remote': job.is_remote
         }
 
-    def _match_keywords(self, cv_analysis, job):
-        """Comparer les mots-clés"""
-        cv_keywords = set([k.lower() for k in (cv_analysis.keywords or [])])
-
-        # Créer un set de mots-clés du job (titre + description + compétences)
-        job_keywords = set()
-        if job.title:
-            job_keywords.update([w.lower() for w in job.title.split() if len(w) > 3])
-        if job.description:
-            # Prendre quelques mots clés de la description
-            words = [w.lower() for w in job.description.split() if len(w) > 4]
-            job_keywords.update(words[:20])
-        job_keywords.update([s.lower() for s in (job.required_skills or [])])
+    def _match_keywords(self, cv_data, job_data):
+        """Comparer les mots-clés (titre + description + compétences de l'offre)"""
+        cv_keywords = cv_data['keywords']
+        job_keywords = job_data['keywords']
 
         if not job_keywords:
             return 70, {'score': 70, 'matched_keywords': []}
@@ -326,6 +330,9 @@ class AutoMatcherService:
         if scores['keywords'] >= 80:
             reasons.append("Vocabulaire et domaine d'expertise alignés")
 
+        if scores.get('semantic', 0) >= 80:
+            reasons.append("Parcours très proche de la description du poste")
+
         if not reasons:
             reasons.append("Profil correspond aux critères de base")
 
@@ -484,6 +491,12 @@ class AutoMatcherService:
 
             matches_created = []
 
+            # Caractéristiques de l'offre: calculées une seule fois pour tous les CV
+            job_data = job_features(job)
+
+            # Similarité TF-IDF avec tous les CV: un seul produit creux
+            semantic_scores = semantic_index.similarities_for_job(job, latest_analyses)
+
             for cv_analysis in latest_analyses:
                 candidate = Candidate.query.get(cv_analysis.candidate_id)
                 if not candidate:
@@ -499,7 +512,10 @@ class AutoMatcherService:
                     continue
 
                 # Calculer le score
-                match_score, match_details = self._calculate_match_score(cv_analysis, job, candidate)
+                match_score, match_details = self._calculate_match_score(
+                    cv_analysis, job, candidate, job_data=job_data,
+                    semantic_score=semantic_scores.get(cv_analysis.id)
+                )
 
                 threshold = job.match_threshold or self.match_threshold
 
@@ -0,0 +1,524 @@
+"""
+================================================================
+Stockage de Fichiers (Blobs) - BaraCorrespondance AI
+================================================================
+Stockage adressé par contenu des fichiers uploadés et générés
+(CV, avatars, logos, affiches):
+- écriture en flux: le fichier est haché (SHA-256) pendant sa copie
+  dans une zone temporaire, puis publié sous sa clé
+- déduplication: un contenu déjà présent n'est pas réécrit
+- références comptées (app.models.blob), nettoyage par `flask gc-blobs`
+
+Backends: système de fichiers local (BLOB_BACKEND=local) ou stockage
+compatible S3 (BLOB_BACKEND=s3, boto3; BLOB_S3_ENDPOINT_URL pour
+MinIO, LocalStack ou le serveur moto en local).
+
+Les anciens chemins (/uploads/cv/..., chemins absolus des affiches)
+restent lisibles par les mêmes méthodes.
+
+Diffusion (send): les URLs de blobs changent avec le contenu et sont
+servies `immutable`; les octets sont délégués au proxy frontal
+(UPLOADS_OFFLOAD=x-accel ou x-sendfile) ou à S3 (URL pré-signée), le
+worker Python ne les transmet qu'en dernier recours (requêtes Range
+comprises).
+"""
+
+import hashlib
+import mimetypes
+import os
+import shutil
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from urllib.parse import quote
+
+from flask import current_app, redirect, request, send_file
+from werkzeug.datastructures import ContentRange
+from werkzeug.wsgi import wrap_file
+
+from app import db
+from app.models.blob import Blob, blob_url, blob_key
+from app.utils.lazy import module_available
+
+# boto3 importé seulement à la création du backend S3
+BOTO3_AVAILABLE = module_available('boto3')
+
+# Taille des blocs lus et écrits en flux
+CHUNK_SIZE = 64 * 1024
+
+# Préfixe des anciennes URLs servies depuis UPLOAD_FOLDER
+LEGACY_URL_PREFIX = '/uploads/'
+
+# Fraîcheur des URLs adressées par contenu (un an, jamais revalidées)
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+
+class BlobTooLarge(ValueError):
+    """Fichier dépassant la taille maximale (détecté pendant l'écriture)"""
+
+
+class LocalBlobBackend:
+    """Blobs sur le système de fichiers (<racine>/ab/cd/<sha256>)"""
+
+    def __init__(self, root):
+        self.root = os.path.abspath(root)
+        self.staging = os.path.join(self.root, '.staging')
+        os.makedirs(self.staging, exist_ok=True)
+
+    def relative(self, key):
+        return f'{key[:2]}/{key[2:4]}/{key}'
+
+    def path(self, key):
+        return os.path.join(self.root, key[:2], key[2:4], key)
+
+    def exists(self, key):
+        return os.path.exists(self.path(key))
+
+    def touch(self, key):
+        """Rafraîchir la date d'un blob réutilisé (non orphelin pour le nettoyage)"""
+        os.utime(self.path(key))
+
+    def write(self, key, source_path, content_type=None, keep_source=False):
+        """Publier un fichier temporaire (renommage atomique, ou lien physique si conservé)"""
+        target = self.path(key)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        if not keep_source:
+            os.replace(source_path, target)
+            return
+        try:
+            os.link(source_path, target)
+        except FileExistsError:
+            pass
+        except OSError:
+            # Autre système de fichiers: copie publiée par renommage
+            fd, temp_path = tempfile.mkstemp(dir=self.staging)
+            with os.fdopen(fd, 'wb') as temp, open(source_path, 'rb') as source:
+                shutil.copyfileobj(source, temp, CHUNK_SIZE)
+            os.replace(temp_path, target)
+
+    def open(self, key):
+        return open(self.path(key), 'rb')
+
+    def delete(self, key):
+        try:
+            os.remove(self.path(key))
+        except FileNotFoundError:
+            pass
+
+    def iter_keys(self):
+        """(clé, date de modification) de tous les blobs présents"""
+        for directory, subdirectories, files in os.walk(self.root):
+            subdirectories[:] = [d for d in subdirectories if d != '.staging']
+            for name in files:
+                if len(name) == 64:
+                    yield name, os.path.getmtime(os.path.join(directory, name))
+
+
+class S3BlobBackend:
+    """Blobs dans un bucket compatible S3 (<préfixe><sha256>)"""
+
+    def __init__(self, bucket, prefix='blobs/', endpoint_url=None, region=None):
+        if not BOTO3_AVAILABLE:
+            raise RuntimeError("boto3 est requis pour BLOB_BACKEND=s3")
+        import boto3
+        self.bucket = bucket
+        self.prefix = prefix
+        self.staging = None
+        self.client = boto3.client('s3', endpoint_url=endpoint_url, region_name=region)
+
+    def path(self, key):
+        return None
+
+    def exists(self, key):
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self.prefix + key)
+            return True
+        except self.client.exceptions.ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound'):
+                return False
+            raise
+
+    def touch(self, key):
+        pass
+
+    def write(self, key, source_path, content_type=None, keep_source=False):
+        """Envoyer un fichier (multipart au-delà du seuil de boto3)"""
+        extra = {'ContentType': content_type} if content_type else None
+        self.client.upload_file(source_path, self.bucket, self.prefix + key, ExtraArgs=extra)
+
+    def open(self, key, byte_range=None):
+        """Flux du blob, ou de l'intervalle [début, fin[ demandé"""
+        extra = {'Range': f'bytes={byte_range[0]}-{byte_range[1] - 1}'} if byte_range else {}
+        return self.client.get_object(Bucket=self.bucket, Key=self.prefix + key, **extra)['Body']
+
+    def size(self, key):
+        return self.client.head_object(Bucket=self.bucket, Key=self.prefix + key)['ContentLength']
+
+    def presigned_url(self, key, expires, mimetype=None, disposition=None, cache_control=None):
+        """URL de lecture directe (S3 gère Range et la diffusion)"""
+        params = {'Bucket': self.bucket, 'Key': self.prefix + key}
+        if mimetype:
+            params['ResponseContentType'] = mimetype
+        if disposition:
+            params['ResponseContentDisposition'] = disposition
+        if cache_control:
+            params['ResponseCacheControl'] = cache_control
+        return self.client.generate_presigned_url('get_object', Params=params, ExpiresIn=expires)
+
+    def delete(self, key):
+        self.client.delete_object(Bucket=self.bucket, Key=self.prefix + key)
+
+    def iter_keys(self):
+        paginator = self.client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self.prefix):
+            for item in page.get('Contents', []):
+                key = item['Key'][len(self.prefix):]
+                if len(key) == 64:
+                    yield key, item['LastModified'].timestamp()
+
+
+class BlobStore:
+    """Stockage adressé par contenu"""
+
+    def __init__(self):
+        self.backend = None
+        self._app = None
+
+    def init_app(self, app):
+        """Configurer le backend"""
+        self._app = app
+        if app.config.get('BLOB_BACKEND', 'local') == 's3':
+            self.backend = S3BlobBackend(
+                app.config['BLOB_S3_BUCKET'],
+                prefix=app.config.get('BLOB_S3_PREFIX', 'blobs/'),
+                endpoint_url=app.config.get('BLOB_S3_ENDPOINT_URL'),
+                region=app.config.get('BLOB_S3_REGION')
+            )
+        else:
+            self.backend = LocalBlobBackend(
+                app.config.get('BLOB_LOCAL_ROOT')
+                or os.path.join(app.config.get('UPLOAD_FOLDER', 'app/static/uploads'), 'blobs')
+            )
+
+    # ------------------------------------------------------------
+    # Écriture
+    # ------------------------------------------------------------
+
+    def put(self, source, content_type=None, extension='', max_size=None):
+        """
+        Enregistrer un fichier en flux (dédupliqué par contenu)
+
+        Le blob est enregistré sans référence: c'est l'affectation de
+        l'URL à une colonne suivie (BLOB_REFERENCES) qui le retient.
+
+        Args:
+            source: Objet fichier ouvert en lecture binaire
+            content_type: Type MIME
+            extension: Extension ajoutée à l'URL ('.pdf', '.png', ...)
+            max_size: Taille maximale en octets (BlobTooLarge au-delà)
+
+        Returns:
+            str: URL du blob (/uploads/blobs/<sha256><extension>)
+        """
+        digest = hashlib.sha256()
+        size = 0
+        fd, temp_path = tempfile.mkstemp(dir=self.backend.staging)
+        try:
+            with os.fdopen(fd, 'wb') as temp:
+                while True:
+                    chunk = source.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    size += len(chunk)
+                    if max_size is not None and size > max_size:
+                        raise BlobTooLarge(f"Fichier trop volumineux (maximum {max_size} octets)")
+                    digest.update(chunk)
+                    temp.write(chunk)
+
+            key = digest.hexdigest()
+            self._record(key, size, content_type)
+            self._publish(key, temp_path, content_type)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+        return blob_url(key, extension.lower() if extension else '')
+
+    def put_file(self, path, key, size, content_type=None, extension=''):
+        """
+        Enregistrer un fichier local déjà haché (upload reprenable)
+
+        Le fichier source est conservé (lien physique en local): il peut
+        être analysé ensuite sans relire le blob.
+
+        Returns:
+            str: URL du blob
+        """
+        self._record(key, size, content_type)
+        self._publish(key, path, content_type, keep_source=True)
+        return blob_url(key, extension.lower() if extension else '')
+
+    def _publish(self, key, path, content_type, keep_source=False):
+        """Écrire le contenu sous sa clé (réécrit s'il a été supprimé par le nettoyage)"""
+        if self.backend.exists(key):
+            self.backend.touch(key)
+        else:
+            self.backend.write(key, path, content_type, keep_source=keep_source)
+
+    def _record(self, key, size, content_type):
+        """
+        Créer la ligne du blob, ou la rafraîchir, avant de publier le contenu
+
+        Validé dans sa propre transaction: le nettoyage voit la nouvelle
+        date et épargne le blob, ou l'a déjà supprimé (fichier compris)
+        et _publish réécrit alors le contenu. Sous SQLite, la requête en
+        cours peut déjà tenir le verrou d'écriture de la base: la ligne
+        passe par sa transaction, que le nettoyage attend de toute façon.
+        """
+        if db.engine.dialect.name == 'sqlite':
+            Blob.register(db.session.connection(), key, size, content_type)
+            return
+        with db.engine.begin() as connection:
+            Blob.register(connection, key, size, content_type)
+
+    # ------------------------------------------------------------
+    # Lecture
+    # ------------------------------------------------------------
+
+    def legacy_path(self, url):
+        """Chemin local d'un ancien fichier (URL /uploads/... ou chemin absolu)"""
+        if not url:
+            return None
+        if url.startswith(LEGACY_URL_PREFIX):
+            upload_folder = os.path.abspath(self._app.config.get('UPLOAD_FOLDER', 'app/static/uploads'))
+            path = os.path.abspath(os.path.join(upload_folder, url[len(LEGACY_URL_PREFIX):]))
+            return path if path.startswith(upload_folder + os.sep) else None
+        return url
+
+    def is_stored(self, url):
+        """L'URL désigne-t-elle un fichier de la plateforme (blob ou ancien upload) ?"""
+        return bool(blob_key(url)) or (isinstance(url, str) and url.startswith(LEGACY_URL_PREFIX))
+
+    def exists(self, url):
+        key = blob_key(url)
+        if key:
+            return self.backend.exists(key)
+        path = self.legacy_path(url)
+        return bool(path) and os.path.exists(path)
+
+    def open(self, url):
+        """Objet fichier en lecture binaire (flux pour S3)"""
+        key = blob_key(url)
+        if key:
+            return self.backend.open(key)
+        path = self.legacy_path(url)
+        if not path:
+            raise FileNotFoundError(url)
+        return open(path, 'rb')
+
+    def read(self, url):
+        """Contenu complet d'un fichier"""
+        with self.open(url) as stream:
+            return stream.read()
+
+    @contextmanager
+    def local_file(self, url, suffix=None):
+        """
+        Chemin local lisible d'un fichier (copie temporaire pour S3)
+
+        Un blob local est lu en place: son chemin n'a pas d'extension,
+        le type de fichier doit être pris de l'URL ou du nom d'origine.
+
+        Args:
+            url: URL du blob ou ancien chemin
+            suffix: Extension du fichier temporaire (déduite de l'URL par défaut)
+        """
+        key = blob_key(url)
+        if not key:
+            yield self.legacy_path(url)
+            return
+        if self.backend.path(key):
+            yield self.backend.path(key)
+            return
+
+        suffix = suffix if suffix is not None else os.path.splitext(url)[1]
+        fd, temp_path = tempfile.mkstemp(suffix=suffix)
+        try:
+            with os.fdopen(fd, 'wb') as temp, self.open(url) as stream:
+                shutil.copyfileobj(stream, temp, CHUNK_SIZE)
+            yield temp_path
+        finally:
+            os.remove(temp_path)
+
+    # ------------------------------------------------------------
+    # Diffusion
+    # ------------------------------------------------------------
+
+    def send(self, url, mimetype=None, as_attachment=False, download_name=None):
+        """
+        Réponse Flask servant un fichier
+
+        Par ordre de préférence: 304 sur un blob déjà en cache, délégation
+        au proxy (X-Accel-Redirect / X-Sendfile) ou redirection vers S3,
+        sinon envoi par le worker avec prise en charge de Range.
+
+        Returns:
+            Response: Réponse à renvoyer, None si le fichier n'existe pas
+        """
+        config = current_app.config
+        mimetype = mimetype or mimetypes.guess_type(download_name or url)[0] or 'application/octet-stream'
+        download_name = download_name or os.path.basename(url)
+        key = blob_key(url)
+
+        # Contenu immuable: l'ETag est le hash, aucune lecture du stockage
+        if key and key in request.if_none_match:
+            return self._cache(current_app.response_class(status=304), key)
+
+        if key and self.backend.path(key) is None:
+            return self._send_remote(key, mimetype, as_attachment, download_name)
+
+        # Vérifié avant la délégation: le proxy ne répondrait 404 qu'après
+        # que l'appelant a compté le téléchargement ou la vue
+        path = self.backend.path(key) if key else self.legacy_path(url)
+        if not path or not os.path.exists(path):
+            return None
+
+        offload = config.get('UPLOADS_OFFLOAD')
+        if offload == 'x-accel':
+            internal = self._accel_path(path)
+            if internal:
+                return self._offloaded('X-Accel-Redirect', internal, key, mimetype, as_attachment, download_name)
+        elif offload == 'x-sendfile':
+            return self._offloaded('X-Sendfile', path, key, mimetype, as_attachment, download_name)
+
+        response = send_file(path, mimetype=mimetype, as_attachment=as_attachment,
+                             download_name=download_name, conditional=True, etag=key or True,
+                             max_age=IMMUTABLE_MAX_AGE if key else config.get('UPLOADS_CACHE_MAX_AGE', 3600))
+        return self._cache(response, key)
+
+    def _cache(self, response, key):
+        """Cache-Control: immuable pour un blob, durée configurée sinon"""
+        response.cache_control.public = True
+        if key:
+            response.set_etag(key)
+            response.cache_control.max_age = IMMUTABLE_MAX_AGE
+            response.cache_control.immutable = True
+        else:
+            response.cache_control.max_age = current_app.config.get('UPLOADS_CACHE_MAX_AGE', 3600)
+        return response
+
+    def _accel_path(self, path):
+        """Emplacement interne nginx d'un fichier (blobs, puis UPLOAD_FOLDER)"""
+        if not path:
+            return None
+        config = current_app.config
+        upload_folder = os.path.abspath(config.get('UPLOAD_FOLDER', 'app/static/uploads'))
+        roots = ((self.backend.root, config['BLOB_ACCEL_PREFIX']), (upload_folder, config['UPLOADS_ACCEL_PREFIX']))
+        for root, prefix in roots:
+            if path.startswith(root + os.sep):
+                return prefix + quote(os.path.relpath(path, root).replace(os.sep, '/'))
+        return None
+
+    def _offloaded(self, header, value, key, mimetype, as_attachment, download_name):
+        """Réponse vide: le proxy lit le fichier et gère Range et la validation"""
+        response = current_app.response_class(mimetype=mimetype)
+        response.headers[header] = value
+        if as_attachment:
+            response.headers.set('Content-Disposition', 'attachment', filename=download_name)
+        return self._cache(response, key)
+
+    def _send_remote(self, key, mimetype, as_attachment, download_name):
+        """Blob S3: redirection vers une URL pré-signée, ou flux (Range compris)"""
+        config = current_app.config
+        if config.get('BLOB_S3_REDIRECT', True):
+            disposition = f"attachment; filename=\"{download_name}\"" if as_attachment else None
+            location = self.backend.presigned_url(
+                key, config.get('BLOB_S3_URL_EXPIRES', 3600), mimetype, disposition,
+                f'public, max-age={IMMUTABLE_MAX_AGE}, immutable'
+            )
+            return redirect(location, 302)
+
+        try:
+            size = self.backend.size(key)
+        except self.backend.client.exceptions.ClientError:
+            return None
+
+        byte_range = request.range.range_for_length(size) if request.range else None
+        if request.range and byte_range is None:
+            response = current_app.response_class(status=416)
+            response.content_range = ContentRange('bytes', None, None, size)
+            return response
+
+        body = self.backend.open(key, byte_range)
+        response = current_app.response_class(
+            wrap_file(request.environ, body, CHUNK_SIZE), mimetype=mimetype, direct_passthrough=True
+        )
+        if byte_range:
+            response.status_code = 206
+            response.content_range = ContentRange('bytes', byte_range[0], byte_range[1], size)
+            response.content_length = byte_range[1] - byte_range[0]
+        else:
+            response.content_length = size
+        response.accept_ranges = 'bytes'
+        if as_attachment:
+            response.headers.set('Content-Disposition', 'attachment', filename=download_name)
+        return self._cache(response, key)
+
+    # ------------------------------------------------------------
+    # Nettoyage
+    # ------------------------------------------------------------
+
+    def discard_legacy(self, url):
+        """Supprimer un ancien fichier (les blobs sont libérés par leur compteur)"""
+        if blob_key(url):
+            return
+        path = self.legacy_path(url)
+        if path and os.path.exists(path):
+            os.remove(path)
+
+    def collect_garbage(self, grace_seconds=86400):
+        """
+        Supprimer les blobs sans référence et les fichiers orphelins
+
+        Seuls les blobs libérés (ou enregistrés sans être référencés)
+        depuis plus de grace_seconds sont supprimés.
+
+        Returns:
+            dict: Nombre de blobs supprimés et d'orphelins effacés du stockage
+        """
+        cutoff = datetime.utcnow() - timedelta(seconds=grace_seconds)
+        removed = 0
+        released = db.session.query(Blob.id, Blob.hash).filter(
+            Blob.ref_count <= 0, Blob.updated_at < cutoff
+        ).all()
+        for blob_id, key in released:
+            # Suppression conditionnelle: le blob a pu être réutilisé entre-temps.
+            # Le fichier est effacé avant la validation: un enregistrement
+            # concurrent du même contenu attend la fin de la transaction
+            # (ligne verrouillée), recrée la ligne et réécrit le fichier
+            deleted = Blob.query.filter(
+                Blob.id == blob_id, Blob.ref_count <= 0, Blob.updated_at < cutoff
+            ).delete(synchronize_session=False)
+            if deleted:
+                self.backend.delete(key)
+                removed += 1
+            db.session.commit()
+
+        # Fichiers sans ligne (transaction annulée après l'écriture)
+        known = {row[0] for row in db.session.query(Blob.hash)}
+        orphans = 0
+        cutoff_timestamp = time.time() - grace_seconds
+        for key, modified in list(self.backend.iter_keys()):
+            if key not in known and modified < cutoff_timestamp:
+                # Ligne enregistrée depuis la lecture: contenu en cours de réutilisation
+                if db.session.query(Blob.id).filter_by(hash=key).first() is not None:
+                    continue
+                self.backend.delete(key)
+                orphans += 1
+
+        return {'removed': removed, 'orphans': orphans}
+
+
+# Instance singleton
+blob_store = BlobStore()
@@ -0,0 +1,152 @@
+"""
+================================================================
+Service Compteurs - BaraCorrespondance AI
+================================================================
+Tampon d'écriture différée pour les compteurs (vues, "utile",
+candidatures) : les incréments sont regroupés en mémoire par
+processus puis appliqués périodiquement par des UPDATE atomiques
+`SET x = x + n`, sans verrou de ligne dans les requêtes de lecture.
+Les compteurs de DAILY_COUNTERS gardent aussi leurs incréments par
+jour (CounterDay) pour compter une période.
+"""
+
+import atexit
+import os
+import threading
+from collections import defaultdict
+from datetime import datetime
+
+from sqlalchemy import bindparam, func
+
+from app import db
+from app.models.counter_day import CounterDay
+
+# Compteurs dont les incréments quotidiens sont conservés (récapitulatif hebdomadaire)
+DAILY_COUNTERS = frozenset({'candidates.profile_views', 'companies.profile_views'})
+
+
+class CounterBuffer:
+    """Tampon d'incréments de compteurs, vidé périodiquement en base"""
+
+    def __init__(self):
+        self._app = None
+        self._lock = threading.Lock()
+        self._pending = defaultdict(int)  # (Model, colonne, id) -> delta
+        self._thread = None
+        self._thread_pid = None
+        self._stop = threading.Event()
+        self._atexit_registered = False
+        self.scheduled_flush = False
+
+    def init_app(self, app):
+        """Configurer le tampon et le vidage à l'arrêt du processus"""
+        self._app = app
+        self.flush_interval = app.config.get('COUNTER_FLUSH_INTERVAL', 10)
+        self.flush_threshold = app.config.get('COUNTER_FLUSH_THRESHOLD', 1000)
+        # Vidage périodique confié au planificateur (tâche flush-counters) s'il tourne
+        self.scheduled_flush = app.config.get('SCHEDULER_ENABLED', False)
+        if not self._atexit_registered:
+            atexit.register(self.shutdown)
+            self._atexit_registered = True
+
+    def increment(self, model, column, entity_id, amount=1):
+        """
+        Enregistrer un incrément de compteur
+
+        Args:
+            model: Classe du modèle (ex: Job)
+            column: Nom de la colonne compteur (ex: 'views_count')
+            entity_id: ID de la ligne
+            amount: Valeur à ajouter (négative pour décrémenter)
+        """
+        key = (model, column, entity_id)
+        with self._lock:
+            self._pending[key] += amount
+            pending_count = len(self._pending)
+
+        if not self.flush_interval or pending_count >= self.flush_threshold:
+            self.flush()
+        else:
+            self._ensure_thread()
+
+    def pending(self, model, column, entity_id):
+        """Incrément non encore écrit pour une ligne"""
+        with self._lock:
+            return self._pending.get((model, column, entity_id), 0)
+
+    def flush(self):
+        """
+        Écrire les incréments en attente (un UPDATE groupé par modèle/colonne)
+
+        Returns:
+            int: Nombre de lignes mises à jour
+        """
+        with self._lock:
+            pending, self._pending = self._pending, defaultdict(int)
+
+        grouped = defaultdict(list)
+        for (model, column, entity_id), amount in pending.items():
+            if amount:
+                grouped[(model, column)].append({'_id': entity_id, '_amount': amount})
+
+        if not grouped:
+            return 0
+
+        today = datetime.utcnow().date()
+        try:
+            with self._app.app_context():
+                # Connexion dédiée: n'interfère pas avec la session de la requête
+                with db.engine.begin() as connection:
+                    for (model, column), params in grouped.items():
+                        table = model.__table__
+                        counter = CounterDay.counter_key(table.name, column)
+                        if counter in DAILY_COUNTERS:
+                            CounterDay.add(connection, counter, today, {
+                                row['_id']: row['_amount'] for row in params
+                            })
+                        values = {column: func.coalesce(table.c[column], 0) + bindparam('_amount')}
+                        if 'updated_at' in table.c:
+                            # Un compteur n'est pas une modification de l'entité
+                            values['updated_at'] = table.c.updated_at
+                        connection.execute(
+                            table.update().where(table.c.id == bindparam('_id')).values(values),
+                            params
+                        )
+        except Exception as e:
+            # Réinjecter les incréments pour la prochaine tentative
+            with self._lock:
+                for key, amount in pending.items():
+                    self._pending[key] += amount
+            self._app.logger.error(f"Échec d'écriture des compteurs: {e}")
+            return 0
+
+        return sum(len(params) for params in grouped.values())
+
+    def shutdown(self):
+        """Arrêter le thread de vidage et écrire les derniers incréments"""
+        self._stop.set()
+        if self._app is not None:
+            self.flush()
+
+    def _ensure_thread(self):
+        """Démarrer le thread de vidage périodique (un par processus, après fork)"""
+        if self.scheduled_flush:
+            return
+        if self._thread_pid == os.getpid() and self._thread and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread_pid == os.getpid() and self._thread and self._thread.is_alive():
+                return
+            self._stop = threading.Event()
+            self._thread = threading.Thread(target=self._run, name='counter-flush', daemon=True)
+            self._thread_pid = os.getpid()
+            self._thread.start()
+
+    def _run(self):
+        """Boucle de vidage périodique"""
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+
+# Instance singleton
+counter_buffer = CounterBuffer()
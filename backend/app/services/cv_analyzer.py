@@ -62,13 +62,16 @@ class CVAnalyzerService:
         'gestion du temps', 'négociation', 'présentation', 'analyse'
     ]
     
-    def analyze_file(self, filepath, candidate_id):
+    def analyze_file(self, filepath, candidate_id, file_url=None, file_name=None, raw_text=None):
         """
         Analyser un fichier CV complet
         
         Args:
             filepath: Chemin vers le fichier CV
             candidate_id: ID du candidat
+            file_url: URL enregistrée du CV (par défaut le chemin)
+            file_name: Nom d'origine du fichier (par défaut celui du chemin)
+            raw_text: Texte déjà extrait (évite une seconde lecture du fichier)
             
         Returns:
             dict: Résultats de l'analyse
@@ -76,7 +79,8 @@ class CVAnalyzerService:
         start_time = time.time()
         
         # Extraire le texte du fichier
-        raw_text = self._extract_text(filepath)
+        if raw_text is None:
+            raw_text = self._extract_text(filepath, file_name)
         
         if not raw_text or len(raw_text.strip()) < 50:
             raise ValueError("Impossible d'extraire le texte du CV ou CV trop court")
@@ -141,13 +145,14 @@ class CVAnalyzerService:
         ).update({'is_latest': False})
         
         # Créer la nouvelle analyse
-        file_ext = filepath.rsplit('.', 1)[-1].lower() if '.' in filepath else 'unknown'
+        type_source = file_name or filepath
+        file_ext = type_source.rsplit('.', 1)[-1].lower() if '.' in type_source else 'unknown'
         file_size = os.path.getsize(filepath) if os.path.exists(filepath) else 0
         
         analysis = CVAnalysis(
             candidate_id=candidate_id,
-            file_url=filepath,
-            file_name=os.path.basename(filepath),
+            file_url=file_url or filepath,
+            file_name=file_name or os.path.basename(filepath),
             file_type=file_ext,
             file_size=file_size,
             raw_text=raw_text,
@@ -174,9 +179,10 @@ class CVAnalyzerService:
 
         return result
     
-    def _extract_text(self, filepath):
-        """Extraire le texte d'un fichier PDF ou DOCX"""
-        ext = filepath.rsplit('.', 1)[-1].lower() if '.' in filepath else ''
+    def _extract_text(self, filepath, file_name=None):
+        """Extraire le texte d'un fichier PDF ou DOCX (type pris de file_name si fourni)"""
+        type_source = file_name or filepath
+        ext = type_source.rsplit('.', 1)[-1].lower() if '.' in type_source else ''
         
         if ext == 'pdf':
             return self._extract_from_pdf(filepath)
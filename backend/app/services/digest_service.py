@@ -0,0 +1,227 @@
+"""
+================================================================
+Service Récapitulatif Hebdomadaire - BaraCorrespondance AI
+================================================================
+Génération par lots des emails récapitulatifs:
+- les utilisateurs sont parcourus par tranches d'ID (pagination par clé)
+- les statistiques d'une tranche sont calculées par quelques requêtes
+  groupées (GROUP BY user_id), quel que soit le nombre d'utilisateurs
+- le gabarit HTML est rendu une seule fois, seul le contenu varie
+- les messages sont versés dans la file d'envoi au fil de l'eau
+  (mémoire bornée par la taille de tranche et de la file)
+- les vues de profil sont celles de la période (CounterDay), pas le
+  compteur cumulé; les messages comptés sont les messages reçus
+"""
+
+import time
+from datetime import datetime, timedelta
+from html import escape
+
+from sqlalchemy import func
+from sqlalchemy.orm import load_only
+
+from app import db
+from app.models import User, Candidate, Company, Job, JobApplication, Match, Message, CounterDay
+from app.services.email_queue import email_queue
+from app.services.email_service import (
+    build_message, get_email_template, weekly_digest_content,
+    WEEKLY_DIGEST_TITLE, WEEKLY_DIGEST_SUBJECT, WEEKLY_DIGEST_CTA
+)
+
+# Emplacement du contenu dans le gabarit pré-rendu
+_CONTENT_SLOT = '<!--digest-content-->'
+
+STAT_KEYS = ('new_matches', 'applications', 'messages', 'profile_views')
+
+
+class DigestService:
+    """Service de génération des récapitulatifs hebdomadaires"""
+
+    def __init__(self):
+        self._template = None
+
+    def _template_parts(self):
+        """Gabarit email rendu une fois, découpé autour du contenu"""
+        if self._template is None:
+            html = get_email_template(WEEKLY_DIGEST_TITLE, _CONTENT_SLOT, *WEEKLY_DIGEST_CTA)
+            self._template = tuple(html.split(_CONTENT_SLOT, 1))
+        return self._template
+
+    def render(self, user_name, stats):
+        """Rendre l'email HTML d'un utilisateur"""
+        prefix, suffix = self._template_parts()
+        return prefix + weekly_digest_content(escape(user_name), stats) + suffix
+
+    # ------------------------------------------------------------
+    # Statistiques groupées
+    # ------------------------------------------------------------
+
+    @staticmethod
+    def _grouped(query, stats, key):
+        """Reporter les résultats (user_id, valeur) d'une requête groupée"""
+        for user_id, value in query:
+            stats.setdefault(user_id, {})[key] = int(value or 0)
+
+    def compute_stats(self, first_user_id, last_user_id, since):
+        """
+        Statistiques de la semaine pour une tranche d'utilisateurs
+
+        Args:
+            first_user_id: Premier ID utilisateur de la tranche
+            last_user_id: Dernier ID utilisateur de la tranche
+            since: Début de la période
+
+        Returns:
+            dict: {user_id: {'new_matches', 'applications', 'messages', 'profile_views'}}
+        """
+        stats = {}
+        candidate_range = Candidate.user_id.between(first_user_id, last_user_id)
+        company_range = Company.user_id.between(first_user_id, last_user_id)
+
+        # Candidats
+        self._grouped(
+            db.session.query(Candidate.user_id, func.count(Match.id))
+            .join(Match, Match.candidate_id == Candidate.id)
+            .filter(candidate_range, Match.created_at >= since)
+            .group_by(Candidate.user_id),
+            stats, 'new_matches'
+        )
+        self._grouped(
+            db.session.query(Candidate.user_id, func.count(JobApplication.id))
+            .join(JobApplication, JobApplication.candidate_id == Candidate.id)
+            .filter(candidate_range, JobApplication.created_at >= since)
+            .group_by(Candidate.user_id),
+            stats, 'applications'
+        )
+        self._grouped(
+            db.session.query(Candidate.user_id, func.count(Message.id))
+            .join(Match, Match.candidate_id == Candidate.id)
+            .join(Message, Message.match_id == Match.id)
+            .filter(candidate_range, Message.created_at >= since, Message.sender_type != 'candidate')
+            .group_by(Candidate.user_id),
+            stats, 'messages'
+        )
+        self._grouped(
+            db.session.query(Candidate.user_id, func.sum(CounterDay.amount))
+            .join(CounterDay, CounterDay.entity_id == Candidate.id)
+            .filter(
+                candidate_range,
+                CounterDay.counter == CounterDay.counter_key(Candidate.__tablename__, 'profile_views'),
+                CounterDay.day >= since.date()
+            )
+            .group_by(Candidate.user_id),
+            stats, 'profile_views'
+        )
+
+        # Entreprises (via leurs offres)
+        self._grouped(
+            db.session.query(Company.user_id, func.count(Match.id))
+            .join(Job, Job.company_id == Company.id)
+            .join(Match, Match.job_id == Job.id)
+            .filter(company_range, Match.created_at >= since)
+            .group_by(Company.user_id),
+            stats, 'new_matches'
+        )
+        self._grouped(
+            db.session.query(Company.user_id, func.count(JobApplication.id))
+            .join(Job, Job.company_id == Company.id)
+            .join(JobApplication, JobApplication.job_id == Job.id)
+            .filter(company_range, JobApplication.created_at >= since)
+            .group_by(Company.user_id),
+            stats, 'applications'
+        )
+        self._grouped(
+            db.session.query(Company.user_id, func.count(Message.id))
+            .join(Job, Job.company_id == Company.id)
+            .join(Match, Match.job_id == Job.id)
+            .join(Message, Message.match_id == Match.id)
+            .filter(company_range, Message.created_at >= since, Message.sender_type != 'company')
+            .group_by(Company.user_id),
+            stats, 'messages'
+        )
+        self._grouped(
+            db.session.query(Company.user_id, func.sum(CounterDay.amount))
+            .join(CounterDay, CounterDay.entity_id == Company.id)
+            .filter(
+                company_range,
+                CounterDay.counter == CounterDay.counter_key(Company.__tablename__, 'profile_views'),
+                CounterDay.day >= since.date()
+            )
+            .group_by(Company.user_id),
+            stats, 'profile_views'
+        )
+
+        return stats
+
+    # ------------------------------------------------------------
+    # Envoi
+    # ------------------------------------------------------------
+
+    def iter_user_chunks(self, chunk_size):
+        """Parcourir les destinataires actifs par tranches d'ID croissants"""
+        last_id = 0
+        while True:
+            users = User.query.options(
+                load_only(User.id, User.email, User.first_name, User.last_name)
+            ).filter(
+                User.id > last_id,
+                User.is_active.is_(True),
+                User.role.in_(('candidate', 'company'))
+            ).order_by(User.id).limit(chunk_size).all()
+
+            if not users:
+                return
+
+            yield users
+            last_id = users[-1].id
+
+    def send_weekly_digests(self, days=7, chunk_size=1000, skip_empty=True, dry_run=False, enqueue_timeout=60):
+        """
+        Générer et mettre en file les récapitulatifs de tous les utilisateurs
+
+        Args:
+            days: Durée de la période couverte
+            chunk_size: Nombre d'utilisateurs traités par tranche
+            skip_empty: Ne pas écrire aux utilisateurs sans activité
+            dry_run: Calculer et rendre sans envoyer
+            enqueue_timeout: Attente maximale d'une place dans la file (secondes)
+
+        Returns:
+            dict: Bilan (utilisateurs, envoyés, ignorés, rejetés, durée)
+        """
+        started = time.monotonic()
+        since = datetime.utcnow() - timedelta(days=days)
+        summary = {'users': 0, 'queued': 0, 'skipped': 0, 'rejected': 0, 'chunks': 0}
+
+        for users in self.iter_user_chunks(chunk_size):
+            stats_by_user = self.compute_stats(users[0].id, users[-1].id, since)
+            summary['chunks'] += 1
+
+            for user in users:
+                summary['users'] += 1
+                stats = stats_by_user.get(user.id)
+                if skip_empty and not any((stats or {}).values()):
+                    summary['skipped'] += 1
+                    continue
+
+                stats = {key: (stats or {}).get(key, 0) for key in STAT_KEYS}
+                html = self.render(user.full_name, stats)
+                if dry_run:
+                    summary['queued'] += 1
+                    continue
+
+                msg = build_message(user.email, WEEKLY_DIGEST_SUBJECT, html)
+                if email_queue.enqueue(msg, timeout=enqueue_timeout):
+                    summary['queued'] += 1
+                else:
+                    summary['rejected'] += 1
+
+            # Libérer les objets de la tranche
+            db.session.expunge_all()
+
+        summary['duration_seconds'] = round(time.monotonic() - started, 2)
+        return summary
+
+
+# Instance singleton
+digest_service = DigestService()
@@ -0,0 +1,222 @@
+"""
+================================================================
+File d'envoi d'emails - BaraCorrespondance AI
+================================================================
+Pool borné de workers SMTP alimenté par une file:
+- chaque worker garde sa connexion SMTP ouverte tant qu'il a du travail
+  (Flask-Mail `connect()`, reconnexion tous les MAIL_MAX_EMAILS envois)
+- contre-pression: enqueue() attend au plus MAIL_ENQUEUE_TIMEOUT secondes
+  puis rejette le message si la file est pleine
+- nouvelles tentatives avec backoff exponentiel
+- métriques de livraison (stats())
+
+Pour les tests et benchmarks, un serveur SMTP local suffit:
+    python -m aiosmtpd -n -l localhost:8025
+avec MAIL_SERVER=localhost MAIL_PORT=8025 MAIL_USE_TLS=false
+"""
+
+import atexit
+import os
+import queue
+import threading
+import time
+
+from app import mail
+
+# Marqueur d'arrêt des workers
+_STOP = object()
+
+
+class EmailQueue:
+    """Pool de workers d'envoi d'emails"""
+
+    def __init__(self):
+        self._app = None
+        self._queue = None
+        self._workers = []
+        self._workers_pid = None
+        self._lock = threading.Lock()
+        self._metrics_lock = threading.Lock()
+        self._atexit_registered = False
+        self._metrics = {
+            'enqueued': 0,
+            'sent': 0,
+            'failed': 0,
+            'retried': 0,
+            'rejected': 0,
+            'connections': 0,
+            'send_time_total': 0.0
+        }
+
+    def init_app(self, app):
+        """Configurer le pool depuis la configuration de l'application"""
+        self._app = app
+        self.worker_count = app.config.get('MAIL_WORKERS', 2)
+        self.max_retries = app.config.get('MAIL_MAX_RETRIES', 3)
+        self.retry_backoff = app.config.get('MAIL_RETRY_BACKOFF', 2.0)
+        self.enqueue_timeout = app.config.get('MAIL_ENQUEUE_TIMEOUT', 5.0)
+        self.idle_timeout = app.config.get('MAIL_IDLE_TIMEOUT', 5.0)
+        self._queue = queue.Queue(maxsize=app.config.get('MAIL_QUEUE_SIZE', 1000))
+        if not self._atexit_registered:
+            atexit.register(self.shutdown)
+            self._atexit_registered = True
+
+    # ------------------------------------------------------------
+    # API publique
+    # ------------------------------------------------------------
+
+    def enqueue(self, msg, block=True, timeout=None):
+        """
+        Ajouter un message à la file
+
+        Args:
+            msg: flask_mail.Message
+            block: Attendre une place si la file est pleine
+            timeout: Attente maximale en secondes (défaut: MAIL_ENQUEUE_TIMEOUT)
+
+        Returns:
+            bool: False si le message a été rejeté (file pleine)
+        """
+        self._ensure_workers()
+        try:
+            if timeout is None:
+                timeout = self.enqueue_timeout
+            self._queue.put((msg, 0), block=block, timeout=timeout if block else None)
+        except queue.Full:
+            self._count('rejected')
+            self._app.logger.warning(f"File email pleine: message '{msg.subject}' rejeté")
+            return False
+
+        self._count('enqueued')
+        return True
+
+    def stats(self):
+        """Métriques de livraison"""
+        with self._metrics_lock:
+            metrics = dict(self._metrics)
+        sent = metrics.pop('send_time_total')
+        metrics['avg_send_ms'] = round(sent / metrics['sent'] * 1000, 2) if metrics['sent'] else 0
+        metrics['queue_depth'] = self._queue.qsize() if self._queue else 0
+        metrics['workers'] = sum(1 for w in self._workers if w.is_alive())
+        return metrics
+
+    def join(self, timeout=None):
+        """Attendre que la file soit vide (tests, benchmarks, arrêt)"""
+        deadline = time.monotonic() + timeout if timeout else None
+        while self._queue.unfinished_tasks:
+            if deadline and time.monotonic() > deadline:
+                return False
+            time.sleep(0.05)
+        return True
+
+    def shutdown(self, timeout=10):
+        """Vider la file puis arrêter les workers"""
+        if self._queue is None or self._workers_pid != os.getpid():
+            return
+        self.join(timeout)
+        for _ in self._workers:
+            self._queue.put((_STOP, 0))
+        for worker in self._workers:
+            worker.join(timeout=1)
+        self._workers = []
+
+    # ------------------------------------------------------------
+    # Workers
+    # ------------------------------------------------------------
+
+    def _count(self, key, value=1):
+        with self._metrics_lock:
+            self._metrics[key] += value
+
+    def _ensure_workers(self):
+        """Démarrer les workers (une fois par processus, après fork)"""
+        if self._workers_pid == os.getpid():
+            return
+        with self._lock:
+            if self._workers_pid == os.getpid():
+                return
+            self._workers = [
+                threading.Thread(target=self._run, name=f'email-worker-{i}', daemon=True)
+                for i in range(self.worker_count)
+            ]
+            self._workers_pid = os.getpid()
+            for worker in self._workers:
+                worker.start()
+
+    def _run(self):
+        """Boucle d'un worker: une connexion SMTP par rafale de messages"""
+        with self._app.app_context():
+            while True:
+                item = self._queue.get()
+                if item[0] is _STOP:
+                    self._queue.task_done()
+                    return
+                try:
+                    with mail.connect() as connection:
+                        self._count('connections')
+                        # Réutiliser la connexion tant que la file n'est pas vide
+                        while item is not None:
+                            if item[0] is _STOP:
+                                self._queue.task_done()
+                                return
+                            if not self._deliver(connection, item):
+                                # Connexion probablement cassée: en rouvrir une
+                                item = None
+                                break
+                            try:
+                                item = self._queue.get(timeout=self.idle_timeout)
+                            except queue.Empty:
+                                item = None
+                except Exception as e:
+                    # Échec d'ouverture de la connexion SMTP
+                    self._app.logger.error(f"Connexion SMTP impossible: {e}")
+                    if item is not None:
+                        self._retry_or_fail(item, e)
+                        self._queue.task_done()
+
+    def _deliver(self, connection, item):
+        """Envoyer un message; True si la connexion reste utilisable"""
+        msg, attempt = item
+        started = time.monotonic()
+        try:
+            connection.send(msg)
+            self._count('sent')
+            self._count('send_time_total', time.monotonic() - started)
+            return True
+        except Exception as e:
+            self._retry_or_fail(item, e)
+            return False
+        finally:
+            self._queue.task_done()
+
+    def _retry_or_fail(self, item, error):
+        """Replanifier un message avec backoff, ou l'abandonner"""
+        msg, attempt = item
+        if attempt >= self.max_retries:
+            self._count('failed')
+            self._app.logger.error(f"Erreur envoi email '{msg.subject}' (abandon après {attempt + 1} essais): {error}")
+            return
+
+        self._count('retried')
+        delay = self.retry_backoff * (2 ** attempt)
+        # Compté comme travail en cours jusqu'à la nouvelle tentative
+        with self._queue.all_tasks_done:
+            self._queue.unfinished_tasks += 1
+        timer = threading.Timer(delay, self._requeue, args=((msg, attempt + 1),))
+        timer.daemon = True
+        timer.start()
+
+    def _requeue(self, item):
+        """Remettre un message en file après le délai de backoff"""
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            self._count('failed')
+            self._app.logger.error(f"Erreur envoi email '{item[0].subject}': file pleine lors de la nouvelle tentative")
+        finally:
+            # Compense l'incrément fait dans _retry_or_fail
+            self._queue.task_done()
+
+
+# Instance singleton
+email_queue = EmailQueue()
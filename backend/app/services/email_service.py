@@ -3,29 +3,20 @@
 Email Service - BaraCorrespondance AI
 ================================================================
 Service d'envoi d'emails avec templates HTML
+Les messages sont remis à la file d'envoi (app.services.email_queue)
 """
 
-from flask import current_app, render_template_string
+from flask import current_app
 from flask_mail import Message
-from threading import Thread
-from app import mail
+from app.services.email_queue import email_queue
 
 
-def send_async_email(app, msg):
-    """Envoi asynchrone d'email"""
-    with app.app_context():
-        try:
-            mail.send(msg)
-        except Exception as e:
-            current_app.logger.error(f"Erreur envoi email: {e}")
-
-
-def send_email(to, subject, html_body, text_body=None):
+def build_message(to, subject, html_body, text_body=None):
     """
-    Envoyer un email
+    Construire un message email
 
     Args:
-        to: email destinataire
+        to: email destinataire (ou liste)
         subject: sujet
         html_body: corps HTML
         text_body: corps texte (optionnel)
@@ -38,9 +29,24 @@ def send_email(to, subject, html_body, text_body=None):
 
     msg.html = html_body
     msg.body = text_body or html_body
+    return msg
+
+
+def send_email(to, subject, html_body, text_body=None):
+    """
+    Envoyer un email (asynchrone, via la file d'envoi)
+
+    Args:
+        to: email destinataire
+        subject: sujet
+        html_body: corps HTML
+        text_body: corps texte (optionnel)
 
-    # Envoi asynchrone
-    Thread(target=send_async_email, args=(current_app._get_current_object(), msg)).start()
+    Returns:
+        bool: False si la file est pleine et le message rejeté
+    """
+    # Envoi asynchrone par le pool de workers
+    return email_queue.enqueue(build_message(to, subject, html_body, text_body))
 
 
 # ================================================================
@@ -91,16 +97,24 @@ def get_email_template(title, content, cta_text=None, cta_link=None):
 
 def send_welcome_email(user_email, user_name, user_role):
     """Email de bienvenue"""
+    is_company = user_role == 'company'
+    goal = 'trouver les meilleurs talents' if is_company else 'trouver votre emploi idéal'
+    steps = [
+        'Complétez votre profil entreprise' if is_company else 'Uploadez votre CV pour analyse IA',
+        "Créez votre première offre d'emploi" if is_company else "Explorez les offres d'emploi correspondantes",
+        'Découvrez les candidats matchés' if is_company else 'Postulez aux offres qui vous intéressent'
+    ]
+
     content = f"""
         <p>Bonjour <strong>{user_name}</strong>,</p>
         <p>Bienvenue sur <strong>BaraCorrespondance AI</strong> ! 🎉</p>
         <p>Votre compte <strong>{user_role}</strong> a été créé avec succès.</p>
-        <p>Notre intelligence artificielle est prête à vous aider à {'trouver les meilleurs talents' if user_role == 'company' else 'trouver votre emploi idéal'}.</p>
+        <p>Notre intelligence artificielle est prête à vous aider à {goal}.</p>
         <p><strong>Prochaines étapes :</strong></p>
         <ul>
-            <li>{'Complétez votre profil entreprise' if user_role == 'company' else 'Uploadez votre CV pour analyse IA'}</li>
-            <li>{'Créez votre première offre d\'emploi' if user_role == 'company' else 'Explorez les offres d\'emploi correspondantes'}</li>
-            <li>{'Découvrez les candidats matchés' if user_role == 'company' else 'Postulez aux offres qui vous intéressent'}</li>
+            <li>{steps[0]}</li>
+            <li>{steps[1]}</li>
+            <li>{steps[2]}</li>
         </ul>
     """
 
@@ -154,14 +168,19 @@ def send_application_status_email(user_email, user_name, job_title, status):
         'interview': '#f59e0b'
     }
 
+    extra = ''
+    if status in ('accepted', 'interview'):
+        extra = "<p>Félicitations ! L'entreprise souhaite vous rencontrer.</p>"
+    elif status == 'rejected':
+        extra = "<p>Continuez vos recherches, d'autres opportunités vous attendent !</p>"
+
     content = f"""
         <p>Bonjour <strong>{user_name}</strong>,</p>
         <div style="background: {status_colors.get(status, '#06b6d4')}; color: white; padding: 20px; border-radius: 8px; text-align: center; margin: 20px 0;">
             <h2 style="margin: 0;">{status_messages.get(status, 'Mise à jour de candidature')}</h2>
         </div>
         <p>Concernant votre candidature pour le poste de <strong>{job_title}</strong>.</p>
-        {'<p>Félicitations ! L\'entreprise souhaite vous rencontrer.</p>' if status == 'accepted' or status == 'interview' else ''}
-        {'<p>Continuez vos recherches, d\'autres opportunités vous attendent !</p>' if status == 'rejected' else ''}
+        {extra}
     """
 
     html = get_email_template(
@@ -195,9 +214,14 @@ def send_new_message_email(user_email, user_name, sender_name, message_preview):
     send_email(user_email, f"Nouveau message de {sender_name}", html)
 
 
-def send_weekly_digest_email(user_email, user_name, stats):
-    """Email récapitulatif hebdomadaire"""
-    content = f"""
+WEEKLY_DIGEST_TITLE = "Votre Récapitulatif Hebdomadaire"
+WEEKLY_DIGEST_SUBJECT = "Votre récapitulatif hebdomadaire"
+WEEKLY_DIGEST_CTA = ("Voir mon tableau de bord", "http://localhost:5173/dashboard")
+
+
+def weekly_digest_content(user_name, stats):
+    """Contenu HTML du récapitulatif hebdomadaire (sans le gabarit)"""
+    return f"""
         <p>Bonjour <strong>{user_name}</strong>,</p>
         <p>📊 Voici votre récapitulatif de la semaine :</p>
         <div style="background: white; padding: 20px; border-radius: 8px; margin: 20px 0;">
@@ -206,20 +230,22 @@ def send_weekly_digest_email(user_email, user_name, stats):
                 <li><strong>{stats.get('new_matches', 0)}</strong> nouveaux matchs</li>
                 <li><strong>{stats.get('profile_views', 0)}</strong> vues de profil</li>
                 <li><strong>{stats.get('applications', 0)}</strong> candidatures</li>
-                <li><strong>{stats.get('messages', 0)}</strong> messages échangés</li>
+                <li><strong>{stats.get('messages', 0)}</strong> messages reçus</li>
             </ul>
         </div>
         <p>Continuez sur cette lancée ! 💪</p>
     """
 
+
+def send_weekly_digest_email(user_email, user_name, stats):
+    """Email récapitulatif hebdomadaire"""
     html = get_email_template(
-        "Votre Récapitulatif Hebdomadaire",
-        content,
-        "Voir mon tableau de bord",
-        "http://localhost:5173/dashboard"
+        WEEKLY_DIGEST_TITLE,
+        weekly_digest_content(user_name, stats),
+        *WEEKLY_DIGEST_CTA
     )
 
-    send_email(user_email, "Votre récapitulatif hebdomadaire", html)
+    send_email(user_email, WEEKLY_DIGEST_SUBJECT, html)
 
 
 def send_cv_analysis_complete_email(user_email, user_name, score):
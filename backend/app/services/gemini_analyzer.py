@@ -8,13 +8,17 @@ Utilise Google Gemini (gratuit) pour analyser les CVs
 import json
 import os
 from flask import current_app
-# Import google.generativeai optionally - may not be installed in all environments
-try:
+
+from app.utils.lazy import module_available
+
+# google.generativeai est optionnel et coûteux à importer: chargé au premier appel
+GENAI_AVAILABLE = module_available('google.generativeai')
+
+
+def _genai():
+    """Module google.generativeai (importé au premier usage)"""
     import google.generativeai as genai
-    GENAI_AVAILABLE = True
-except Exception:
-    genai = None
-    GENAI_AVAILABLE = False
+    return genai
 
 
 class GeminiAnalyzerService:
@@ -35,6 +39,7 @@ class GeminiAnalyzerService:
                 raise ValueError("GEMINI_API_KEY non configurée. Obtenez une clé gratuite sur https://makersuite.google.com/app/apikey")
 
             # Configurer Gemini
+            genai = _genai()
             genai.configure(api_key=api_key)
 
             # Utiliser gemini-1.5-flash (gratuit et rapide)
@@ -113,7 +118,7 @@ Retourne UNIQUEMENT un JSON valide avec cette structure exacte:
             # Générer la réponse
             response = model.generate_content(
                 user_prompt,
-                generation_config=genai.types.GenerationConfig(
+                generation_config=_genai().types.GenerationConfig(
                     temperature=0.3,
                     max_output_tokens=2000,
                 )
@@ -217,7 +222,7 @@ Retourne un JSON avec cette structure:
 
             response = model.generate_content(
                 prompt,
-                generation_config=genai.types.GenerationConfig(
+                generation_config=_genai().types.GenerationConfig(
                     temperature=0.5,
                     max_output_tokens=1000,
                 )
@@ -265,7 +270,7 @@ La lettre doit:
 
             response = model.generate_content(
                 prompt,
-                generation_config=genai.types.GenerationConfig(
+                generation_config=_genai().types.GenerationConfig(
                     temperature=0.7,
                     max_output_tokens=800,
                 )
@@ -315,7 +320,7 @@ Retourne UNIQUEMENT un JSON valide avec:
 
             response = model.generate_content(
                 prompt,
-                generation_config=genai.types.GenerationConfig(
+                generation_config=_genai().types.GenerationConfig(
                     temperature=0.8,
                     max_output_tokens=500,
                 )
@@ -0,0 +1,187 @@
+"""
+================================================================
+Déclinaisons d'images - BaraCorrespondance AI
+================================================================
+Après l'upload d'un avatar ou d'un logo et la génération d'une
+affiche, un pool de threads (Pillow relâche le GIL pendant le
+redimensionnement et l'encodage) produit des versions réduites:
+- tailles bornées par préréglage (IMAGE_PRESETS)
+- WebP, ou JPEG si Pillow n'a pas le support WebP
+- orientation EXIF appliquée puis métadonnées (EXIF, ICC, XMP) retirées
+- images stockées dans le blob store, URLs enregistrées sur le modèle
+  (avatar_variants, logo_variants, thumbnail_variants)
+
+Les sérialiseurs de listes utilisent la miniature ('thumb') et
+retombent sur l'original tant qu'elle n'existe pas.
+"""
+
+import atexit
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from io import BytesIO
+
+from app import db
+from app.models import User, Company, Poster
+from app.services.blob_store import blob_store
+
+# Préréglages: modèle, colonne source, colonne des déclinaisons, {nom: (largeur, hauteur) max}
+IMAGE_PRESETS = {
+    'avatar': (User, 'avatar_url', 'avatar_variants', {'thumb': (96, 96), 'medium': (256, 256), 'large': (512, 512)}),
+    'logo': (Company, 'logo_url', 'logo_variants', {'thumb': (96, 96), 'medium': (256, 256), 'large': (512, 512)}),
+    'poster': (Poster, 'file_path', 'thumbnail_variants', {'thumb': (270, 480), 'medium': (540, 960)}),
+}
+
+
+@lru_cache(maxsize=None)
+def webp_available():
+    """Pillow a-t-il le support WebP ? (Pillow importé au premier rendu)"""
+    from PIL import features
+    return features.check('webp')
+
+
+def render_variants(source, sizes, quality=80, max_pixels=None):
+    """
+    Produire les déclinaisons d'une image
+
+    Args:
+        source: Objet fichier binaire de l'image d'origine
+        sizes: {nom: (largeur, hauteur)} boîtes englobantes
+        quality: Qualité d'encodage
+        max_pixels: Taille maximale acceptée (bombes de décompression)
+
+    Returns:
+        dict: {nom: (octets, type MIME, extension)}
+    """
+    from PIL import Image, ImageOps
+
+    with Image.open(source) as original:
+        # Dimensions lues dans l'en-tête, avant tout décodage. Image.MAX_IMAGE_PIXELS
+        # n'est pas modifié: global au processus (partagé avec le générateur
+        # d'affiches) et Pillow ne lève d'erreur qu'au double de cette valeur
+        width, height = original.size
+        if max_pixels and width * height > max_pixels:
+            raise Image.DecompressionBombError(
+                f"Image trop grande: {width * height} pixels (maximum {max_pixels})"
+            )
+        image = ImageOps.exif_transpose(original)
+        image.load()
+
+    has_alpha = image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info)
+    if webp_available():
+        image = image.convert('RGBA' if has_alpha else 'RGB')
+        fmt, mimetype, extension = 'WEBP', 'image/webp', '.webp'
+    else:
+        # JPEG: transparence aplatie sur fond blanc
+        if has_alpha:
+            background = Image.new('RGB', image.size, 'white')
+            background.paste(image.convert('RGBA'), mask=image.convert('RGBA').split()[-1])
+            image = background
+        else:
+            image = image.convert('RGB')
+        fmt, mimetype, extension = 'JPEG', 'image/jpeg', '.jpg'
+
+    variants = {}
+    for name, box in sizes.items():
+        resized = image.copy()
+        resized.thumbnail(box, Image.LANCZOS)
+        buffer = BytesIO()
+        # Aucun exif/icc_profile transmis: les métadonnées ne sont pas recopiées
+        if fmt == 'WEBP':
+            resized.save(buffer, fmt, quality=quality, method=4)
+        else:
+            resized.save(buffer, fmt, quality=quality, optimize=True, progressive=True)
+        variants[name] = (buffer.getvalue(), mimetype, extension)
+    return variants
+
+
+class ImageDerivativeService:
+    """Pool de génération des déclinaisons d'images"""
+
+    def __init__(self):
+        self._app = None
+        self._executor = None
+        self._executor_pid = None
+        self._lock = threading.Lock()
+        self._atexit_registered = False
+
+    def init_app(self, app):
+        """Configurer le pool"""
+        self._app = app
+        self.workers = app.config.get('IMAGE_WORKERS', 2)
+        self.quality = app.config.get('IMAGE_QUALITY', 80)
+        self.run_async = app.config.get('IMAGE_DERIVATIVES_ASYNC', True)
+        self.max_pixels = app.config.get('IMAGE_MAX_PIXELS')
+        if not self._atexit_registered:
+            atexit.register(self.shutdown)
+            self._atexit_registered = True
+
+    def _pool(self):
+        """Pool de threads (un par processus, après fork)"""
+        with self._lock:
+            if self._executor is None or self._executor_pid != os.getpid():
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='image-derivatives')
+                self._executor_pid = os.getpid()
+            return self._executor
+
+    def schedule(self, preset, entity_id):
+        """
+        Planifier les déclinaisons d'une entité (après le commit de sa nouvelle image)
+
+        Args:
+            preset: 'avatar', 'logo' ou 'poster'
+            entity_id: ID de l'utilisateur, de l'entreprise ou de l'affiche
+        """
+        if not self.run_async:
+            return self.generate(preset, entity_id)
+        return self._pool().submit(self._run, preset, entity_id)
+
+    def _run(self, preset, entity_id):
+        with self._app.app_context():
+            try:
+                return self.generate(preset, entity_id)
+            except Exception as e:
+                self._app.logger.error(f"Erreur déclinaisons {preset} {entity_id}: {e}")
+            finally:
+                db.session.remove()
+
+    def generate(self, preset, entity_id):
+        """
+        Générer et enregistrer les déclinaisons de l'image courante d'une entité
+
+        Returns:
+            dict: {nom: URL}, None si l'entité n'a pas d'image
+        """
+        model, source_attribute, variants_attribute, sizes = IMAGE_PRESETS[preset]
+        entity = db.session.get(model, entity_id)
+        source_url = getattr(entity, source_attribute, None) if entity else None
+        if not source_url:
+            return None
+
+        with blob_store.open(source_url) as stream:
+            rendered = render_variants(BytesIO(stream.read()), sizes, self.quality, self.max_pixels)
+
+        urls = {
+            name: blob_store.put(BytesIO(data), mimetype, extension)
+            for name, (data, mimetype, extension) in rendered.items()
+        }
+
+        # L'image a pu être remplacée pendant le calcul: ne pas écraser
+        updated = model.query.filter(
+            model.id == entity_id, getattr(model, source_attribute) == source_url
+        ).first()
+        if updated is not None:
+            setattr(updated, variants_attribute, urls)
+        db.session.commit()
+        return urls
+
+    def shutdown(self):
+        """Attendre les déclinaisons en cours"""
+        if self._executor is not None and self._executor_pid == os.getpid():
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+# Instance singleton
+image_derivatives = ImageDerivativeService()
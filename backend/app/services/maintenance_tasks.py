@@ -0,0 +1,138 @@
+"""
+================================================================
+Tâches de maintenance - BaraCorrespondance AI
+================================================================
+Tâches planifiées par app.services.scheduler (flask list-tasks pour
+les déclencheurs, flask run-task <nom> pour une exécution à la main).
+Chaque tâche retourne un bilan enregistré dans l'historique.
+"""
+
+from datetime import datetime, timedelta
+
+from flask import current_app
+
+from app import db
+from app.models import Job, Match, Notification, CVAnalysis, CounterDay, CandidateRemoval
+from app.services.scheduler import scheduler
+
+
+@scheduler.task('expire-jobs', every=300, timeout=120)
+def expire_jobs():
+    """Désactiver les offres dont la date d'expiration est passée"""
+    expired = Job.query.filter(
+        Job.is_active == True,
+        Job.expires_at <= datetime.utcnow()
+    ).update({'is_active': False}, synchronize_session=False)
+    db.session.commit()
+    return {'expired': expired}
+
+
+@scheduler.task('expire-matches', every=900, timeout=120)
+def expire_matches():
+    """Passer en 'expired' les matchs dont la date d'expiration est passée"""
+    expired = Match.query.filter(
+        Match.status != 'expired',
+        Match.expires_at <= datetime.utcnow()
+    ).update({'status': 'expired'}, synchronize_session=False)
+    db.session.commit()
+    return {'expired': expired}
+
+
+@scheduler.task('flush-counters', every='COUNTER_FLUSH_INTERVAL', timeout=60, scope='worker')
+def flush_counters():
+    """Écrire les compteurs en attente de ce worker"""
+    from app.services.counter_service import counter_buffer
+
+    return {'rows': counter_buffer.flush()}
+
+
+@scheduler.task('refresh-match-features', cron='15 2 * * *', timeout=1800)
+def refresh_match_features(batch_size=500):
+    """Recalculer les caractéristiques de matching périmées (offres et analyses de CV)"""
+    from app.utils.match_features import build_job_features, build_cv_features, MATCH_FEATURES_VERSION
+
+    summary = {}
+    for model, build in ((Job, build_job_features), (CVAnalysis, build_cv_features)):
+        refreshed = 0
+        last_id = 0
+        while True:
+            rows = model.query.filter(model.id > last_id).order_by(model.id).limit(batch_size).all()
+            if not rows:
+                break
+            for row in rows:
+                if (row.match_features or {}).get('version') != MATCH_FEATURES_VERSION:
+                    values = {'match_features': build(row)}
+                    if hasattr(model, 'updated_at'):
+                        # Donnée dérivée: ne pas modifier updated_at (ETags)
+                        values['updated_at'] = model.updated_at
+                    model.query.filter_by(id=row.id).update(values, synchronize_session=False)
+                    refreshed += 1
+            last_id = rows[-1].id
+            db.session.commit()
+        summary[model.__tablename__] = refreshed
+    return summary
+
+
+@scheduler.task('rebuild-matching-snapshot', every='MATCHING_SNAPSHOT_REBUILD_INTERVAL', timeout=1800, scope='host')
+def rebuild_matching_snapshot():
+    """Reconstruire l'instantané de matching de l'hôte (journal des deltas remis à zéro)"""
+    from app.services.matching_snapshot import matching_snapshot
+
+    if not matching_snapshot.enabled:
+        return {'skipped': 'MATCHING_SNAPSHOT_DIR non configuré'}
+    return matching_snapshot.build()
+
+
+@scheduler.task('refit-tfidf-index', every='TFIDF_REFIT_INTERVAL', timeout=1800, scope='host')
+def refit_tfidf_index():
+    """Réapprendre l'index TF-IDF de l'hôte (critère sémantique du matching)"""
+    from app.services.semantic_index import semantic_index
+
+    if not semantic_index.enabled:
+        return {'skipped': 'TFIDF_WEIGHT nul ou scikit-learn absent'}
+    return semantic_index.build()
+
+
+@scheduler.task('purge-notifications', cron='30 3 * * *', timeout=600)
+def purge_notifications():
+    """Supprimer les notifications lues anciennes, les compteurs quotidiens, les suppressions de candidats et l'historique des tâches"""
+    now = datetime.utcnow()
+    cutoff = now - timedelta(days=current_app.config.get('NOTIFICATION_RETENTION_DAYS', 90))
+    deleted = Notification.query.filter(
+        Notification.is_read == True,
+        Notification.created_at < cutoff
+    ).delete(synchronize_session=False)
+    counter_days = CounterDay.query.filter(
+        CounterDay.day < (now - timedelta(days=current_app.config.get('COUNTER_HISTORY_DAYS', 35))).date()
+    ).delete(synchronize_session=False)
+    removals = CandidateRemoval.query.filter(
+        CandidateRemoval.removed_at < now - timedelta(days=current_app.config.get('CANDIDATE_REMOVAL_RETENTION_DAYS', 7))
+    ).delete(synchronize_session=False)
+    db.session.commit()
+    return {
+        'notifications': deleted,
+        'counter_days': counter_days,
+        'candidate_removals': removals,
+        'task_runs': scheduler.prune_history()
+    }
+
+
+@scheduler.task('gc-blobs', cron='45 3 * * *', timeout=1800)
+def gc_blobs(grace=None):
+    """Supprimer les fichiers stockés non référencés et les uploads reprenables expirés"""
+    from app.services.blob_store import blob_store
+    from app.services.resumable_uploads import resumable_uploads
+
+    sessions = resumable_uploads.purge_expired()
+    grace = grace if grace is not None else current_app.config['BLOB_GC_GRACE']
+    result = blob_store.collect_garbage(grace)
+    result['upload_sessions'] = sessions
+    return result
+
+
+@scheduler.task('weekly-digest', cron='WEEKLY_DIGEST_CRON', timeout=3600)
+def weekly_digest():
+    """Envoyer le récapitulatif hebdomadaire à tous les utilisateurs"""
+    from app.services.digest_service import digest_service
+
+    return digest_service.send_weekly_digests()
@@ -7,6 +7,8 @@ Algorithme de matching entre candidats et offres d'emploi
 
 from app import db
 from app.models import Candidate, Job, JobApplication
+from app.utils.ranking import TopK, can_reach, remaining_weights, SCORE_MARGIN
+from app.services.skill_vocabulary import skill_vocabulary
 
 
 class MatcherService:
@@ -21,6 +23,13 @@ class MatcherService:
         'salary': 0.10        # 10% - Salaire
     }
     
+    # Ordre de calcul (poids décroissants: l'élagage intervient au plus tôt)
+    CRITERIA = ('skills', 'experience', 'education', 'location', 'salary')
+    REMAINING_WEIGHTS = remaining_weights(WEIGHTS, CRITERIA)
+    
+    # Nombre de résultats retournés par défaut
+    TOP_K = 20
+    
     def calculate_match_score(self, candidate, job):
         """
         Calculer le score de matching entre un candidat et une offre
@@ -32,43 +41,71 @@ class MatcherService:
         Returns:
             dict: Scores détaillés et score global
         """
-        scores = {
-            'skills_match': self._calculate_skills_match(candidate, job),
-            'experience_match': self._calculate_experience_match(candidate, job),
-            'education_match': self._calculate_education_match(candidate, job),
-            'location_match': self._calculate_location_match(candidate, job),
-            'salary_match': self._calculate_salary_match(candidate, job)
+        return self._bounded_match_score(candidate, job)[0]
+    
+    def _bounded_match_score(self, candidate, job, threshold=None, target=None):
+        """
+        Calculer le score critère par critère avec élagage
+        
+        Le calcul s'arrête dès que la borne supérieure (score partiel +
+        100% des critères restants) passe sous le seuil, ou sous `target`
+        (score du K-ième meilleur) si le seuil est déjà garanti.
+        
+        Args:
+            candidate: Objet Candidate
+            job: Objet Job
+            threshold: Score minimum pour être compté
+            target: Score à dépasser pour entrer dans le top K
+            
+        Returns:
+            tuple: (scores ou None si élagué, score >= seuil)
+        """
+        scorers = {
+            'skills': self._calculate_skills_match,
+            'experience': self._calculate_experience_match,
+            'education': self._calculate_education_match,
+            'location': self._calculate_location_match,
+            'salary': self._calculate_salary_match
         }
         
-        # Calculer le score global pondéré
-        overall = (
-            scores['skills_match'] * self.WEIGHTS['skills'] +
-            scores['experience_match'] * self.WEIGHTS['experience'] +
-            scores['education_match'] * self.WEIGHTS['education'] +
-            scores['location_match'] * self.WEIGHTS['location'] +
-            scores['salary_match'] * self.WEIGHTS['salary']
-        )
+        scores = {}
+        overall = 0
+        for criterion in self.CRITERIA:
+            scores[f'{criterion}_match'] = scorers[criterion](candidate, job)
+            overall += scores[f'{criterion}_match'] * self.WEIGHTS[criterion]
+            
+            remaining = self.REMAINING_WEIGHTS[criterion]
+            if not remaining:
+                break
+            if not can_reach(overall, remaining, threshold):
+                return None, False
+            if not can_reach(overall, remaining, target):
+                # Hors du top K: inutile de finir si le seuil est déjà acquis
+                if threshold is None or overall >= threshold + SCORE_MARGIN:
+                    return None, True
         
         scores['overall'] = round(overall, 1)
         
-        return scores
+        return scores, threshold is None or scores['overall'] >= threshold
     
     def _calculate_skills_match(self, candidate, job):
         """Calculer la correspondance des compétences"""
-        candidate_skills = set(s.lower() for s in (candidate.skills or []))
-        required_skills = set(s.lower() for s in (job.required_skills or []))
-        nice_to_have = set(s.lower() for s in (job.nice_to_have_skills or []))
+        # Bitsets du vocabulaire (synonymes résolus): ET binaire + popcount
+        with skill_vocabulary.pinned():
+            candidate_skills = skill_vocabulary.bits(candidate.skills)
+            required_skills = skill_vocabulary.bits(job.required_skills)
+            nice_to_have = skill_vocabulary.bits(job.nice_to_have_skills)
+            required_match = (candidate_skills & required_skills).bit_count()
+            nice_match = (candidate_skills & nice_to_have).bit_count()
         
         if not required_skills:
             return 100  # Pas de compétences requises = match parfait
         
         # Compétences requises trouvées
-        required_match = len(candidate_skills & required_skills)
-        required_total = len(required_skills)
+        required_total = required_skills.bit_count()
         required_score = (required_match / required_total) * 100 if required_total > 0 else 100
         
         # Bonus pour les compétences "nice to have"
-        nice_match = len(candidate_skills & nice_to_have)
         nice_bonus = min(10, nice_match * 2)  # Max 10 points bonus
         
         return min(100, required_score + nice_bonus)
@@ -181,13 +218,20 @@ class MatcherService:
         # Offre au-dessus des attentes (bonus!)
         return 100
     
-    def find_matches_for_job(self, job_id, min_score=None):
+    def _applied_ids(self, column, **filters):
+        """IDs (offres ou candidats) déjà liés par une candidature, en une requête"""
+        return {
+            row[0] for row in db.session.query(column).filter_by(**filters)
+        }
+    
+    def find_matches_for_job(self, job_id, min_score=None, limit=TOP_K):
         """
         Trouver les candidats correspondant à une offre
         
         Args:
             job_id: ID de l'offre
             min_score: Score minimum (utilise le seuil de l'offre si non spécifié)
+            limit: Nombre de candidats retournés
             
         Returns:
             dict: Résultats du matching
@@ -198,53 +242,58 @@ class MatcherService:
         
         threshold = min_score or job.match_threshold or 60
         
-        # Récupérer les candidats disponibles et publics
+        # Grand vivier: matching réparti sur plusieurs processus/nœuds
+        from app.services.sharded_matcher import sharded_matcher
+        if sharded_matcher.enabled:
+            return sharded_matcher.find_matches_for_job(job, threshold, limit)
+        
+        # Récupérer les candidats disponibles et publics (par ID: ex aequo déterministes)
         candidates = Candidate.query.filter_by(
             is_public=True,
             is_available=True
-        ).all()
+        ).order_by(Candidate.id).all()
+        
+        # Candidats ayant déjà postulé
+        applied = self._applied_ids(JobApplication.candidate_id, job_id=job_id)
         
-        matches = []
+        top = TopK(limit, threshold)
+        total_found = 0
         
         for candidate in candidates:
-            # Vérifier s'il n'a pas déjà postulé
-            existing = JobApplication.query.filter_by(
-                job_id=job_id,
-                candidate_id=candidate.id
-            ).first()
-            
-            if existing:
+            if candidate.id in applied:
                 continue
             
-            # Calculer le score
-            score = self.calculate_match_score(candidate, job)
+            # Calculer le score (élagué s'il ne peut pas entrer dans le top)
+            score, found = self._bounded_match_score(candidate, job, threshold, top.floor)
+            total_found += found
             
-            if score['overall'] >= threshold:
-                matches.append({
-                    'candidate_id': candidate.id,
-                    'candidate_name': candidate.user.full_name if candidate.user else 'N/A',
-                    'candidate_title': candidate.title,
-                    'score': score
-                })
+            if score is not None:
+                top.push(score['overall'], (candidate, score))
         
-        # Trier par score décroissant
-        matches.sort(key=lambda x: x['score']['overall'], reverse=True)
+        # Sérialiser uniquement les K retenus
+        matches = [{
+            'candidate_id': candidate.id,
+            'candidate_name': candidate.user.full_name if candidate.user else 'N/A',
+            'candidate_title': candidate.title,
+            'score': score
+        } for _, (candidate, score) in top.results()]
         
         return {
             'job_id': job_id,
             'job_title': job.title,
             'threshold': threshold,
-            'total_found': len(matches),
-            'top_candidates': matches[:20]  # Top 20
+            'total_found': total_found,
+            'top_candidates': matches
         }
     
-    def find_jobs_for_candidate(self, candidate_id, min_score=60):
+    def find_jobs_for_candidate(self, candidate_id, min_score=60, limit=TOP_K):
         """
         Trouver les offres correspondant à un candidat
         
         Args:
             candidate_id: ID du candidat
             min_score: Score minimum
+            limit: Nombre d'offres retournées
             
         Returns:
             dict: Offres correspondantes
@@ -256,38 +305,37 @@ class MatcherService:
         # Récupérer les offres actives
         jobs = Job.query.filter_by(is_active=True).all()
         
-        matches = []
+        # Offres auxquelles le candidat a déjà postulé
+        applied = self._applied_ids(JobApplication.job_id, candidate_id=candidate_id)
+        
+        top = TopK(limit, min_score)
+        total_found = 0
         
         for job in jobs:
-            # Vérifier si pas déjà postulé
-            existing = JobApplication.query.filter_by(
-                job_id=job.id,
-                candidate_id=candidate_id
-            ).first()
-            
-            if existing:
+            if job.id in applied:
                 continue
             
-            # Calculer le score
-            score = self.calculate_match_score(candidate, job)
+            # Calculer le score (élagué s'il ne peut pas entrer dans le top)
+            score, found = self._bounded_match_score(candidate, job, min_score, top.floor)
+            total_found += found
             
-            if score['overall'] >= min_score:
-                matches.append({
-                    'job_id': job.id,
-                    'job_title': job.title,
-                    'company_name': job.company.name if job.company else 'N/A',
-                    'company_logo': job.company.logo_url if job.company else None,
-                    'score': score
-                })
-        
-        # Trier par score décroissant
-        matches.sort(key=lambda x: x['score']['overall'], reverse=True)
+            if score is not None:
+                top.push(score['overall'], (job, score))
+        
+        # Sérialiser uniquement les K retenus
+        matches = [{
+            'job_id': job.id,
+            'job_title': job.title,
+            'company_name': job.company.name if job.company else 'N/A',
+            'company_logo': job.company.logo_url if job.company else None,
+            'score': score
+        } for _, (job, score) in top.results()]
         
         return {
             'candidate_id': candidate_id,
             'min_score': min_score,
-            'total_found': len(matches),
-            'matching_jobs': matches[:20]
+            'total_found': total_found,
+            'matching_jobs': matches
         }
     
     def get_match_explanation(self, candidate, job, scores):
@@ -307,11 +355,14 @@ class MatcherService:
                 'message': "Vos compétences correspondent très bien aux exigences du poste."
             })
         elif scores['skills_match'] < 50:
-            missing = set(s.lower() for s in (job.required_skills or [])) - set(s.lower() for s in (candidate.skills or []))
+            with skill_vocabulary.pinned():
+                missing = skill_vocabulary.names(
+                    skill_vocabulary.bits(job.required_skills) & ~skill_vocabulary.bits(candidate.skills)
+                )
             explanations.append({
                 'type': 'negative',
                 'category': 'skills',
-                'message': f"Certaines compétences requises manquent: {', '.join(list(missing)[:3])}"
+                'message': f"Certaines compétences requises manquent: {', '.join(missing[:3])}"
             })
         
         # Expérience
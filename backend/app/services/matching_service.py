@@ -4,8 +4,22 @@ Service de Matching CV-Emplois - BaraCorrespondance AI
 ================================================================
 """
 
+from datetime import datetime
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+from sqlalchemy import or_
+
 from app.models import Candidate, Job, Company
 from app import db
+from app.utils.ranking import TopK, can_reach, remaining_weights, SCORE_MARGIN
+from app.utils.db_routing import read_only
+from app.services.skill_vocabulary import skill_vocabulary
 
 
 class MatchingService:
@@ -29,10 +43,27 @@ class MatchingService:
         'doctorate': 5
     }
 
-    def calculate_match_score(self, candidate, job):
+    # Ordre de calcul (poids décroissants: l'élagage intervient au plus tôt)
+    CRITERIA = ('skills', 'experience', 'education', 'location', 'salary')
+    REMAINING_WEIGHTS = remaining_weights(WEIGHTS, CRITERIA)
+
+    # Candidats traités par bloc dans la matrice de scores (mémoire bornée):
+    # au plus MATRIX_CHUNK_SIZE, moins quand les ~MATRIX_BLOCK_ARRAYS
+    # tableaux float64 (offres x bloc) dépasseraient MATRIX_BLOCK_BYTES
+    MATRIX_CHUNK_SIZE = 4096
+    MATRIX_BLOCK_BYTES = 64 * 1024 * 1024
+    MATRIX_BLOCK_ARRAYS = 24
+
+    def calculate_match_score(self, candidate, job, floor=None):
         """
         Calculer le score de compatibilité entre un candidat et une offre
 
+        Args:
+            candidate: Objet Candidate
+            job: Objet Job
+            floor: Score plancher optionnel; le calcul s'arrête (retourne None)
+                dès que la borne supérieure du score passe en dessous
+
         Returns:
             dict: {
                 'overall_score': float (0-100),
@@ -47,30 +78,35 @@ class MatchingService:
                 'missing_skills': list
             }
         """
-        # Calculer chaque composant du score
+        scorers = {
+            'experience': self._calculate_experience_score,
+            'education': self._calculate_education_score,
+            'location': self._calculate_location_score,
+            'salary': self._calculate_salary_score
+        }
+
+        # Compétences d'abord: critère le plus lourd
         skills_result = self._calculate_skills_score(candidate, job)
-        experience_score = self._calculate_experience_score(candidate, job)
-        education_score = self._calculate_education_score(candidate, job)
-        location_score = self._calculate_location_score(candidate, job)
-        salary_score = self._calculate_salary_score(candidate, job)
-
-        # Score global pondéré
-        overall_score = (
-            skills_result['score'] * self.WEIGHTS['skills'] +
-            experience_score * self.WEIGHTS['experience'] +
-            education_score * self.WEIGHTS['education'] +
-            location_score * self.WEIGHTS['location'] +
-            salary_score * self.WEIGHTS['salary']
-        )
+        scores = {'skills': skills_result['score']}
+        overall_score = scores['skills'] * self.WEIGHTS['skills']
+
+        previous = 'skills'
+        for criterion in self.CRITERIA[1:]:
+            # Borne supérieure: score partiel + 100% des critères restants
+            if not can_reach(overall_score, self.REMAINING_WEIGHTS[previous], floor):
+                return None
+            scores[criterion] = scorers[criterion](candidate, job)
+            overall_score += scores[criterion] * self.WEIGHTS[criterion]
+            previous = criterion
 
         return {
             'overall_score': round(overall_score, 1),
             'details': {
-                'skills_score': round(skills_result['score'], 1),
-                'experience_score': round(experience_score, 1),
-                'education_score': round(education_score, 1),
-                'location_score': round(location_score, 1),
-                'salary_score': round(salary_score, 1)
+                'skills_score': round(scores['skills'], 1),
+                'experience_score': round(scores['experience'], 1),
+                'education_score': round(scores['education'], 1),
+                'location_score': round(scores['location'], 1),
+                'salary_score': round(scores['salary'], 1)
             },
             'matched_skills': skills_result['matched'],
             'missing_skills': skills_result['missing']
@@ -78,31 +114,33 @@ class MatchingService:
 
     def _calculate_skills_score(self, candidate, job):
         """Calculer le score de correspondance des compétences"""
-        candidate_skills = set(s.lower() for s in (candidate.skills or []))
-        required_skills = set(s.lower() for s in (job.required_skills or []))
-        nice_to_have = set(s.lower() for s in (job.nice_to_have_skills or []))
+        # Bitsets du vocabulaire (synonymes résolus): ET binaire + popcount
+        with skill_vocabulary.pinned():
+            candidate_skills = skill_vocabulary.bits(candidate.skills)
+            required_skills = skill_vocabulary.bits(job.required_skills)
+            nice_to_have = skill_vocabulary.bits(job.nice_to_have_skills)
 
-        if not required_skills:
-            return {'score': 100, 'matched': list(candidate_skills), 'missing': []}
+            if not required_skills:
+                return {'score': 100, 'matched': skill_vocabulary.names(candidate_skills), 'missing': []}
 
-        # Compétences correspondantes
-        matched_required = candidate_skills & required_skills
-        matched_nice = candidate_skills & nice_to_have
+            # Compétences correspondantes
+            matched_required = candidate_skills & required_skills
+            matched_nice = candidate_skills & nice_to_have
 
-        # Score basé sur les compétences requises (80%) + nice to have (20%)
-        required_ratio = len(matched_required) / len(required_skills) if required_skills else 1
-        nice_ratio = len(matched_nice) / len(nice_to_have) if nice_to_have else 0
+            # Score basé sur les compétences requises (80%) + nice to have (20%)
+            required_ratio = matched_required.bit_count() / required_skills.bit_count()
+            nice_ratio = matched_nice.bit_count() / nice_to_have.bit_count() if nice_to_have else 0
 
-        score = (required_ratio * 80) + (nice_ratio * 20)
+            score = (required_ratio * 80) + (nice_ratio * 20)
 
-        # Compétences manquantes
-        missing = list(required_skills - candidate_skills)
+            # Compétences manquantes
+            missing = skill_vocabulary.names(required_skills & ~candidate_skills)
 
-        return {
-            'score': min(score, 100),
-            'matched': list(matched_required | matched_nice),
-            'missing': missing
-        }
+            return {
+                'score': min(score, 100),
+                'matched': skill_vocabulary.names(matched_required | matched_nice),
+                'missing': missing
+            }
 
     def _calculate_experience_score(self, candidate, job):
         """Calculer le score d'expérience"""
@@ -184,6 +222,7 @@ class MatchingService:
             # Candidat en dessous
             return 90  # Peu pénalisant
 
+    @read_only
     def get_matched_jobs_for_candidate(self, candidate_id, limit=20, min_score=50):
         """
         Obtenir les offres correspondant à un candidat
@@ -200,26 +239,31 @@ class MatchingService:
         if not candidate:
             return []
 
-        # Récupérer les offres actives
-        jobs = Job.query.filter_by(is_active=True).all()
+        # Offres actives et non expirées (entreprise chargée pour to_dict)
+        jobs = Job.query.filter(
+            Job.is_active == True,
+            or_(Job.expires_at.is_(None), Job.expires_at > datetime.utcnow())
+        ).options(
+            *Job.loader_options(include_company=True)
+        ).all()
 
-        matches = []
+        top = TopK(limit, min_score)
         for job in jobs:
-            if job.is_expired():
-                continue
+            # Élagué si le score ne peut pas battre le K-ième meilleur
+            match_result = self.calculate_match_score(candidate, job, floor=top.floor)
+            if match_result is not None:
+                top.push(match_result['overall_score'], (job, match_result))
 
-            match_result = self.calculate_match_score(candidate, job)
-
-            if match_result['overall_score'] >= min_score:
-                job_data = job.to_dict(include_company=True)
-                job_data['match'] = match_result
-                matches.append(job_data)
-
-        # Trier par score décroissant
-        matches.sort(key=lambda x: x['match']['overall_score'], reverse=True)
+        # Sérialiser uniquement les K retenus
+        matches = []
+        for _, (job, match_result) in top.results():
+            job_data = job.to_dict(include_company=True)
+            job_data['match'] = match_result
+            matches.append(job_data)
 
-        return matches[:limit]
+        return matches
 
+    @read_only
     def get_matched_candidates_for_job(self, job_id, limit=20, min_score=50):
         """
         Obtenir les candidats correspondant à une offre
@@ -236,25 +280,366 @@ class MatchingService:
         if not job:
             return []
 
+        # Vivier partagé (instantané mappé): seuls les présélectionnés sont chargés
+        view = self._snapshot_view()
+        if view is not None:
+            return self._matched_from_snapshot([job], view, limit, min_score)[job.id]
+
         # Récupérer les candidats publics et disponibles
         candidates = Candidate.query.filter_by(
             is_public=True,
             is_available=True
+        ).options(
+            *Candidate.loader_options(include_user=True)
         ).all()
 
-        matches = []
+        top = TopK(limit, min_score)
         for candidate in candidates:
-            match_result = self.calculate_match_score(candidate, job)
+            # Élagué si le score ne peut pas battre le K-ième meilleur
+            match_result = self.calculate_match_score(candidate, job, floor=top.floor)
+            if match_result is not None:
+                top.push(match_result['overall_score'], (candidate, match_result))
+
+        # Sérialiser uniquement les K retenus
+        matches = []
+        for _, (candidate, match_result) in top.results():
+            candidate_data = candidate.to_dict(include_user=True)
+            candidate_data['match'] = match_result
+            matches.append(candidate_data)
+
+        return matches
+
+    # ------------------------------------------------------------
+    # Matching par lots (tableau de bord entreprise)
+    # ------------------------------------------------------------
+
+    @read_only
+    def get_matched_candidates_for_jobs(self, jobs, limit=5, min_score=50):
+        """
+        Obtenir les meilleurs candidats de plusieurs offres en une passe
+
+        Le vivier de candidats est chargé une seule fois et noté contre
+        toutes les offres via une matrice offres x candidats (NumPy). Les
+        candidats retenus sont ensuite re-notés par calculate_match_score:
+        le résultat est identique à get_matched_candidates_for_job offre
+        par offre.
+
+        Args:
+            jobs: Offres à traiter
+            limit: Nombre max de candidats par offre
+            min_score: Score minimum pour inclure
+
+        Returns:
+            dict: {job_id: liste de candidats avec scores de matching}
+        """
+        if not jobs:
+            return {}
 
-            if match_result['overall_score'] >= min_score:
+        view = self._snapshot_view()
+        if view is not None:
+            return self._matched_from_snapshot(jobs, view, limit, min_score)
+
+        candidates = Candidate.query.filter_by(
+            is_public=True,
+            is_available=True
+        ).options(
+            *Candidate.loader_options(include_user=True)
+        ).all()
+
+        if NUMPY_AVAILABLE and candidates:
+            shortlists = [
+                [candidates[i] for i in rows]
+                for rows in self._shortlist_rows(self.score_matrix(jobs, candidates), limit, min_score)
+            ]
+        else:
+            shortlists = [candidates] * len(jobs)
+
+        return self._rescore(jobs, shortlists, limit, min_score)
+
+    def _rescore(self, jobs, shortlists, limit, min_score):
+        """Noter exactement les candidats présélectionnés de chaque offre et garder le top K"""
+        results = {}
+        for job, shortlist in zip(jobs, shortlists):
+            top = TopK(limit, min_score)
+            for candidate in shortlist:
+                match_result = self.calculate_match_score(candidate, job, floor=top.floor)
+                if match_result is not None:
+                    top.push(match_result['overall_score'], (candidate, match_result))
+
+            matches = []
+            for _, (candidate, match_result) in top.results():
                 candidate_data = candidate.to_dict(include_user=True)
                 candidate_data['match'] = match_result
                 matches.append(candidate_data)
+            results[job.id] = matches
+
+        return results
+
+    def _snapshot_view(self):
+        """Vivier de l'instantané partagé (None: chargement depuis la base)"""
+        if not NUMPY_AVAILABLE:
+            return None
+        from app.services.matching_snapshot import matching_snapshot
+        return matching_snapshot.view()
+
+    def _matched_from_snapshot(self, jobs, view, limit, min_score):
+        """
+        Présélection sur l'instantané, puis notation exacte des candidats
+        retenus rechargés depuis la base (état courant: un candidat
+        devenu privé ou supprimé depuis est écarté)
+
+        Un candidat retenu mais absent au rechargement (sortie du vivier
+        pas encore vue par le journal) est retiré de la matrice et la
+        présélection des offres concernées est refaite: sa place revient
+        au candidat suivant.
+        """
+        overall = self.score_snapshot(jobs, view)
+        shortlisted_ids = [None] * len(jobs)
+        by_id, gone = {}, set()
+        pending = list(range(len(jobs)))
+        while pending:
+            for index, rows in zip(pending, self._shortlist_rows(overall[pending], limit, min_score)):
+                shortlisted_ids[index] = view.ids[rows].tolist()
+
+            wanted = sorted(set().union(*(shortlisted_ids[i] for i in pending)) - by_id.keys() - gone)
+            for start in range(0, len(wanted), 500):
+                for candidate in Candidate.query.filter(
+                    Candidate.id.in_(wanted[start:start + 500]),
+                    Candidate.is_public == True,
+                    Candidate.is_available == True
+                ).options(*Candidate.loader_options(include_user=True)):
+                    by_id[candidate.id] = candidate
+
+            missing = set(wanted) - by_id.keys()
+            if not missing:
+                break
+            gone |= missing
+            overall[:, np.isin(view.ids, list(missing))] = -np.inf
+            pending = [i for i in pending if missing.intersection(shortlisted_ids[i])]
+
+        # Ordre des IDs: mêmes ex aequo que le parcours de la base
+        shortlists = [[by_id[i] for i in sorted(ids) if i in by_id] for ids in shortlisted_ids]
+        return self._rescore(jobs, shortlists, limit, min_score)
+
+    def _shortlist_rows(self, overall, limit, min_score):
+        """
+        Colonnes (candidats) pouvant entrer dans le top de chaque offre
 
-        # Trier par score décroissant
-        matches.sort(key=lambda x: x['match']['overall_score'], reverse=True)
+        Le score arrondi à 0.1 diffère du score brut d'au plus
+        SCORE_MARGIN: tout candidat du top final a un score brut d'au
+        moins (K-ième score brut - 2 * SCORE_MARGIN).
+        """
+        slack = SCORE_MARGIN + 1e-9
+
+        shortlists = []
+        for row in overall:
+            eligible = np.flatnonzero(row >= min_score - slack)
+            if limit and len(eligible) > limit:
+                scores = row[eligible]
+                kth = np.partition(scores, len(scores) - limit)[len(scores) - limit]
+                eligible = eligible[scores >= kth - 2 * slack]
+            shortlists.append(eligible)
+        return shortlists
+
+    def score_matrix(self, jobs, candidates):
+        """
+        Scores globaux bruts (non arrondis) de toutes les paires offre x candidat
+
+        Même calcul que calculate_match_score, critère par critère, sur
+        des tableaux NumPy.
 
-        return matches[:limit]
+        Returns:
+            numpy.ndarray: Matrice float64 (len(jobs), len(candidates))
+        """
+        overall = np.empty((len(jobs), len(candidates)))
+        with skill_vocabulary.pinned():
+            job_arrays = self._job_arrays(jobs)
+            chunk_size = self._chunk_size(len(jobs))
+            for start in range(0, len(candidates), chunk_size):
+                chunk = candidates[start:start + chunk_size]
+                overall[:, start:start + len(chunk)] = self._score_block(job_arrays, self._candidate_arrays(chunk))
+        return overall
+
+    def score_snapshot(self, jobs, view):
+        """
+        Scores globaux bruts des offres contre le vivier d'un instantané
+
+        Les lignes périmées de l'instantané (remplacées par le journal)
+        valent -inf.
+
+        Returns:
+            numpy.ndarray: Matrice float64 (len(jobs), view.size)
+        """
+        overall = np.empty((len(jobs), view.size))
+        job_arrays = self._job_arrays(jobs, view.vocabulary)
+        start = 0
+        for block in view.blocks(self._chunk_size(len(jobs))):
+            count = block['experience'].shape[1]
+            overall[:, start:start + count] = self._score_block(job_arrays, block)
+            start += count
+        overall[:, view.stale] = -np.inf
+        return overall
+
+    def _chunk_size(self, job_count):
+        """Candidats par bloc pour job_count offres (budget MATRIX_BLOCK_BYTES)"""
+        per_candidate = max(1, job_count) * 8 * self.MATRIX_BLOCK_ARRAYS
+        return max(1, min(self.MATRIX_CHUNK_SIZE, self.MATRIX_BLOCK_BYTES // per_candidate))
+
+    def _job_arrays(self, jobs, vocabulary=skill_vocabulary):
+        """Caractéristiques des offres en colonnes (J, 1)"""
+        def column(values, dtype=float):
+            return np.array(values, dtype=dtype)[:, None]
+
+        required = [vocabulary.bits(job.required_skills) for job in jobs]
+        nice = [vocabulary.bits(job.nice_to_have_skills) for job in jobs]
+
+        return {
+            'required': required,
+            'nice': nice,
+            'required_count': column([b.bit_count() for b in required]),
+            'nice_count': column([b.bit_count() for b in nice]),
+            'min_exp': column([job.min_experience_years or 0 for job in jobs]),
+            'max_exp': column([job.max_experience_years or 0 for job in jobs]),
+            'has_education': column([bool(job.education_level) for job in jobs], bool),
+            'education': column([self.EDUCATION_LEVELS.get(job.education_level, 0) for job in jobs]),
+            'city': [(job.city or '').lower() for job in jobs],
+            'country': [(job.country or '').lower() for job in jobs],
+            'full_remote': column([bool(job.is_remote and job.remote_type == 'full') for job in jobs], bool),
+            'salary_min': column([job.salary_min or 0 for job in jobs]),
+            'salary_max': column([job.salary_max or job.salary_min or 0 for job in jobs])
+        }
+
+    def _candidate_arrays(self, candidates):
+        """Caractéristiques des candidats en lignes (1, C)"""
+        def row(values, dtype=float):
+            return np.array(values, dtype=dtype)[None, :]
+
+        desired_min = row([c.desired_salary_min or 0 for c in candidates])
+        desired_max = row([c.desired_salary_max or 0 for c in candidates])
+
+        return {
+            'skills': [skill_vocabulary.bits(c.skills) for c in candidates],
+            'experience': row([c.experience_years or 0 for c in candidates]),
+            'education': row([self.EDUCATION_LEVELS.get(c.education_level, 0) for c in candidates]),
+            'city': [(c.city or '').lower() for c in candidates],
+            'country': [(c.country or '').lower() for c in candidates],
+            'relocate': row([bool(c.willing_to_relocate) for c in candidates], bool),
+            'salary_min': desired_min,
+            'salary_max': np.where(desired_max > 0, desired_max, desired_min * 1.3)
+        }
+
+    @staticmethod
+    def _overlap(job_bits, candidate_bits):
+        """
+        Tailles des intersections offres x candidats (popcount du ET binaire)
+
+        Offre par offre, seuls les mots de 64 bits où l'offre a des
+        compétences sont comparés: la mémoire de travail reste de
+        (candidats x mots de l'offre), quelle que soit la taille du
+        vocabulaire.
+        """
+        if isinstance(candidate_bits, np.ndarray):
+            # Bitsets déjà empilés (instantané): les compétences au-delà
+            # de leur largeur ne peuvent pas être en commun
+            words = candidate_bits.shape[1]
+            mask = (1 << (64 * words)) - 1
+            jobs = skill_vocabulary.to_array([bits & mask for bits in job_bits], words)
+            candidates = candidate_bits
+        else:
+            words = max(1, (max(job_bits + candidate_bits).bit_length() + 63) // 64)
+            jobs = skill_vocabulary.to_array(job_bits, words)
+            candidates = skill_vocabulary.to_array(candidate_bits, words)
+        overlap = np.zeros((len(jobs), len(candidates)))
+        for index, row in enumerate(jobs):
+            used = np.flatnonzero(row)
+            if len(used):
+                overlap[index] = skill_vocabulary.popcount(candidates[:, used] & row[used])
+        return overlap
+
+    @staticmethod
+    def _codes(job_values, candidate_values, table=None):
+        """
+        Codes entiers communs des valeurs textuelles (-1 si vide)
+
+        Les valeurs des candidats peuvent être déjà codées (instantané):
+        table donne alors les codes existants.
+        """
+        codes = dict(table or {})
+
+        def encode(values):
+            return np.array([codes.setdefault(v, len(codes)) if v else -1 for v in values])
+
+        if not isinstance(candidate_values, np.ndarray):
+            candidate_values = encode(candidate_values)
+        return encode(job_values)[:, None], candidate_values[None, :]
+
+    def _score_block(self, job, candidate):
+        """Scores globaux bruts d'un bloc de candidats contre toutes les offres"""
+        with np.errstate(divide='ignore', invalid='ignore'):
+            # Compétences: ET binaire + popcount
+            required_count, nice_count = job['required_count'], job['nice_count']
+            required_ratio = self._overlap(job['required'], candidate['skills']) / required_count
+            nice_ratio = np.where(nice_count > 0, self._overlap(job['nice'], candidate['skills']) / nice_count, 0)
+            skills = np.where(
+                required_count > 0,
+                np.minimum((required_ratio * 80) + (nice_ratio * 20), 100),
+                100
+            )
+
+            # Expérience
+            candidate_exp, min_exp, max_exp = candidate['experience'], job['min_exp'], job['max_exp']
+            experience = np.where(
+                candidate_exp >= min_exp,
+                np.where(
+                    (max_exp > 0) & (candidate_exp > max_exp),
+                    np.maximum(70, 100 - (candidate_exp - max_exp) * 5),
+                    100
+                ),
+                np.where(min_exp > 0, np.maximum(0, (candidate_exp / min_exp) * 100), 50)
+            )
+            experience = np.where((min_exp == 0) & (max_exp == 0), 100, experience)
+
+            # Formation
+            candidate_level, required_level = candidate['education'], job['education']
+            education = np.where(
+                candidate_level >= required_level,
+                100,
+                np.where(candidate_level > 0, (candidate_level / required_level) * 100, 0)
+            )
+            education = np.where(job['has_education'], education, 100)
+
+            # Localisation
+            job_city, candidate_city = self._codes(job['city'], candidate['city'], candidate.get('city_table'))
+            job_country, candidate_country = self._codes(job['country'], candidate['country'], candidate.get('country_table'))
+            same_country = (job_country >= 0) & (job_country == candidate_country)
+            location = np.where(
+                (job_city >= 0) & (candidate_city >= 0),
+                np.where(
+                    job_city == candidate_city,
+                    100,
+                    np.where(same_country, np.where(candidate['relocate'], 80, 50), 30)
+                ),
+                np.where(job['full_remote'], 100, 70)
+            )
+
+            # Salaire
+            job_min, job_max = job['salary_min'], job['salary_max']
+            candidate_min, candidate_max = candidate['salary_min'], candidate['salary_max']
+            salary = np.where(
+                (job_max >= candidate_min) & (job_min <= candidate_max),
+                100,
+                np.where(job_max < candidate_min, np.maximum(0, (job_max / candidate_min) * 100), 90)
+            )
+            salary = np.where(candidate_min > 0, salary, 80)
+            salary = np.where(job_max > 0, salary, 100)
+
+        # Même ordre d'addition que calculate_match_score (arrondis identiques)
+        overall = skills * self.WEIGHTS['skills']
+        overall = overall + experience * self.WEIGHTS['experience']
+        overall = overall + education * self.WEIGHTS['education']
+        overall = overall + location * self.WEIGHTS['location']
+        overall = overall + salary * self.WEIGHTS['salary']
+        return overall
 
 
 # Instance singleton
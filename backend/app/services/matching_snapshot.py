@@ -0,0 +1,433 @@
+"""
+================================================================
+Instantané de Matching - BaraCorrespondance AI
+================================================================
+Vivier de candidats (publics et disponibles) sous forme de tableaux
+NumPy mappés en mémoire, partagés par tous les workers d'un hôte:
+- `flask build-matching-snapshot` (ou MATCHING_SNAPSHOT_BUILD_ON_START,
+  exécuté une fois dans le maître avec gunicorn --preload) écrit un
+  répertoire de fichiers .npy et un meta.json (vocabulaire de
+  compétences interné, tables des villes et des pays), puis bascule
+  le pointeur CURRENT
+- chaque worker ouvre les fichiers en lecture seule (mmap): les pages
+  viennent du cache du système, la mémoire est payée une fois par
+  hôte et le démarrage ne lit rien
+- les candidats modifiés depuis la construction (updated_at) sont
+  relus dans un journal de deltas propre au worker: leur ligne de
+  l'instantané est masquée et remplacée par la version courante;
+  les candidats supprimés (candidate_removals) sont masqués
+
+L'instantané ne sert qu'à présélectionner: les candidats retenus
+sont rechargés et re-notés depuis la base par MatchingService.
+"""
+
+import json
+import os
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from app import db
+from app.models import Candidate, CandidateRemoval
+from app.services.matching_service import MatchingService, NUMPY_AVAILABLE, np
+from app.services.skill_vocabulary import skill_vocabulary
+
+try:
+    import fcntl
+except ImportError:  # Windows: pas de verrou entre processus
+    fcntl = None
+
+SNAPSHOT_FORMAT = 1
+
+# Colonnes lues en base (ni objets ORM ni relations)
+SOURCE_COLUMNS = (
+    Candidate.id, Candidate.skills, Candidate.experience_years, Candidate.education_level,
+    Candidate.willing_to_relocate, Candidate.desired_salary_min, Candidate.desired_salary_max,
+    Candidate.city, Candidate.country, Candidate.is_public, Candidate.is_available, Candidate.updated_at
+)
+
+# Fichiers .npy de l'instantané (une valeur par candidat, triés par ID)
+ARRAY_COLUMNS = ('ids', 'skills', 'experience', 'education', 'relocate', 'salary_min', 'salary_max', 'city', 'country')
+
+# Marge de relecture du journal (transactions validées après coup)
+DELTA_OVERLAP = timedelta(seconds=60)
+
+
+class InternTable:
+    """Valeurs internées sous un code entier (les codes ne changent jamais)"""
+
+    def __init__(self, values=()):
+        self._lock = threading.Lock()
+        self.values = list(values)
+        self.codes = {value: code for code, value in enumerate(self.values)}
+
+    def code(self, value):
+        """Code d'une valeur (attribué au premier usage)"""
+        code = self.codes.get(value)
+        if code is None:
+            with self._lock:
+                code = self.codes.get(value)
+                if code is None:
+                    code = len(self.values)
+                    self.values.append(value)
+                    self.codes[value] = code
+        return code
+
+
+class SnapshotVocabulary(InternTable):
+    """
+    Compétences internées de l'instantané
+
+    Les compétences apparues depuis la construction (offres, deltas)
+    reçoivent des identifiants au-delà de ceux de l'instantané, propres
+    au worker: aucun candidat de l'instantané ne les possède.
+    """
+
+    def bits(self, skills):
+        """Bitset d'une liste de compétences (noms canoniques du vocabulaire partagé)"""
+        bitset = 0
+        for name in skills or ():
+            if isinstance(name, str) and name.strip():
+                bitset |= 1 << self.code(skill_vocabulary.canonical(name))
+        return bitset
+
+
+def candidate_row(values, vocabulary, cities, countries):
+    """
+    Ligne de l'instantané d'un candidat (mêmes valeurs que MatchingService._candidate_arrays)
+
+    Args:
+        values: Tuple des SOURCE_COLUMNS
+
+    Returns:
+        tuple: Valeurs dans l'ordre de ARRAY_COLUMNS (bitset en entier Python)
+    """
+    (candidate_id, skills, experience, education, relocate,
+     salary_min, salary_max, city, country) = values[:9]
+    salary_min = salary_min or 0
+    return (
+        candidate_id,
+        vocabulary.bits(skills),
+        experience or 0,
+        MatchingService.EDUCATION_LEVELS.get(education, 0),
+        bool(relocate),
+        salary_min,
+        salary_max if salary_max else salary_min * 1.3,
+        cities.code((city or '').lower()) if city else -1,
+        countries.code((country or '').lower()) if country else -1
+    )
+
+
+def _columns(rows, words):
+    """Tableaux NumPy des lignes (ordre de ARRAY_COLUMNS)"""
+    columns = list(zip(*rows)) if rows else [()] * len(ARRAY_COLUMNS)
+    return {
+        'ids': np.array(columns[0], dtype=np.int64),
+        'skills': skill_vocabulary.to_array(list(columns[1]), words),
+        'experience': np.array(columns[2], dtype=np.float64),
+        'education': np.array(columns[3], dtype=np.float64),
+        'relocate': np.array(columns[4], dtype=bool),
+        'salary_min': np.array(columns[5], dtype=np.float64),
+        'salary_max': np.array(columns[6], dtype=np.float64),
+        'city': np.array(columns[7], dtype=np.int32),
+        'country': np.array(columns[8], dtype=np.int32),
+    }
+
+
+class SnapshotView:
+    """Vivier à noter: lignes de l'instantané (stale masquées) puis lignes du journal"""
+
+    def __init__(self, snapshot, delta_arrays, stale):
+        self.vocabulary = snapshot.vocabulary
+        # Copies figées: le journal peut interner de nouvelles villes pendant la notation
+        self.city_table = dict(snapshot.cities.codes)
+        self.country_table = dict(snapshot.countries.codes)
+        self._arrays = snapshot.arrays
+        self._delta = delta_arrays
+        self.stale = stale
+        self.ids = np.concatenate([snapshot.arrays['ids'], delta_arrays['ids']])
+        self.size = len(self.ids)
+
+    def blocks(self, chunk_size):
+        """Blocs de candidats au format de MatchingService._score_block"""
+        count = len(self._arrays['ids'])
+        for start in range(0, count, chunk_size):
+            yield self._block(self._arrays, slice(start, min(start + chunk_size, count)))
+        if len(self._delta['ids']):
+            yield self._block(self._delta, slice(None))
+
+    def _block(self, arrays, rows):
+        def row(name):
+            return arrays[name][rows][None, :]
+
+        return {
+            'skills': arrays['skills'][rows],
+            'experience': row('experience'),
+            'education': row('education'),
+            'relocate': row('relocate'),
+            'salary_min': row('salary_min'),
+            'salary_max': row('salary_max'),
+            'city': arrays['city'][rows],
+            'country': arrays['country'][rows],
+            'city_table': self.city_table,
+            'country_table': self.country_table,
+        }
+
+
+class _Snapshot:
+    """Instantané ouvert (fichiers mappés en lecture seule)"""
+
+    def __init__(self, path):
+        with open(os.path.join(path, 'meta.json'), encoding='utf-8') as f:
+            self.meta = json.load(f)
+        if self.meta.get('format') != SNAPSHOT_FORMAT:
+            raise ValueError(f"Format d'instantané inconnu: {self.meta.get('format')}")
+        self.name = os.path.basename(path)
+        self.built_at = datetime.fromisoformat(self.meta['built_at'])
+        self.arrays = {
+            name: np.load(os.path.join(path, f'{name}.npy'), mmap_mode='r')
+            for name in ARRAY_COLUMNS
+        }
+        self.vocabulary = SnapshotVocabulary(self.meta['skills'])
+        self.cities = InternTable(self.meta['cities'])
+        self.countries = InternTable(self.meta['countries'])
+
+        # Journal des candidats modifiés depuis la construction {id: ligne ou None}
+        self.delta = {}
+        self.delta_since = self.built_at
+        self.delta_checked_at = 0.0
+        self.view = None
+
+
+class MatchingSnapshotService:
+    """Construction et lecture de l'instantané partagé"""
+
+    def __init__(self):
+        self._app = None
+        self._lock = threading.RLock()
+        self._snapshot = None
+        self._pointer_checked_at = 0.0
+        self.folder = None
+
+    def init_app(self, app):
+        """Configurer le dossier et ouvrir l'instantané courant (mmap, sans lecture)"""
+        self._app = app
+        self.folder = app.config.get('MATCHING_SNAPSHOT_DIR')
+        self.delta_interval = app.config.get('MATCHING_SNAPSHOT_DELTA_INTERVAL', 5)
+        self.keep = max(1, app.config.get('MATCHING_SNAPSHOT_KEEP', 2))
+        if not self.folder or not NUMPY_AVAILABLE:
+            return
+        self.folder = os.path.abspath(self.folder)
+        os.makedirs(self.folder, exist_ok=True)
+
+        if app.config.get('MATCHING_SNAPSHOT_BUILD_ON_START') and self._pointer() is None:
+            with app.app_context(), self._build_lock():
+                # Un autre processus a pu construire pendant l'attente du verrou
+                if self._pointer() is None:
+                    self.build()
+        self._open_current()
+
+    @property
+    def enabled(self):
+        return bool(self.folder) and NUMPY_AVAILABLE
+
+    # ------------------------------------------------------------
+    # Construction
+    # ------------------------------------------------------------
+
+    def build(self):
+        """
+        Construire un instantané et en faire l'instantané courant
+
+        Returns:
+            dict: {'name', 'candidates', 'skills', 'bytes', 'seconds'}
+        """
+        if not self.enabled:
+            raise RuntimeError("MATCHING_SNAPSHOT_DIR non configuré (ou NumPy absent)")
+
+        started = time.perf_counter()
+        built_at = datetime.utcnow()
+        vocabulary, cities, countries = SnapshotVocabulary(), InternTable(), InternTable()
+
+        query = db.session.query(*SOURCE_COLUMNS).filter(
+            Candidate.is_public == True,
+            Candidate.is_available == True
+        ).order_by(Candidate.id).yield_per(2000)
+        rows = [candidate_row(values, vocabulary, cities, countries) for values in query]
+
+        words = max(1, (len(vocabulary.values) + 63) // 64)
+        arrays = _columns(rows, words)
+
+        name = built_at.strftime('%Y%m%dT%H%M%S%f')
+        staging = os.path.join(self.folder, f'.build-{name}-{os.getpid()}')
+        os.makedirs(staging)
+        try:
+            for column, array in arrays.items():
+                np.save(os.path.join(staging, f'{column}.npy'), array)
+            with open(os.path.join(staging, 'meta.json'), 'w', encoding='utf-8') as f:
+                json.dump({
+                    'format': SNAPSHOT_FORMAT,
+                    'built_at': built_at.isoformat(),
+                    'count': len(rows),
+                    'words': words,
+                    'skills': vocabulary.values,
+                    'cities': cities.values,
+                    'countries': countries.values,
+                }, f, ensure_ascii=False)
+            os.rename(staging, os.path.join(self.folder, name))
+        except Exception:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+        self._set_pointer(name)
+        self._prune(name)
+        return {
+            'name': name,
+            'candidates': len(rows),
+            'skills': len(vocabulary.values),
+            'bytes': sum(array.nbytes for array in arrays.values()),
+            'seconds': round(time.perf_counter() - started, 2)
+        }
+
+    @contextmanager
+    def _build_lock(self):
+        """Verrou exclusif entre processus pendant la construction au démarrage"""
+        with open(os.path.join(self.folder, '.lock'), 'w') as lock:
+            if fcntl:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _pointer(self):
+        """Nom de l'instantané courant (fichier CURRENT), None s'il n'y en a pas"""
+        try:
+            with open(os.path.join(self.folder, 'CURRENT'), encoding='utf-8') as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def _set_pointer(self, name):
+        """Basculer atomiquement vers un instantané"""
+        temporary = os.path.join(self.folder, f'.CURRENT-{os.getpid()}')
+        with open(temporary, 'w', encoding='utf-8') as f:
+            f.write(name)
+        os.replace(temporary, os.path.join(self.folder, 'CURRENT'))
+
+    def _prune(self, current):
+        """Supprimer les anciens instantanés (les workers qui les mappent encore gardent leurs pages)"""
+        names = sorted(
+            name for name in os.listdir(self.folder)
+            if not name.startswith('.') and name != 'CURRENT'
+            and os.path.isdir(os.path.join(self.folder, name))
+        )
+        for name in names[:-self.keep]:
+            if name != current:
+                shutil.rmtree(os.path.join(self.folder, name), ignore_errors=True)
+
+    # ------------------------------------------------------------
+    # Lecture (workers)
+    # ------------------------------------------------------------
+
+    def _open_current(self):
+        """Mapper l'instantané pointé par CURRENT s'il a changé"""
+        name = self._pointer()
+        if name is None or (self._snapshot is not None and self._snapshot.name == name):
+            return self._snapshot
+        try:
+            self._snapshot = _Snapshot(os.path.join(self.folder, name))
+        except (OSError, ValueError, KeyError) as e:
+            if self._app:
+                self._app.logger.warning(f"Instantané de matching illisible ({name}): {e}")
+        return self._snapshot
+
+    def view(self):
+        """
+        Vivier courant (instantané + journal du worker)
+
+        Returns:
+            SnapshotView, None si aucun instantané n'est disponible
+        """
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            now = time.monotonic()
+            if now - self._pointer_checked_at >= self.delta_interval:
+                self._pointer_checked_at = now
+                self._open_current()
+            snapshot = self._snapshot
+            if snapshot is None:
+                return None
+
+            if snapshot.view is None or now - snapshot.delta_checked_at >= self.delta_interval:
+                snapshot.delta_checked_at = now
+                if self._read_delta(snapshot) or snapshot.view is None:
+                    snapshot.view = self._make_view(snapshot)
+            return snapshot.view
+
+    def _read_delta(self, snapshot):
+        """
+        Ajouter au journal les candidats modifiés ou supprimés depuis la dernière lecture
+
+        Returns:
+            bool: True si le journal a changé
+        """
+        since = snapshot.delta_since - DELTA_OVERLAP
+        removed = db.session.query(CandidateRemoval.candidate_id, CandidateRemoval.removed_at).filter(
+            CandidateRemoval.removed_at >= since
+        ).all()
+        changed = db.session.query(*SOURCE_COLUMNS).filter(Candidate.updated_at >= since).all()
+
+        updated = False
+        for candidate_id, removed_at in removed:
+            # Lus avant les modifications: un identifiant réutilisé (SQLite) reprend sa ligne courante
+            if snapshot.delta.get(candidate_id, False) is not None:
+                snapshot.delta[candidate_id] = None
+                updated = True
+            if removed_at > snapshot.delta_since:
+                snapshot.delta_since = removed_at
+        for values in changed:
+            in_pool = values[9] and values[10]
+            row = candidate_row(values, snapshot.vocabulary, snapshot.cities, snapshot.countries) if in_pool else None
+            if snapshot.delta.get(values[0], False) != row:
+                snapshot.delta[values[0]] = row
+                updated = True
+            if values[11] and values[11] > snapshot.delta_since:
+                snapshot.delta_since = values[11]
+        return updated
+
+    def _make_view(self, snapshot):
+        """Vue du vivier: lignes modifiées masquées dans l'instantané, versions courantes ajoutées"""
+        rows = [row for row in snapshot.delta.values() if row is not None]
+        words = max(1, (max((row[1] for row in rows), default=0).bit_length() + 63) // 64)
+        delta_arrays = _columns(sorted(rows), words)
+
+        ids = snapshot.arrays['ids']
+        stale = np.zeros(len(ids) + len(rows), dtype=bool)
+        if snapshot.delta:
+            stale[:len(ids)] = np.isin(ids, np.fromiter(snapshot.delta, dtype=np.int64))
+        return SnapshotView(snapshot, delta_arrays, stale)
+
+    def stats(self):
+        """État de l'instantané du worker"""
+        snapshot = self._snapshot
+        if snapshot is None:
+            return {'enabled': self.enabled, 'snapshot': None}
+        return {
+            'enabled': self.enabled,
+            'snapshot': snapshot.name,
+            'built_at': snapshot.meta['built_at'],
+            'candidates': snapshot.meta['count'],
+            'mapped_bytes': sum(array.nbytes for array in snapshot.arrays.values()),
+            'delta': len(snapshot.delta),
+            'worker_skills': len(snapshot.vocabulary.values) - len(snapshot.meta['skills'])
+        }
+
+
+# Instance singleton
+matching_snapshot = MatchingSnapshotService()
@@ -9,7 +9,6 @@ import json
 import time
 import os
 from flask import current_app
-from PIL import Image, ImageDraw, ImageFont
 from datetime import datetime
 
 # Try to import Gemini analyzer module (optional - requires google-generativeai)
@@ -68,11 +67,14 @@ class PosterGeneratorService:
 
         Args:
             poster_data: dict avec title, headline, tagline, company_name, etc.
-            output_path: Chemin où sauvegarder l'image
+            output_path: Chemin où sauvegarder l'image, ou objet fichier binaire
 
         Returns:
             dict: Informations sur l'image créée
         """
+        # Pillow importé au premier rendu (démarrage des workers)
+        from PIL import Image, ImageDraw, ImageFont
+
         start_time = time.time()
 
         try:
@@ -153,16 +155,21 @@ class PosterGeneratorService:
             )
             self._draw_text_wrapped(draw, cta, (width//2, y_pos), font_text, 'white', cta_width, 'center')
 
-            # Sauvegarder l'image
-            os.makedirs(os.path.dirname(output_path), exist_ok=True)
-            img.save(output_path, 'PNG', quality=95)
+            # Sauvegarder l'image (fichier ou tampon en mémoire)
+            if isinstance(output_path, str):
+                os.makedirs(os.path.dirname(output_path), exist_ok=True)
+                img.save(output_path, 'PNG', quality=95)
+                file_size = os.path.getsize(output_path)
+            else:
+                img.save(output_path, 'PNG', quality=95)
+                file_size = output_path.tell()
 
             generation_time = time.time() - start_time
 
             return {
                 'success': True,
-                'file_path': output_path,
-                'file_size': os.path.getsize(output_path),
+                'file_path': output_path if isinstance(output_path, str) else None,
+                'file_size': file_size,
                 'width': width,
                 'height': height,
                 'generation_time': round(generation_time, 2)
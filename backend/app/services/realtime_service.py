@@ -0,0 +1,86 @@
+"""
+================================================================
+Service Temps Réel - BaraCorrespondance AI
+================================================================
+Diffusion Socket.IO des notifications, messages et compteurs
+de non-lus (remplace le polling des clients connectés)
+
+Salles:
+- user:<user_id>   : notifications et compteurs d'un utilisateur
+- match:<match_id> : fil de discussion d'un match mutuel
+"""
+
+from flask import current_app
+
+from app import socketio
+
+
+class RealtimeService:
+    """Service de diffusion des événements temps réel"""
+
+    # Événements émis vers les clients
+    EVENT_NOTIFICATION = 'notification:new'
+    EVENT_MESSAGE = 'message:new'
+    EVENT_MESSAGES_READ = 'message:read'
+    EVENT_COUNTERS = 'counters'
+
+    @staticmethod
+    def user_room(user_id):
+        """Nom de la salle d'un utilisateur"""
+        return f"user:{user_id}"
+
+    @staticmethod
+    def match_room(match_id):
+        """Nom de la salle d'un match"""
+        return f"match:{match_id}"
+
+    def _emit(self, event, payload, room):
+        """Émettre un événement sans jamais faire échouer la requête HTTP"""
+        if not current_app.config.get('REALTIME_ENABLED', True):
+            return
+        try:
+            socketio.emit(event, payload, to=room)
+        except Exception as e:
+            current_app.logger.warning(f"Diffusion temps réel impossible ({event}): {e}")
+
+    def push_counters(self, user_id, notifications=0, messages=0):
+        """
+        Pousser des deltas de compteurs de non-lus
+
+        Args:
+            user_id: Utilisateur destinataire
+            notifications: Variation du nombre de notifications non lues
+            messages: Variation du nombre de messages non lus
+        """
+        if not notifications and not messages:
+            return
+        self._emit(self.EVENT_COUNTERS, {
+            'notifications_unread_delta': notifications,
+            'messages_unread_delta': messages
+        }, self.user_room(user_id))
+
+    def notify_user(self, user_id, notification):
+        """Pousser une nouvelle notification et incrémenter le compteur"""
+        self._emit(self.EVENT_NOTIFICATION, notification.to_dict(), self.user_room(user_id))
+        self.push_counters(user_id, notifications=1)
+
+    def message_sent(self, message, recipient_user_id=None):
+        """Pousser un nouveau message au fil du match et au destinataire"""
+        self._emit(self.EVENT_MESSAGE, message.to_dict(), self.match_room(message.match_id))
+        if recipient_user_id:
+            self.push_counters(recipient_user_id, messages=1)
+
+    def messages_read(self, match_id, reader_user_id, reader_type, count):
+        """Signaler des accusés de lecture et décrémenter le compteur du lecteur"""
+        if not count:
+            return
+        self._emit(self.EVENT_MESSAGES_READ, {
+            'match_id': match_id,
+            'reader_type': reader_type,
+            'count': count
+        }, self.match_room(match_id))
+        self.push_counters(reader_user_id, messages=-count)
+
+
+# Instance singleton
+realtime_service = RealtimeService()
@@ -0,0 +1,328 @@
+"""
+================================================================
+Uploads Reprenables - BaraCorrespondance AI
+================================================================
+Upload de CV par morceaux pour les connexions mobiles instables:
+1. POST  /api/uploads/cv/sessions                {file_name, size, sha256?, analyze?}
+2. PATCH /api/uploads/cv/sessions/<id>           en-tête Upload-Offset, corps = octets
+3. GET   /api/uploads/cv/sessions/<id>           décalage confirmé (reprise après coupure)
+4. POST  /api/uploads/cv/sessions/<id>/complete  publication et analyse
+
+Chaque morceau est écrit à son décalage dans un fichier partiel et
+haché au fil de l'eau, sous verrou exclusif du fichier partiel (un
+seul écrivain par session, un envoi répété reçoit 409); la taille annoncée et la signature du format
+sont vérifiées avant d'écrire plus que les premiers octets. À la
+publication, le fichier partiel devient le blob (lien physique) et
+l'analyse le lit directement.
+
+L'état du hachage est gardé en mémoire par processus; si un morceau
+arrive sur un autre worker, le préfixe déjà reçu est relu une fois.
+Les fichiers partiels doivent être sur un volume partagé par les
+workers (UPLOAD_SESSIONS_FOLDER).
+"""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from werkzeug.exceptions import ClientDisconnected
+
+from app import db
+from app.models import UploadSession
+from app.services.blob_store import CHUNK_SIZE, blob_store
+from app.utils.validators import allowed_cv_file, file_extension
+
+try:
+    import fcntl
+except ImportError:  # Windows: verrou limité au processus
+    fcntl = None
+
+# Signatures (premiers octets) acceptées par extension
+CV_SIGNATURES = {
+    'pdf': (b'%PDF',),
+    'docx': (b'PK\x03\x04',),
+    'doc': (b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1', b'PK\x03\x04'),
+}
+SIGNATURE_LENGTH = 8
+
+# Hachages en cours gardés en mémoire (sessions actives d'un processus)
+MAX_CACHED_HASHERS = 256
+
+
+class UploadSessionError(ValueError):
+    """Morceau ou session refusé (status: code HTTP, offset: décalage attendu)"""
+
+    def __init__(self, message, status=400, offset=None):
+        super().__init__(message)
+        self.status = status
+        self.offset = offset
+
+
+class ResumableUploadService:
+    """Sessions d'upload par morceaux"""
+
+    def __init__(self):
+        self._app = None
+        self._hashers = OrderedDict()
+        self._lock = threading.Lock()
+        self._writers = set()  # sessions en cours d'écriture (sans fcntl)
+
+    def init_app(self, app):
+        """Configurer le dossier des fichiers partiels"""
+        self._app = app
+        self.folder = os.path.abspath(
+            app.config.get('UPLOAD_SESSIONS_FOLDER')
+            or os.path.join(app.config.get('UPLOAD_FOLDER', 'app/static/uploads'), '.sessions')
+        )
+        os.makedirs(self.folder, exist_ok=True)
+        self.ttl = app.config.get('UPLOAD_SESSION_TTL', 86400)
+        self.chunk_size = app.config.get('UPLOAD_CHUNK_SIZE', 1024 * 1024)
+        self.max_size = app.config.get('MAX_CONTENT_LENGTH', 10 * 1024 * 1024)
+
+    def part_path(self, session_id):
+        return os.path.join(self.folder, f'{session_id}.part')
+
+    # ------------------------------------------------------------
+    # Sessions
+    # ------------------------------------------------------------
+
+    def create(self, user_id, file_name, size, content_type=None, sha256=None, analyze=True):
+        """
+        Ouvrir une session (refus immédiat d'un format ou d'une taille invalides)
+
+        Returns:
+            UploadSession
+        """
+        if not allowed_cv_file(file_name):
+            raise UploadSessionError("Format non supporté. Formats acceptés: PDF, DOC, DOCX", 400)
+        if not isinstance(size, int) or size <= 0:
+            raise UploadSessionError("Taille du fichier requise", 400)
+        if size > self.max_size:
+            raise UploadSessionError(
+                f"Fichier trop volumineux. Maximum: {self.max_size // (1024 * 1024)} MB", 413
+            )
+        if sha256 is not None and (len(sha256) != 64 or any(c not in '0123456789abcdef' for c in sha256.lower())):
+            raise UploadSessionError("Empreinte SHA-256 invalide", 400)
+
+        session = UploadSession(
+            user_id=user_id,
+            file_name=file_name,
+            content_type=content_type,
+            total_size=size,
+            expected_sha256=sha256.lower() if sha256 else None,
+            analyze=analyze,
+            expires_at=datetime.utcnow() + timedelta(seconds=self.ttl)
+        )
+        db.session.add(session)
+        db.session.flush()
+        open(self.part_path(session.id), 'wb').close()
+        db.session.commit()
+        return session
+
+    def get(self, session_id, user_id):
+        """Session active d'un utilisateur"""
+        return UploadSession.query.filter(
+            UploadSession.id == session_id,
+            UploadSession.user_id == user_id,
+            UploadSession.expires_at > datetime.utcnow()
+        ).first()
+
+    def append(self, session, offset, stream):
+        """
+        Écrire un morceau au décalage confirmé
+
+        Args:
+            session: UploadSession
+            offset: Décalage annoncé par le client (Upload-Offset)
+            stream: Corps de la requête (lu en flux)
+
+        Returns:
+            int: Nouveau décalage confirmé
+        """
+        with self._writer(session) as part:
+            # Décalage relu sous verrou: un envoi concurrent a pu le faire avancer
+            db.session.refresh(session)
+            if offset != session.received_size:
+                raise UploadSessionError("Décalage incorrect", 409, offset=session.received_size)
+
+            remaining = session.total_size - offset
+            hasher = self._hasher(session)
+            head = None
+            if offset < SIGNATURE_LENGTH:
+                # Signature vérifiée tant que ses octets ne sont pas tous confirmés
+                part.seek(0)
+                head = part.read(offset)
+            written = 0
+            try:
+                part.seek(offset)
+                part.truncate()
+                while True:
+                    try:
+                        chunk = stream.read(CHUNK_SIZE)
+                    except (ClientDisconnected, OSError):
+                        # Connexion coupée: les octets déjà écrits sont confirmés
+                        break
+                    if not chunk:
+                        break
+                    if written + len(chunk) > remaining:
+                        raise UploadSessionError("Morceau au-delà de la taille annoncée", 413, offset=offset)
+                    if head is not None and len(head) < SIGNATURE_LENGTH:
+                        # Signature vérifiée avant d'écrire la suite du fichier
+                        head += chunk[:SIGNATURE_LENGTH - len(head)]
+                        self._check_signature(session, head, offset)
+                    hasher.update(chunk)
+                    part.write(chunk)
+                    written += len(chunk)
+                part.flush()
+            except UploadSessionError:
+                # Morceau refusé: le fichier revient au décalage confirmé
+                part.truncate(offset)
+                raise
+
+            # Confirmation conditionnelle (un seul écrivain par décalage)
+            updated = UploadSession.query.filter_by(id=session.id, received_size=offset).update(
+                {'received_size': offset + written, 'updated_at': datetime.utcnow()},
+                synchronize_session=False
+            )
+            db.session.commit()
+            if not updated:
+                db.session.refresh(session)
+                raise UploadSessionError("Morceau concurrent", 409, offset=session.received_size)
+
+            session.received_size = offset + written
+            self._remember(session.id, session.received_size, hasher)
+            return session.received_size
+
+    def complete(self, session):
+        """
+        Publier le fichier reçu dans le blob store
+
+        Le fichier partiel est conservé pour l'analyse: appeler
+        discard() ensuite.
+
+        Returns:
+            tuple: (URL du blob, chemin local du fichier reçu)
+        """
+        with self._writer(session):
+            db.session.refresh(session)
+            if not session.is_complete:
+                raise UploadSessionError("Upload incomplet", 409, offset=session.received_size)
+            digest = self._hasher(session).hexdigest()
+
+        if session.expected_sha256 and digest != session.expected_sha256:
+            self.discard(session)
+            raise UploadSessionError("Empreinte SHA-256 différente: fichier corrompu, recommencez l'upload", 422)
+
+        path = self.part_path(session.id)
+        url = blob_store.put_file(
+            path, digest, session.total_size, session.content_type, file_extension(session.file_name)
+        )
+        return url, path
+
+    def discard(self, session):
+        """Supprimer une session et son fichier partiel"""
+        with self._lock:
+            self._hashers.pop(session.id, None)
+        self._remove_part(session.id)
+        db.session.delete(session)
+        db.session.commit()
+
+    def purge_expired(self):
+        """
+        Supprimer les sessions expirées et les fichiers partiels orphelins
+
+        Returns:
+            int: Nombre de sessions supprimées
+        """
+        now = datetime.utcnow()
+        expired = [row[0] for row in db.session.query(UploadSession.id).filter(UploadSession.expires_at <= now)]
+        if expired:
+            UploadSession.query.filter(UploadSession.id.in_(expired)).delete(synchronize_session=False)
+            db.session.commit()
+            for session_id in expired:
+                self._remove_part(session_id)
+
+        known = {row[0] for row in db.session.query(UploadSession.id)}
+        cutoff = now.timestamp() - self.ttl
+        for name in os.listdir(self.folder):
+            session_id = name[:-len('.part')]
+            path = os.path.join(self.folder, name)
+            if name.endswith('.part') and session_id not in known and os.path.getmtime(path) < cutoff:
+                os.remove(path)
+        return len(expired)
+
+    # ------------------------------------------------------------
+    # Validation et hachage
+    # ------------------------------------------------------------
+
+    @contextmanager
+    def _writer(self, session):
+        """
+        Fichier partiel ouvert sous verrou exclusif (un écrivain par session)
+
+        Raises:
+            UploadSessionError: 409 si un autre envoi écrit déjà cette session
+        """
+        with open(self.part_path(session.id), 'r+b') as part:
+            if fcntl:
+                try:
+                    fcntl.flock(part, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    raise UploadSessionError("Morceau en cours d'écriture", 409, offset=session.received_size)
+            else:
+                with self._lock:
+                    if session.id in self._writers:
+                        raise UploadSessionError("Morceau en cours d'écriture", 409, offset=session.received_size)
+                    self._writers.add(session.id)
+            try:
+                yield part
+            finally:
+                if fcntl:
+                    fcntl.flock(part, fcntl.LOCK_UN)
+                else:
+                    with self._lock:
+                        self._writers.discard(session.id)
+
+    def _check_signature(self, session, head, offset):
+        """Refuser dès les premiers octets un fichier qui n'a pas le format annoncé"""
+        extension = file_extension(session.file_name).lstrip('.')
+        if not any(head.startswith(signature) or signature.startswith(head)
+                   for signature in CV_SIGNATURES.get(extension, ())):
+            raise UploadSessionError(f"Le contenu ne correspond pas à un fichier {extension.upper()}", 415, offset=offset)
+
+    def _hasher(self, session):
+        """Hachage du préfixe confirmé (en mémoire, sinon relu depuis le fichier partiel)"""
+        with self._lock:
+            entry = self._hashers.pop(session.id, None)
+        if entry and entry[0] == session.received_size:
+            return entry[1]
+
+        hasher = hashlib.sha256()
+        remaining = session.received_size
+        with open(self.part_path(session.id), 'rb') as part:
+            while remaining > 0:
+                chunk = part.read(min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                hasher.update(chunk)
+                remaining -= len(chunk)
+        return hasher
+
+    def _remember(self, session_id, offset, hasher):
+        with self._lock:
+            self._hashers[session_id] = (offset, hasher)
+            while len(self._hashers) > MAX_CACHED_HASHERS:
+                self._hashers.popitem(last=False)
+
+    def _remove_part(self, session_id):
+        try:
+            os.remove(self.part_path(session_id))
+        except FileNotFoundError:
+            pass
+
+
+# Instance singleton
+resumable_uploads = ResumableUploadService()
@@ -0,0 +1,480 @@
+"""
+================================================================
+Planificateur de tâches - BaraCorrespondance AI
+================================================================
+Tâches de maintenance périodiques exécutées dans les workers
+(app.services.maintenance_tasks):
+- déclencheurs à intervalle (every=secondes) ou cron (5 champs, UTC)
+- élection par échéance: chaque worker consulte scheduled_tasks, un
+  seul obtient le bail (UPDATE conditionnel) et exécute l'échéance;
+  un bail expiré (worker arrêté) est repris par un autre worker
+- portée 'cluster' (un worker au total), 'host' (un par hôte:
+  fichiers locaux) ou 'worker' (chaque processus, sans bail)
+- délai max par tâche: dépassé, l'exécution est enregistrée en
+  'timeout' et le bail reste posé jusqu'à son expiration (un thread
+  Python ne peut pas être interrompu)
+- historique (task_runs): durée, statut, bilan ou erreur
+
+Le thread de planification démarre à la première requête de chaque
+worker (après le fork de gunicorn), jamais dans les commandes CLI:
+`flask run-task <nom>` exécute une tâche à la demande.
+"""
+
+import os
+import socket
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, insert, or_, select, update
+from sqlalchemy.exc import IntegrityError
+
+from app import db
+from app.models import ScheduledTask, TaskRun
+
+# Marge du bail au-delà du délai max de la tâche (secondes)
+LEASE_GRACE = 60
+
+SCOPES = ('cluster', 'host', 'worker')
+
+
+class IntervalTrigger:
+    """Toutes les N secondes"""
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+
+    def first_after(self, moment):
+        # Première échéance immédiate
+        return moment
+
+    def next_after(self, moment):
+        return moment + timedelta(seconds=self.seconds)
+
+    def __str__(self):
+        return f'every {self.seconds}s'
+
+
+class CronTrigger:
+    """Expression cron à 5 champs: minute heure jour mois jour-de-semaine (UTC)"""
+
+    # Bornes de chaque champ (jour de semaine: 0 et 7 = dimanche)
+    FIELDS = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+
+    def __init__(self, expression):
+        parts = expression.split()
+        if len(parts) != 5:
+            raise ValueError(f"Expression cron invalide (5 champs attendus): {expression!r}")
+        self.expression = expression
+        self.minutes, self.hours, self.days, self.months, self.weekdays = (
+            self._parse(part, low, high) for part, (low, high) in zip(parts, self.FIELDS)
+        )
+        if 7 in self.weekdays:
+            self.weekdays = (self.weekdays - {7}) | {0}
+        # Jour du mois et jour de semaine restreints tous deux: l'un OU l'autre (cron)
+        self.any_day = parts[2] == '*'
+        self.any_weekday = parts[4] == '*'
+
+    @staticmethod
+    def _parse(field, low, high):
+        values = set()
+        for item in field.split(','):
+            step = 1
+            if '/' in item:
+                item, step = item.split('/', 1)
+                step = int(step)
+            if item == '*':
+                start, end = low, high
+            elif '-' in item:
+                start, end = (int(value) for value in item.split('-', 1))
+            else:
+                start = int(item)
+                end = high if step > 1 else start
+            if start < low or end > high or start > end or step < 1:
+                raise ValueError(f"Champ cron hors bornes: {field!r}")
+            values.update(range(start, end + 1, step))
+        return values
+
+    def _day_matches(self, moment):
+        day = moment.day in self.days
+        weekday = (moment.isoweekday() % 7) in self.weekdays
+        if self.any_day:
+            return weekday
+        if self.any_weekday:
+            return day
+        return day or weekday
+
+    def first_after(self, moment):
+        return self.next_after(moment)
+
+    def next_after(self, moment):
+        """Première minute correspondante strictement après moment"""
+        candidate = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = candidate + timedelta(days=366 * 4)
+        while candidate < limit:
+            if candidate.month not in self.months:
+                month = candidate.month % 12 + 1
+                year = candidate.year + (candidate.month == 12)
+                candidate = candidate.replace(year=year, month=month, day=1, hour=0, minute=0)
+            elif not self._day_matches(candidate):
+                candidate = (candidate + timedelta(days=1)).replace(hour=0, minute=0)
+            elif candidate.hour not in self.hours:
+                candidate = (candidate + timedelta(hours=1)).replace(minute=0)
+            elif candidate.minute not in self.minutes:
+                candidate += timedelta(minutes=1)
+            else:
+                return candidate
+        raise ValueError(f"Aucune échéance pour l'expression cron {self.expression!r}")
+
+    def __str__(self):
+        return f'cron {self.expression}'
+
+
+class Task:
+    """Tâche enregistrée (déclencheur résolu par init_app)"""
+
+    def __init__(self, name, func, every=None, cron=None, timeout=300, scope='cluster'):
+        if scope not in SCOPES:
+            raise ValueError(f"Portée inconnue: {scope}")
+        self.name = name
+        self.func = func
+        self.every = every
+        self.cron = cron
+        self.timeout = timeout
+        self.scope = scope
+        self.description = (func.__doc__ or '').strip().splitlines()[0] if func.__doc__ else ''
+        self.trigger = None
+
+    def resolve(self, config):
+        """Déclencheur depuis la configuration (valeurs ou noms de clés), None = à la demande"""
+        every = config.get(self.every, self.every) if isinstance(self.every, str) else self.every
+        cron = config.get(self.cron, self.cron) if self.cron and ' ' not in self.cron else self.cron
+        if every:
+            self.trigger = IntervalTrigger(int(every))
+        elif cron:
+            self.trigger = CronTrigger(cron)
+        else:
+            self.trigger = None
+
+    @property
+    def lease_name(self):
+        """Ligne de scheduled_tasks (une par hôte pour la portée 'host')"""
+        if self.scope == 'host':
+            return f'{self.name}@{socket.gethostname()}'
+        return self.name
+
+
+class TaskScheduler:
+    """Registre des tâches, thread de planification et historique"""
+
+    def __init__(self):
+        self._app = None
+        self._lock = threading.Lock()
+        self._thread = None
+        self._thread_pid = None
+        self._stop = threading.Event()
+        self._running = set()
+        self._local_next = {}
+        self._local_last = {}
+        self.tasks = {}
+        self.enabled = False
+
+    def task(self, name, every=None, cron=None, timeout=300, scope='cluster'):
+        """
+        Décorateur d'enregistrement d'une tâche
+
+        Args:
+            name: Nom (flask run-task <nom>)
+            every: Intervalle en secondes, ou nom d'une clé de configuration
+            cron: Expression cron, ou nom d'une clé de configuration
+            timeout: Durée max d'une exécution (secondes)
+            scope: 'cluster', 'host' ou 'worker'
+        """
+        def decorator(func):
+            self.tasks[name] = Task(name, func, every, cron, timeout, scope)
+            return func
+        return decorator
+
+    def init_app(self, app):
+        """Résoudre les déclencheurs et démarrer le thread à la première requête"""
+        self._app = app
+        self.enabled = app.config.get('SCHEDULER_ENABLED', False)
+        self.tick = app.config.get('SCHEDULER_TICK_SECONDS', 15)
+        self.history_days = app.config.get('SCHEDULER_HISTORY_DAYS', 30)
+
+        # Enregistrement des tâches de maintenance
+        from app.services import maintenance_tasks  # noqa: F401
+
+        for task in self.tasks.values():
+            task.resolve(app.config)
+        if self.enabled:
+            app.before_request(self._ensure_thread)
+
+    @staticmethod
+    def worker_id():
+        return f'{socket.gethostname()}:{os.getpid()}'
+
+    # ------------------------------------------------------------
+    # Thread de planification
+    # ------------------------------------------------------------
+
+    def _ensure_thread(self):
+        """Démarrer le thread de planification (un par processus, après fork)"""
+        if self._thread_pid == os.getpid() and self._thread and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread_pid == os.getpid() and self._thread and self._thread.is_alive():
+                return
+            self._stop = threading.Event()
+            self._running = set()
+            self._thread = threading.Thread(target=self._run, name='task-scheduler', daemon=True)
+            self._thread_pid = os.getpid()
+            self._thread.start()
+
+    def _run(self):
+        """Boucle de planification"""
+        while not self._stop.wait(self.tick):
+            try:
+                self.run_pending()
+            except Exception as e:
+                self._app.logger.error(f"Planificateur: {e}")
+
+    def shutdown(self):
+        self._stop.set()
+
+    def run_pending(self, now=None):
+        """
+        Lancer les tâches arrivées à échéance dont ce worker obtient le bail
+
+        Returns:
+            list: Noms des tâches lancées
+        """
+        now = now or datetime.utcnow()
+        scheduled = [task for task in self.tasks.values() if task.trigger and task.name not in self._running]
+        started = []
+
+        for task in scheduled:
+            if task.scope == 'worker':
+                due_at = self._local_next.setdefault(task.name, task.trigger.first_after(now))
+                if due_at <= now:
+                    self._local_next[task.name] = task.trigger.next_after(now)
+                    self._start(task, 'schedule')
+                    started.append(task.name)
+
+        shared = [task for task in scheduled if task.scope != 'worker']
+        if shared:
+            with self._app.app_context():
+                due = self._due(shared, now)
+                for task in due:
+                    if self._claim(task, now):
+                        self._start(task, 'schedule', advance=True)
+                        started.append(task.name)
+        return started
+
+    def _due(self, tasks, now):
+        """Tâches partagées à échéance (crée les lignes manquantes)"""
+        names = [task.lease_name for task in tasks]
+        with db.engine.begin() as connection:
+            next_runs = dict(connection.execute(
+                select(ScheduledTask.name, ScheduledTask.next_run_at).where(ScheduledTask.name.in_(names))
+            ).all())
+        for task in tasks:
+            if task.lease_name not in next_runs:
+                next_runs[task.lease_name] = self._create_row(task, task.trigger.first_after(now))
+        return [task for task in tasks if next_runs[task.lease_name] and next_runs[task.lease_name] <= now]
+
+    def _create_row(self, task, next_run_at):
+        try:
+            with db.engine.begin() as connection:
+                connection.execute(insert(ScheduledTask).values(name=task.lease_name, next_run_at=next_run_at))
+            return next_run_at
+        except IntegrityError:
+            # Créée entre-temps par un autre worker
+            with db.engine.begin() as connection:
+                return connection.execute(
+                    select(ScheduledTask.next_run_at).where(ScheduledTask.name == task.lease_name)
+                ).scalar()
+
+    def _claim(self, task, now, due_only=True):
+        """Prendre le bail de la tâche (False si un autre worker l'a)"""
+        statement = update(ScheduledTask).where(
+            ScheduledTask.name == task.lease_name,
+            or_(ScheduledTask.locked_until.is_(None), ScheduledTask.locked_until < now)
+        ).values(
+            locked_by=self.worker_id(),
+            locked_until=now + timedelta(seconds=task.timeout + LEASE_GRACE)
+        )
+        if due_only:
+            statement = statement.where(ScheduledTask.next_run_at <= now)
+        with db.engine.begin() as connection:
+            return connection.execute(statement).rowcount == 1
+
+    def _release(self, task, run, advance):
+        """Rendre le bail (conservé jusqu'à expiration si la tâche tourne encore)"""
+        values = {'last_run_at': run['started_at'], 'last_status': run['status']}
+        if run['status'] != 'timeout':
+            values.update(locked_by=None, locked_until=None)
+        if advance and task.trigger:
+            values['next_run_at'] = task.trigger.next_after(datetime.utcnow())
+        with db.engine.begin() as connection:
+            connection.execute(
+                update(ScheduledTask)
+                .where(ScheduledTask.name == task.lease_name, ScheduledTask.locked_by == self.worker_id())
+                .values(values)
+            )
+
+    def _start(self, task, trigger, advance=False):
+        """Exécuter la tâche sans bloquer le thread de planification"""
+        self._running.add(task.name)
+        threading.Thread(
+            target=self._supervise, args=(task, trigger, advance),
+            name=f'task-{task.name}', daemon=True
+        ).start()
+
+    def _supervise(self, task, trigger, advance):
+        try:
+            run, finished = self._execute(task, trigger)
+            if task.scope == 'worker':
+                self._local_last[task.name] = run
+            else:
+                with self._app.app_context():
+                    self._release(task, run, advance)
+            # Pas de nouvelle exécution dans ce worker tant que l'ancienne tourne
+            finished.wait()
+        except Exception as e:
+            self._app.logger.error(f"Tâche {task.name}: {e}")
+        finally:
+            self._running.discard(task.name)
+
+    # ------------------------------------------------------------
+    # Exécution
+    # ------------------------------------------------------------
+
+    def _execute(self, task, trigger, timeout=None):
+        """
+        Exécuter la tâche dans son propre thread, borné par son délai max
+
+        Returns:
+            tuple: (exécution: statut, durée, bilan ou erreur ; Event de fin réelle)
+        """
+        timeout = timeout or task.timeout
+        outcome = {}
+        finished = threading.Event()
+
+        def target():
+            try:
+                with self._app.app_context():
+                    outcome['result'] = task.func()
+            except Exception as e:
+                self._app.logger.exception(f"Échec de la tâche {task.name}")
+                outcome['error'] = f'{type(e).__name__}: {e}'
+            finally:
+                finished.set()
+
+        started_at = datetime.utcnow()
+        started = time.perf_counter()
+        threading.Thread(target=target, name=f'task-{task.name}-run', daemon=True).start()
+        finished.wait(timeout)
+
+        if not finished.is_set():
+            status = 'timeout'
+        elif 'error' in outcome:
+            status = 'failed'
+        else:
+            status = 'success'
+        run = {
+            'task': task.name,
+            'trigger': trigger,
+            'worker': self.worker_id(),
+            'status': status,
+            'started_at': started_at,
+            'duration_ms': int((time.perf_counter() - started) * 1000),
+            'result': outcome.get('result'),
+            'error': outcome.get('error') or (f"Délai de {timeout}s dépassé" if status == 'timeout' else None),
+        }
+
+        # Exécutions des tâches par worker: trop fréquentes pour l'historique
+        if task.scope != 'worker' or trigger == 'manual':
+            with self._app.app_context(), db.engine.begin() as connection:
+                connection.execute(insert(TaskRun).values(run))
+        return run, finished
+
+    def run_now(self, name, timeout=None, ignore_lease=False):
+        """
+        Exécuter une tâche à la demande (flask run-task)
+
+        Args:
+            name: Nom de la tâche
+            timeout: Délai max (celui de la tâche par défaut)
+            ignore_lease: Exécuter même si un worker tient le bail
+
+        Returns:
+            dict: Exécution, ou None si le bail est tenu par un worker
+        """
+        task = self.tasks.get(name)
+        if task is None:
+            raise KeyError(name)
+
+        if task.scope == 'worker':
+            return self._execute(task, 'manual', timeout)[0]
+
+        now = datetime.utcnow()
+        self._create_row(task, task.trigger.first_after(now) if task.trigger else now)
+        if not self._claim(task, now, due_only=False) and not ignore_lease:
+            return None
+        run = self._execute(task, 'manual', timeout)[0]
+        self._release(task, run, advance=False)
+        return run
+
+    # ------------------------------------------------------------
+    # Consultation
+    # ------------------------------------------------------------
+
+    def describe(self):
+        """Tâches enregistrées avec leur échéance partagée"""
+        rows = {row.name: row for row in ScheduledTask.query.all()}
+        tasks = []
+        for task in sorted(self.tasks.values(), key=lambda t: t.name):
+            row = rows.get(task.lease_name)
+            tasks.append({
+                'name': task.name,
+                'description': task.description,
+                'trigger': str(task.trigger) if task.trigger else 'manual',
+                'scope': task.scope,
+                'timeout': task.timeout,
+                'next_run_at': row.next_run_at.isoformat() if row and task.trigger else None,
+                'last_run_at': row.last_run_at.isoformat() if row and row.last_run_at else None,
+                'last_status': row.last_status if row else None,
+                'locked_by': row.locked_by if row else None,
+            })
+        return tasks
+
+    def history(self, task=None, limit=20):
+        """Dernières exécutions (les plus récentes d'abord)"""
+        query = TaskRun.query
+        if task:
+            query = query.filter_by(task=task)
+        return [run.to_dict() for run in query.order_by(TaskRun.started_at.desc()).limit(limit)]
+
+    def prune_history(self, days=None):
+        """Supprimer l'historique plus ancien que SCHEDULER_HISTORY_DAYS"""
+        cutoff = datetime.utcnow() - timedelta(days=days or self.history_days)
+        with db.engine.begin() as connection:
+            return connection.execute(delete(TaskRun).where(TaskRun.started_at < cutoff)).rowcount
+
+    def stats(self):
+        """État du planificateur dans ce worker"""
+        return {
+            'enabled': self.enabled,
+            'running': self._thread_pid == os.getpid() and bool(self._thread and self._thread.is_alive()),
+            'tasks': len(self.tasks),
+            'in_progress': sorted(self._running),
+            'worker_tasks': {
+                name: {'status': run['status'], 'duration_ms': run['duration_ms'], 'started_at': run['started_at'].isoformat()}
+                for name, run in self._local_last.items()
+            },
+        }
+
+
+# Instance singleton
+scheduler = TaskScheduler()
@@ -0,0 +1,345 @@
+"""
+================================================================
+Index Sémantique TF-IDF - BaraCorrespondance AI
+================================================================
+Similarité textuelle offres <-> CV par TF-IDF (scikit-learn):
+- les offres actives et les dernières analyses de CV sont gardées
+  sous forme de matrices creuses (lignes normalisées L2)
+- un CV est comparé à toutes les offres (ou une offre à tous les CV)
+  par un seul produit matrice creuse x vecteur
+- le vocabulaire est appris hors requête (flask build-tfidf-index ou
+  tâche planifiée refit-tfidf-index) et enregistré dans TFIDF_INDEX_PATH;
+  chaque processus recharge le fichier quand il change
+- les documents nouveaux ou modifiés sont ajoutés au fil de l'eau avec
+  le vocabulaire chargé
+- sans index enregistré, aucune similarité n'est retournée: le score
+  de matching n'intègre pas le critère sémantique
+"""
+
+import os
+import pickle
+import threading
+import time
+
+from flask import current_app
+
+from app.utils.lazy import module_available
+
+# scikit-learn / scipy importés au premier apprentissage (plusieurs centaines de ms)
+TFIDF_AVAILABLE = all(module_available(name) for name in ('numpy', 'scipy', 'sklearn'))
+
+# Cosinus considéré comme une correspondance parfaite (score 100)
+SIMILARITY_FOR_FULL_SCORE = 0.5
+
+
+def job_document(job):
+    """Texte indexé pour une offre"""
+    parts = [job.title or '', job.description or '']
+    parts.extend(job.required_skills or [])
+    parts.extend(job.nice_to_have_skills or [])
+    return ' '.join(p for p in parts if isinstance(p, str))
+
+
+def cv_document(cv_analysis):
+    """Texte indexé pour une analyse de CV"""
+    extracted_data = cv_analysis.extracted_data or {}
+    skills = extracted_data.get('skills') or {}
+    parts = [cv_analysis.raw_text or '']
+    parts.extend(cv_analysis.keywords or [])
+    parts.extend(skills.get('technical') or [])
+    return ' '.join(p for p in parts if isinstance(p, str))
+
+
+def similarity_to_score(similarity):
+    """Convertir un cosinus (0-1) en score de critère (0-100)"""
+    return round(min(100.0, similarity / SIMILARITY_FOR_FULL_SCORE * 100), 1)
+
+
+class _SparseRows:
+    """Matrice creuse en ajout seul, une ligne vivante par entité"""
+
+    def __init__(self, matrix=None, ids=(), stamps=()):
+        self.matrix = matrix
+        self.row_of = {entity_id: row for row, entity_id in enumerate(ids)}
+        self.stamps = dict(zip(ids, stamps))
+        self.row_ids = list(ids)
+        self._pending = []
+        self.appended = 0
+
+    def is_current(self, entity_id, stamp):
+        """La ligne de l'entité est-elle à jour ?"""
+        return entity_id in self.row_of and self.stamps.get(entity_id) == stamp
+
+    def append(self, entity_id, stamp, vector):
+        """Ajouter (ou remplacer) la ligne d'une entité"""
+        self.row_of[entity_id] = len(self.row_ids)
+        self.row_ids.append(entity_id)
+        self.stamps[entity_id] = stamp
+        self._pending.append(vector)
+        self.appended += 1
+
+    def materialize(self):
+        """Matrice CSR incluant les lignes ajoutées"""
+        if self._pending:
+            from scipy import sparse
+            blocks = ([self.matrix] if self.matrix is not None else []) + self._pending
+            self.matrix = sparse.vstack(blocks, format='csr')
+            self._pending = []
+        return self.matrix
+
+    def similarities(self, vector, entity_ids):
+        """Cosinus entre un vecteur et les lignes des entités demandées"""
+        matrix = self.materialize()
+        if matrix is None or not entity_ids:
+            return {}
+        products = (matrix @ vector.T).toarray().ravel()
+        return {
+            entity_id: float(products[self.row_of[entity_id]])
+            for entity_id in entity_ids if entity_id in self.row_of
+        }
+
+
+class SemanticIndex:
+    """Index TF-IDF des offres et des CV (un par processus)"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.vectorizer = None
+        self.jobs = None
+        self.cvs = None
+        self.fitted_at = None
+        self._loaded_mtime = None
+
+    @property
+    def enabled(self):
+        """Critère sémantique actif (dépendances présentes et poids non nul)"""
+        return TFIDF_AVAILABLE and current_app.config.get('TFIDF_WEIGHT', 0) > 0
+
+    # ------------------------------------------------------------
+    # Construction
+    # ------------------------------------------------------------
+
+    def fit(self, jobs, cv_analyses):
+        """
+        (Ré)apprendre le vocabulaire et reconstruire les deux matrices
+
+        Args:
+            jobs: Offres à indexer
+            cv_analyses: Analyses de CV à indexer
+        """
+        import numpy as np
+        from sklearn.feature_extraction.text import TfidfVectorizer
+
+        job_docs = [job_document(job) for job in jobs]
+        cv_docs = [cv_document(cv) for cv in cv_analyses]
+
+        vectorizer = TfidfVectorizer(
+            lowercase=True,
+            strip_accents='unicode',
+            sublinear_tf=True,
+            min_df=1,
+            max_df=0.9 if len(job_docs) + len(cv_docs) > 20 else 1.0,
+            max_features=current_app.config.get('TFIDF_MAX_FEATURES', 50000),
+            dtype=np.float32
+        )
+        vectorizer.fit(job_docs + cv_docs or [''])
+
+        with self._lock:
+            self.vectorizer = vectorizer
+            self.jobs = _SparseRows(
+                vectorizer.transform(job_docs) if job_docs else None,
+                [job.id for job in jobs],
+                [job.updated_at for job in jobs]
+            )
+            self.cvs = _SparseRows(
+                vectorizer.transform(cv_docs) if cv_docs else None,
+                [cv.id for cv in cv_analyses],
+                [cv.created_at for cv in cv_analyses]
+            )
+            self.fitted_at = time.monotonic()
+
+    @property
+    def path(self):
+        return os.path.abspath(current_app.config.get('TFIDF_INDEX_PATH') or 'instance/tfidf-index.pkl')
+
+    def build(self):
+        """
+        Apprendre sur les offres actives et les dernières analyses, puis
+        enregistrer l'index (hors requête: CLI ou tâche planifiée)
+
+        Returns:
+            dict: Bilan (offres, CV, termes, durée)
+        """
+        from app.models import Job, CVAnalysis
+
+        started = time.monotonic()
+        jobs = Job.query.filter_by(is_active=True).all()
+        analyses = CVAnalysis.query.filter_by(is_latest=True).all()
+        self.fit(jobs, analyses)
+        self.save()
+        return {
+            'jobs': len(jobs),
+            'cvs': len(analyses),
+            'terms': len(self.vectorizer.vocabulary_),
+            'seconds': round(time.monotonic() - started, 2)
+        }
+
+    def save(self):
+        """Enregistrer l'index (remplacement atomique du fichier)"""
+        path = self.path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._lock:
+            state = {
+                'vectorizer': self.vectorizer,
+                'jobs': (self.jobs.materialize(), self.jobs.row_ids, [self.jobs.stamps[i] for i in self.jobs.row_ids]),
+                'cvs': (self.cvs.materialize(), self.cvs.row_ids, [self.cvs.stamps[i] for i in self.cvs.row_ids]),
+            }
+        temporary = f'{path}.{os.getpid()}.tmp'
+        with open(temporary, 'wb') as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary, path)
+        self._loaded_mtime = os.stat(path).st_mtime_ns
+
+    def _ensure_loaded(self):
+        """Charger l'index enregistré s'il est nouveau; False s'il n'existe pas"""
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            return self.vectorizer is not None
+        if mtime != self._loaded_mtime:
+            with open(self.path, 'rb') as f:
+                state = pickle.load(f)
+            self.vectorizer = state['vectorizer']
+            # Lignes remplacées plus tard: les doublons d'ID gardent la dernière
+            self.jobs = _SparseRows(*state['jobs'])
+            self.cvs = _SparseRows(*state['cvs'])
+            self.fitted_at = time.monotonic()
+            self._loaded_mtime = mtime
+        return True
+
+    def _sync(self, rows, entities, document, stamp_of):
+        """Ajouter les entités absentes ou modifiées avec le vocabulaire courant"""
+        stale = [e for e in entities if not rows.is_current(e.id, stamp_of(e))]
+        if stale:
+            vectors = self.vectorizer.transform([document(e) for e in stale])
+            for i, entity in enumerate(stale):
+                rows.append(entity.id, stamp_of(entity), vectors[i])
+
+    # ------------------------------------------------------------
+    # Similarités
+    # ------------------------------------------------------------
+
+    def similarities_for_cv(self, cv_analysis, jobs):
+        """
+        Similarité d'un CV avec une liste d'offres (un produit creux)
+
+        Returns:
+            dict: {job_id: score 0-100}, vide si le critère est désactivé
+        """
+        if not self.enabled or not jobs:
+            return {}
+
+        try:
+            with self._lock:
+                if not self._ensure_loaded():
+                    return {}
+                self._sync(self.jobs, jobs, job_document, lambda j: j.updated_at)
+                vector = self.vectorizer.transform([cv_document(cv_analysis)])
+                raw = self.jobs.similarities(vector, [job.id for job in jobs])
+        except ValueError as e:
+            # Vocabulaire vide (documents sans texte exploitable)
+            current_app.logger.warning(f"Similarité TF-IDF indisponible: {e}")
+            return {}
+
+        return {job_id: similarity_to_score(value) for job_id, value in raw.items()}
+
+    def similarities_for_job(self, job, cv_analyses):
+        """
+        Similarité d'une offre avec une liste d'analyses de CV (un produit creux)
+
+        Returns:
+            dict: {cv_analysis_id: score 0-100}, vide si le critère est désactivé
+        """
+        if not self.enabled or not cv_analyses:
+            return {}
+
+        try:
+            with self._lock:
+                if not self._ensure_loaded():
+                    return {}
+                self._sync(self.cvs, cv_analyses, cv_document, lambda cv: cv.created_at)
+                vector = self.vectorizer.transform([job_document(job)])
+                raw = self.cvs.similarities(vector, [cv.id for cv in cv_analyses])
+        except ValueError as e:
+            # Vocabulaire vide (documents sans texte exploitable)
+            current_app.logger.warning(f"Similarité TF-IDF indisponible: {e}")
+            return {}
+
+        return {cv_id: similarity_to_score(value) for cv_id, value in raw.items()}
+
+
+def benchmark(jobs_count=5000, queries=20, seed=42):
+    """
+    Comparer le critère mots-clés par paire et le produit TF-IDF creux
+
+    Documents synthétiques, sans base de données.
+
+    Returns:
+        dict: Temps moyen par CV (ms) pour chaque méthode
+    """
+    import random
+    from types import SimpleNamespace
+    from app.utils.match_features import build_job_features
+
+    rng = random.Random(seed)
+    vocabulary = [f"terme{i}" for i in range(3000)] + [
+        'python', 'flask', 'django', 'javascript', 'react', 'comptabilité', 'gestion',
+        'logistique', 'marketing', 'vente', 'réseau', 'sécurité', 'données', 'cloud'
+    ]
+
+    def text(words):
+        return ' '.join(rng.choices(vocabulary, k=words))
+
+    jobs = [SimpleNamespace(
+        id=i, title=text(4), description=text(180),
+        required_skills=rng.sample(vocabulary, 5), nice_to_have_skills=rng.sample(vocabulary, 3),
+        education_level=None, updated_at=None
+    ) for i in range(jobs_count)]
+    cvs = [SimpleNamespace(
+        id=i, raw_text=text(400), keywords=rng.sample(vocabulary, 20),
+        extracted_data={'skills': {'technical': rng.sample(vocabulary, 8)}}, created_at=None
+    ) for i in range(queries)]
+
+    # Boucle par paire (critère mots-clés: tokenisation de chaque offre)
+    started = time.perf_counter()
+    for cv in cvs:
+        cv_keywords = {k.lower() for k in cv.keywords}
+        for job in jobs:
+            len(cv_keywords & set(build_job_features(job)['keywords']))
+    pair_loop = (time.perf_counter() - started) / queries
+
+    # TF-IDF: apprentissage une fois, puis un produit creux par CV
+    index = SemanticIndex()
+    started = time.perf_counter()
+    index.fit(jobs, [])
+    fit_time = time.perf_counter() - started
+    job_ids = [job.id for job in jobs]
+
+    started = time.perf_counter()
+    for cv in cvs:
+        vector = index.vectorizer.transform([cv_document(cv)])
+        index.jobs.similarities(vector, job_ids)
+    sparse_product = (time.perf_counter() - started) / queries
+
+    return {
+        'jobs': jobs_count,
+        'queries': queries,
+        'pair_loop_ms': round(pair_loop * 1000, 2),
+        'tfidf_fit_s': round(fit_time, 2),
+        'tfidf_query_ms': round(sparse_product * 1000, 2),
+        'terms': len(index.vectorizer.vocabulary_)
+    }
+
+
+# Instance singleton
+semantic_index = SemanticIndex()
@@ -0,0 +1,391 @@
+"""
+================================================================
+Matching Réparti - BaraCorrespondance AI
+================================================================
+Matching offre -> candidats réparti en shards pour les grands viviers:
+- les candidats sont partitionnés par hachage de leur ID
+- chaque shard (processus du pool local, ou nœud distant joint par
+  multiprocessing.connection) charge et note ses candidats et ne
+  renvoie que son top K local
+- le coordinateur fusionne les tops (score décroissant, ID croissant)
+
+Le résultat est identique à MatcherService.find_matches_for_job en
+un seul processus (mêmes scores, mêmes ex aequo, même total).
+"""
+
+import heapq
+import itertools
+import multiprocessing
+import os
+import random
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Listener
+from types import SimpleNamespace
+
+from flask import current_app
+
+from app import db
+from app.models import Candidate, Job, JobApplication
+from app.services.matcher import MatcherService
+from app.utils.ranking import TopK
+
+# Ancienne valeur par défaut de MATCHING_SHARD_AUTHKEY (publique)
+_DEFAULT_AUTHKEY = 'shard-secret-change-in-production'
+_MIN_AUTHKEY_LENGTH = 16
+
+# Hachage multiplicatif (Knuth) des IDs, calculable aussi en SQL
+_HASH_MULTIPLIER = 2654435761
+_HASH_MODULUS = 1 << 32
+
+
+def shard_of(entity_id, shards):
+    """Shard d'un ID"""
+    return (entity_id * _HASH_MULTIPLIER) % _HASH_MODULUS % shards
+
+
+def _shard_filter(column, shard, shards):
+    """Clause SQL équivalente à shard_of(column) == shard"""
+    return (column * _HASH_MULTIPLIER) % _HASH_MODULUS % shards == shard
+
+
+def job_snapshot(job):
+    """Colonnes d'une offre (sérialisables, envoyées aux shards)"""
+    return {column.key: getattr(job, column.key) for column in Job.__table__.columns}
+
+
+# ================================================================
+# TRAVAIL D'UN SHARD
+# ================================================================
+
+def score_shard(candidates, job, threshold, limit, exclude=frozenset()):
+    """
+    Noter les candidats d'un shard et garder le top K local
+
+    Les candidats doivent être triés par ID: à score égal, le top
+    local garde les plus petits IDs, comme le parcours global.
+
+    Returns:
+        dict: {'found': nombre au-dessus du seuil,
+               'top': [(score, candidate_id, scores)] par score décroissant}
+    """
+    matcher = MatcherService()
+    top = TopK(limit, threshold)
+    found = 0
+
+    for candidate in candidates:
+        if candidate.id in exclude:
+            continue
+        score, hit = matcher._bounded_match_score(candidate, job, threshold, top.floor)
+        found += hit
+        if score is not None:
+            top.push(score['overall'], (candidate.id, score))
+
+    return {
+        'found': found,
+        'top': [(overall, candidate_id, score) for overall, (candidate_id, score) in top.results()]
+    }
+
+
+def merge_shards(results, limit):
+    """
+    Fusionner les tops locaux des shards
+
+    Returns:
+        tuple: ([(score, candidate_id, scores)] des K meilleurs, total au-dessus du seuil)
+    """
+    merged = heapq.merge(*(result['top'] for result in results), key=lambda entry: (-entry[0], entry[1]))
+    return list(itertools.islice(merged, limit)), sum(result['found'] for result in results)
+
+
+def _load_shard(shard, shards):
+    """Candidats publics et disponibles d'un shard, par ID croissant"""
+    return Candidate.query.filter(
+        Candidate.is_public.is_(True),
+        Candidate.is_available.is_(True),
+        _shard_filter(Candidate.id, shard, shards)
+    ).order_by(Candidate.id).all()
+
+
+def synthetic_candidates(count, seed, shard=0, shards=1):
+    """Candidats synthétiques d'un shard (benchmark, sans base de données)"""
+    skills = ['python', 'javascript', 'sql', 'docker', 'react', 'node.js', 'excel', 'comptabilité',
+              'anglais', 'aws', 'java', 'c#', 'html', 'css', 'gestion de projet', 'marketing']
+    candidates = []
+    for candidate_id in range(1, count + 1):
+        if shard_of(candidate_id, shards) != shard:
+            continue
+        rng = random.Random(seed * 1000003 + candidate_id)
+        candidates.append(SimpleNamespace(
+            id=candidate_id,
+            skills=rng.sample(skills, rng.randint(0, 8)),
+            experience_years=rng.randint(0, 15),
+            education_level=rng.choice(['bac', 'bac+2', 'bac+3', 'bac+5', 'doctorate', None]),
+            city=rng.choice(['Conakry', 'Kankan', 'Labé', 'Kindia', None]),
+            country=rng.choice(['Guinée', 'Mali', 'Sénégal']),
+            willing_to_relocate=rng.random() < 0.4,
+            desired_salary_min=rng.choice([None, 2000000, 4000000, 6000000]),
+            desired_salary_max=rng.choice([None, 8000000, 12000000])
+        ))
+    return candidates
+
+
+def run_shard_task(task):
+    """
+    Exécuter la tâche d'un shard (processus du pool ou serveur de shard)
+
+    Args:
+        task: dict {'shard', 'shards', 'job', 'threshold', 'limit', 'exclude',
+              'source': 'database' ou 'synthetic' (+ 'count', 'seed')}
+    """
+    if task.get('source') == 'synthetic':
+        candidates = synthetic_candidates(task['count'], task['seed'], task['shard'], task['shards'])
+    else:
+        candidates = _load_shard(task['shard'], task['shards'])
+
+    try:
+        return score_shard(
+            candidates, SimpleNamespace(**task['job']),
+            task['threshold'], task['limit'], task.get('exclude', frozenset())
+        )
+    finally:
+        if task.get('source') != 'synthetic':
+            db.session.remove()
+
+
+def _init_worker():
+    """Initialiser un processus du pool (application et contexte propres)"""
+    from app import create_app
+    create_app().app_context().push()
+
+
+# ================================================================
+# EXÉCUTEURS
+# ================================================================
+
+class ProcessShards:
+    """Shards exécutés par un pool de processus local"""
+
+    def __init__(self, workers, initializer=_init_worker):
+        self.workers = workers
+        self._executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=initializer
+        )
+
+    def map(self, tasks):
+        return list(self._executor.map(run_shard_task, tasks))
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+
+
+def shard_authkey(value):
+    """
+    Clé partagée des nœuds de shard
+
+    multiprocessing.connection désérialise (pickle) ce qu'il reçoit:
+    seule la clé empêche un tiers d'exécuter du code sur un nœud.
+
+    Raises:
+        ValueError: Clé absente, trop courte ou égale à l'ancienne valeur par défaut
+    """
+    if isinstance(value, bytes):
+        value = value.decode()
+    if not value or value == _DEFAULT_AUTHKEY or len(value) < _MIN_AUTHKEY_LENGTH:
+        raise ValueError(
+            f"MATCHING_SHARD_AUTHKEY doit être un secret d'au moins {_MIN_AUTHKEY_LENGTH} caractères "
+            "(python -c \"import secrets; print(secrets.token_urlsafe(32))\")"
+        )
+    return value.encode()
+
+
+class RemoteShards:
+    """Shards exécutés par des serveurs distants (un par nœud, voir serve_shard)"""
+
+    def __init__(self, addresses, authkey):
+        self.addresses = addresses
+        self.authkey = shard_authkey(authkey)
+
+    def _call(self, address, task):
+        with Client(address, authkey=self.authkey) as connection:
+            connection.send(task)
+            result = connection.recv()
+        if 'error' in result:
+            raise RuntimeError(f"Shard {task['shard']} ({address[0]}:{address[1]}): {result['error']}")
+        return result
+
+    def map(self, tasks):
+        with ThreadPoolExecutor(max_workers=len(tasks)) as executor:
+            return list(executor.map(
+                lambda task: self._call(self.addresses[task['shard'] % len(self.addresses)], task),
+                tasks
+            ))
+
+
+def serve_shard(address, authkey):
+    """Servir les tâches de shard sur une adresse (nœud de matching)"""
+    with Listener(address, authkey=shard_authkey(authkey)) as listener:
+        while True:
+            # Un client fautif (clé invalide, déconnexion) ne doit pas arrêter le nœud
+            try:
+                connection = listener.accept()
+            except (AuthenticationError, EOFError, OSError) as e:
+                current_app.logger.warning(f"Connexion de shard refusée: {e}")
+                continue
+            with connection:
+                try:
+                    task = connection.recv()
+                except (EOFError, OSError) as e:
+                    current_app.logger.warning(f"Tâche de shard non reçue: {e}")
+                    continue
+                try:
+                    result = run_shard_task(task)
+                except Exception as e:
+                    result = {'error': str(e)}
+                try:
+                    connection.send(result)
+                except OSError as e:
+                    current_app.logger.warning(f"Résultat de shard non envoyé: {e}")
+
+
+def parse_nodes(value):
+    """Adresses 'hôte:port,hôte:port' -> [(hôte, port)]"""
+    nodes = []
+    for node in (value or '').split(','):
+        if node.strip():
+            host, _, port = node.strip().rpartition(':')
+            nodes.append((host or 'localhost', int(port)))
+    return nodes
+
+
+# ================================================================
+# COORDINATEUR
+# ================================================================
+
+class ShardedMatcher:
+    """Coordinateur du matching réparti"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pool = None
+        self._pid = None
+
+    @property
+    def enabled(self):
+        """Matching réparti configuré (MATCHING_SHARDS > 1)"""
+        return current_app.config.get('MATCHING_SHARDS', 0) > 1
+
+    def _executor(self):
+        """Nœuds distants si configurés, sinon pool de processus (un par processus parent)"""
+        nodes = parse_nodes(current_app.config.get('MATCHING_SHARD_NODES'))
+        if nodes:
+            return RemoteShards(nodes, current_app.config.get('MATCHING_SHARD_AUTHKEY'))
+        with self._lock:
+            if self._pool is None or self._pid != os.getpid():
+                self._pool = ProcessShards(current_app.config['MATCHING_SHARDS'])
+                self._pid = os.getpid()
+            return self._pool
+
+    def find_matches_for_job(self, job, threshold, limit):
+        """
+        Trouver les candidats d'une offre sur tous les shards
+
+        Returns:
+            dict: Même format que MatcherService.find_matches_for_job
+        """
+        shards = current_app.config['MATCHING_SHARDS']
+        applied = frozenset(
+            row[0] for row in db.session.query(JobApplication.candidate_id).filter_by(job_id=job.id)
+        )
+        snapshot = job_snapshot(job)
+        tasks = [{
+            'source': 'database', 'shard': shard, 'shards': shards, 'job': snapshot,
+            'threshold': threshold, 'limit': limit, 'exclude': applied
+        } for shard in range(shards)]
+
+        top, total_found = merge_shards(self._executor().map(tasks), limit)
+
+        # Sérialiser uniquement les K retenus (une requête)
+        candidates = {
+            candidate.id: candidate
+            for candidate in Candidate.query.filter(
+                Candidate.id.in_([candidate_id for _, candidate_id, _ in top])
+            ).options(*Candidate.loader_options(include_user=True))
+        } if top else {}
+
+        matches = [{
+            'candidate_id': candidate_id,
+            'candidate_name': candidates[candidate_id].user.full_name if candidates[candidate_id].user else 'N/A',
+            'candidate_title': candidates[candidate_id].title,
+            'score': score
+        } for _, candidate_id, score in top]
+
+        return {
+            'job_id': job.id,
+            'job_title': job.title,
+            'threshold': threshold,
+            'total_found': total_found,
+            'top_candidates': matches
+        }
+
+
+def benchmark(candidates=50000, workers=(1, 2, 4), limit=20, threshold=60, seed=11):
+    """
+    Passage à l'échelle du matching réparti (1 à N processus)
+
+    Candidats synthétiques générés dans chaque shard, sans base de
+    données; chaque configuration est comparée au parcours mono-processus.
+
+    Returns:
+        dict: Temps de référence et, par nombre de processus, temps et identité du résultat
+    """
+    job = {
+        'id': 1, 'required_skills': ['python', 'sql', 'docker'], 'nice_to_have_skills': ['aws', 'react'],
+        'min_experience_years': 2, 'max_experience_years': 8, 'education_level': 'bac+3',
+        'is_remote': False, 'remote_type': None, 'city': 'Conakry', 'country': 'Guinée',
+        'salary_min': 3000000, 'salary_max': 7000000
+    }
+
+    started = time.perf_counter()
+    reference = score_shard(synthetic_candidates(candidates, seed), SimpleNamespace(**job), threshold, limit)
+    single = time.perf_counter() - started
+    expected = [(score, candidate_id) for score, candidate_id, _ in reference['top']]
+
+    runs = []
+    for count in workers:
+        pool = ProcessShards(count, initializer=None)
+        try:
+            pool.map([{'source': 'synthetic', 'shard': 0, 'shards': 1, 'count': 0, 'seed': seed,
+                       'job': job, 'threshold': threshold, 'limit': limit}] * count)  # démarrage des processus
+            tasks = [{
+                'source': 'synthetic', 'shard': shard, 'shards': count, 'count': candidates, 'seed': seed,
+                'job': job, 'threshold': threshold, 'limit': limit
+            } for shard in range(count)]
+            started = time.perf_counter()
+            top, total_found = merge_shards(pool.map(tasks), limit)
+            elapsed = time.perf_counter() - started
+        finally:
+            pool.shutdown()
+
+        runs.append({
+            'workers': count,
+            'seconds': round(elapsed, 3),
+            'speedup': round(single / elapsed, 2),
+            'identical': [(score, candidate_id) for score, candidate_id, _ in top] == expected
+            and total_found == reference['found']
+        })
+
+    return {
+        'candidates': candidates,
+        'cpus': os.cpu_count(),
+        'single_process_s': round(single, 3),
+        'runs': runs
+    }
+
+
+# Instance singleton
+sharded_matcher = ShardedMatcher()
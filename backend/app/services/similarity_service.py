@@ -0,0 +1,201 @@
+"""
+================================================================
+Service Similarité - BaraCorrespondance AI
+================================================================
+"Offres similaires" et "candidats similaires" via l'index LSH
+(table similarity_buckets): seules les entités partageant au moins
+un seau avec la référence sont chargées, puis classées par Jaccard
+exact. Le coût ne dépend pas du nombre total d'offres ou de candidats.
+"""
+
+import time
+
+from sqlalchemy import func
+
+from app import db
+from app.models import Job, Candidate, CVAnalysis, SimilarityBucket
+from app.utils.minhash import (
+    minhasher, jaccard, job_tokens, candidate_tokens, LSHIndex
+)
+
+
+class SimilarityService:
+    """Recherche d'offres et de candidats similaires"""
+
+    # Entités candidates examinées au plus (les plus de seaux communs)
+    MAX_CANDIDATES = 200
+
+    def _candidate_ids(self, entity_type, tokens, exclude_id):
+        """IDs partageant des seaux LSH avec les jetons, par nombre de seaux communs"""
+        signature = minhasher.signature(tokens)
+        if signature is None:
+            return []
+
+        buckets = [bucket for _, bucket in minhasher.bands(signature)]
+        hits = func.count(SimilarityBucket.id)
+        rows = db.session.query(SimilarityBucket.entity_id, hits).filter(
+            SimilarityBucket.entity_type == entity_type,
+            SimilarityBucket.bucket.in_(buckets),
+            SimilarityBucket.entity_id != exclude_id
+        ).group_by(SimilarityBucket.entity_id).order_by(hits.desc()).limit(self.MAX_CANDIDATES).all()
+
+        return [entity_id for entity_id, _ in rows]
+
+    @staticmethod
+    def _latest_keywords(candidate_ids):
+        """Mots-clés de la dernière analyse de chaque candidat (une requête)"""
+        rows = db.session.query(CVAnalysis.candidate_id, CVAnalysis.keywords).filter(
+            CVAnalysis.candidate_id.in_(candidate_ids),
+            CVAnalysis.is_latest.is_(True)
+        ).all()
+        return {candidate_id: keywords for candidate_id, keywords in rows}
+
+    def similar_jobs(self, job, limit=10):
+        """
+        Offres actives les plus proches d'une offre
+
+        Returns:
+            list: [(Job, similarité 0-1)] par similarité décroissante
+        """
+        tokens = job_tokens(job)
+        ids = self._candidate_ids('job', tokens, job.id)
+        if not ids:
+            return []
+
+        jobs = Job.query.filter(Job.id.in_(ids), Job.is_active.is_(True)).options(
+            *Job.loader_options(include_company=True)
+        ).all()
+
+        ranked = sorted(
+            ((jaccard(tokens, job_tokens(other)), other) for other in jobs),
+            key=lambda pair: (-pair[0], pair[1].id)
+        )
+        return [(other, score) for score, other in ranked[:max(limit, 0)] if score > 0]
+
+    def similar_candidates(self, candidate, limit=10):
+        """
+        Candidats publics les plus proches d'un candidat
+
+        Returns:
+            list: [(Candidate, similarité 0-1)] par similarité décroissante
+        """
+        keywords = self._latest_keywords([candidate.id]).get(candidate.id)
+        tokens = candidate_tokens(candidate.skills, keywords)
+        ids = self._candidate_ids('candidate', tokens, candidate.id)
+        if not ids:
+            return []
+
+        candidates = Candidate.query.filter(
+            Candidate.id.in_(ids),
+            Candidate.is_public.is_(True)
+        ).options(*Candidate.loader_options(include_user=True)).all()
+        keywords_by_candidate = self._latest_keywords([c.id for c in candidates])
+
+        ranked = sorted(
+            ((jaccard(tokens, candidate_tokens(other.skills, keywords_by_candidate.get(other.id))), other)
+             for other in candidates),
+            key=lambda pair: (-pair[0], pair[1].id)
+        )
+        return [(other, score) for score, other in ranked[:max(limit, 0)] if score > 0]
+
+    def rebuild(self, batch_size=500):
+        """
+        Reconstruire tout l'index (après import massif ou changement de paramètres)
+
+        Returns:
+            dict: Nombre d'offres et de candidats indexés
+        """
+        connection = db.session.connection()
+        SimilarityBucket.query.delete()
+        counts = {'jobs': 0, 'candidates': 0}
+
+        last_id = 0
+        while True:
+            jobs = Job.query.filter(Job.id > last_id).order_by(Job.id).limit(batch_size).all()
+            if not jobs:
+                break
+            for job in jobs:
+                SimilarityBucket.replace(connection, 'job', job.id, job_tokens(job))
+            counts['jobs'] += len(jobs)
+            last_id = jobs[-1].id
+
+        last_id = 0
+        while True:
+            candidates = Candidate.query.filter(Candidate.id > last_id).order_by(Candidate.id).limit(batch_size).all()
+            if not candidates:
+                break
+            keywords = self._latest_keywords([c.id for c in candidates])
+            for candidate in candidates:
+                SimilarityBucket.replace(
+                    connection, 'candidate', candidate.id,
+                    candidate_tokens(candidate.skills, keywords.get(candidate.id))
+                )
+            counts['candidates'] += len(candidates)
+            last_id = candidates[-1].id
+
+        db.session.commit()
+        return counts
+
+
+def benchmark(items=20000, queries=200, limit=10, seed=7):
+    """
+    Rappel et latence de l'index LSH face au Jaccard exhaustif
+
+    Ensembles de compétences synthétiques regroupés en familles de
+    métiers (comme les offres réelles), sans base de données.
+
+    Returns:
+        dict: Rappel@limit moyen et latences moyennes (ms)
+    """
+    import random
+
+    rng = random.Random(seed)
+    vocabulary = [f"skill{i}" for i in range(2000)]
+    families = [rng.sample(vocabulary, 25) for _ in range(200)]
+
+    def sample_tokens():
+        family = rng.choice(families)
+        tokens = set(rng.sample(family, rng.randint(5, 12)))
+        tokens.update(rng.sample(vocabulary, rng.randint(0, 3)))
+        return tokens
+
+    corpus = {i: sample_tokens() for i in range(items)}
+    index = LSHIndex()
+    started = time.perf_counter()
+    for entity_id, tokens in corpus.items():
+        index.add(entity_id, tokens)
+    build_time = time.perf_counter() - started
+
+    recall_total = 0.0
+    lsh_time = brute_time = 0.0
+    for query_id in rng.sample(range(items), queries):
+        tokens = corpus[query_id]
+
+        started = time.perf_counter()
+        exact = sorted(
+            ((jaccard(tokens, other), entity_id) for entity_id, other in corpus.items() if entity_id != query_id),
+            reverse=True
+        )[:limit]
+        brute_time += time.perf_counter() - started
+
+        started = time.perf_counter()
+        approx = index.query(tokens, limit=limit, exclude=query_id)
+        lsh_time += time.perf_counter() - started
+
+        # Rappel sur les scores (les ex aequo sont interchangeables)
+        threshold = exact[-1][0] if exact else 0
+        found = sum(1 for _, score in approx if score >= threshold)
+        recall_total += min(found, len(exact)) / max(len(exact), 1)
+
+    return {
+        'items': items,
+        'queries': queries,
+        'build_s': round(build_time, 2),
+        'recall': round(recall_total / queries, 3),
+        'lsh_ms': round(lsh_time / queries * 1000, 2),
+        'brute_force_ms': round(brute_time / queries * 1000, 2)
+    }
+
+
+# Instance singleton
+similarity_service = SimilarityService()
@@ -0,0 +1,331 @@
+"""
+================================================================
+Vocabulaire de Compétences - BaraCorrespondance AI
+================================================================
+Vocabulaire de compétences partagé par tout le processus:
+- chaque compétence est ramenée à un nom canonique (synonymes:
+  "js" -> "javascript", "node" -> "node.js", ...) puis internée
+  sous un identifiant entier
+- un ensemble de compétences devient un bitset (entier Python):
+  intersection = ET binaire, effectif = popcount
+- les bitsets sont mis en cache par contenu de la liste source
+  (taille du cache bornée en octets)
+
+Les compétences viennent du texte libre des CV et des offres: les
+identifiants sont compactés au rechargement des synonymes
+(SKILL_SYNONYMS_FILE, relu quand il change) et quand le vocabulaire
+dépasse SKILL_VOCABULARY_MAX_IDS. Seules les compétences vues depuis
+le compactage précédent sont gardées, les plus fréquentes en premier
+(bitsets courts). Un bitset n'est valable que pour les identifiants
+qui l'ont produit: les calculs qui combinent plusieurs bitsets les
+obtiennent sous `with skill_vocabulary.pinned():`, qui diffère le
+compactage.
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+# Synonymes par défaut: nom canonique -> variantes
+DEFAULT_SYNONYMS = {
+    'javascript': ['js', 'ecmascript', 'es6'],
+    'typescript': ['ts'],
+    'node.js': ['node', 'nodejs', 'node js'],
+    'react': ['react.js', 'reactjs'],
+    'vue.js': ['vue', 'vuejs'],
+    'angular': ['angularjs', 'angular.js'],
+    'python': ['python3'],
+    'postgresql': ['postgres'],
+    'mongodb': ['mongo'],
+    'c#': ['csharp', 'c sharp'],
+    'c++': ['cpp'],
+    'html': ['html5'],
+    'css': ['css3'],
+    'kubernetes': ['k8s'],
+    'amazon web services': ['aws'],
+    'google cloud platform': ['gcp', 'google cloud'],
+    'machine learning': ['ml', 'apprentissage automatique'],
+    'intelligence artificielle': ['ia', 'ai', 'artificial intelligence'],
+    'excel': ['microsoft excel', 'ms excel'],
+    'comptabilité': ['comptabilite', 'accounting'],
+    'gestion de projet': ['gestion de projets', 'project management'],
+    'anglais': ['english'],
+    'français': ['francais', 'french']
+}
+
+# Taille maximale du cache des bitsets en octets (vidé au-delà)
+MAX_CACHED_BITSET_BYTES = 32 * 1024 * 1024
+
+# Compétences internées au-delà desquelles les identifiants sont compactés
+DEFAULT_MAX_IDS = 4096
+
+
+def normalize(name):
+    """Forme normalisée d'un nom de compétence (minuscules, espaces réduits)"""
+    return ' '.join(name.lower().split())
+
+
+class SkillVocabulary:
+    """Internement des compétences et représentation en bitsets"""
+
+    def __init__(self, synonyms=None):
+        self._lock = threading.Lock()
+        self._aliases = {}
+        self._ids = {}
+        self._names = []
+        self._bitsets = {}
+        self._cache_bytes = 0
+        self._seen = {}  # nom canonique -> usages depuis le dernier compactage
+        self._pins = 0
+        self._max_ids = DEFAULT_MAX_IDS
+        self.compactions = 0
+        self._app = None
+        self._source = None
+        self._source_mtime = None
+        self._check_interval = 0
+        self._checked_at = 0.0
+        self.version = 0
+        self.load(DEFAULT_SYNONYMS if synonyms is None else synonyms)
+
+    def init_app(self, app):
+        """Charger les synonymes de la configuration"""
+        self._app = app
+        self._source = app.config.get('SKILL_SYNONYMS_FILE')
+        self._check_interval = app.config.get('SKILL_VOCABULARY_CHECK_INTERVAL', 60)
+        self._max_ids = app.config.get('SKILL_VOCABULARY_MAX_IDS', DEFAULT_MAX_IDS)
+        if self._source:
+            self.refresh()
+
+    # ------------------------------------------------------------
+    # Chargement
+    # ------------------------------------------------------------
+
+    def load(self, synonyms):
+        """
+        Remplacer la table des synonymes (et compacter les identifiants)
+
+        Args:
+            synonyms: dict {nom canonique: [variantes]}
+        """
+        aliases = {}
+        for canonical, variants in synonyms.items():
+            name = normalize(canonical)
+            aliases[name] = name
+            for variant in variants or []:
+                aliases[normalize(variant)] = name
+
+        with self._lock:
+            self._aliases = aliases
+            self._clear_cache()
+            self.version += 1
+        self.compact()
+
+    def refresh(self):
+        """
+        Recharger les synonymes (par défaut + fichier SKILL_SYNONYMS_FILE)
+
+        Le fichier JSON {nom canonique: [variantes]} complète les
+        synonymes par défaut. Un fichier illisible laisse le vocabulaire
+        courant en place.
+
+        Returns:
+            bool: True si le vocabulaire a été rechargé
+        """
+        synonyms = {name: list(variants) for name, variants in DEFAULT_SYNONYMS.items()}
+        if self._source:
+            try:
+                mtime = os.path.getmtime(self._source)
+                with open(self._source, encoding='utf-8') as f:
+                    extra = json.load(f)
+            except (OSError, ValueError) as e:
+                if self._app:
+                    self._app.logger.warning(f"Synonymes de compétences illisibles ({self._source}): {e}")
+                return False
+            for name, variants in extra.items():
+                synonyms.setdefault(name, []).extend(variants or [])
+            self._source_mtime = mtime
+
+        self.load(synonyms)
+        if self._app:
+            self._app.logger.info(f"Vocabulaire de compétences chargé: {len(self._aliases)} formes")
+        return True
+
+    def _maybe_refresh(self):
+        """
+        Relire le fichier de synonymes s'il a changé, compacter un
+        vocabulaire trop grand (au plus une fois par intervalle, jamais
+        pendant un calcul)
+        """
+        if not self._check_interval or self._pins:
+            return
+        now = time.monotonic()
+        if now - self._checked_at < self._check_interval:
+            return
+        self._checked_at = now
+        if self._source:
+            try:
+                if os.path.getmtime(self._source) != self._source_mtime:
+                    self.refresh()
+                    return
+            except OSError:
+                pass
+        if len(self._names) > self._max_ids:
+            self.compact()
+
+    def compact(self):
+        """
+        Réattribuer des identifiants denses aux compétences vues depuis
+        le dernier compactage (les plus fréquentes en premier)
+
+        Différé tant qu'un calcul tient le vocabulaire (pinned).
+
+        Returns:
+            bool: True si les identifiants ont été compactés
+        """
+        with self._lock:
+            if self._pins:
+                return False
+            seen = self._seen
+            names = sorted(seen, key=lambda name: (-seen[name], name))
+            self._names = names
+            self._ids = {name: skill_id for skill_id, name in enumerate(names)}
+            self._seen = {}
+            self._clear_cache()
+            self.compactions += 1
+        return True
+
+    @contextmanager
+    def pinned(self):
+        """Identifiants stables le temps d'un calcul (compactage différé)"""
+        self._maybe_refresh()
+        with self._lock:
+            self._pins += 1
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._pins -= 1
+
+    def _clear_cache(self):
+        self._bitsets = {}
+        self._cache_bytes = 0
+
+    # ------------------------------------------------------------
+    # Internement
+    # ------------------------------------------------------------
+
+    def canonical(self, name):
+        """Nom canonique d'une compétence"""
+        name = normalize(name)
+        return self._aliases.get(name, name)
+
+    def skill_id(self, name):
+        """Identifiant entier d'une compétence (attribué au premier usage)"""
+        name = self.canonical(name)
+        seen = self._seen
+        seen[name] = seen.get(name, 0) + 1
+        skill_id = self._ids.get(name)
+        if skill_id is None:
+            with self._lock:
+                skill_id = self._ids.get(name)
+                if skill_id is None:
+                    skill_id = len(self._names)
+                    self._names.append(name)
+                    self._ids[name] = skill_id
+        return skill_id
+
+    def bits(self, skills):
+        """
+        Bitset d'une liste (ou d'un ensemble) de compétences
+
+        Args:
+            skills: Noms de compétences (les valeurs non textuelles sont ignorées)
+
+        Returns:
+            int: Bit i positionné si la compétence d'identifiant i est présente
+        """
+        if not skills:
+            return 0
+        self._maybe_refresh()
+
+        key = skills if isinstance(skills, frozenset) else tuple(skills)
+        cache = self._bitsets
+        bitset = cache.get(key)
+        if bitset is None:
+            bitset = 0
+            for name in skills:
+                if isinstance(name, str) and name.strip():
+                    bitset |= 1 << self.skill_id(name)
+            # Entier et clé (tuple de chaînes courtes), à peu près
+            size = 64 + bitset.bit_length() // 8 + 72 * len(key)
+            if self._cache_bytes + size > MAX_CACHED_BITSET_BYTES:
+                self._clear_cache()
+                cache = self._bitsets
+            cache[key] = bitset
+            self._cache_bytes += size
+        return bitset
+
+    @staticmethod
+    def count(bitset):
+        """Nombre de compétences d'un bitset (popcount)"""
+        return bitset.bit_count()
+
+    def names(self, bitset):
+        """Noms canoniques des compétences d'un bitset"""
+        names = []
+        while bitset:
+            low = bitset & -bitset
+            names.append(self._names[low.bit_length() - 1])
+            bitset ^= low
+        return names
+
+    # ------------------------------------------------------------
+    # Bitsets NumPy (calculs par lots)
+    # ------------------------------------------------------------
+
+    def to_array(self, bitsets, words=None):
+        """
+        Empiler des bitsets en matrice de mots de 64 bits
+
+        Args:
+            bitsets: Liste de bitsets
+            words: Nombre de mots par ligne (par défaut: taille du vocabulaire)
+
+        Returns:
+            numpy.ndarray: Matrice uint64 (len(bitsets), words)
+        """
+        words = words or max(1, (len(self._names) + 63) // 64)
+        width = words * 8
+        buffer = b''.join(b.to_bytes(width, 'little') for b in bitsets)
+        return np.frombuffer(buffer, dtype='<u8').reshape(len(bitsets), words)
+
+    @staticmethod
+    def popcount(array):
+        """Nombre de bits positionnés par ligne d'une matrice de bitsets"""
+        if hasattr(np, 'bitwise_count'):
+            return np.bitwise_count(array).sum(axis=-1, dtype=np.int64)
+        return np.unpackbits(array.view(np.uint8), axis=-1).sum(axis=-1, dtype=np.int64)
+
+    def stats(self):
+        """Taille du vocabulaire et du cache"""
+        return {
+            'version': self.version,
+            'aliases': len(self._aliases),
+            'skills': len(self._names),
+            'compactions': self.compactions,
+            'cached_bitsets': len(self._bitsets),
+            'cache_bytes': self._cache_bytes
+        }
+
+
+# Instance singleton
+skill_vocabulary = SkillVocabulary()
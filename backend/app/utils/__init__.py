@@ -16,7 +16,9 @@ from app.utils.validators import (
 from app.utils.helpers import (
     success_response,
     error_response,
-    paginated_response
+    paginated_response,
+    get_requested_fields,
+    select_fields
 )
 
 __all__ = [
@@ -31,5 +33,7 @@ __all__ = [
     # Helpers
     'success_response',
     'error_response',
-    'paginated_response'
+    'paginated_response',
+    'get_requested_fields',
+    'select_fields'
 ]
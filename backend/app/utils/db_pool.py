@@ -0,0 +1,238 @@
+"""
+================================================================
+Pools de connexions - BaraCorrespondance AI
+================================================================
+Options des moteurs par environnement (taille, débordement, recyclage,
+pre-ping, délai max des requêtes SQL) et instrumentation des pools:
+- temps d'attente d'une connexion (total, max, attentes lentes)
+- connexions en cours d'utilisation, ouvertures en débordement,
+  expirations de l'attente (pool saturé)
+
+Un second pool, petit et à délais courts, sur la même base
+(bind 'interactive') sert les routes sensibles à la latence
+(@latency_sensitive): un long scan de matching ne peut pas
+l'épuiser.
+
+Le délai max des requêtes SQL ne s'applique qu'aux transactions
+ouvertes pendant une requête HTTP: migrations, commandes CLI et
+tâches planifiées (thread du planificateur) n'ont pas de limite.
+"""
+
+import threading
+import time
+
+import sqlalchemy as sa
+from flask import has_request_context
+from sqlalchemy import event, exc as sa_exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+
+INTERACTIVE_BIND = 'interactive'
+
+# Option d'exécution portant le délai max des requêtes SQL d'un moteur
+STATEMENT_TIMEOUT_OPTION = 'request_statement_timeout_ms'
+
+# Bornes (secondes) de l'histogramme des attentes de connexion
+WAIT_BUCKETS = (0.001, 0.01, 0.1, 1.0, float('inf'))
+
+
+class PoolMetrics:
+    """Compteurs d'un pool (partagés par ses recréations)"""
+
+    def __init__(self, slow_wait):
+        self._lock = threading.Lock()
+        self.slow_wait = slow_wait
+        self.checkouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.slow_waits = 0
+        self.timeouts = 0
+        self.overflow_opened = 0
+        self.buckets = [0] * len(WAIT_BUCKETS)
+
+    def record_checkout(self, waited, overflowed):
+        with self._lock:
+            self.checkouts += 1
+            self.wait_total += waited
+            self.wait_max = max(self.wait_max, waited)
+            if waited >= self.slow_wait:
+                self.slow_waits += 1
+            if overflowed:
+                self.overflow_opened += 1
+            for index, bound in enumerate(WAIT_BUCKETS):
+                if waited <= bound:
+                    self.buckets[index] += 1
+                    break
+
+    def record_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'checkouts': self.checkouts,
+                'avg_wait_ms': round(self.wait_total / self.checkouts * 1000, 2) if self.checkouts else 0,
+                'max_wait_ms': round(self.wait_max * 1000, 2),
+                'slow_waits': self.slow_waits,
+                'timeouts': self.timeouts,
+                'overflow_opened': self.overflow_opened,
+                'wait_histogram': {
+                    ('+inf' if bound == float('inf') else f'{bound * 1000:g}ms'): count
+                    for bound, count in zip(WAIT_BUCKETS, self.buckets)
+                },
+            }
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool mesurant l'attente de chaque connexion"""
+
+    # slow_wait nommé explicitement: create_engine() ne transmet que les
+    # arguments déclarés par la classe du pool
+    def __init__(self, creator, slow_wait=0.1, **kwargs):
+        super().__init__(creator, **kwargs)
+        self.metrics = PoolMetrics(slow_wait)
+
+    def _do_get(self):
+        overflow = self.overflow()
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except sa_exc.TimeoutError:
+            self.metrics.record_timeout()
+            raise
+        self.metrics.record_checkout(
+            time.perf_counter() - started,
+            self.overflow() > max(overflow, 0)
+        )
+        return connection
+
+    def recreate(self):
+        # dispose() recrée le pool: garder les compteurs
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+
+def _uses_queue_pool(url):
+    """SQLite en mémoire garde son StaticPool (une seule connexion)"""
+    url = sa.engine.make_url(url)
+    return not (url.drivername.startswith('sqlite') and url.database in (None, '', ':memory:'))
+
+
+def engine_options(url, pool_size, max_overflow, pool_timeout, statement_timeout_ms, config):
+    """
+    Options create_engine d'un bind
+
+    Args:
+        url: URI de la base
+        statement_timeout_ms: Durée max d'une requête SQL pendant une requête HTTP (0 = aucune)
+
+    Returns:
+        dict: Options (sans 'url')
+    """
+    options = {'pool_pre_ping': config.get('DB_POOL_PRE_PING', True)}
+    if _uses_queue_pool(url):
+        options.update(
+            poolclass=InstrumentedQueuePool,
+            pool_size=pool_size,
+            max_overflow=max_overflow,
+            pool_timeout=pool_timeout,
+            pool_recycle=config.get('DB_POOL_RECYCLE', 1800),
+            slow_wait=config.get('DB_POOL_SLOW_WAIT_MS', 100) / 1000,
+        )
+
+    backend = sa.engine.make_url(url).get_backend_name()
+    if statement_timeout_ms and backend in ('postgresql', 'mysql'):
+        # Appliqué transaction par transaction (voir _request_statement_timeout)
+        options['execution_options'] = {STATEMENT_TIMEOUT_OPTION: int(statement_timeout_ms)}
+    return options
+
+
+@event.listens_for(Engine, 'begin')
+def _request_statement_timeout(connection):
+    """Limiter la durée des requêtes SQL des transactions ouvertes par une requête HTTP"""
+    timeout = connection.get_execution_options().get(STATEMENT_TIMEOUT_OPTION)
+    if not timeout:
+        return
+    backend = connection.dialect.name
+    if backend == 'postgresql':
+        # SET LOCAL: limité à la transaction, rien à rétablir au retour dans le pool
+        if has_request_context():
+            connection.exec_driver_sql(f'SET LOCAL statement_timeout = {int(timeout)}')
+    elif backend == 'mysql':
+        # Variable de session: toujours (re)positionnée, la connexion est partagée
+        value = int(timeout) if has_request_context() else 0
+        connection.exec_driver_sql(f'SET SESSION max_execution_time = {value}')
+
+
+def init_db_pool(app):
+    """
+    Appliquer les options de pool au bind par défaut et aux binds
+    existants (réplicas), et déclarer le pool interactif (avant db.init_app)
+    """
+    config = app.config
+    general = dict(
+        pool_size=config.get('DB_POOL_SIZE', 5),
+        max_overflow=config.get('DB_MAX_OVERFLOW', 10),
+        pool_timeout=config.get('DB_POOL_TIMEOUT', 10),
+        statement_timeout_ms=config.get('DB_STATEMENT_TIMEOUT_MS', 0),
+        config=config,
+    )
+    uri = config['SQLALCHEMY_DATABASE_URI']
+
+    # Options explicites de SQLALCHEMY_ENGINE_OPTIONS prioritaires
+    options = engine_options(uri, **general)
+    options.update(config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    config['SQLALCHEMY_ENGINE_OPTIONS'] = options
+
+    binds = {}
+    for key, value in (config.get('SQLALCHEMY_BINDS') or {}).items():
+        if isinstance(value, dict):
+            binds[key] = value
+        else:
+            binds[key] = {'url': value, **engine_options(value, **general)}
+
+    fast_size = config.get('DB_FAST_POOL_SIZE', 0)
+    if fast_size and _uses_queue_pool(uri):
+        binds[INTERACTIVE_BIND] = {'url': uri, **engine_options(
+            uri,
+            pool_size=fast_size,
+            max_overflow=config.get('DB_FAST_MAX_OVERFLOW', 2),
+            pool_timeout=config.get('DB_FAST_POOL_TIMEOUT', 2),
+            statement_timeout_ms=config.get('DB_FAST_STATEMENT_TIMEOUT_MS', 0),
+            config=config,
+        )}
+    if binds:
+        config['SQLALCHEMY_BINDS'] = binds
+
+
+def pool_status(engines):
+    """
+    État et compteurs de chaque pool
+
+    Args:
+        engines: db.engines ({clé de bind: Engine}, None = défaut)
+
+    Returns:
+        dict: {nom: {...}}
+    """
+    status = {}
+    for key, engine in engines.items():
+        pool = engine.pool
+        entry = {'pool': type(pool).__name__}
+        if isinstance(pool, QueuePool):
+            capacity = pool.size() + max(pool._max_overflow, 0)
+            in_use = pool.checkedout()
+            entry.update(
+                size=pool.size(),
+                max_overflow=pool._max_overflow,
+                in_use=in_use,
+                idle=pool.checkedin(),
+                overflow=max(pool.overflow(), 0),
+                saturation=round(in_use / capacity, 2) if capacity > 0 else None,
+            )
+        if isinstance(pool, InstrumentedQueuePool):
+            entry.update(pool.metrics.snapshot())
+        status[key or 'default'] = entry
+    return status
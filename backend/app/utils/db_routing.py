@@ -0,0 +1,219 @@
+"""
+================================================================
+Routage lecture / écriture - BaraCorrespondance AI
+================================================================
+Les lectures déclarées explicitement en lecture seule (analytics,
+listes et recherches, génération des candidats du matching) partent
+vers un réplica; tout le reste va au primaire:
+- SQLALCHEMY_REPLICA_URIS devient des binds 'replica_0', 'replica_1'...
+- read_only (décorateur) et replica_reads() (bloc) marquent la portée
+- une session reste sur le même réplica pendant toute la requête
+- lecture de ses propres écritures: après une écriture, la requête
+  en cours lit sur le primaire, puis l'utilisateur du JWT y reste
+  DB_REPLICA_STICKY_SECONDS (retard de réplication). L'échéance est
+  gardée côté serveur (users.reads_primary_until, partagée par les
+  workers, plus un cache par processus): le frontend, sur un autre
+  site, n'envoie pas de cookie
+- les routes @latency_sensitive utilisent, pour toute la requête, le
+  pool interactif du primaire (voir app.utils.db_pool)
+
+Sans réplica configuré, tout va au primaire (aucun changement).
+"""
+
+import random
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from functools import wraps
+
+from flask import g, request, has_app_context, has_request_context
+from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event, select, update
+
+from app.utils.db_pool import INTERACTIVE_BIND
+from app.utils.helpers import safe_int
+
+REPLICA_PREFIX = 'replica_'
+
+# Échéances de lecture sur le primaire connues de ce processus (user_id -> datetime)
+_sticky_users = {}
+_sticky_lock = threading.Lock()
+MAX_STICKY_USERS = 10000
+
+
+def replica_binds(app):
+    """Clés des binds des réplicas configurés"""
+    return sorted(key for key in app.config.get('SQLALCHEMY_BINDS') or {} if key.startswith(REPLICA_PREFIX))
+
+
+def init_db_routing(app):
+    """
+    Déclarer les réplicas comme binds (avant db.init_app), choisir le
+    pool des routes @latency_sensitive et poser le cookie de lecture
+    sur le primaire après une écriture
+    """
+    @app.before_request
+    def _select_pool():
+        # Décidé avant la première requête SQL: une seule connexion par requête
+        view = app.view_functions.get(request.endpoint)
+        bind = getattr(view, 'db_bind', None)
+        if bind:
+            g._db_bind = bind
+
+    uris = app.config.get('SQLALCHEMY_REPLICA_URIS') or []
+    if isinstance(uris, str):
+        uris = [uri.strip() for uri in uris.split(',') if uri.strip()]
+    if not uris:
+        return
+
+    binds = dict(app.config.get('SQLALCHEMY_BINDS') or {})
+    for index, uri in enumerate(uris):
+        binds[f'{REPLICA_PREFIX}{index}'] = uri
+    app.config['SQLALCHEMY_BINDS'] = binds
+
+    sticky = app.config.get('DB_REPLICA_STICKY_SECONDS', 10)
+
+    @app.after_request
+    def _stick_to_primary(response):
+        if g.get('_db_wrote') and response.status_code < 400 and sticky:
+            user_id = _request_user_id()
+            if user_id is not None:
+                _mark_sticky(user_id, datetime.utcnow() + timedelta(seconds=sticky))
+        return response
+
+
+@contextmanager
+def replica_reads():
+    """Bloc dont les lectures peuvent partir vers un réplica"""
+    if not has_app_context():
+        yield
+        return
+    g._db_read_only = g.get('_db_read_only', 0) + 1
+    try:
+        yield
+    finally:
+        g._db_read_only -= 1
+
+
+def read_only(f):
+    """Décorateur: route ou méthode de service en lecture seule"""
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        with replica_reads():
+            return f(*args, **kwargs)
+    return decorated
+
+
+def latency_sensitive(f):
+    """Décorateur de route: pool interactif (petit, délais courts) pour toute la requête"""
+    f.db_bind = INTERACTIVE_BIND
+    return f
+
+
+def _mark_write():
+    """La requête a écrit: ses lectures suivantes vont au primaire"""
+    if has_app_context():
+        g._db_wrote = True
+
+
+def _request_user_id():
+    """ID utilisateur du JWT de la requête (None si absent ou invalide), une fois par requête"""
+    if '_db_user_id' not in g:
+        try:
+            verify_jwt_in_request(optional=True)
+            g._db_user_id = safe_int(get_jwt_identity())
+        except Exception:
+            g._db_user_id = None
+    return g._db_user_id
+
+
+def _mark_sticky(user_id, until):
+    """Lectures de l'utilisateur sur le primaire jusqu'à until (tous les workers)"""
+    from app import db
+    from app.models import User
+
+    with _sticky_lock:
+        if len(_sticky_users) >= MAX_STICKY_USERS:
+            now = datetime.utcnow()
+            for key in [key for key, value in _sticky_users.items() if value <= now]:
+                del _sticky_users[key]
+        _sticky_users[user_id] = until
+
+    table = User.__table__
+    try:
+        # Transaction séparée: la réponse est déjà validée
+        with db.engine.begin() as connection:
+            connection.execute(update(table).where(table.c.id == user_id).values(
+                reads_primary_until=until,
+                updated_at=table.c.updated_at  # pas une modification du compte
+            ))
+    except Exception as e:
+        from flask import current_app
+        current_app.logger.warning(f"Échéance de lecture sur le primaire non enregistrée: {e}")
+
+
+def _is_sticky(session):
+    """L'utilisateur de la requête a-t-il écrit récemment ? (une fois par requête)"""
+    if '_db_sticky' in g:
+        return g._db_sticky
+    g._db_sticky = False
+    user_id = _request_user_id()
+    if user_id is None:
+        return False
+
+    now = datetime.utcnow()
+    until = _sticky_users.get(user_id)
+    if until is None or until <= now:
+        # Écriture éventuellement servie par un autre worker: échéance lue sur le primaire
+        from app.models import User
+        until = session.execute(
+            select(User.__table__.c.reads_primary_until).where(User.__table__.c.id == user_id),
+            bind_arguments={'bind': session._db.engine}
+        ).scalar()
+    g._db_sticky = bool(until and until > now)
+    return g._db_sticky
+
+
+def _reads_from_replica(session):
+    """Les lectures courantes peuvent-elles partir vers un réplica ?"""
+    if not has_app_context() or not g.get('_db_read_only') or g.get('_db_wrote'):
+        return False
+    if has_request_context() and _is_sticky(session):
+        return False
+    return True
+
+
+class RoutingSession(Session):
+    """Session Flask-SQLAlchemy envoyant les lectures en lecture seule vers un réplica"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing:
+            replicas = self.info.get('replicas')
+            if replicas is None:
+                replicas = self.info['replicas'] = [
+                    key for key in self._db.engines if isinstance(key, str) and key.startswith(REPLICA_PREFIX)
+                ]
+            if replicas and _reads_from_replica(self):
+                # Un seul réplica par session: lectures cohérentes entre elles
+                key = self.info.get('replica')
+                if key is None:
+                    key = self.info['replica'] = random.choice(replicas)
+                return self._db.engines[key]
+        if bind is None and has_app_context():
+            key = g.get('_db_bind')
+            if key is not None and key in self._db.engines:
+                return self._db.engines[key]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _after_flush(session, flush_context):
+    _mark_write()
+
+
+@event.listens_for(RoutingSession, 'do_orm_execute')
+def _after_bulk_write(orm_execute_state):
+    # UPDATE / DELETE en masse (query.update(), compteurs...)
+    if orm_execute_state.is_update or orm_execute_state.is_delete or orm_execute_state.is_insert:
+        _mark_write()
@@ -5,7 +5,7 @@ Helpers - BaraCorrespondance AI
 Fonctions utilitaires pour les réponses API et autres
 """
 
-from flask import jsonify
+from flask import jsonify, request, has_request_context
 
 
 def success_response(data=None, message="Succès", status_code=200):
@@ -54,7 +54,7 @@ def error_response(message="Une erreur est survenue", status_code=400, errors=No
     return jsonify(response), status_code
 
 
-def paginated_response(items, total, page, per_page, message="Succès"):
+def paginated_response(items, total, page, per_page, message="Succès", fields=None):
     """
     Créer une réponse paginée standardisée
     
@@ -64,12 +64,17 @@ def paginated_response(items, total, page, per_page, message="Succès"):
         page: Numéro de page actuel
         per_page: Nombre d'éléments par page
         message: Message de succès
+        fields: Champs à conserver par élément (défaut: paramètre ?fields=)
         
     Returns:
         tuple: (Response, 200)
     """
     total_pages = (total + per_page - 1) // per_page if per_page > 0 else 0
     
+    if fields is None:
+        fields = get_requested_fields()
+    items = select_fields(items, fields)
+    
     response = {
         'success': True,
         'message': message,
@@ -89,6 +94,49 @@ def paginated_response(items, total, page, per_page, message="Succès"):
     return jsonify(response), 200
 
 
+def get_requested_fields():
+    """
+    Lire le paramètre de requête ?fields=id,title,... (sparse fieldset)
+    
+    Returns:
+        set: Champs demandés, ou None si tous les champs sont demandés
+    """
+    if not has_request_context():
+        return None
+    
+    raw = request.args.get('fields')
+    if not raw:
+        return None
+    
+    fields = {f.strip() for f in raw.split(',') if f.strip()}
+    return fields or None
+
+
+def select_fields(data, fields):
+    """
+    Ne conserver que certains champs d'un dictionnaire sérialisé
+    
+    L'identifiant 'id' est toujours conservé.
+    
+    Args:
+        data: Dictionnaire ou liste de dictionnaires (sortie de to_dict)
+        fields: Ensemble des champs à conserver (None = tous)
+        
+    Returns:
+        dict | list: Données filtrées
+    """
+    if not fields:
+        return data
+    
+    if isinstance(data, list):
+        return [select_fields(item, fields) for item in data]
+    
+    if isinstance(data, dict):
+        return {k: v for k, v in data.items() if k in fields or k == 'id'}
+    
+    return data
+
+
 def format_datetime(dt, format='%d/%m/%Y %H:%M'):
     """
     Formater une date pour l'affichage
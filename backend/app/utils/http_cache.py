@@ -0,0 +1,115 @@
+"""
+================================================================
+Cache HTTP - BaraCorrespondance AI
+================================================================
+Validation conditionnelle des réponses (ETag / Last-Modified)
+et en-têtes Cache-Control pour les endpoints de lecture publics
+"""
+
+import hashlib
+from functools import wraps
+
+from flask import current_app, g, request
+from werkzeug.http import is_resource_modified
+
+
+def entity_etag(*entities):
+    """
+    Calculer un ETag à partir de l'identité et de la date de mise à jour d'entités
+
+    Les paramètres de requête font partie de l'ETag car ils modifient le corps.
+
+    Args:
+        *entities: Instances de modèles (None ignorés)
+
+    Returns:
+        str: ETag (hash hexadécimal)
+    """
+    parts = [request.query_string.decode('utf-8', 'ignore')]
+    for entity in entities:
+        if entity is None:
+            continue
+        stamp = getattr(entity, 'updated_at', None)
+        parts.append(f"{type(entity).__name__}:{entity.id}:{stamp.isoformat() if stamp else ''}")
+
+    return hashlib.sha1('|'.join(parts).encode('utf-8')).hexdigest()
+
+
+def entity_last_modified(*entities):
+    """Retourner la date de mise à jour la plus récente des entités"""
+    stamps = [getattr(e, 'updated_at', None) for e in entities if e is not None]
+    stamps = [s for s in stamps if s]
+    return max(stamps) if stamps else None
+
+
+def check_not_modified(etag=None, last_modified=None):
+    """
+    Enregistrer les validateurs de la réponse et tester la requête conditionnelle
+
+    À appeler dans une vue décorée par @conditional_get, avant le travail
+    coûteux (sérialisation, agrégats).
+
+    Args:
+        etag: ETag calculé à partir des entités
+        last_modified: Date de dernière modification
+
+    Returns:
+        Response: Réponse 304 si le client est à jour, sinon None
+    """
+    g.http_validators = {'etag': etag, 'last_modified': last_modified}
+
+    if not is_resource_modified(request.environ, etag=etag, last_modified=last_modified):
+        return current_app.response_class(status=304)
+
+    return None
+
+
+def _apply_cache_control(response, max_age, private):
+    """Définir Cache-Control (et Vary pour les réponses privées)"""
+    response.cache_control.max_age = max_age
+    if private:
+        response.cache_control.private = True
+        response.vary.add('Authorization')
+    else:
+        response.cache_control.public = True
+    response.cache_control.must_revalidate = True
+
+
+def conditional_get(max_age=0, private=False):
+    """
+    Décorateur: réponses GET validables par ETag / Last-Modified
+
+    - Utilise les validateurs fournis par check_not_modified() si présents,
+      sinon un ETag dérivé du contenu de la réponse
+    - Répond 304 si If-None-Match / If-Modified-Since correspondent
+    - Définit Cache-Control selon la route
+
+    Args:
+        max_age: Durée de fraîcheur en secondes
+        private: True pour les réponses dépendantes de l'utilisateur
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            g.http_validators = None
+            response = current_app.make_response(view(*args, **kwargs))
+
+            if request.method not in ('GET', 'HEAD') or response.status_code not in (200, 304):
+                return response
+
+            validators = g.get('http_validators') or {}
+            if validators.get('etag'):
+                response.set_etag(validators['etag'])
+            elif response.status_code == 200:
+                response.add_etag()
+            if validators.get('last_modified'):
+                response.last_modified = validators['last_modified']
+
+            _apply_cache_control(response, max_age, private)
+
+            if response.status_code == 200:
+                response.make_conditional(request)
+
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,130 @@
+"""
+================================================================
+Identité de la requête - BaraCorrespondance AI
+================================================================
+Les tokens portent, en plus de l'ID utilisateur, le rôle et l'ID du
+profil (candidat ou entreprise) en claims additionnels. current_actor
+résout l'identité une seule fois par requête (mise en cache dans g):
+- rôle et IDs lus dans le token, sans requête
+- profil et utilisateur chargés ensemble (jointure), seulement s'ils
+  sont utilisés
+
+Les tokens émis avant l'ajout des claims sont résolus depuis la base.
+"""
+
+from flask import g
+from flask_jwt_extended import get_jwt, get_jwt_identity
+from sqlalchemy.orm import joinedload
+from werkzeug.local import LocalProxy
+
+from app.models import User, Candidate, Company
+from app.utils.helpers import safe_int
+
+PROFILE_MODELS = {
+    'candidate': Candidate,
+    'company': Company,
+}
+
+
+def identity_claims(user):
+    """
+    Claims additionnels d'un token: rôle et ID du profil
+
+    Args:
+        user: User
+
+    Returns:
+        dict: {'role': ..., 'profile_id': ...}
+    """
+    profile = getattr(user, user.role, None) if user.role in PROFILE_MODELS else None
+    return {
+        'role': user.role,
+        'profile_id': profile.id if profile else None
+    }
+
+
+class Actor:
+    """Utilisateur connecté (rôle et profil résolus paresseusement)"""
+
+    def __init__(self, user_id, role, profile_id=None, user=None):
+        self.id = user_id
+        self.role = role
+        self.profile_id = profile_id
+        self._user = user
+        self._profile = None
+
+    @property
+    def user(self):
+        """User, chargé avec son profil au premier accès"""
+        if self._user is None:
+            query = User.query
+            if self.role in PROFILE_MODELS:
+                query = query.options(joinedload(getattr(User, self.role)))
+            self._user = query.filter_by(id=self.id).first()
+        return self._user
+
+    @property
+    def profile(self):
+        """Candidate ou Company selon le rôle, None sinon"""
+        if self._profile is None and self.role in PROFILE_MODELS:
+            if self._user is None and self.profile_id:
+                # Profil et utilisateur en une requête (les handlers lisent souvent profile.user)
+                model = PROFILE_MODELS[self.role]
+                self._profile = model.query.options(joinedload(model.user)).filter_by(id=self.profile_id).first()
+                if self._profile is not None:
+                    self._user = self._profile.user
+            elif self.user is not None:
+                self._profile = getattr(self.user, self.role)
+        return self._profile
+
+    @property
+    def candidate(self):
+        return self.profile if self.role == 'candidate' else None
+
+    @property
+    def company(self):
+        return self.profile if self.role == 'company' else None
+
+    @property
+    def candidate_id(self):
+        """ID du profil candidat (depuis le token si possible)"""
+        if self.role != 'candidate':
+            return None
+        return self.profile_id or (self.profile.id if self.profile else None)
+
+    @property
+    def company_id(self):
+        """ID du profil entreprise (depuis le token si possible)"""
+        if self.role != 'company':
+            return None
+        return self.profile_id or (self.profile.id if self.profile else None)
+
+    def __repr__(self):
+        return f'<Actor {self.id} {self.role}>'
+
+
+def _load_actor():
+    """Résoudre l'utilisateur du token courant (une fois par token décodé)"""
+    claims = get_jwt()
+    cached = g.get('_current_actor')
+    # Le cache suit le token décodé par jwt_required (nouveau à chaque requête)
+    if cached is not None and cached[0] is claims:
+        return cached[1]
+
+    user_id = safe_int(get_jwt_identity())
+    if user_id is None:
+        actor = None
+    elif 'role' in claims:
+        actor = Actor(user_id, claims['role'], claims.get('profile_id'))
+    else:
+        # Ancien token sans claims: une requête avec les deux profils
+        user = User.query.options(
+            joinedload(User.candidate), joinedload(User.company)
+        ).filter_by(id=user_id).first()
+        actor = Actor(user_id, user.role, identity_claims(user)['profile_id'], user=user) if user else None
+    g._current_actor = (claims, actor)
+    return actor
+
+
+# Utilisateur connecté (None si le token ne correspond à aucun utilisateur)
+current_actor = LocalProxy(_load_actor)
@@ -0,0 +1,74 @@
+"""
+================================================================
+Encodeur JSON - BaraCorrespondance AI
+================================================================
+Fournisseur JSON Flask basé sur orjson (optionnel) pour réduire
+le coût CPU de sérialisation des réponses API
+"""
+
+from flask.json.provider import DefaultJSONProvider
+
+# orjson est optionnel - repli sur l'encodeur standard de Flask
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except Exception:
+    orjson = None
+    ORJSON_AVAILABLE = False
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """
+    Fournisseur JSON utilisant orjson
+
+    Utilisé automatiquement par jsonify(), donc par success_response,
+    error_response et paginated_response.
+    """
+
+    # Le tri des clés coûte du CPU et n'apporte rien aux clients de l'API
+    sort_keys = False
+
+    def _options(self):
+        """Options orjson équivalentes au comportement de Flask"""
+        # Les datetime restent gérés par default() (format HTTP de Flask)
+        options = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if self.sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        if self.compact is False or (self.compact is None and self._app.debug):
+            options |= orjson.OPT_INDENT_2
+        return options
+
+    def dumps(self, obj, **kwargs):
+        """Sérialiser en chaîne JSON"""
+        if kwargs:
+            # Options spécifiques à json.dumps: déléguer à l'encodeur standard
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=self.default, option=self._options()).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        """Désérialiser une chaîne JSON"""
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        """Créer une réponse JSON directement en bytes"""
+        obj = self._prepare_response_obj(args, kwargs)
+        body = orjson.dumps(
+            obj,
+            default=self.default,
+            option=self._options() | orjson.OPT_APPEND_NEWLINE
+        )
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+
+def init_json_provider(app):
+    """Activer l'encodeur orjson si configuré et disponible"""
+    if not app.config.get('JSON_USE_ORJSON', True):
+        return
+
+    if not ORJSON_AVAILABLE:
+        app.logger.info("orjson non installé - encodeur JSON standard utilisé")
+        return
+
+    app.json = OrjsonProvider(app)
@@ -0,0 +1,54 @@
+"""
+================================================================
+Imports différés - BaraCorrespondance AI
+================================================================
+Les dépendances lourdes (reportlab, openai, google.generativeai,
+scikit-learn, boto3...) ne sont importées qu'au premier usage: chaque
+worker et chaque commande CLI démarre sans les charger.
+
+- module_available(): présence d'un module sans l'importer
+- lazy_service(): singleton d'un module de service, importé au
+  premier accès (attribut ou appel)
+"""
+
+import importlib.util
+
+from werkzeug.local import LocalProxy
+from werkzeug.utils import import_string
+
+
+def module_available(name):
+    """
+    Le module est-il installé ? (sans exécuter son import)
+
+    Args:
+        name: Nom du module ('sklearn', 'google.generativeai', ...)
+
+    Returns:
+        bool
+    """
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        # Paquet parent absent
+        return False
+
+
+def lazy_service(import_path):
+    """
+    Proxy d'un objet de service importé au premier usage
+
+    Args:
+        import_path: 'module:attribut' (ex: 'app.services.pdf_generator:pdf_generator')
+
+    Returns:
+        LocalProxy: se comporte comme l'objet (attributs, appel)
+    """
+    loaded = []
+
+    def _load():
+        if not loaded:
+            loaded.append(import_string(import_path))
+        return loaded[0]
+
+    return LocalProxy(_load)
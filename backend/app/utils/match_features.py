@@ -0,0 +1,130 @@
+"""
+================================================================
+Caractéristiques de matching - BaraCorrespondance AI
+================================================================
+Caractéristiques pré-calculées des offres et des analyses de CV
+(mots-clés, compétences normalisées, niveau d'études ordinal),
+enregistrées à l'écriture dans la colonne JSON `match_features`
+et consommées directement par AutoMatcherService.
+
+Incrémenter MATCH_FEATURES_VERSION à chaque changement de
+l'extraction: les enregistrements d'une autre version sont ignorés
+(recalculés à la volée) jusqu'au `flask refresh-match-features`.
+"""
+
+from sqlalchemy import inspect
+
+MATCH_FEATURES_VERSION = 1
+
+# Niveaux d'études (recherchés comme sous-chaînes dans le texte du CV)
+EDUCATION_LEVELS = {
+    'bac': 1,
+    'bac+2': 2,
+    'bac+3': 3,
+    'bac+5': 5,
+    'master': 5,
+    'doctorat': 8,
+    'phd': 8
+}
+
+# Niveau supposé pour une exigence inconnue
+DEFAULT_REQUIRED_EDUCATION = 3
+
+# Colonnes sources des caractéristiques
+JOB_FEATURE_FIELDS = ('title', 'description', 'required_skills', 'nice_to_have_skills', 'education_level')
+CV_FEATURE_FIELDS = ('extracted_data', 'keywords')
+
+
+def _lower_all(values):
+    """Ensemble des valeurs en minuscules"""
+    return {v.lower() for v in (values or []) if isinstance(v, str)}
+
+
+def education_ordinal(text):
+    """Niveau d'études le plus élevé mentionné dans un texte (0 si aucun)"""
+    text = (text or '').lower()
+    return max((level for key, level in EDUCATION_LEVELS.items() if key in text), default=0)
+
+
+def build_job_features(job):
+    """
+    Calculer les caractéristiques d'une offre
+
+    Returns:
+        dict: Caractéristiques sérialisables (listes triées)
+    """
+    keywords = set()
+    if job.title:
+        keywords.update(w.lower() for w in job.title.split() if len(w) > 3)
+    if job.description:
+        # Quelques mots-clés de la description
+        words = [w.lower() for w in job.description.split() if len(w) > 4]
+        keywords.update(words[:20])
+    required_skills = _lower_all(job.required_skills)
+    keywords.update(required_skills)
+
+    education_required = None
+    if job.education_level:
+        education_required = EDUCATION_LEVELS.get(job.education_level.lower(), DEFAULT_REQUIRED_EDUCATION)
+
+    return {
+        'version': MATCH_FEATURES_VERSION,
+        'keywords': sorted(keywords),
+        'required_skills': sorted(required_skills),
+        'nice_to_have_skills': sorted(_lower_all(job.nice_to_have_skills)),
+        'education_required': education_required
+    }
+
+
+def build_cv_features(cv_analysis):
+    """
+    Calculer les caractéristiques d'une analyse de CV
+
+    Returns:
+        dict: Caractéristiques sérialisables (listes triées)
+    """
+    extracted_data = cv_analysis.extracted_data or {}
+    skills = extracted_data.get('skills') or {}
+    education = (extracted_data.get('education_level') or '').lower()
+
+    return {
+        'version': MATCH_FEATURES_VERSION,
+        'keywords': sorted(_lower_all(cv_analysis.keywords)),
+        'skills': sorted(_lower_all(skills.get('technical')) | _lower_all(skills.get('soft'))),
+        'education': education,
+        'education_level': education_ordinal(education),
+        'experience_years': extracted_data.get('total_experience_years', 0)
+    }
+
+
+def _as_sets(features, *keys):
+    """Convertir les listes enregistrées en ensembles pour le scoring"""
+    loaded = dict(features)
+    for key in keys:
+        loaded[key] = frozenset(loaded.get(key) or ())
+    return loaded
+
+
+def job_features(job):
+    """Caractéristiques d'une offre prêtes pour le scoring (recalculées si périmées)"""
+    features = job.match_features
+    if not features or features.get('version') != MATCH_FEATURES_VERSION:
+        features = build_job_features(job)
+    return _as_sets(features, 'keywords', 'required_skills', 'nice_to_have_skills')
+
+
+def cv_features(cv_analysis):
+    """Caractéristiques d'une analyse prêtes pour le scoring (recalculées si périmées)"""
+    features = cv_analysis.match_features
+    if not features or features.get('version') != MATCH_FEATURES_VERSION:
+        features = build_cv_features(cv_analysis)
+    return _as_sets(features, 'keywords', 'skills')
+
+
+def needs_refresh(target, fields):
+    """Une des colonnes sources a-t-elle changé (ou les caractéristiques sont-elles périmées) ?"""
+    features = target.match_features
+    if not features or features.get('version') != MATCH_FEATURES_VERSION:
+        return True
+    state = inspect(target)
+    return any(state.attrs[field].history.has_changes() for field in fields)
@@ -0,0 +1,117 @@
+"""
+================================================================
+MinHash / LSH - BaraCorrespondance AI
+================================================================
+Signatures MinHash d'ensembles de jetons (compétences, mots du
+titre, mots-clés de CV) et découpage en bandes LSH: deux ensembles
+de similarité de Jaccard J partagent au moins un seau avec une
+probabilité 1 - (1 - J^ROWS)^BANDS.
+"""
+
+import hashlib
+from collections import defaultdict
+
+import numpy as np
+
+NUM_PERM = 64
+BANDS = 32
+ROWS = NUM_PERM // BANDS
+
+# Grand nombre premier de Mersenne (2^61 - 1)
+_PRIME = np.uint64((1 << 61) - 1)
+
+
+def _token_hash(token):
+    """Hash 32 bits stable d'un jeton"""
+    return int.from_bytes(hashlib.blake2b(token.encode('utf-8'), digest_size=4).digest(), 'big')
+
+
+def jaccard(a, b):
+    """Similarité de Jaccard de deux ensembles"""
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def job_tokens(job):
+    """Jetons d'une offre: compétences et mots du titre"""
+    tokens = {s.lower().strip() for s in (job.required_skills or []) + (job.nice_to_have_skills or []) if isinstance(s, str)}
+    tokens.update(w.lower() for w in (job.title or '').split() if len(w) > 2)
+    tokens.discard('')
+    return tokens
+
+
+def candidate_tokens(skills, keywords=None):
+    """Jetons d'un candidat: compétences et mots-clés du dernier CV"""
+    tokens = {s.lower().strip() for s in (skills or []) if isinstance(s, str)}
+    tokens.update(k.lower().strip() for k in (keywords or []) if isinstance(k, str))
+    tokens.discard('')
+    return tokens
+
+
+class MinHasher:
+    """Calcul vectorisé des signatures MinHash (hachage universel a*h+b mod p)"""
+
+    def __init__(self, num_perm=NUM_PERM, seed=1):
+        rng = np.random.RandomState(seed)
+        self.num_perm = num_perm
+        self.a = rng.randint(1, 1 << 32, size=num_perm, dtype=np.uint64)
+        self.b = rng.randint(0, 1 << 32, size=num_perm, dtype=np.uint64)
+
+    def signature(self, tokens):
+        """Signature d'un ensemble de jetons (None si vide)"""
+        if not tokens:
+            return None
+        hashes = np.fromiter((_token_hash(t) for t in tokens), dtype=np.uint64, count=len(tokens))
+        values = (np.outer(hashes, self.a) + self.b) % _PRIME
+        return values.min(axis=0)
+
+    def bands(self, signature):
+        """
+        Seaux LSH d'une signature
+
+        Returns:
+            list: [(bande, seau)] avec un seau entier signé 64 bits
+        """
+        buckets = []
+        for band in range(BANDS):
+            chunk = signature[band * ROWS:(band + 1) * ROWS].tobytes()
+            digest = hashlib.blake2b(bytes([band]) + chunk, digest_size=8).digest()
+            buckets.append((band, int.from_bytes(digest, 'big', signed=True)))
+        return buckets
+
+
+class LSHIndex:
+    """Index LSH en mémoire (benchmark et traitements hors base)"""
+
+    def __init__(self, hasher=None):
+        self.hasher = hasher or MinHasher()
+        self.buckets = defaultdict(set)
+        self.tokens = {}
+
+    def add(self, entity_id, tokens):
+        """Indexer un ensemble de jetons"""
+        signature = self.hasher.signature(tokens)
+        if signature is None:
+            return
+        self.tokens[entity_id] = tokens
+        for key in self.hasher.bands(signature):
+            self.buckets[key].add(entity_id)
+
+    def query(self, tokens, limit=10, exclude=None, max_candidates=200):
+        """Entités les plus proches (Jaccard exact sur les candidats LSH)"""
+        signature = self.hasher.signature(tokens)
+        if signature is None:
+            return []
+        hits = defaultdict(int)
+        for key in self.hasher.bands(signature):
+            for entity_id in self.buckets.get(key, ()):
+                if entity_id != exclude:
+                    hits[entity_id] += 1
+        candidates = sorted(hits, key=hits.get, reverse=True)[:max_candidates]
+        ranked = sorted(((jaccard(tokens, self.tokens[e]), e) for e in candidates), reverse=True)
+        return [(entity_id, score) for score, entity_id in ranked[:limit] if score > 0]
+
+
+# Instance partagée (mêmes permutations dans tous les processus)
+minhasher = MinHasher()
@@ -0,0 +1,81 @@
+"""
+================================================================
+Classement Top-K - BaraCorrespondance AI
+================================================================
+Sélection des K meilleurs résultats par tas borné et élagage par
+borne supérieure du score pondéré (critère par critère)
+"""
+
+import heapq
+
+# Tolérance sur l'arrondi du score global (arrondi à 0.1)
+SCORE_MARGIN = 0.05
+
+
+def remaining_weights(weights, order):
+    """
+    Poids cumulé des critères restant à calculer après chaque critère
+
+    Args:
+        weights: {critère: poids}
+        order: Ordre de calcul des critères
+
+    Returns:
+        dict: {critère: somme des poids des critères suivants}
+    """
+    remaining = {}
+    total = 0.0
+    for criterion in reversed(order):
+        remaining[criterion] = total
+        total += weights[criterion]
+    return remaining
+
+
+def can_reach(partial, remaining_weight, floor, max_score=100):
+    """Le score partiel peut-il encore atteindre le plancher ?"""
+    if floor is None:
+        return True
+    return partial + remaining_weight * max_score >= floor - SCORE_MARGIN
+
+
+class TopK:
+    """
+    Conserve les K meilleurs éléments au-dessus d'un score minimum
+
+    À score égal, l'ordre d'insertion est conservé (comme un tri stable).
+    """
+
+    def __init__(self, k, min_score=None):
+        self.k = k
+        self.min_score = min_score
+        self._heap = []
+        self._seq = 0
+
+    @property
+    def floor(self):
+        """Score à atteindre pour entrer dans le classement"""
+        if self.k and len(self._heap) >= self.k:
+            kth = self._heap[0][0]
+            return kth if self.min_score is None else max(kth, self.min_score)
+        return self.min_score
+
+    def push(self, score, item):
+        """Proposer un élément; retourne True s'il entre dans le classement"""
+        if not self.k or (self.min_score is not None and score < self.min_score):
+            return False
+        self._seq += 1
+        entry = (score, -self._seq, item)
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, entry)
+            return True
+        if entry[:2] > self._heap[0][:2]:
+            heapq.heapreplace(self._heap, entry)
+            return True
+        return False
+
+    def __len__(self):
+        return len(self._heap)
+
+    def results(self):
+        """Éléments retenus, par score décroissant"""
+        return [(score, item) for score, _, item in sorted(self._heap, key=lambda e: e[:2], reverse=True)]
@@ -0,0 +1,115 @@
+"""
+================================================================
+Coût du démarrage - BaraCorrespondance AI
+================================================================
+Mesures faites dans un interpréteur neuf (sous-processus), seule
+façon d'observer les imports réellement payés par un worker:
+- profile_imports(): coût par module de create_app() (python -X importtime)
+- measure_startup(): durée de create_app() et dépendances lourdes
+  chargées alors qu'elles devraient être différées (DEFERRED_MODULES)
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+# Dépendances importées au premier usage seulement (voir app.utils.lazy)
+DEFERRED_MODULES = (
+    'reportlab',
+    'openai',
+    'google.generativeai',
+    'sklearn',
+    'scipy',
+    'boto3',
+    'pdfplumber',
+    'PyPDF2',
+    'docx',
+    'PIL',
+)
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+_MEASURE_SNIPPET = """
+import json, sys, time
+started = time.perf_counter()
+from app import create_app
+create_app({config!r})
+elapsed = time.perf_counter() - started
+print(json.dumps({{
+    'seconds': elapsed,
+    'modules': len(sys.modules),
+    'deferred_loaded': [name for name in {deferred!r} if name in sys.modules]
+}}))
+"""
+
+
+def _run(args):
+    """Lancer un interpréteur neuf depuis le dossier backend"""
+    return subprocess.run(
+        [sys.executable] + args,
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+        check=True
+    )
+
+
+def profile_imports(config_name=None, limit=25, by_package=False):
+    """
+    Coût d'import de chaque module chargé par create_app()
+
+    Args:
+        config_name: Configuration passée à create_app
+        limit: Nombre de lignes retournées
+        by_package: Regrouper le temps propre par paquet racine
+
+    Returns:
+        dict: {'total_ms', 'modules': [{'name', 'self_ms', 'cumulative_ms'}]}
+    """
+    snippet = f"from app import create_app; create_app({config_name!r})"
+    result = _run(['-X', 'importtime', '-c', snippet])
+
+    rows = []
+    for line in result.stderr.splitlines():
+        # "import time:  self [us] | cumulative | imported package"
+        if not line.startswith('import time:'):
+            continue
+        parts = line[len('import time:'):].split('|')
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue
+        rows.append((parts[2].strip(), int(parts[0]), int(parts[1])))
+
+    total_us = sum(self_us for _, self_us, _ in rows)
+    if by_package:
+        packages = {}
+        for name, self_us, _ in rows:
+            root = name.split('.')[0]
+            packages[root] = packages.get(root, 0) + self_us
+        rows = [(name, self_us, self_us) for name, self_us in packages.items()]
+
+    rows.sort(key=lambda row: row[2], reverse=True)
+    return {
+        'total_ms': round(total_us / 1000, 1),
+        'modules': [
+            {'name': name, 'self_ms': round(self_us / 1000, 1), 'cumulative_ms': round(cumulative_us / 1000, 1)}
+            for name, self_us, cumulative_us in rows[:limit]
+        ]
+    }
+
+
+def measure_startup(config_name=None, runs=3):
+    """
+    Durée de create_app() dans un interpréteur neuf (meilleure de N mesures)
+
+    Returns:
+        dict: {'ms', 'modules', 'deferred_loaded'}
+    """
+    snippet = _MEASURE_SNIPPET.format(config=config_name, deferred=DEFERRED_MODULES)
+    measures = [json.loads(_run(['-c', snippet]).stdout.strip().splitlines()[-1]) for _ in range(max(1, runs))]
+    best = min(measures, key=lambda measure: measure['seconds'])
+    return {
+        'ms': round(best['seconds'] * 1000, 1),
+        'modules': best['modules'],
+        'deferred_loaded': sorted({name for measure in measures for name in measure['deferred_loaded']})
+    }
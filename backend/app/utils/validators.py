@@ -122,6 +122,22 @@ def allowed_image_file(filename):
     return ext in ALLOWED_IMAGE_EXTENSIONS
 
 
+def file_extension(filename):
+    """
+    Extension d'un nom de fichier (avec le point, en minuscules)
+    
+    Args:
+        filename: Nom du fichier
+        
+    Returns:
+        str: Extension ('.pdf') ou chaîne vide
+    """
+    if not filename or '.' not in filename:
+        return ''
+    
+    return '.' + filename.rsplit('.', 1)[1].lower()
+
+
 def generate_unique_filename(original_filename, prefix=''):
     """
     Générer un nom de fichier unique
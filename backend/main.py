@@ -8,10 +8,15 @@ Usage:
     
 Pour production:
     gunicorn -w 4 -b 0.0.0.0:5000 main:app
+    
+Temps réel (service séparé, SOCKETIO_MESSAGE_QUEUE partagée):
+    gunicorn -w 1 --threads 100 -b 0.0.0.0:5001 main:app
 ================================================================
 """
 
-from app import create_app, db
+import click
+
+from app import create_app, db, socketio
 
 app = create_app()
 
@@ -104,6 +109,364 @@ def seed_db():
         print("   - Candidat: candidat@test.com / Test123!")
 
 
+@app.cli.command("email-benchmark")
+@click.option('--count', default=200, help="Nombre d'emails à envoyer")
+@click.option('--to', default='benchmark@example.com', help='Destinataire')
+def email_benchmark(count, to):
+    """Mesurer le débit de la file d'envoi d'emails (serveur SMTP local conseillé)"""
+    import time
+    from app.services.email_queue import email_queue
+    from app.services.email_service import send_email, get_email_template
+
+    html = get_email_template("Benchmark", "<p>Message de test</p>")
+
+    with app.app_context():
+        started = time.monotonic()
+        for i in range(count):
+            send_email(to, f"Benchmark {i + 1}/{count}", html)
+        email_queue.join()
+        elapsed = time.monotonic() - started
+
+    stats = email_queue.stats()
+    print(f"✅ {stats['sent']}/{count} emails envoyés en {elapsed:.2f}s ({count / elapsed:.1f} emails/s)")
+    print(f"   Connexions SMTP: {stats['connections']} - Temps moyen d'envoi: {stats['avg_send_ms']} ms")
+    print(f"   Rejetés: {stats['rejected']} - Réessais: {stats['retried']} - Échecs: {stats['failed']}")
+
+
+@app.cli.command("send-weekly-digest")
+@click.option('--days', default=7, help='Période couverte (jours)')
+@click.option('--chunk-size', default=1000, help="Utilisateurs traités par tranche")
+@click.option('--include-empty', is_flag=True, help="Écrire aussi aux utilisateurs sans activité")
+@click.option('--dry-run', is_flag=True, help="Calculer sans envoyer")
+def send_weekly_digest(days, chunk_size, include_empty, dry_run):
+    """Envoyer le récapitulatif hebdomadaire à tous les utilisateurs"""
+    from app.services.email_queue import email_queue
+    from app.services.digest_service import digest_service
+
+    with app.app_context():
+        summary = digest_service.send_weekly_digests(
+            days=days,
+            chunk_size=chunk_size,
+            skip_empty=not include_empty,
+            dry_run=dry_run
+        )
+        email_queue.join()
+
+    print(f"✅ {summary['queued']} récapitulatifs {'rendus' if dry_run else 'envoyés'} "
+          f"pour {summary['users']} utilisateurs en {summary['duration_seconds']}s")
+    print(f"   Ignorés (sans activité): {summary['skipped']} - Rejetés: {summary['rejected']}")
+
+
+@app.cli.command("refresh-match-features")
+@click.option('--batch-size', default=500, help="Lignes traitées par lot")
+def refresh_match_features(batch_size):
+    """Recalculer les caractéristiques de matching périmées (offres et analyses de CV)"""
+    from app.services.maintenance_tasks import refresh_match_features as refresh
+
+    with app.app_context():
+        summary = refresh(batch_size)
+    for table, refreshed in summary.items():
+        print(f"✅ {table}: {refreshed} ligne(s) mise(s) à jour")
+
+
+@app.cli.command("build-tfidf-index")
+def build_tfidf_index():
+    """Apprendre l'index TF-IDF des offres et des CV (hors requête)"""
+    from app.services.semantic_index import semantic_index, TFIDF_AVAILABLE
+
+    if not TFIDF_AVAILABLE:
+        print("❌ scikit-learn / scipy non installés")
+        raise SystemExit(1)
+
+    with app.app_context():
+        result = semantic_index.build()
+        path = semantic_index.path
+    print(f"✅ Index TF-IDF: {result['jobs']} offres, {result['cvs']} CV, {result['terms']} termes en {result['seconds']} s")
+    print(f"   {path}")
+
+
+@app.cli.command("benchmark-tfidf")
+@click.option('--jobs', 'jobs_count', default=5000, help="Nombre d'offres synthétiques")
+@click.option('--queries', default=20, help="Nombre de CV comparés")
+def benchmark_tfidf(jobs_count, queries):
+    """Comparer la boucle par paire et le produit TF-IDF creux"""
+    from app.services.semantic_index import benchmark, TFIDF_AVAILABLE
+
+    if not TFIDF_AVAILABLE:
+        print("❌ scikit-learn / scipy non installés")
+        return
+
+    with app.app_context():
+        result = benchmark(jobs_count, queries)
+
+    print(f"📊 {result['jobs']} offres, {result['queries']} CV, {result['terms']} termes")
+    print(f"   Boucle par paire (mots-clés): {result['pair_loop_ms']} ms / CV")
+    print(f"   TF-IDF: apprentissage {result['tfidf_fit_s']} s, puis {result['tfidf_query_ms']} ms / CV")
+
+
+@app.cli.command("rebuild-similarity-index")
+def rebuild_similarity_index():
+    """Reconstruire l'index LSH des offres et candidats similaires"""
+    from app.services.similarity_service import similarity_service
+
+    with app.app_context():
+        counts = similarity_service.rebuild()
+    print(f"✅ Index reconstruit: {counts['jobs']} offres, {counts['candidates']} candidats")
+
+
+@app.cli.command("benchmark-similarity")
+@click.option('--items', default=20000, help="Nombre d'ensembles indexés")
+@click.option('--queries', default=200, help="Nombre de requêtes")
+def benchmark_similarity(items, queries):
+    """Mesurer rappel et latence de l'index LSH face au Jaccard exhaustif"""
+    from app.services.similarity_service import benchmark
+
+    result = benchmark(items, queries)
+    print(f"📊 {result['items']} ensembles, {result['queries']} requêtes (index construit en {result['build_s']} s)")
+    print(f"   Rappel@10: {result['recall']:.1%}")
+    print(f"   LSH: {result['lsh_ms']} ms - Jaccard exhaustif: {result['brute_force_ms']} ms")
+
+
+@app.cli.command("matching-shard-server")
+@click.option('--host', default='localhost')
+@click.option('--port', default=6100, help="Port d'écoute du nœud")
+def matching_shard_server(host, port):
+    """Servir les tâches du matching réparti (un nœud de MATCHING_SHARD_NODES)"""
+    from app.services.sharded_matcher import serve_shard, shard_authkey
+
+    try:
+        authkey = shard_authkey(app.config.get('MATCHING_SHARD_AUTHKEY'))
+    except ValueError as e:
+        print(f"❌ {e}")
+        raise SystemExit(1)
+
+    print(f"🧩 Nœud de matching à l'écoute sur {host}:{port}")
+    with app.app_context():
+        serve_shard((host, port), authkey)
+
+
+@app.cli.command("benchmark-sharded-matching")
+@click.option('--candidates', default=50000, help="Taille du vivier synthétique")
+@click.option('--workers', default='1,2,4', help="Nombres de processus à comparer")
+def benchmark_sharded_matching(candidates, workers):
+    """Mesurer le passage à l'échelle du matching réparti"""
+    from app.services.sharded_matcher import benchmark
+
+    result = benchmark(candidates, [int(w) for w in workers.split(',')])
+    print(f"📊 {result['candidates']} candidats, {result['cpus']} CPU")
+    print(f"   Mono-processus: {result['single_process_s']} s")
+    for run in result['runs']:
+        status = '✅ identique' if run['identical'] else '❌ DIFFÉRENT'
+        print(f"   {run['workers']} processus: {run['seconds']} s (x{run['speedup']}) {status}")
+
+
+@app.cli.command("gc-blobs")
+@click.option('--grace', default=None, type=int, help="Délai de grâce en secondes (BLOB_GC_GRACE par défaut)")
+def gc_blobs(grace):
+    """Supprimer les fichiers stockés non référencés et les uploads reprenables expirés"""
+    from app.services.maintenance_tasks import gc_blobs as collect
+
+    with app.app_context():
+        result = collect(grace)
+    print(f"🧹 {result['removed']} blob(s) supprimé(s), {result['orphans']} fichier(s) orphelin(s) effacé(s), "
+          f"{result['upload_sessions']} upload(s) expiré(s)")
+
+
+@app.cli.command("import-legacy-uploads")
+def import_legacy_uploads():
+    """Déplacer les anciens fichiers (UPLOAD_FOLDER, affiches) dans le stockage par contenu"""
+    import mimetypes
+    from app.models.blob import BLOB_REFERENCES, BLOB_URL_PREFIX
+    from app.services.blob_store import blob_store
+    from app.utils.validators import file_extension
+
+    with app.app_context():
+        imported, missing = 0, 0
+        for model, attribute in BLOB_REFERENCES:
+            column = getattr(model, attribute)
+            rows = model.query.filter(column.isnot(None), ~column.startswith(BLOB_URL_PREFIX)).all()
+            for row in rows:
+                url = getattr(row, attribute)
+                if not blob_store.is_stored(url) and not url.startswith('/'):
+                    continue  # URL externe
+                if not blob_store.exists(url):
+                    missing += 1
+                    continue
+                with blob_store.open(url) as stream:
+                    setattr(row, attribute, blob_store.put(
+                        stream, mimetypes.guess_type(url)[0], file_extension(url)
+                    ))
+                imported += 1
+            db.session.commit()
+        print(f"📦 {imported} fichier(s) importé(s), {missing} introuvable(s)")
+        print("   Les anciens fichiers sont conservés; supprimez-les après vérification.")
+
+
+@app.cli.command("generate-image-derivatives")
+@click.option('--preset', type=click.Choice(['avatar', 'logo', 'poster', 'all']), default='all')
+@click.option('--missing-only/--all-rows', default=True, help="Ignorer les images déjà déclinées")
+def generate_image_derivatives(preset, missing_only):
+    """Générer les miniatures des avatars, logos et affiches existants"""
+    from app.services.image_derivatives import IMAGE_PRESETS, image_derivatives
+
+    with app.app_context():
+        for name in (IMAGE_PRESETS if preset == 'all' else [preset]):
+            model, source_attribute, variants_attribute, _ = IMAGE_PRESETS[name]
+            query = db.session.query(model.id).filter(getattr(model, source_attribute).isnot(None))
+            if missing_only:
+                query = query.filter(getattr(model, variants_attribute).is_(None))
+            done, failed = 0, 0
+            for (entity_id,) in query.all():
+                try:
+                    image_derivatives.generate(name, entity_id)
+                    done += 1
+                except Exception as e:
+                    db.session.rollback()
+                    failed += 1
+                    print(f"   ⚠️ {name} {entity_id}: {e}")
+            print(f"🖼️ {name}: {done} image(s) déclinée(s), {failed} échec(s)")
+
+
+@app.cli.command("build-matching-snapshot")
+def build_matching_snapshot():
+    """Construire l'instantané de matching partagé par les workers"""
+    from app.services.matching_snapshot import matching_snapshot
+
+    if not matching_snapshot.enabled:
+        print("⚠️ MATCHING_SNAPSHOT_DIR non configuré (ou NumPy absent)")
+        raise SystemExit(1)
+    with app.app_context():
+        result = matching_snapshot.build()
+    print(f"🧮 Instantané {result['name']}: {result['candidates']} candidat(s), "
+          f"{result['skills']} compétence(s), {result['bytes'] / 1024:.0f} Ko en {result['seconds']} s")
+    print("   Les workers le chargent au prochain contrôle (MATCHING_SNAPSHOT_DELTA_INTERVAL).")
+
+
+@app.cli.command("replica-status")
+def replica_status():
+    """Joignabilité et retard des réplicas de lecture"""
+    from sqlalchemy import text
+    from app.utils.db_routing import replica_binds
+
+    keys = replica_binds(app)
+    if not keys:
+        print("ℹ️ Aucun réplica configuré (DATABASE_REPLICA_URLS): tout est lu sur le primaire")
+        return
+    with app.app_context():
+        for key in keys:
+            engine = db.engines[key]
+            try:
+                with engine.connect() as connection:
+                    lag = None
+                    if engine.dialect.name == 'postgresql':
+                        lag = connection.execute(text(
+                            "SELECT EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())"
+                        )).scalar()
+                    else:
+                        connection.execute(text("SELECT 1"))
+                delay = f"retard {lag:.1f} s" if lag is not None else "retard inconnu"
+                print(f"✅ {key} ({engine.url.render_as_string(hide_password=True)}): {delay}")
+            except Exception as e:
+                print(f"❌ {key}: {e}")
+
+
+@app.cli.command("list-tasks")
+def list_tasks():
+    """Lister les tâches planifiées, leurs déclencheurs et leur dernière exécution"""
+    from app.services.scheduler import scheduler
+
+    with app.app_context():
+        tasks = scheduler.describe()
+    state = "actif" if scheduler.enabled else "désactivé (SCHEDULER_ENABLED)"
+    print(f"🗓️ Planificateur {state}: {len(tasks)} tâche(s)")
+    for task in tasks:
+        last = f"{task['last_status']} le {task['last_run_at']}" if task['last_run_at'] else "jamais exécutée"
+        print(f"   {task['name']:<26} {task['trigger']:<18} [{task['scope']}] prochaine: {task['next_run_at'] or '-'} - {last}")
+        print(f"   {'':<26} {task['description']}")
+
+
+@app.cli.command("run-task")
+@click.argument('name')
+@click.option('--timeout', default=None, type=int, help="Délai max en secondes (celui de la tâche par défaut)")
+@click.option('--ignore-lease', is_flag=True, help="Exécuter même si un worker exécute déjà la tâche")
+def run_task(name, timeout, ignore_lease):
+    """Exécuter une tâche planifiée à la demande (enregistrée dans l'historique)"""
+    from app.services.email_queue import email_queue
+    from app.services.scheduler import scheduler
+
+    if name not in scheduler.tasks:
+        print(f"❌ Tâche inconnue: {name} (flask list-tasks)")
+        raise SystemExit(1)
+    with app.app_context():
+        run = scheduler.run_now(name, timeout=timeout, ignore_lease=ignore_lease)
+        email_queue.join()
+    if run is None:
+        print(f"⏳ {name} est en cours dans un worker (--ignore-lease pour forcer)")
+        raise SystemExit(1)
+
+    icon = '✅' if run['status'] == 'success' else '❌'
+    print(f"{icon} {name}: {run['status']} en {run['duration_ms']} ms")
+    if run['result'] is not None:
+        print(f"   Bilan: {run['result']}")
+    if run['error']:
+        print(f"   Erreur: {run['error']}")
+        raise SystemExit(1)
+
+
+@app.cli.command("task-history")
+@click.option('--task', 'task_name', default=None, help="Filtrer sur une tâche")
+@click.option('--limit', default=20, help="Nombre d'exécutions affichées")
+def task_history(task_name, limit):
+    """Historique des exécutions des tâches planifiées"""
+    from app.services.scheduler import scheduler
+
+    with app.app_context():
+        runs = scheduler.history(task_name, limit)
+    for run in runs:
+        icon = {'success': '✅', 'failed': '❌', 'timeout': '⏱️'}.get(run['status'], '•')
+        print(f"{icon} {run['started_at']} {run['task']:<26} {run['status']:<8} {run['duration_ms']:>8} ms "
+              f"[{run['trigger']}] {run['worker']}")
+        if run['error']:
+            print(f"   {run['error']}")
+
+
+@app.cli.command("profile-imports")
+@click.option('--limit', default=25, help="Nombre de modules affichés")
+@click.option('--by-package', is_flag=True, help="Regrouper par paquet racine")
+def profile_imports(limit, by_package):
+    """Coût d'import par module au démarrage de l'application"""
+    from app.utils.startup import profile_imports as run_profile
+
+    result = run_profile(limit=limit, by_package=by_package)
+    print(f"📊 Imports au démarrage: {result['total_ms']} ms")
+    print(f"   {'cumulé (ms)':>12} {'propre (ms)':>12}  module")
+    for module in result['modules']:
+        print(f"   {module['cumulative_ms']:>12} {module['self_ms']:>12}  {module['name']}")
+
+
+@app.cli.command("check-startup")
+@click.option('--budget', default=None, type=int, help="Durée max en ms (STARTUP_BUDGET_MS par défaut)")
+@click.option('--runs', default=3, help="Mesures (la meilleure est retenue)")
+def check_startup(budget, runs):
+    """Vérifier la durée de create_app() et l'absence d'imports lourds (CI)"""
+    from app.utils.startup import measure_startup
+
+    budget = budget or app.config['STARTUP_BUDGET_MS']
+    result = measure_startup(runs=runs)
+    print(f"⏱️ create_app(): {result['ms']} ms (budget {budget} ms), {result['modules']} modules chargés")
+
+    failed = False
+    if result['ms'] > budget:
+        print("❌ Budget de démarrage dépassé (flask profile-imports pour le détail)")
+        failed = True
+    if result['deferred_loaded']:
+        print(f"❌ Dépendances chargées au démarrage au lieu du premier usage: {', '.join(result['deferred_loaded'])}")
+        failed = True
+    if failed:
+        raise SystemExit(1)
+    print("✅ Démarrage conforme")
+
+
 @app.shell_context_processor
 def make_shell_context():
     """Contexte pour flask shell"""
@@ -127,4 +490,4 @@ if __name__ == '__main__':
     Documentation: http://localhost:5000/api/docs
     ================================================
     """)
-    app.run(host='0.0.0.0', port=5000, debug=True)
+    socketio.run(app, host='0.0.0.0', port=5000, debug=True, allow_unsafe_werkzeug=True)
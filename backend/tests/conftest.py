@@ -0,0 +1,58 @@
+"""
+================================================================
+Fixtures de test - BaraCorrespondance AI
+================================================================
+Application 'testing' (SQLite en mémoire), dossiers d'upload
+temporaires, utilisateurs et en-têtes d'authentification.
+"""
+
+import os
+import tempfile
+
+# Lu par la configuration à l'import de l'application
+os.environ.setdefault('UPLOAD_FOLDER', tempfile.mkdtemp(prefix='bara-tests-'))
+
+import pytest
+from flask_jwt_extended import create_access_token
+
+from app import create_app, db as _db
+from app.models import User, Candidate
+from app.utils.identity import identity_claims
+
+
+@pytest.fixture
+def app():
+    """Application de test avec schéma créé"""
+    app = create_app('testing')
+    with app.app_context():
+        _db.create_all()
+        yield app
+        _db.session.remove()
+        _db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def candidate(app):
+    """Candidat avec son profil"""
+    user = User(email='candidat@example.com', password='motdepasse123', role='candidate')
+    _db.session.add(user)
+    _db.session.flush()
+    profile = Candidate(user_id=user.id)
+    _db.session.add(profile)
+    _db.session.commit()
+    return profile
+
+
+
+@pytest.fixture
+def auth_headers(app):
+    """En-têtes Authorization d'un jeton d'accès, par utilisateur"""
+    def headers(user):
+        token = create_access_token(identity=str(user.id), additional_claims=identity_claims(user))
+        return {'Authorization': f'Bearer {token}'}
+    return headers
@@ -0,0 +1,178 @@
+"""
+Tests du stockage de fichiers - déduplication et références comptées
+"""
+
+import io
+import os
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import db
+from app.models.blob import Blob, blob_key
+from app.services.blob_store import BlobTooLarge, blob_store
+
+
+@pytest.fixture
+def store(app, tmp_path):
+    """Stockage local isolé dans un dossier temporaire"""
+    app.config.update(BLOB_BACKEND='local', BLOB_LOCAL_ROOT=str(tmp_path))
+    blob_store.init_app(app)
+    return blob_store
+
+
+def _blob(url):
+    db.session.expire_all()
+    return Blob.query.filter_by(hash=blob_key(url)).one()
+
+
+def _age(url, seconds=3600):
+    """Vieillir un blob au-delà du délai de grâce"""
+    blob = _blob(url)
+    blob.updated_at = datetime.utcnow() - timedelta(seconds=seconds)
+    db.session.commit()
+
+
+def test_identical_content_is_stored_once(store):
+    first = store.put(io.BytesIO(b'%PDF-1.4 cv'), 'application/pdf', '.pdf')
+    second = store.put(io.BytesIO(b'%PDF-1.4 cv'), 'application/pdf', '.PDF')
+    db.session.commit()
+
+    assert first == second
+    assert first.endswith('.pdf')
+    assert Blob.query.count() == 1
+    assert _blob(first).ref_count == 0
+    assert os.path.exists(store.backend.path(blob_key(first)))
+
+
+def test_put_rejects_oversized_stream(store):
+    with pytest.raises(BlobTooLarge):
+        store.put(io.BytesIO(b'x' * 100), max_size=10)
+    assert Blob.query.count() == 0
+    assert os.listdir(store.backend.staging) == []
+
+
+def test_references_follow_url_columns(store, candidate):
+    url = store.put(io.BytesIO(b'%PDF-1.4 cv'), 'application/pdf', '.pdf')
+    candidate.cv_url = url
+    candidate.user.avatar_url = url
+    db.session.commit()
+    assert _blob(url).ref_count == 2
+
+    other = store.put(io.BytesIO(b'%PDF-1.4 autre cv'), 'application/pdf', '.pdf')
+    candidate.cv_url = other
+    db.session.commit()
+    assert _blob(url).ref_count == 1
+    assert _blob(other).ref_count == 1
+
+    db.session.delete(candidate)
+    db.session.commit()
+    assert _blob(other).ref_count == 0
+    assert _blob(url).ref_count == 1
+
+
+def test_garbage_collection_keeps_referenced_blobs(store, candidate):
+    kept = store.put(io.BytesIO(b'%PDF-1.4 cv'), 'application/pdf', '.pdf')
+    released = store.put(io.BytesIO(b'%PDF-1.4 ancien cv'), 'application/pdf', '.pdf')
+    candidate.cv_url = kept
+    db.session.commit()
+    _age(kept)
+    _age(released)
+
+    assert store.collect_garbage(grace_seconds=60) == {'removed': 1, 'orphans': 0}
+    assert not os.path.exists(store.backend.path(blob_key(released)))
+    assert os.path.exists(store.backend.path(blob_key(kept)))
+    assert _blob(kept).ref_count == 1
+
+
+def test_garbage_collection_respects_grace_period(store):
+    url = store.put(io.BytesIO(b'%PDF-1.4 cv'), 'application/pdf', '.pdf')
+    db.session.commit()
+
+    assert store.collect_garbage(grace_seconds=60) == {'removed': 0, 'orphans': 0}
+    assert os.path.exists(store.backend.path(blob_key(url)))
+
+
+def test_garbage_collection_removes_orphan_files(store, tmp_path):
+    # Fichier publié sans ligne (transaction annulée après l'écriture)
+    source = tmp_path / 'cv.pdf'
+    source.write_bytes(b'%PDF-1.4 cv')
+    key = 'a' * 64
+    store.backend.write(key, str(source))
+    path = store.backend.path(key)
+    old = (datetime.utcnow() - timedelta(hours=1)).timestamp()
+    os.utime(path, (old, old))
+
+    assert store.collect_garbage(grace_seconds=60) == {'removed': 0, 'orphans': 1}
+    assert not os.path.exists(path)
+
+
+def test_reuse_during_garbage_collection_keeps_content(store, monkeypatch):
+    url = store.put(io.BytesIO(b'%PDF-1.4 cv'), 'application/pdf', '.pdf')
+    db.session.commit()
+    _age(url)
+
+    # Nettoyage exécuté pendant la réutilisation du même contenu
+    touch = store.backend.touch
+
+    def touch_then_collect(key):
+        touch(key)
+        store.collect_garbage(grace_seconds=60)
+
+    monkeypatch.setattr(store.backend, 'touch', touch_then_collect)
+    again = store.put(io.BytesIO(b'%PDF-1.4 cv'), 'application/pdf', '.pdf')
+    db.session.commit()
+
+    assert again == url
+    assert _blob(url) is not None
+    assert os.path.exists(store.backend.path(blob_key(url)))
+
+
+def test_content_collected_before_reuse_is_rewritten(store):
+    url = store.put(io.BytesIO(b'%PDF-1.4 cv'), 'application/pdf', '.pdf')
+    db.session.commit()
+    _age(url)
+    assert store.collect_garbage(grace_seconds=60)['removed'] == 1
+
+    assert store.put(io.BytesIO(b'%PDF-1.4 cv'), 'application/pdf', '.pdf') == url
+    db.session.commit()
+    assert _blob(url).ref_count == 0
+    with open(store.backend.path(blob_key(url)), 'rb') as f:
+        assert f.read() == b'%PDF-1.4 cv'
+
+
+def test_s3_backend(app, monkeypatch):
+    moto = pytest.importorskip('moto')
+    monkeypatch.setenv('AWS_ACCESS_KEY_ID', 'testing')
+    monkeypatch.setenv('AWS_SECRET_ACCESS_KEY', 'testing')
+
+    with moto.mock_aws():
+        app.config.update(BLOB_BACKEND='s3', BLOB_S3_BUCKET='bara-blobs', BLOB_S3_REGION='us-east-1')
+        blob_store.init_app(app)
+        blob_store.backend.client.create_bucket(Bucket='bara-blobs')
+
+        url = blob_store.put(io.BytesIO(b'%PDF-1.4 cv'), 'application/pdf', '.pdf')
+        again = blob_store.put(io.BytesIO(b'%PDF-1.4 cv'), 'application/pdf', '.pdf')
+        db.session.commit()
+        key = blob_key(url)
+        assert again == url
+        assert blob_store.backend.exists(key)
+        assert blob_store.backend.open(key).read() == b'%PDF-1.4 cv'
+
+        _age(url)
+        assert blob_store.collect_garbage(grace_seconds=60) == {'removed': 1, 'orphans': 0}
+        assert not blob_store.backend.exists(key)
+
+
+@pytest.mark.parametrize('offload', ['x-accel', 'x-sendfile'])
+def test_offloaded_send_checks_file_exists(store, app, offload):
+    app.config['UPLOADS_OFFLOAD'] = offload
+    os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+    with open(os.path.join(app.config['UPLOAD_FOLDER'], 'affiche.png'), 'wb') as f:
+        f.write(b'\x89PNG')
+
+    with app.test_request_context():
+        assert store.send('/uploads/absente.png') is None
+        response = store.send('/uploads/affiche.png')
+    assert response.status_code == 200
+    assert response.get_data() == b''
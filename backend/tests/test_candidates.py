@@ -0,0 +1,68 @@
+"""
+Tests des routes candidat - retrait d'une candidature
+"""
+
+import pytest
+
+from app import db
+from app.models import Candidate, Company, Job, JobApplication, User
+
+
+@pytest.fixture
+def job(app):
+    """Offre publiée avec une candidature déjà comptée"""
+    user = User(email='recruteur@example.com', password='motdepasse123', role='company')
+    db.session.add(user)
+    db.session.flush()
+    company = Company(user_id=user.id, name='Bara SARL')
+    db.session.add(company)
+    db.session.flush()
+    job = Job(company_id=company.id, title='Développeur Python', description='Backend Flask', applications_count=1)
+    db.session.add(job)
+    db.session.commit()
+    return job
+
+
+def _apply(candidate, job, status='pending'):
+    application = JobApplication(job_id=job.id, candidate_id=candidate.id, status=status)
+    db.session.add(application)
+    db.session.commit()
+    return application
+
+
+def test_withdraw_application(client, auth_headers, candidate, job):
+    application = _apply(candidate, job)
+    application_id = application.id
+
+    response = client.post(
+        f'/api/candidates/applications/{application_id}/withdraw', headers=auth_headers(candidate.user)
+    )
+    assert response.status_code == 200
+    db.session.expire_all()
+    assert db.session.get(JobApplication, application_id) is None
+    assert db.session.get(Job, job.id).applications_count == 0
+
+
+def test_withdraw_decided_application_is_refused(client, auth_headers, candidate, job):
+    application = _apply(candidate, job, status='hired')
+
+    response = client.post(
+        f'/api/candidates/applications/{application.id}/withdraw', headers=auth_headers(candidate.user)
+    )
+    assert response.status_code == 400
+    db.session.expire_all()
+    assert db.session.get(Job, job.id).applications_count == 1
+
+
+def test_withdraw_other_candidate_application(client, auth_headers, candidate, job):
+    application = _apply(candidate, job)
+    other = User(email='autre@example.com', password='motdepasse123', role='candidate')
+    db.session.add(other)
+    db.session.flush()
+    db.session.add(Candidate(user_id=other.id))
+    db.session.commit()
+
+    response = client.post(
+        f'/api/candidates/applications/{application.id}/withdraw', headers=auth_headers(other)
+    )
+    assert response.status_code == 404
@@ -0,0 +1,38 @@
+"""
+Tests des déclinaisons d'images - tailles et limite de pixels
+"""
+
+from io import BytesIO
+
+import pytest
+from PIL import Image
+
+from app.services.image_derivatives import render_variants
+
+
+def _png(width, height):
+    buffer = BytesIO()
+    Image.new('RGB', (width, height), 'red').save(buffer, 'PNG')
+    buffer.seek(0)
+    return buffer
+
+
+def test_variants_fit_their_box():
+    variants = render_variants(_png(400, 200), {'thumb': (96, 96), 'medium': (256, 256)})
+
+    with Image.open(BytesIO(variants['thumb'][0])) as thumb:
+        assert thumb.size == (96, 48)
+    with Image.open(BytesIO(variants['medium'][0])) as medium:
+        assert medium.size == (256, 128)
+
+
+def test_max_pixels_is_enforced_without_changing_pillow_limit():
+    default = Image.MAX_IMAGE_PIXELS
+
+    # Au-dessus de la limite mais sous le double (seuil d'erreur de Pillow)
+    with pytest.raises(Image.DecompressionBombError):
+        render_variants(_png(150, 100), {'thumb': (96, 96)}, max_pixels=10_000)
+    assert Image.MAX_IMAGE_PIXELS == default
+
+    assert render_variants(_png(100, 100), {'thumb': (96, 96)}, max_pixels=10_000)
+    assert Image.MAX_IMAGE_PIXELS == default
@@ -0,0 +1,35 @@
+"""
+Tests des routes offres - offres similaires
+"""
+
+import pytest
+
+from app import db
+from app.models import Company, Job, User
+
+
+@pytest.fixture
+def jobs(app):
+    """Offres proches (mêmes compétences, même intitulé)"""
+    user = User(email='recruteur@example.com', password='motdepasse123', role='company')
+    db.session.add(user)
+    db.session.flush()
+    company = Company(user_id=user.id, name='Bara SARL')
+    db.session.add(company)
+    db.session.flush()
+    jobs = [
+        Job(company_id=company.id, title='Développeur Python', description='Backend Flask',
+            required_skills=['Python', 'Flask', 'SQL', 'Docker'])
+        for _ in range(4)
+    ]
+    db.session.add_all(jobs)
+    db.session.commit()
+    return jobs
+
+
+@pytest.mark.parametrize('limit, expected', [(-1, 1), (0, 1), (2, 2), (100, 3)])
+def test_similar_jobs_limit_is_clamped(client, jobs, limit, expected):
+    response = client.get(f'/api/jobs/{jobs[0].id}/similar?limit={limit}')
+
+    assert response.status_code == 200
+    assert len(response.get_json()['data']['jobs']) == expected
@@ -0,0 +1,48 @@
+"""
+Tests du matching en lot - intersections de compétences et blocs bornés
+"""
+
+import random
+
+import numpy as np
+
+from app.services.matching_service import MatchingService
+from app.services.skill_vocabulary import skill_vocabulary
+
+
+def _bitsets(count, width, skills, seed):
+    rng = random.Random(seed)
+    return [sum(1 << rng.randrange(width) for _ in range(rng.randrange(skills))) for _ in range(count)]
+
+
+def _expected(jobs, candidates, mask=-1):
+    return np.array([[(job & candidate & mask).bit_count() for candidate in candidates] for job in jobs], dtype=float)
+
+
+def test_overlap_matches_bit_count():
+    jobs = _bitsets(12, 5000, 10, seed=1) + [0]
+    candidates = _bitsets(40, 5000, 40, seed=2)
+
+    assert (MatchingService._overlap(jobs, candidates) == _expected(jobs, candidates)).all()
+
+
+def test_overlap_with_stacked_snapshot_bitsets():
+    jobs = _bitsets(8, 1000, 10, seed=3)
+    candidates = _bitsets(30, 320, 20, seed=4)
+    stacked = skill_vocabulary.to_array(candidates, 5)
+
+    # Compétences des offres au-delà de la largeur de l'instantané: jamais en commun
+    expected = _expected(jobs, candidates, mask=(1 << 320) - 1)
+    assert (MatchingService._overlap(jobs, stacked) == expected).all()
+
+
+def test_chunk_size_shrinks_with_job_count():
+    service = MatchingService()
+
+    assert service._chunk_size(1) == service.MATRIX_CHUNK_SIZE
+    for job_count in (500, 5000, 10 ** 6):
+        chunk = service._chunk_size(job_count)
+        assert 1 <= chunk < service.MATRIX_CHUNK_SIZE
+        assert job_count * chunk * 8 * service.MATRIX_BLOCK_ARRAYS <= max(
+            service.MATRIX_BLOCK_BYTES, job_count * 8 * service.MATRIX_BLOCK_ARRAYS
+        )
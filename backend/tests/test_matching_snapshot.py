@@ -0,0 +1,80 @@
+"""
+Tests de l'instantané de matching - journal des suppressions
+"""
+
+import pytest
+
+from app import db
+from app.models import Candidate, CandidateRemoval, Company, Job, User
+from app.services.matching_service import matching_service
+from app.services.matching_snapshot import matching_snapshot
+
+SKILLS = (
+    ['Python', 'Flask', 'SQL'],
+    ['Python', 'Flask'],
+    ['Python'],
+    ['Java'],
+)
+
+
+@pytest.fixture
+def pool(app):
+    """Offre et candidats de compétences décroissantes (par ordre de création)"""
+    user = User(email='recruteur@example.com', password='motdepasse123', role='company')
+    db.session.add(user)
+    db.session.flush()
+    company = Company(user_id=user.id, name='Bara SARL')
+    db.session.add(company)
+    db.session.flush()
+    job = Job(company_id=company.id, title='Développeur Python', description='Backend Flask',
+              required_skills=['Python', 'Flask', 'SQL'])
+    db.session.add(job)
+
+    candidates = []
+    for index, skills in enumerate(SKILLS):
+        user = User(email=f'candidat{index}@example.com', password='motdepasse123', role='candidate')
+        db.session.add(user)
+        db.session.flush()
+        candidate = Candidate(user_id=user.id, skills=skills)
+        db.session.add(candidate)
+        candidates.append(candidate)
+    db.session.commit()
+    return job, candidates
+
+
+@pytest.fixture
+def snapshot(app, tmp_path, pool):
+    """Instantané construit sur le vivier, journal relu à chaque vue"""
+    app.config['MATCHING_SNAPSHOT_DIR'] = str(tmp_path)
+    matching_snapshot._snapshot = None
+    matching_snapshot.init_app(app)
+    matching_snapshot.build()
+    matching_snapshot.delta_interval = 0
+    yield matching_snapshot
+    matching_snapshot.folder = None
+    matching_snapshot._snapshot = None
+
+
+def _matched_ids(job, limit):
+    return [match['id'] for match in matching_service.get_matched_candidates_for_jobs([job], limit=limit, min_score=0)[job.id]]
+
+
+def test_deleted_candidate_is_masked(snapshot, pool):
+    job, candidates = pool
+    removed_id = candidates[0].id
+    db.session.delete(candidates[0])
+    db.session.commit()
+
+    assert db.session.get(CandidateRemoval, removed_id) is not None
+    view = snapshot.view()
+    assert view.stale[list(view.ids).index(removed_id)]
+    assert _matched_ids(job, limit=2) == [candidates[1].id, candidates[2].id]
+
+
+def test_unjournaled_removal_refills_shortlist(snapshot, pool):
+    job, candidates = pool
+    # Suppression en masse: ni updated_at ni after_delete
+    Candidate.query.filter(Candidate.id == candidates[0].id).delete(synchronize_session=False)
+    db.session.commit()
+
+    assert _matched_ids(job, limit=2) == [candidates[1].id, candidates[2].id]
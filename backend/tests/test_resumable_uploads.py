@@ -0,0 +1,135 @@
+"""
+Tests des uploads reprenables - décalages, signatures et empreintes
+"""
+
+import hashlib
+import io
+
+import pytest
+
+from app import db
+from app.models import UploadSession
+from app.models.blob import blob_key
+from app.services.blob_store import blob_store
+from app.services.resumable_uploads import UploadSessionError, resumable_uploads
+
+CONTENT = b'%PDF-1.4\n' + b'contenu du cv ' * 100
+DIGEST = hashlib.sha256(CONTENT).hexdigest()
+
+
+@pytest.fixture
+def uploads(app, tmp_path):
+    """Sessions et blobs dans des dossiers temporaires"""
+    app.config.update(
+        BLOB_BACKEND='local',
+        BLOB_LOCAL_ROOT=str(tmp_path / 'blobs'),
+        UPLOAD_SESSIONS_FOLDER=str(tmp_path / 'sessions')
+    )
+    blob_store.init_app(app)
+    resumable_uploads.init_app(app)
+    resumable_uploads._hashers.clear()
+    return resumable_uploads
+
+
+def _send(uploads, session, chunks):
+    offset = 0
+    for chunk in chunks:
+        offset = uploads.append(session, offset, io.BytesIO(chunk))
+    return offset
+
+
+def test_chunks_are_assembled_and_hashed(uploads, candidate):
+    session = uploads.create(candidate.user_id, 'cv.pdf', len(CONTENT), sha256=DIGEST)
+
+    assert _send(uploads, session, [CONTENT[:3], CONTENT[3:500], CONTENT[500:]]) == len(CONTENT)
+    url, path = uploads.complete(session)
+    assert blob_key(url) == DIGEST
+    assert url.endswith('.pdf')
+    with open(path, 'rb') as received:
+        assert received.read() == CONTENT
+
+
+def test_hash_is_rebuilt_without_cached_state(uploads, candidate):
+    session = uploads.create(candidate.user_id, 'cv.pdf', len(CONTENT), sha256=DIGEST)
+    uploads.append(session, 0, io.BytesIO(CONTENT[:600]))
+
+    # Autre worker: hachage relu depuis le fichier partiel
+    uploads._hashers.clear()
+    uploads.append(session, 600, io.BytesIO(CONTENT[600:]))
+    url, _ = uploads.complete(session)
+    assert blob_key(url) == DIGEST
+
+
+def test_wrong_offset_returns_confirmed_offset(uploads, candidate):
+    session = uploads.create(candidate.user_id, 'cv.pdf', len(CONTENT))
+    uploads.append(session, 0, io.BytesIO(CONTENT[:100]))
+
+    with pytest.raises(UploadSessionError) as error:
+        uploads.append(session, 50, io.BytesIO(CONTENT[50:150]))
+    assert error.value.status == 409
+    assert error.value.offset == 100
+
+    # Reprise au décalage confirmé
+    assert uploads.append(session, 100, io.BytesIO(CONTENT[100:])) == len(CONTENT)
+
+
+def test_bad_signature_is_rejected(uploads, candidate):
+    session = uploads.create(candidate.user_id, 'cv.pdf', len(CONTENT))
+
+    with pytest.raises(UploadSessionError) as error:
+        uploads.append(session, 0, io.BytesIO(b'MZ' + CONTENT[2:]))
+    assert error.value.status == 415
+    db.session.refresh(session)
+    assert session.received_size == 0
+
+
+def test_signature_split_across_chunks_is_checked(uploads, candidate):
+    session = uploads.create(candidate.user_id, 'cv.pdf', len(CONTENT))
+    assert uploads.append(session, 0, io.BytesIO(b'%P')) == 2
+
+    with pytest.raises(UploadSessionError) as error:
+        uploads.append(session, 2, io.BytesIO(b'XX' + CONTENT[4:]))
+    assert error.value.status == 415
+    assert error.value.offset == 2
+    assert uploads.append(session, 2, io.BytesIO(CONTENT[2:])) == len(CONTENT)
+
+
+def test_chunk_beyond_announced_size(uploads, candidate):
+    session = uploads.create(candidate.user_id, 'cv.pdf', 100)
+
+    with pytest.raises(UploadSessionError) as error:
+        uploads.append(session, 0, io.BytesIO(CONTENT[:200]))
+    assert error.value.status == 413
+    assert error.value.offset == 0
+
+
+def test_digest_mismatch_discards_session(uploads, candidate):
+    session = uploads.create(candidate.user_id, 'cv.pdf', len(CONTENT), sha256='0' * 64)
+    session_id = session.id
+    _send(uploads, session, [CONTENT])
+
+    with pytest.raises(UploadSessionError) as error:
+        uploads.complete(session)
+    assert error.value.status == 422
+    assert db.session.get(UploadSession, session_id) is None
+
+
+def test_incomplete_upload_cannot_complete(uploads, candidate):
+    session = uploads.create(candidate.user_id, 'cv.pdf', len(CONTENT))
+    uploads.append(session, 0, io.BytesIO(CONTENT[:100]))
+
+    with pytest.raises(UploadSessionError) as error:
+        uploads.complete(session)
+    assert error.value.status == 409
+    assert error.value.offset == 100
+
+
+def test_concurrent_writer_is_refused(uploads, candidate):
+    session = uploads.create(candidate.user_id, 'cv.pdf', len(CONTENT))
+
+    with uploads._writer(session):
+        with pytest.raises(UploadSessionError) as error:
+            uploads.append(session, 0, io.BytesIO(CONTENT))
+    assert error.value.status == 409
+    assert error.value.offset == 0
+    assert uploads.append(session, 0, io.BytesIO(CONTENT)) == len(CONTENT)
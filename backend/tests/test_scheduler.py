@@ -0,0 +1,114 @@
+"""
+Tests du planificateur - baux des tâches partagées
+"""
+
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import db
+from app.models.scheduled_task import ScheduledTask
+from app.services.scheduler import TaskScheduler
+
+
+@pytest.fixture
+def scheduler(app):
+    """Planificateur isolé (sans les tâches de maintenance)"""
+    scheduler = TaskScheduler()
+    scheduler._app = app
+    return scheduler
+
+
+def _register(scheduler, name, func, **options):
+    """Enregistrer une tâche et résoudre son déclencheur"""
+    scheduler.task(name, **options)(func)
+    task = scheduler.tasks[name]
+    task.resolve({})
+    return task
+
+
+def _as_worker(monkeypatch, worker):
+    monkeypatch.setattr(TaskScheduler, 'worker_id', staticmethod(lambda: worker))
+
+
+def _lease(name):
+    db.session.expire_all()
+    return db.session.get(ScheduledTask, name)
+
+
+def test_second_worker_cannot_claim_held_lease(scheduler, monkeypatch):
+    task = _register(scheduler, 'cleanup', lambda: None, every=60)
+    now = datetime.utcnow()
+    scheduler._create_row(task, now)
+
+    _as_worker(monkeypatch, 'host-a:1')
+    assert scheduler._claim(task, now)
+    _as_worker(monkeypatch, 'host-b:2')
+    assert not scheduler._claim(task, now)
+    assert _lease('cleanup').locked_by == 'host-a:1'
+
+
+def test_expired_lease_is_taken_over(scheduler, monkeypatch):
+    task = _register(scheduler, 'cleanup', lambda: None, every=60, timeout=10)
+    now = datetime.utcnow()
+    scheduler._create_row(task, now)
+
+    _as_worker(monkeypatch, 'host-a:1')
+    assert scheduler._claim(task, now)
+    _as_worker(monkeypatch, 'host-b:2')
+    later = now + timedelta(seconds=task.timeout + 61)
+    assert scheduler._claim(task, later)
+    assert _lease('cleanup').locked_by == 'host-b:2'
+
+
+def test_claim_waits_for_next_run(scheduler):
+    task = _register(scheduler, 'cleanup', lambda: None, every=60)
+    now = datetime.utcnow()
+    scheduler._create_row(task, now + timedelta(minutes=5))
+
+    assert not scheduler._claim(task, now)
+    assert scheduler._claim(task, now, due_only=False)
+
+
+def test_run_now_skips_task_leased_elsewhere(scheduler, monkeypatch):
+    calls = []
+    task = _register(scheduler, 'cleanup', lambda: calls.append(1), every=60)
+    now = datetime.utcnow()
+    scheduler._create_row(task, now)
+
+    _as_worker(monkeypatch, 'host-a:1')
+    assert scheduler._claim(task, now)
+    _as_worker(monkeypatch, 'host-b:2')
+    assert scheduler.run_now('cleanup') is None
+    assert calls == []
+
+    run = scheduler.run_now('cleanup', ignore_lease=True)
+    assert run['status'] == 'success'
+    assert calls == [1]
+
+
+def test_run_now_releases_lease(scheduler):
+    _register(scheduler, 'cleanup', lambda: {'deleted': 3}, every=60)
+
+    run = scheduler.run_now('cleanup')
+    assert run['status'] == 'success'
+    assert run['result'] == {'deleted': 3}
+    lease = _lease('cleanup')
+    assert lease.locked_by is None
+    assert lease.last_status == 'success'
+
+
+def test_timed_out_task_keeps_lease(scheduler):
+    release = threading.Event()
+    _register(scheduler, 'slow', lambda: release.wait(5), every=60)
+
+    try:
+        run = scheduler.run_now('slow', timeout=0.1)
+        assert run['status'] == 'timeout'
+        lease = _lease('slow')
+        assert lease.locked_by == scheduler.worker_id()
+        assert lease.locked_until > datetime.utcnow()
+        assert lease.last_status == 'timeout'
+    finally:
+        release.set()
@@ -0,0 +1,74 @@
+"""
+Tests du vocabulaire de compétences - compactage des identifiants
+"""
+
+from app.services.skill_vocabulary import SkillVocabulary
+
+
+def _vocabulary(max_ids):
+    vocabulary = SkillVocabulary()
+    vocabulary._max_ids = max_ids
+    vocabulary._check_interval = 1
+    return vocabulary
+
+
+def _due(vocabulary):
+    """Échéance de la prochaine vérification atteinte"""
+    vocabulary._checked_at = 0.0
+
+
+def test_compaction_keeps_recent_skills_frequent_first():
+    vocabulary = _vocabulary(max_ids=4)
+    for index in range(10):
+        vocabulary.bits([f'outil {index}'])
+    for _ in range(3):
+        vocabulary.bits(['Python', 'JS'])
+        vocabulary._clear_cache()
+    vocabulary.bits(['Python'])
+
+    assert vocabulary.compact()
+    assert vocabulary.stats()['skills'] == 12
+    assert vocabulary.bits(['python']) == 1 << 0
+    assert vocabulary.names(vocabulary.bits(['javascript'])) == ['javascript']
+
+    # Seules les compétences vues depuis le compactage sont gardées
+    vocabulary.bits(['Python', 'Flask'])
+    assert vocabulary.compact()
+    assert sorted(vocabulary.names((1 << vocabulary.stats()['skills']) - 1)) == ['flask', 'javascript', 'python']
+
+
+def test_vocabulary_beyond_limit_is_compacted_on_check():
+    vocabulary = _vocabulary(max_ids=4)
+    vocabulary.compact()
+    for index in range(10):
+        vocabulary.bits([f'outil {index}'])
+    vocabulary.compact()
+    vocabulary.bits(['Python'])
+
+    _due(vocabulary)
+    vocabulary.bits(['Flask'])
+    assert vocabulary.stats()['skills'] == 2
+
+
+def test_pinned_bitsets_stay_consistent():
+    vocabulary = _vocabulary(max_ids=1)
+    for index in range(10):
+        vocabulary.bits([f'outil {index}'])
+
+    with vocabulary.pinned():
+        job = vocabulary.bits(['Python', 'Flask'])
+        assert not vocabulary.compact()
+        _due(vocabulary)
+        candidate = vocabulary.bits(['Flask', 'Django'])
+        assert vocabulary.names(job & candidate) == ['flask']
+    assert vocabulary.compact()
+
+
+def test_cache_is_bounded_in_bytes(monkeypatch):
+    monkeypatch.setattr('app.services.skill_vocabulary.MAX_CACHED_BITSET_BYTES', 2000)
+    vocabulary = _vocabulary(max_ids=10 ** 6)
+
+    for index in range(100):
+        vocabulary.bits([f'outil {index}', 'python'])
+        assert vocabulary.stats()['cache_bytes'] <= 2000
+    assert 0 < vocabulary.stats()['cached_bitsets'] < 100
@@ -0,0 +1,17 @@
+"""
+Démarrage: durée de create_app() et dépendances lourdes différées
+(mesuré dans un interpréteur neuf, comme flask check-startup)
+"""
+
+from app.config import Config
+from app.utils.startup import measure_startup
+
+
+def test_create_app_within_budget_without_heavy_imports():
+    result = measure_startup('testing', runs=1)
+
+    assert result['deferred_loaded'] == [], (
+        f"Chargés au démarrage au lieu du premier usage: {result['deferred_loaded']}"
+    )
+    assert result['ms'] <= Config.STARTUP_BUDGET_MS
+